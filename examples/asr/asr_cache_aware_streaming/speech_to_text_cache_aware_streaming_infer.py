@@ -43,6 +43,21 @@ python speech_to_text_streaming_infer.py \
 You may drop the '--debug_mode' and '--compare_vs_offline' to speedup the streaming evaluation.
 If compare_vs_offline is not used, then significantly larger batch_size can be used.
 
+## To simulate serving concurrent live streams on a manifest file:
+
+python speech_to_text_streaming_infer.py \
+    --asr_model=asr_model.nemo \
+    --manifest_file=manifest_file.json \
+    --simulate_live_streams \
+    --max_streams=64 \
+    --join_interval=2 \
+    --use_amp
+
+Each audio file is treated as a live stream which receives the features of one more chunk at each step.
+A new stream joins every join_interval steps while there are less than max_streams active streams, and streams leave
+as soon as their audio is processed. At each step the chunks of all the active streams are processed in batches by
+CacheAwareStreamingManager, which keeps the encoder caches of each stream in its own slot.
+
 ## Evaluate a model trained with full context for offline mode
 
 You may try the cache-aware streaming with a model trained with full context in offline mode.
@@ -82,7 +97,11 @@ from omegaconf import open_dict
 import nemo.collections.asr as nemo_asr
 from nemo.collections.asr.metrics.wer import word_error_rate
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
-from nemo.collections.asr.parts.utils.streaming_utils import CacheAwareStreamingAudioBuffer
+from nemo.collections.asr.parts.utils.audio_utils import get_samples
+from nemo.collections.asr.parts.utils.streaming_utils import (
+    CacheAwareStreamingAudioBuffer,
+    CacheAwareStreamingManager,
+)
 from nemo.utils import logging
 
 
@@ -187,6 +206,64 @@ def perform_streaming(asr_model, streaming_buffer, compare_vs_offline=False, deb
     return final_streaming_tran, final_offline_tran
 
 
+def perform_live_streaming(
+    asr_model, samples, max_streams, join_interval=1, online_normalization=False, debug_mode=False
+):
+    """
+        Simulates concurrent live streams which start at different times, one stream per sample of the manifest.
+        Returns the final streaming transcriptions in the order of the samples.
+    """
+    stream_manager = CacheAwareStreamingManager(
+        model=asr_model, max_streams=max_streams, online_normalization=online_normalization
+    )
+    streaming_cfg = stream_manager.streaming_cfg
+    first_chunk_size = streaming_cfg.chunk_size
+    if isinstance(first_chunk_size, list):
+        first_chunk_size = first_chunk_size[0]
+    shift_size = streaming_cfg.shift_size
+    if isinstance(shift_size, list):
+        shift_size = shift_size[1]
+
+    final_streaming_tran = [""] * len(samples)
+    # stream_id -> [sample_idx, processed_signal, number of the frames sent to the stream]
+    active_streams = {}
+    next_sample_idx = 0
+    step_num = 0
+    while next_sample_idx < len(samples) or active_streams:
+        if next_sample_idx < len(samples) and len(active_streams) < max_streams and step_num % join_interval == 0:
+            stream_id = stream_manager.add_stream()
+            audio = get_samples(samples[next_sample_idx]['audio_filepath'])
+            processed_signal, processed_signal_length = stream_manager.preprocess_audio(audio)
+            active_streams[stream_id] = [next_sample_idx, processed_signal, 0]
+            logging.info(f'Stream {stream_id} joined with sample: {samples[next_sample_idx]["audio_filepath"]}')
+            next_sample_idx += 1
+
+        # the features of each stream arrive one chunk at a time like live audio
+        for stream_id, (sample_idx, processed_signal, sent_len) in active_streams.items():
+            if sent_len >= processed_signal.size(-1):
+                continue
+            new_sent_len = sent_len + (first_chunk_size if sent_len == 0 else shift_size)
+            stream_manager.append_processed_signal(stream_id, processed_signal[:, :, sent_len:new_sent_len])
+            active_streams[stream_id][2] = new_sent_len
+            if new_sent_len >= processed_signal.size(-1):
+                stream_manager.end_stream(stream_id)
+
+        with torch.inference_mode():
+            with autocast():
+                step_tran = stream_manager.step()
+        if debug_mode:
+            logging.info(f"Step {step_num}, streaming transcriptions: {step_tran}")
+
+        for stream_id in list(active_streams.keys()):
+            if stream_manager.is_stream_finished(stream_id):
+                sample_idx = active_streams.pop(stream_id)[0]
+                final_streaming_tran[sample_idx] = stream_manager.remove_stream(stream_id) or ""
+                logging.info(f"Stream {stream_id} left with transcription: {final_streaming_tran[sample_idx]}")
+        step_num += 1
+
+    return final_streaming_tran
+
+
 def main():
     parser = ArgumentParser()
     parser.add_argument(
@@ -240,6 +317,23 @@ def main():
         action='store_true',
         help="Perform normalization on the run per chunk.",
     )
+    parser.add_argument(
+        "--simulate_live_streams",
+        action="store_true",
+        help="Whether to stream the audio files of the manifest as concurrent live streams with staggered starts.",
+    )
+    parser.add_argument(
+        "--max_streams",
+        type=int,
+        default=64,
+        help="The maximum number of concurrent live streams when simulate_live_streams is enabled",
+    )
+    parser.add_argument(
+        "--join_interval",
+        type=int,
+        default=1,
+        help="The number of steps between the arrivals of the live streams when simulate_live_streams is enabled",
+    )
     parser.add_argument(
         "--output_path", type=str, help="path to output file when manifest is used as input", default=None
     )
@@ -336,26 +430,41 @@ def main():
         logging.info(f"Loaded {len(samples)} from the manifest at {args.manifest_file}.")
 
         start_time = time.time()
-        for sample_idx, sample in enumerate(samples):
-            processed_signal, processed_signal_length, stream_id = streaming_buffer.append_audio_file(
-                sample['audio_filepath'], stream_id=-1
+        if args.simulate_live_streams:
+            for sample in samples:
+                if "text" in sample:
+                    all_refs_text.append(sample["text"])
+            all_streaming_tran = perform_live_streaming(
+                asr_model=asr_model,
+                samples=samples,
+                max_streams=args.max_streams,
+                join_interval=args.join_interval,
+                online_normalization=online_normalization,
+                debug_mode=args.debug_mode,
             )
-            if "text" in sample:
-                all_refs_text.append(sample["text"])
-            logging.info(f'Added this sample to the buffer: {sample["audio_filepath"]}')
-
-            if (sample_idx + 1) % args.batch_size == 0 or sample_idx == len(samples) - 1:
-                logging.info(f"Starting to stream samples {sample_idx - len(streaming_buffer) + 1} to {sample_idx}...")
-                streaming_tran, offline_tran = perform_streaming(
-                    asr_model=asr_model,
-                    streaming_buffer=streaming_buffer,
-                    compare_vs_offline=args.compare_vs_offline,
-                    debug_mode=args.debug_mode,
+        else:
+            for sample_idx, sample in enumerate(samples):
+                processed_signal, processed_signal_length, stream_id = streaming_buffer.append_audio_file(
+                    sample['audio_filepath'], stream_id=-1
                 )
-                all_streaming_tran.extend(streaming_tran)
-                if args.compare_vs_offline:
-                    all_offline_tran.extend(offline_tran)
-                streaming_buffer.reset_buffer()
+                if "text" in sample:
+                    all_refs_text.append(sample["text"])
+                logging.info(f'Added this sample to the buffer: {sample["audio_filepath"]}')
+
+                if (sample_idx + 1) % args.batch_size == 0 or sample_idx == len(samples) - 1:
+                    logging.info(
+                        f"Starting to stream samples {sample_idx - len(streaming_buffer) + 1} to {sample_idx}..."
+                    )
+                    streaming_tran, offline_tran = perform_streaming(
+                        asr_model=asr_model,
+                        streaming_buffer=streaming_buffer,
+                        compare_vs_offline=args.compare_vs_offline,
+                        debug_mode=args.debug_mode,
+                    )
+                    all_streaming_tran.extend(streaming_tran)
+                    if args.compare_vs_offline:
+                        all_offline_tran.extend(offline_tran)
+                    streaming_buffer.reset_buffer()
 
         if args.compare_vs_offline and len(all_refs_text) == len(all_offline_tran):
             offline_wer = word_error_rate(hypotheses=all_offline_tran, references=all_refs_text)
@@ -16,6 +16,7 @@ import json
 import math
 import multiprocessing
 import os
+import random
 from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import braceexpand
@@ -29,6 +30,7 @@ from nemo.collections.asr.parts.preprocessing.features import WaveformFeaturizer
 from nemo.collections.asr.parts.utils.audio_utils import ChannelSelectorType
 from nemo.collections.common import tokenizers
 from nemo.collections.common.parts.preprocessing import collections, parsers
+from nemo.collections.common.parts.preprocessing.compiled_manifest import is_compiled_manifest
 from nemo.core.classes import Dataset, IterableDataset
 from nemo.core.neural_types import *
 from nemo.utils import logging
@@ -113,6 +115,7 @@ class ASRManifestProcessor:
     "utterance_id", "ctm_utt": "en_4156", "side": "A"}
     Args:
         manifest_filepath: Path to manifest json as described above. Can be comma-separated paths.
+            Compiled manifests (see `scripts/speech_recognition/compile_manifest.py`) are read lazily.
         parser: Str for a language specific preprocessor or a callable.
         max_duration: If audio exceeds this length, do not include in dataset.
         min_duration: If audio is less than this length, do not include in dataset.
@@ -120,6 +123,8 @@ class ASRManifestProcessor:
         bos_id: Id of beginning of sequence symbol to append if not None.
         eos_id: Id of end of sequence symbol to append if not None.
         pad_id: Id of pad symbol. Defaults to 0.
+        tokenization_num_workers: If greater than 1, transcripts are tokenized in a pool of this many processes.
+        tokenization_cache_dir: If set, token ids of transcripts are cached in this directory and reused.
     """
 
     def __init__(
@@ -133,16 +138,33 @@ class ASRManifestProcessor:
         eos_id: Optional[int] = None,
         pad_id: int = 0,
         index_by_file_id: bool = False,
+        tokenization_num_workers: int = 0,
+        tokenization_cache_dir: Optional[str] = None,
     ):
         self.parser = parser
 
-        self.collection = collections.ASRAudioText(
+        manifest_files = manifest_filepath.split(',') if isinstance(manifest_filepath, str) else manifest_filepath
+        num_compiled_manifests = sum(is_compiled_manifest(f) for f in manifest_files)
+        collection_kwargs = {}
+        if num_compiled_manifests == 0:
+            collection_cls = collections.ASRAudioText
+            collection_kwargs.update(
+                tokenization_num_workers=tokenization_num_workers, tokenization_cache_dir=tokenization_cache_dir
+            )
+        elif num_compiled_manifests == len(manifest_files):
+            # compiled manifests are tokenized lazily
+            collection_cls = collections.CompiledASRAudioText
+        else:
+            raise ValueError("Compiled and json manifests cannot be mixed, please compile all manifests.")
+
+        self.collection = collection_cls(
             manifests_files=manifest_filepath,
             parser=parser,
             min_duration=min_duration,
             max_duration=max_duration,
             max_number=max_utts,
             index_by_file_id=index_by_file_id,
+            **collection_kwargs,
         )
 
         self.eos_id = eos_id
@@ -369,6 +391,9 @@ class _AudioTextDataset(Dataset):
         pad_id: Id of pad symbol. Defaults to 0
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        tokenization_num_workers (int): If greater than 1, transcripts are tokenized in a pool of this many processes. Defaults to 0.
+        tokenization_cache_dir (str): If set, token ids of transcripts are cached in this directory and reused by subsequent runs and other ranks. Defaults to None.
+        resample_backend (str): Backend used to resample audio to sample_rate, one of 'librosa', 'polyphase' or 'torchaudio'. Defaults to 'librosa'.
     """
 
     @property
@@ -399,6 +424,9 @@ class _AudioTextDataset(Dataset):
         pad_id: int = 0,
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        tokenization_num_workers: int = 0,
+        tokenization_cache_dir: Optional[str] = None,
+        resample_backend: str = 'librosa',
     ):
         if type(manifest_filepath) == str:
             manifest_filepath = manifest_filepath.split(",")
@@ -415,8 +443,12 @@ class _AudioTextDataset(Dataset):
             bos_id=bos_id,
             eos_id=eos_id,
             pad_id=pad_id,
+            tokenization_num_workers=tokenization_num_workers,
+            tokenization_cache_dir=tokenization_cache_dir,
+        )
+        self.featurizer = WaveformFeaturizer(
+            sample_rate=sample_rate, int_values=int_values, augmentor=augmentor, resample_backend=resample_backend
         )
-        self.featurizer = WaveformFeaturizer(sample_rate=sample_rate, int_values=int_values, augmentor=augmentor)
         self.trim = trim
         self.return_sample_id = return_sample_id
         self.channel_selector = channel_selector
@@ -488,6 +520,9 @@ class AudioToCharDataset(_AudioTextDataset):
         eos_id: Id of end of sequence symbol to append if not None
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        tokenization_num_workers (int): If greater than 1, transcripts are tokenized in a pool of this many processes. Defaults to 0.
+        tokenization_cache_dir (str): If set, token ids of transcripts are cached in this directory and reused by subsequent runs and other ranks. Defaults to None.
+        resample_backend (str): Backend used to resample audio to sample_rate, one of 'librosa', 'polyphase' or 'torchaudio'. Defaults to 'librosa'.
     """
 
     @property
@@ -522,6 +557,9 @@ class AudioToCharDataset(_AudioTextDataset):
         parser: Union[str, Callable] = 'en',
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        tokenization_num_workers: int = 0,
+        tokenization_cache_dir: Optional[str] = None,
+        resample_backend: str = 'librosa',
     ):
         self.labels = labels
 
@@ -544,6 +582,9 @@ class AudioToCharDataset(_AudioTextDataset):
             pad_id=pad_id,
             return_sample_id=return_sample_id,
             channel_selector=channel_selector,
+            tokenization_num_workers=tokenization_num_workers,
+            tokenization_cache_dir=tokenization_cache_dir,
+            resample_backend=resample_backend,
         )
 
 
@@ -582,6 +623,9 @@ class AudioToBPEDataset(_AudioTextDataset):
             tokens to beginning and ending of speech respectively.
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        tokenization_num_workers (int): If greater than 1, transcripts are tokenized in a pool of this many processes. Defaults to 0.
+        tokenization_cache_dir (str): If set, token ids of transcripts are cached in this directory and reused by subsequent runs and other ranks. Defaults to None.
+        resample_backend (str): Backend used to resample audio to sample_rate, one of 'librosa', 'polyphase' or 'torchaudio'. Defaults to 'librosa'.
     """
 
     @property
@@ -610,6 +654,9 @@ class AudioToBPEDataset(_AudioTextDataset):
         use_start_end_token: bool = True,
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        tokenization_num_workers: int = 0,
+        tokenization_cache_dir: Optional[str] = None,
+        resample_backend: str = 'librosa',
     ):
         if use_start_end_token and hasattr(tokenizer, "bos_id") and tokenizer.bos_id > 0:
             bos_id = tokenizer.bos_id
@@ -659,6 +706,9 @@ class AudioToBPEDataset(_AudioTextDataset):
             trim=trim,
             return_sample_id=return_sample_id,
             channel_selector=channel_selector,
+            tokenization_num_workers=tokenization_num_workers,
+            tokenization_cache_dir=tokenization_cache_dir,
+            resample_backend=resample_backend,
         )
 
 
@@ -1273,6 +1323,245 @@ class BucketingIterator:
         return batches
 
 
+class DynamicBatchingDataset(IterableDataset):
+    """
+    A Dataset which wraps a tarred IterableDataset and groups its samples into batches with a budget on the
+    duration, and optionally on the number of tokens, of a padded batch.
+
+    Decoded samples are collected in a buffer of `buffer_size` samples, which is sorted by duration and split
+    into batches of samples with similar duration. The wrapped dataset is iterated as usual, so shuffling and
+    the sharding of tarballs across ranks and workers are unchanged. Similarly to BucketingDataset, every
+    item is a list of samples, so the DataLoader should use batch_size=1.
+
+    The order of batches is seeded by `seed` and the epoch, which has to be set with `set_epoch` before the
+    DataLoader creates its iterator, so that workers get a copy with the current epoch. ASR models do it
+    in `on_train_epoch_start`, hence the order does not change between epochs with `persistent_workers=True`.
+
+    Args:
+        dataset (IterableDataset): The TarredAudioToCharDataset or TarredAudioToBPEDataset to get wrapped
+        max_batch_duration (float): Maximum duration in seconds of a padded batch, i.e., the number of samples
+            in a batch times the duration of its longest sample. A longer sample forms a batch of its own.
+        max_batch_tokens (int): Optional maximum number of tokens of a padded batch.
+        max_batch_size (int): Optional maximum number of samples in a batch.
+        buffer_size (int): Number of samples which are sorted by duration to form batches
+        shuffle (bool): Whether to shuffle the order of batches formed from a buffer
+        seed (int): Random seed for shuffling, which is combined with the epoch
+    """
+
+    def __init__(
+        self,
+        dataset: IterableDataset,
+        max_batch_duration: float,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        buffer_size: int = 1000,
+        shuffle: bool = True,
+        seed: int = 0,
+    ):
+        if max_batch_duration <= 0:
+            raise ValueError(f"max_batch_duration must be positive, got {max_batch_duration}")
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be positive, got {buffer_size}")
+
+        self.wrapped_dataset = dataset
+        self.max_batch_duration = max_batch_duration
+        self.max_batch_samples = max_batch_duration * dataset.featurizer.sample_rate
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.buffer_size = buffer_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._num_batches = None
+        super().__init__()
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch which seeds the order of batches, every rank uses the same order in an epoch."""
+        self.epoch = epoch
+
+    def _collate_fn(self, batch):
+        return _speech_collate_fn(batch[0], self.wrapped_dataset.pad_id)
+
+    def _split_batches(self, lengths: List[Tuple[int, int]]) -> List[List[int]]:
+        """Splits (audio length, tokens length) pairs sorted by audio length into batches of their indices."""
+        batches = []
+        batch = []
+        max_audio_len = 0
+        max_tokens_len = 0
+        for idx, (sample_audio_len, sample_tokens_len) in enumerate(lengths):
+            audio_len = max(max_audio_len, sample_audio_len)
+            tokens_len = max(max_tokens_len, sample_tokens_len)
+            batch_size = len(batch) + 1
+            if batch and (
+                batch_size * audio_len > self.max_batch_samples
+                or (self.max_batch_tokens is not None and batch_size * tokens_len > self.max_batch_tokens)
+                or (self.max_batch_size is not None and batch_size > self.max_batch_size)
+            ):
+                batches.append(batch)
+                batch = []
+                audio_len, tokens_len = sample_audio_len, sample_tokens_len
+            batch.append(idx)
+            max_audio_len, max_tokens_len = audio_len, tokens_len
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _make_batches(self, buffer: List[Tuple], rng: random.Random) -> List[List[Tuple]]:
+        # samples are tuples (audio, audio length, tokens, tokens length, ...)
+        buffer.sort(key=lambda sample: int(sample[1]))
+        lengths = [(int(sample[1]), int(sample[3])) for sample in buffer]
+        batches = [[buffer[idx] for idx in batch] for batch in self._split_batches(lengths)]
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        # the same seed on all ranks and workers, the epoch is set in the main process before workers copy it
+        rng = random.Random(self.seed + self.epoch)
+
+        buffer = []
+        for sample in self.wrapped_dataset:
+            buffer.append(sample)
+            if len(buffer) == self.buffer_size:
+                yield from self._make_batches(buffer, rng)
+                buffer = []
+
+        if buffer:
+            yield from self._make_batches(buffer, rng)
+
+    def __len__(self):
+        # the batching of the buffers is replayed on the durations and tokens lengths of the manifest, as
+        # the number of batches depends on the padding in every batch, and it does not change between epochs
+        if self._num_batches is None:
+            collection = self.wrapped_dataset.manifest_processor.collection
+            sample_rate = self.wrapped_dataset.featurizer.sample_rate
+            audio_lens = [int((duration or 0.0) * sample_rate) for duration in collection.durations]
+            if self.max_batch_tokens is not None:
+                tokens_lens = [int(tokens_len) for tokens_len in collection.tokens_lengths]
+            else:
+                tokens_lens = [0] * len(audio_lens)
+
+            num_batches = 0
+            for start in range(0, len(audio_lens), self.buffer_size):
+                end = start + self.buffer_size
+                lengths = sorted(zip(audio_lens[start:end], tokens_lens[start:end]), key=lambda lens: lens[0])
+                num_batches += len(self._split_batches(lengths))
+            self._num_batches = max(num_batches, 1)
+        return self._num_batches
+
+
+class DurationBucketingBatchSampler(torch.utils.data.Sampler):
+    """
+    A batch sampler for map-style datasets which groups samples of similar duration into batches
+    with a budget on the duration of padded audio in a batch.
+
+    Samples are assigned to buckets by their duration. The batch size of a bucket is the number of its
+    longest samples which fit into `max_batch_duration`, so batches of short samples are larger than
+    batches of long samples and padding is limited to the width of a bucket. In every epoch, samples are
+    shuffled within their bucket and the resulting batches are shuffled across buckets.
+
+    Batches are created from the same random seed on all ranks and every rank takes a different subset
+    of them, so each rank gets the same number of batches, which is the length of the sampler. Since the sampler
+    partitions data across ranks itself, the trainer must not replace it with a distributed sampler
+    (`trainer.replace_sampler_ddp=False`).
+
+    Args:
+        durations: Duration of each sample of the dataset in seconds.
+        max_batch_duration: Maximum duration of a padded batch in seconds, i.e., the number of samples in
+            a batch times the duration of its longest sample. Samples longer than this form single-sample batches.
+            A budget in frames corresponds to `max_batch_duration = max_batch_frames * window_stride`.
+        bucket_boundaries: Durations in seconds separating the buckets. If None, `num_buckets` buckets with
+            the same number of samples are created from the quantiles of the durations.
+        num_buckets: Number of buckets used when `bucket_boundaries` is None.
+        max_batch_size: Optional maximum number of samples in a batch.
+        shuffle: Whether to shuffle samples within buckets and batches across buckets in every epoch.
+        seed: Random seed, has to be the same on all ranks.
+        drop_last: If True, drop batches which cannot be distributed evenly across ranks, otherwise repeat
+            batches from the beginning of the epoch.
+        global_rank: Rank of this process.
+        world_size: Number of processes.
+    """
+
+    def __init__(
+        self,
+        durations: List[float],
+        max_batch_duration: float,
+        bucket_boundaries: Optional[List[float]] = None,
+        num_buckets: int = 10,
+        max_batch_size: Optional[int] = None,
+        shuffle: bool = True,
+        seed: int = 0,
+        drop_last: bool = False,
+        global_rank: int = 0,
+        world_size: int = 1,
+    ):
+        if max_batch_duration <= 0:
+            raise ValueError(f"max_batch_duration must be positive, got {max_batch_duration}")
+
+        durations = np.asarray(durations, dtype=np.float64)
+        if bucket_boundaries is None:
+            quantiles = np.linspace(0.0, 1.0, num_buckets + 1)[1:-1]
+            bucket_boundaries = np.quantile(durations, quantiles) if len(durations) > 0 else []
+        self.bucket_boundaries = np.unique(np.asarray(bucket_boundaries, dtype=np.float64))
+
+        bucket_ids = np.searchsorted(self.bucket_boundaries, durations, side='right')
+        self.buckets = []
+        self.bucket_batch_sizes = []
+        for bucket_id in range(len(self.bucket_boundaries) + 1):
+            indices = np.flatnonzero(bucket_ids == bucket_id)
+            if len(indices) == 0:
+                continue
+            batch_size = max(1, int(max_batch_duration // durations[indices].max()))
+            if max_batch_size is not None:
+                batch_size = min(batch_size, max_batch_size)
+            self.buckets.append(indices)
+            self.bucket_batch_sizes.append(batch_size)
+
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.global_rank = global_rank
+        self.world_size = world_size
+        self.epoch = 0
+
+        num_batches = sum(
+            int(math.ceil(len(indices) / batch_size))
+            for indices, batch_size in zip(self.buckets, self.bucket_batch_sizes)
+        )
+        if self.drop_last:
+            self.num_batches_per_rank = num_batches // self.world_size
+        else:
+            self.num_batches_per_rank = int(math.ceil(num_batches / self.world_size))
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch, which determines the order of samples and batches if shuffle is enabled."""
+        self.epoch = epoch
+
+    def __iter__(self):
+        rng = np.random.RandomState(self.seed + self.epoch)
+        batches = []
+        for indices, batch_size in zip(self.buckets, self.bucket_batch_sizes):
+            if self.shuffle:
+                indices = rng.permutation(indices)
+            batches.extend(indices[start : start + batch_size] for start in range(0, len(indices), batch_size))
+
+        if self.shuffle:
+            batches = [batches[idx] for idx in rng.permutation(len(batches))]
+
+        # the same number of batches on every rank
+        num_batches = self.num_batches_per_rank * self.world_size
+        if num_batches > len(batches):
+            batches += [batches[idx % len(batches)] for idx in range(num_batches - len(batches))]
+        batches = batches[:num_batches]
+
+        for batch in batches[self.global_rank :: self.world_size]:
+            yield batch.tolist()
+
+    def __len__(self):
+        return self.num_batches_per_rank
+
+
 class RandomizedChainDataset(ChainDataset):
     def __init__(self, datasets: Iterable[Dataset], rnd_seed=0) -> None:
         super(RandomizedChainDataset, self).__init__(list(datasets))
@@ -15,7 +15,7 @@
 import copy
 import json
 import random
-from typing import Any, List, Optional, Union
+from typing import Any, Callable, List, Optional, Union
 
 import torch
 from omegaconf import DictConfig, open_dict
@@ -140,6 +140,9 @@ def get_char_dataset(config: dict, augmentor: Optional['AudioAugmentor'] = None)
         parser=config.get('parser', 'en'),
         return_sample_id=config.get('return_sample_id', False),
         channel_selector=config.get('channel_selector', None),
+        tokenization_num_workers=config.get('tokenization_num_workers', 0),
+        tokenization_cache_dir=config.get('tokenization_cache_dir', None),
+        resample_backend=config.get('resample_backend', 'librosa'),
     )
     return dataset
 
@@ -210,10 +213,102 @@ def get_bpe_dataset(
         use_start_end_token=config.get('use_start_end_token', True),
         return_sample_id=config.get('return_sample_id', False),
         channel_selector=config.get('channel_selector', None),
+        tokenization_num_workers=config.get('tokenization_num_workers', 0),
+        tokenization_cache_dir=config.get('tokenization_cache_dir', None),
+        resample_backend=config.get('resample_backend', 'librosa'),
     )
     return dataset
 
 
+def get_duration_bucketing_batch_sampler(
+    config: dict, dataset: audio_to_text._AudioTextDataset, global_rank: int, world_size: int
+) -> Optional[audio_to_text.DurationBucketingBatchSampler]:
+    """
+    Instantiates a DurationBucketingBatchSampler for a map-style dataset if `bucketing_batch_duration` is set.
+    Tarred datasets form batches with this budget themselves (see `get_chain_dataset`), so None is returned for them.
+
+    Args:
+        config: Config of the dataset. Uses `bucketing_batch_duration` (maximum padded duration of a batch in
+            seconds), `bucketing_duration_bins` (optional bucket boundaries in seconds), `bucketing_num_buckets`,
+            `batch_size` (maximum number of samples in a batch), `shuffle`, `drop_last` and `seed`.
+        dataset: An instance of AudioToCharDataset or AudioToBPEDataset.
+        global_rank: Global rank of this device.
+        world_size: Global world size in the training method.
+
+    Returns:
+        An instance of DurationBucketingBatchSampler, or None if `bucketing_batch_duration` is not set
+        or the dataset is an IterableDataset.
+    """
+    max_batch_duration = config.get('bucketing_batch_duration', None)
+    if max_batch_duration is None or isinstance(dataset, torch.utils.data.IterableDataset):
+        return None
+
+    if not isinstance(dataset, audio_to_text._AudioTextDataset):
+        raise ValueError(
+            f"bucketing_batch_duration is not supported by {type(dataset).__name__}, "
+            "expected AudioToCharDataset or AudioToBPEDataset."
+        )
+
+    durations = dataset.manifest_processor.collection.durations
+    if any(duration is None for duration in durations):
+        raise ValueError("bucketing_batch_duration requires the duration of every sample in the manifest.")
+
+    bucket_boundaries = config.get('bucketing_duration_bins', None)
+    batch_sampler = audio_to_text.DurationBucketingBatchSampler(
+        durations=durations,
+        max_batch_duration=max_batch_duration,
+        bucket_boundaries=list(bucket_boundaries) if bucket_boundaries is not None else None,
+        num_buckets=config.get('bucketing_num_buckets', 10),
+        max_batch_size=config.get('batch_size', None),
+        shuffle=config.get('shuffle', False),
+        seed=config.get('seed', 0),
+        drop_last=config.get('drop_last', False),
+        global_rank=global_rank,
+        world_size=world_size,
+    )
+    logging.info(
+        f"Duration bucketing is enabled with {len(batch_sampler.buckets)} buckets and batch sizes "
+        f"{batch_sampler.bucket_batch_sizes} for {max_batch_duration} seconds per batch."
+    )
+    return batch_sampler
+
+
+def get_duration_bucketing_dataloader(
+    config: dict, dataset: audio_to_text._AudioTextDataset, collate_fn: Callable, global_rank: int, world_size: int
+) -> Optional[torch.utils.data.DataLoader]:
+    """
+    Instantiates a DataLoader with a DurationBucketingBatchSampler if `bucketing_batch_duration` is set.
+
+    The batch sampler shards batches across ranks itself, so the trainer has to run with
+    `replace_sampler_ddp=False` in distributed runs. The length of the DataLoader is the number of batches of a rank.
+
+    Args:
+        config: Config of the dataset, see `get_duration_bucketing_batch_sampler`. Also uses `num_workers`
+            and `pin_memory`.
+        dataset: An instance of AudioToCharDataset or AudioToBPEDataset.
+        collate_fn: Function which collates a list of samples into a batch.
+        global_rank: Global rank of this device.
+        world_size: Global world size in the training method.
+
+    Returns:
+        An instance of DataLoader, or None if `bucketing_batch_duration` is not set or the dataset is an
+        IterableDataset.
+    """
+    batch_sampler = get_duration_bucketing_batch_sampler(
+        config=config, dataset=dataset, global_rank=global_rank, world_size=world_size
+    )
+    if batch_sampler is None:
+        return None
+
+    return torch.utils.data.DataLoader(
+        dataset=dataset,
+        batch_sampler=batch_sampler,
+        collate_fn=collate_fn,
+        num_workers=config.get('num_workers', 0),
+        pin_memory=config.get('pin_memory', False),
+    )
+
+
 def get_concat_tarred_dataset(
     config: dict,
     shuffle_n: int,
@@ -514,7 +609,27 @@ def convert_to_config_list(initial_list):
 
 
 def get_chain_dataset(datasets, ds_config):
-    if len(datasets) > 1:
+    if ds_config.get('bucketing_batch_duration', None) is not None:
+        if ds_config.get('bucketing_batch_size', None) is not None:
+            raise ValueError("bucketing_batch_duration and bucketing_batch_size cannot be used together!")
+        if ds_config['batch_size'] != 1:
+            raise ValueError(
+                f"batch_size should be set to one when bucketing_batch_duration is set for tarred datasets (batch_size={ds_config['batch_size']})!"
+            )
+        logging.info(
+            f"Dynamic batching is enabled with {ds_config['bucketing_batch_duration']} seconds per batch "
+            f"for {len(datasets)} dataset(s)!"
+        )
+        for idx, dataset in enumerate(datasets):
+            datasets[idx] = audio_to_text.DynamicBatchingDataset(
+                dataset=dataset,
+                max_batch_duration=ds_config['bucketing_batch_duration'],
+                max_batch_tokens=ds_config.get('bucketing_batch_tokens', None),
+                buffer_size=ds_config.get('bucketing_buffer_size', 1000),
+                shuffle=ds_config.get('shuffle', False),
+                seed=ds_config.get('seed', 0),
+            )
+    elif len(datasets) > 1:
         if ds_config.get('bucketing_batch_size', None) is not None:
             bucketing_batch_sizes = calc_bucketing_batch_sizes(ds_config, len(datasets))
             logging.info(
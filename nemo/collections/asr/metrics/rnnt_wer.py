@@ -17,7 +17,6 @@ from abc import abstractmethod
 from dataclasses import dataclass
 from typing import Callable, Dict, List, Optional, Tuple, Union
 
-import editdistance
 import numpy as np
 import torch
 from torchmetrics import Metric
@@ -25,6 +24,7 @@ from torchmetrics import Metric
 from nemo.collections.asr.metrics.wer import move_dimension_to_the_front
 from nemo.collections.asr.parts.submodules import rnnt_beam_decoding as beam_decode
 from nemo.collections.asr.parts.submodules import rnnt_greedy_decoding as greedy_decode
+from nemo.collections.asr.parts.utils import edit_distance_utils
 from nemo.collections.asr.parts.utils.asr_confidence_utils import ConfidenceConfig, ConfidenceMixin
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis, NBestHypotheses
 from nemo.utils import logging
@@ -1133,8 +1133,6 @@ class RNNTWER(Metric):
         targets: torch.Tensor,
         target_lengths: torch.Tensor,
     ) -> torch.Tensor:
-        words = 0
-        scores = 0
         references = []
         with torch.no_grad():
             # prediction_cpu_tensor = tensors[0].long().cpu()
@@ -1157,16 +1155,8 @@ class RNNTWER(Metric):
             logging.info(f"reference :{references[0]}")
             logging.info(f"predicted :{hypotheses[0]}")
 
-        for h, r in zip(hypotheses, references):
-            if self.use_cer:
-                h_list = list(h)
-                r_list = list(r)
-            else:
-                h_list = h.split()
-                r_list = r.split()
-            words += len(r_list)
-            # Compute Levenshtein's distance
-            scores += editdistance.eval(h_list, r_list)
+        # Compute Levenshtein's distance
+        scores, words = edit_distance_utils.edit_distance_totals(hypotheses, references, use_cer=self.use_cer)
 
         self.scores += torch.tensor(scores, device=self.scores.device, dtype=self.scores.dtype)
         self.words += torch.tensor(words, device=self.words.device, dtype=self.words.dtype)
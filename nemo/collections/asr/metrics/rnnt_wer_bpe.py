@@ -15,12 +15,12 @@
 from dataclasses import dataclass
 from typing import List, Union
 
-import editdistance
 import torch
 from torchmetrics import Metric
 
 from nemo.collections.asr.metrics.rnnt_wer import AbstractRNNTDecoding, RNNTDecodingConfig
 from nemo.collections.asr.metrics.wer import move_dimension_to_the_front
+from nemo.collections.asr.parts.utils import edit_distance_utils
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis, NBestHypotheses
 from nemo.collections.common.tokenizers.aggregate_tokenizer import AggregateTokenizer
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
@@ -368,8 +368,6 @@ class RNNTBPEWER(Metric):
         targets: torch.Tensor,
         target_lengths: torch.Tensor,
     ) -> torch.Tensor:
-        words = 0
-        scores = 0
         references = []
         with torch.no_grad():
             # prediction_cpu_tensor = tensors[0].long().cpu()
@@ -391,16 +389,8 @@ class RNNTBPEWER(Metric):
             logging.info(f"reference :{references[0]}")
             logging.info(f"predicted :{hypotheses[0]}")
 
-        for h, r in zip(hypotheses, references):
-            if self.use_cer:
-                h_list = list(h)
-                r_list = list(r)
-            else:
-                h_list = h.split()
-                r_list = r.split()
-            words += len(r_list)
-            # Compute Levenshtein's distance
-            scores += editdistance.eval(h_list, r_list)
+        # Compute Levenshtein's distance
+        scores, words = edit_distance_utils.edit_distance_totals(hypotheses, references, use_cer=self.use_cer)
 
         del hypotheses
 
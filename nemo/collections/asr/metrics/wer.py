@@ -16,14 +16,13 @@ from abc import abstractmethod
 from dataclasses import dataclass, is_dataclass
 from typing import Callable, Dict, List, Optional, Tuple, Union
 
-import editdistance
-import jiwer
 import numpy as np
 import torch
 from omegaconf import DictConfig, OmegaConf
 from torchmetrics import Metric
 
-from nemo.collections.asr.parts.submodules import ctc_greedy_decoding
+from nemo.collections.asr.parts.submodules import ctc_beam_decoding, ctc_greedy_decoding
+from nemo.collections.asr.parts.utils import edit_distance_utils
 from nemo.collections.asr.parts.utils.asr_confidence_utils import ConfidenceConfig, ConfidenceMixin
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis, NBestHypotheses
 from nemo.utils import logging
@@ -31,7 +30,7 @@ from nemo.utils import logging
 __all__ = ['word_error_rate', 'word_error_rate_detail', 'WER', 'move_dimension_to_the_front']
 
 
-def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False) -> float:
+def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False, num_workers: int = 0) -> float:
     """
     Computes Average Word Error rate between two texts represented as
     corresponding lists of string. Hypotheses and references must have same
@@ -40,28 +39,13 @@ def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False)
       hypotheses: list of hypotheses
       references: list of references
       use_cer: bool, set True to enable cer
+      num_workers: int, if greater than 1, large lists are scored by a pool of this many processes
     Returns:
       (float) average word error rate
     """
-    scores = 0
-    words = 0
-    if len(hypotheses) != len(references):
-        raise ValueError(
-            "In word error rate calculation, hypotheses and reference"
-            " lists must have the same number of elements. But I got:"
-            "{0} and {1} correspondingly".format(len(hypotheses), len(references))
-        )
-    for h, r in zip(hypotheses, references):
-        if use_cer:
-            h_list = list(h)
-            r_list = list(r)
-        else:
-            h_list = h.split()
-            r_list = r.split()
-        words += len(r_list)
-        # May deprecate using editdistance in future release for here and rest of codebase
-        # once we confirm jiwer is reliable.
-        scores += editdistance.eval(h_list, r_list)
+    ops = edit_distance_utils.edit_operations(hypotheses, references, use_cer=use_cer, num_workers=num_workers)
+    scores = int(ops[:, : edit_distance_utils.REF_LENGTH].sum())
+    words = int(ops[:, edit_distance_utils.REF_LENGTH].sum())
     if words != 0:
         wer = 1.0 * scores / words
     else:
@@ -70,7 +54,7 @@ def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False)
 
 
 def word_error_rate_detail(
-    hypotheses: List[str], references: List[str], use_cer=False
+    hypotheses: List[str], references: List[str], use_cer=False, num_workers: int = 0
 ) -> Tuple[float, int, float, float, float]:
     """
     Computes Average Word Error Rate with details (insertion rate, deletion rate, substitution rate)
@@ -81,6 +65,7 @@ def word_error_rate_detail(
       hypotheses (list): list of hypotheses
       references(list) : list of references
       use_cer (bool): set True to enable cer
+      num_workers (int): if greater than 1, large lists are scored by a pool of this many processes
     Returns:
       wer (float): average word error rate
       words (int):  Total number of words/charactors of given reference texts
@@ -89,43 +74,14 @@ def word_error_rate_detail(
       sub_rate (float): average substitution error rate
       
     """
-    scores = 0
-    words = 0
-    ops_count = {'substitutions': 0, 'insertions': 0, 'deletions': 0}
-
-    if len(hypotheses) != len(references):
-        raise ValueError(
-            "In word error rate calculation, hypotheses and reference"
-            " lists must have the same number of elements. But I got:"
-            "{0} and {1} correspondingly".format(len(hypotheses), len(references))
-        )
-
-    for h, r in zip(hypotheses, references):
-        if use_cer:
-            h_list = list(h)
-            r_list = list(r)
-        else:
-            h_list = h.split()
-            r_list = r.split()
-
-        # To get rid of the issue that jiwer does not allow empty string
-        if len(r_list) == 0:
-            if len(h_list) != 0:
-                errors = len(h_list)
-                ops_count['insertions'] += errors
-        else:
-            if use_cer:
-                measures = jiwer.cer(r, h, return_dict=True)
-            else:
-                measures = jiwer.compute_measures(r, h)
-
-            errors = measures['insertions'] + measures['deletions'] + measures['substitutions']
-            ops_count['insertions'] += measures['insertions']
-            ops_count['deletions'] += measures['deletions']
-            ops_count['substitutions'] += measures['substitutions']
-
-        scores += errors
-        words += len(r_list)
+    ops = edit_distance_utils.edit_operations(hypotheses, references, use_cer=use_cer, num_workers=num_workers)
+    ops_count = {
+        'substitutions': int(ops[:, edit_distance_utils.SUBSTITUTIONS].sum()),
+        'insertions': int(ops[:, edit_distance_utils.INSERTIONS].sum()),
+        'deletions': int(ops[:, edit_distance_utils.DELETIONS].sum()),
+    }
+    scores = sum(ops_count.values())
+    words = int(ops[:, edit_distance_utils.REF_LENGTH].sum())
 
     if words != 0:
         wer = 1.0 * scores / words
@@ -152,6 +108,8 @@ class AbstractCTCDecoding(ConfidenceMixin):
             strategy: str value which represents the type of decoding that can occur.
                 Possible values are :
                 -   greedy (for greedy decoding).
+                -   beam (for CTC prefix beam search, optionally with word bonus and hotword boosting).
+                -   beam_lm (for CTC prefix beam search with a word level ARPA n-gram language model).
 
             compute_timestamps: A bool flag, which determines whether to compute the character/subword, or
                 word based timestamp mapping the output log-probabilities to discrite intervals of timestamps.
@@ -230,6 +188,20 @@ class AbstractCTCDecoding(ConfidenceMixin):
                 compute_timestamps: Same as above, overrides above value.
                 preserve_frame_confidence: Same as above, overrides above value.
 
+            "beam":
+                beam_size: int size of the beam.
+                return_best_hypothesis: If True, returns only the best hypothesis of each sample.
+                    Otherwise, returns NBestHypotheses with all the beams of each sample.
+                beam_prune_topk: Number of best tokens of each frame considered during beam search.
+                beam_prune_logp: Tokens with a lower log probability are not considered during beam search.
+                ngram_lm_model: Path to a word level ARPA n-gram language model. Required by `beam_lm`.
+                ngram_lm_alpha: Weight of the n-gram language model scores.
+                beam_beta: Bonus added for every word of a hypothesis.
+                hotwords: Optional list of words to boost.
+                hotword_weight: Bonus added for every hotword of a hypothesis.
+                num_workers: Number of processes decoding the samples of a batch in parallel with a language model,
+                    word bonus or hotwords. Without them, samples are decoded in parallel threads.
+
         blank_id: The id of the RNNT blank token.
     """
 
@@ -246,7 +218,7 @@ class AbstractCTCDecoding(ConfidenceMixin):
         OmegaConf.set_struct(decoding_cfg, False)
 
         # update minimal config
-        minimal_cfg = ['greedy']
+        minimal_cfg = ['greedy', 'beam']
         for item in minimal_cfg:
             if item not in decoding_cfg:
                 decoding_cfg[item] = OmegaConf.create({})
@@ -258,7 +230,7 @@ class AbstractCTCDecoding(ConfidenceMixin):
         self.batch_dim_index = self.cfg.get('batch_dim_index', 0)
         self.word_seperator = self.cfg.get('word_seperator', ' ')
 
-        possible_strategies = ['greedy']
+        possible_strategies = ['greedy', 'beam', 'beam_lm']
         if self.cfg.strategy not in possible_strategies:
             raise ValueError(f"Decoding strategy must be one of {possible_strategies}. Given {self.cfg.strategy}")
 
@@ -266,11 +238,15 @@ class AbstractCTCDecoding(ConfidenceMixin):
         if self.preserve_alignments is None:
             if self.cfg.strategy in ['greedy']:
                 self.preserve_alignments = self.cfg.greedy.get('preserve_alignments', False)
+            else:
+                self.preserve_alignments = False
 
         # Update compute timestamps
         if self.compute_timestamps is None:
             if self.cfg.strategy in ['greedy']:
                 self.compute_timestamps = self.cfg.greedy.get('compute_timestamps', False)
+            else:
+                self.compute_timestamps = False
 
         # initialize confidence-related fields
         self._init_confidence(self.cfg.get('confidence_cfg', None))
@@ -278,6 +254,11 @@ class AbstractCTCDecoding(ConfidenceMixin):
         # we need timestamps to extract non-blank per-frame confidence
         self.compute_timestamps |= self.preserve_frame_confidence
 
+        if self.cfg.strategy in ['beam', 'beam_lm'] and (self.preserve_alignments or self.compute_timestamps):
+            raise ValueError(
+                f"Decoding strategy `{self.cfg.strategy}` does not support alignments, timestamps or confidence."
+            )
+
         if self.cfg.strategy == 'greedy':
 
             self.decoding = ctc_greedy_decoding.GreedyCTCInfer(
@@ -288,6 +269,29 @@ class AbstractCTCDecoding(ConfidenceMixin):
                 confidence_method_cfg=self.confidence_method_cfg,
             )
 
+        elif self.cfg.strategy in ['beam', 'beam_lm']:
+            ngram_lm_model = self.cfg.beam.get('ngram_lm_model', None)
+            if self.cfg.strategy == 'beam_lm' and ngram_lm_model is None:
+                raise ValueError("Decoding strategy `beam_lm` requires `beam.ngram_lm_model` to be set.")
+
+            self.decoding = ctc_beam_decoding.BeamCTCInfer(
+                blank_id=self.blank_id,
+                beam_size=self.cfg.beam.get('beam_size', 4),
+                return_best_hypothesis=self.cfg.beam.get('return_best_hypothesis', True),
+                beam_prune_topk=self.cfg.beam.get('beam_prune_topk', 8),
+                beam_prune_logp=self.cfg.beam.get('beam_prune_logp', -10.0),
+                ngram_lm_model=ngram_lm_model if self.cfg.strategy == 'beam_lm' else None,
+                ngram_lm_alpha=self.cfg.beam.get('ngram_lm_alpha', 0.5),
+                beam_beta=self.cfg.beam.get('beam_beta', 0.0),
+                hotwords=self.cfg.beam.get('hotwords', None),
+                hotword_weight=self.cfg.beam.get('hotword_weight', 5.0),
+                num_workers=self.cfg.beam.get('num_workers', 0),
+            )
+            if self.decoding.requires_vocabulary:
+                self.decoding.set_vocabulary(
+                    self.decode_ids_to_tokens(list(range(self.blank_id))), word_seperator=self.word_seperator
+                )
+
         else:
             raise ValueError(
                 f"Incorrect decoding strategy supplied. Must be one of {possible_strategies}\n"
@@ -326,6 +330,10 @@ class AbstractCTCDecoding(ConfidenceMixin):
         if isinstance(decoder_outputs, torch.Tensor):
             decoder_outputs = move_dimension_to_the_front(decoder_outputs, self.batch_dim_index)
 
+        # beam search hypotheses are token sequences, which are already collapsed
+        if self.cfg.strategy in ['beam', 'beam_lm']:
+            fold_consecutive = False
+
         with torch.inference_mode():
             # Resolve the forward step of the decoding strategy
             hypotheses_list = self.decoding(
@@ -829,6 +837,8 @@ class CTCDecoding(AbstractCTCDecoding):
             strategy: str value which represents the type of decoding that can occur.
                 Possible values are :
                 -   greedy (for greedy decoding).
+                -   beam (for CTC prefix beam search, optionally with word bonus and hotword boosting).
+                -   beam_lm (for CTC prefix beam search with a word level ARPA n-gram language model).
 
             compute_timestamps: A bool flag, which determines whether to compute the character/subword, or
                 word based timestamp mapping the output log-probabilities to discrite intervals of timestamps.
@@ -908,6 +918,20 @@ class CTCDecoding(AbstractCTCDecoding):
                 preserve_frame_confidence: Same as above, overrides above value.
                 confidence_method: Same as above, overrides confidence_cfg.method.
 
+            "beam":
+                beam_size: int size of the beam.
+                return_best_hypothesis: If True, returns only the best hypothesis of each sample.
+                    Otherwise, returns NBestHypotheses with all the beams of each sample.
+                beam_prune_topk: Number of best tokens of each frame considered during beam search.
+                beam_prune_logp: Tokens with a lower log probability are not considered during beam search.
+                ngram_lm_model: Path to a word level ARPA n-gram language model. Required by `beam_lm`.
+                ngram_lm_alpha: Weight of the n-gram language model scores.
+                beam_beta: Bonus added for every word of a hypothesis.
+                hotwords: Optional list of words to boost.
+                hotword_weight: Bonus added for every hotword of a hypothesis.
+                num_workers: Number of processes decoding the samples of a batch in parallel with a language model,
+                    word bonus or hotwords. Without them, samples are decoded in parallel threads.
+
         blank_id: The id of the RNNT blank token.
     """
 
@@ -1033,8 +1057,6 @@ class WER(Metric):
             target_lengths: an integer torch.Tensor of shape ``[Batch]``
             predictions_lengths: an integer torch.Tensor of shape ``[Batch]``
         """
-        words = 0
-        scores = 0
         references = []
         with torch.no_grad():
             # prediction_cpu_tensor = tensors[0].long().cpu()
@@ -1057,16 +1079,8 @@ class WER(Metric):
             logging.info(f"reference:{references[0]}")
             logging.info(f"predicted:{hypotheses[0]}")
 
-        for h, r in zip(hypotheses, references):
-            if self.use_cer:
-                h_list = list(h)
-                r_list = list(r)
-            else:
-                h_list = h.split()
-                r_list = r.split()
-            words += len(r_list)
-            # Compute Levenstein's distance
-            scores += editdistance.eval(h_list, r_list)
+        # Compute Levenstein's distance
+        scores, words = edit_distance_utils.edit_distance_totals(hypotheses, references, use_cer=self.use_cer)
 
         self.scores = torch.tensor(scores, device=self.scores.device, dtype=self.scores.dtype)
         self.words = torch.tensor(words, device=self.words.device, dtype=self.words.dtype)
@@ -1102,3 +1116,6 @@ class CTCDecodingConfig:
 
     # greedy decoding config
     greedy: ctc_greedy_decoding.GreedyCTCInferConfig = ctc_greedy_decoding.GreedyCTCInferConfig()
+
+    # beam decoding config
+    beam: ctc_beam_decoding.BeamCTCInferConfig = ctc_beam_decoding.BeamCTCInferConfig()
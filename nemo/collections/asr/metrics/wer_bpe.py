@@ -15,11 +15,11 @@
 from dataclasses import dataclass
 from typing import List
 
-import editdistance
 import torch
 from torchmetrics import Metric
 
 from nemo.collections.asr.metrics.wer import AbstractCTCDecoding, CTCDecodingConfig
+from nemo.collections.asr.parts.utils import edit_distance_utils
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
 from nemo.utils import logging
@@ -34,6 +34,8 @@ class CTCBPEDecoding(AbstractCTCDecoding):
             strategy: str value which represents the type of decoding that can occur.
                 Possible values are :
                 -   greedy (for greedy decoding).
+                -   beam (for CTC prefix beam search, optionally with word bonus and hotword boosting).
+                -   beam_lm (for CTC prefix beam search with a word level ARPA n-gram language model).
 
             compute_timestamps: A bool flag, which determines whether to compute the character/subword, or
                 word based timestamp mapping the output log-probabilities to discrite intervals of timestamps.
@@ -113,6 +115,20 @@ class CTCBPEDecoding(AbstractCTCDecoding):
                 preserve_frame_confidence: Same as above, overrides above value.
                 confidence_method: Same as above, overrides confidence_cfg.method.
 
+            "beam":
+                beam_size: int size of the beam.
+                return_best_hypothesis: If True, returns only the best hypothesis of each sample.
+                    Otherwise, returns NBestHypotheses with all the beams of each sample.
+                beam_prune_topk: Number of best tokens of each frame considered during beam search.
+                beam_prune_logp: Tokens with a lower log probability are not considered during beam search.
+                ngram_lm_model: Path to a word level ARPA n-gram language model. Required by `beam_lm`.
+                ngram_lm_alpha: Weight of the n-gram language model scores.
+                beam_beta: Bonus added for every word of a hypothesis.
+                hotwords: Optional list of words to boost.
+                hotword_weight: Bonus added for every hotword of a hypothesis.
+                num_workers: Number of processes decoding the samples of a batch in parallel with a language model,
+                    word bonus or hotwords. Without them, samples are decoded in parallel threads.
+
         tokenizer: NeMo tokenizer object, which inherits from TokenizerSpec.
     """
 
@@ -238,8 +254,6 @@ class WERBPE(Metric):
             target_lengths: an integer torch.Tensor of shape ``[Batch]``
             predictions_lengths: an integer torch.Tensor of shape ``[Batch]``
         """
-        words = 0
-        scores = 0
         references = []
         with torch.no_grad():
             targets_cpu_tensor = targets.long().cpu()
@@ -261,16 +275,8 @@ class WERBPE(Metric):
             logging.info(f"reference:{references[0]}")
             logging.info(f"predicted:{hypotheses[0]}")
 
-        for h, r in zip(hypotheses, references):
-            if self.use_cer:
-                h_list = list(h)
-                r_list = list(r)
-            else:
-                h_list = h.split()
-                r_list = r.split()
-            words += len(r_list)
-            # Compute Levenstein's distance
-            scores += editdistance.eval(h_list, r_list)
+        # Compute Levenstein's distance
+        scores, words = edit_distance_utils.edit_distance_totals(hypotheses, references, use_cer=self.use_cer)
 
         self.scores = torch.tensor(scores, device=self.scores.device, dtype=self.scores.dtype)
         self.words = torch.tensor(words, device=self.words.device, dtype=self.words.dtype)
@@ -16,6 +16,7 @@ from abc import ABC, abstractmethod
 from typing import List
 
 import torch
+from torch.utils.data import ChainDataset
 
 from nemo.core.classes import ModelPT
 from nemo.core.classes.common import PretrainedModelInfo
@@ -65,6 +66,22 @@ class ASRModel(ModelPT, ABC):
         list_of_models = model_utils.resolve_subclass_pretrained_model_info(cls)
         return list_of_models
 
+    def on_train_epoch_start(self):
+        """
+        Sets the epoch of train datasets which seed their order with it (e.g., DynamicBatchingDataset).
+        The hook runs in the main process before the dataloader iterator is created, so workers get the epoch.
+        """
+        if self._train_dl is None:
+            return
+
+        datasets = [self._train_dl.dataset]
+        while datasets:
+            dataset = datasets.pop()
+            if isinstance(dataset, ChainDataset):
+                datasets.extend(dataset.datasets)
+            elif hasattr(dataset, 'set_epoch'):
+                dataset.set_epoch(self.current_epoch)
+
     def add_auxiliary_losses(self, loss: torch.Tensor, reset_registry: bool = False) -> torch.Tensor:
         """
         Utility method to enable calculation of auxiliary losses for ASR training.
@@ -19,7 +19,7 @@ import shutil
 import tarfile
 import tempfile
 from copy import deepcopy
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import torch
 from omegaconf import DictConfig, OmegaConf
@@ -30,20 +30,29 @@ from nemo.collections.asr.metrics.der import score_labels
 from nemo.collections.asr.models.classification_models import EncDecClassificationModel
 from nemo.collections.asr.models.label_models import EncDecSpeakerLabelModel
 from nemo.collections.asr.parts.mixins.mixins import DiarizationMixin
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
 from nemo.collections.asr.parts.utils.speaker_utils import (
     audio_rttm_map,
     get_embs_and_timestamps,
+    get_offset_and_duration,
+    get_speech_ranges,
+    get_subsegments_from_ranges,
     get_uniqname_from_filepath,
+    get_vad_out_from_rttm_line,
     parse_scale_configs,
     perform_clustering,
+    read_rttm_lines,
     segments_manifest_to_subsegments_manifest,
     validate_vad_manifest,
     write_rttm2manifest,
 )
 from nemo.collections.asr.parts.utils.vad_utils import (
     generate_overlap_vad_seq,
+    generate_overlap_vad_seq_per_tensor,
     generate_vad_segment_table,
+    generate_vad_segment_table_per_tensor,
     get_vad_stream_status,
+    prepare_gen_segment_table,
     prepare_manifest,
 )
 from nemo.core.classes import Model
@@ -187,26 +196,18 @@ class ClusteringDiarizer(Model, DiarizationMixin):
         }
         self._speaker_model.setup_test_data(spk_dl_config)
 
-    def _run_vad(self, manifest_file):
+    def _get_vad_frame_predictions(self, manifest_file):
         """
-        Run voice activity detection. 
-        Get log probability of voice activity detection and smoothes using the post processing parameters. 
-        Using generated frame level predictions generated manifest file for later speaker embedding extraction.
-        input:
-        manifest_file (str) : Manifest file containing path to audio file and label as infer
-
+        Run the VAD model on the audio chunks in manifest_file and yield the frame level predictions of each chunk
+        together with the unique name of its audio file. Predictions of consecutive chunks of the same audio file
+        are trimmed so that they can be concatenated.
         """
-
-        shutil.rmtree(self._vad_dir, ignore_errors=True)
-        os.makedirs(self._vad_dir)
-
         self._vad_model = self._vad_model.to(self._device)
         self._vad_model.eval()
 
         time_unit = int(self._vad_window_length_in_sec / self._vad_shift_length_in_sec)
         trunc = int(time_unit / 2)
         trunc_l = time_unit - trunc
-        all_len = 0
         data = []
         for line in open(manifest_file, 'r', encoding='utf-8'):
             file = json.loads(line)['audio_filepath']
@@ -227,14 +228,27 @@ class ClusteringDiarizer(Model, DiarizationMixin):
                     to_save = pred[trunc_l:]
                 else:
                     to_save = pred
-                all_len += len(to_save)
-                outpath = os.path.join(self._vad_dir, data[i] + ".frame")
-                with open(outpath, "a", encoding='utf-8') as fout:
-                    for f in range(len(to_save)):
-                        fout.write('{0:0.4f}\n'.format(to_save[f]))
             del test_batch
-            if status[i] == 'end' or status[i] == 'single':
-                all_len = 0
+            yield data[i], to_save
+
+    def _run_vad(self, manifest_file):
+        """
+        Run voice activity detection. 
+        Get log probability of voice activity detection and smoothes using the post processing parameters. 
+        Using generated frame level predictions generated manifest file for later speaker embedding extraction.
+        input:
+        manifest_file (str) : Manifest file containing path to audio file and label as infer
+
+        """
+
+        shutil.rmtree(self._vad_dir, ignore_errors=True)
+        os.makedirs(self._vad_dir)
+
+        for uniq_name, to_save in self._get_vad_frame_predictions(manifest_file):
+            outpath = os.path.join(self._vad_dir, uniq_name + ".frame")
+            with open(outpath, "a", encoding='utf-8') as fout:
+                for f in range(len(to_save)):
+                    fout.write('{0:0.4f}\n'.format(to_save[f]))
 
         if not self._vad_params.smoothing:
             # Shift the window by 10ms to generate the frame and use the prediction of the window to represent the label for the frame;
@@ -289,32 +303,42 @@ class ClusteringDiarizer(Model, DiarizationMixin):
         )
         return None
 
+    def _prepare_vad_input(self) -> str:
+        """
+        Split the input audio files into chunks for the VAD model and set up its test dataloader.
+
+        Returns:
+            manifest_vad_input (str): Path to the manifest file of the audio chunks
+        """
+        self._auto_split = True
+        self._split_duration = 50
+        manifest_vad_input = self._diarizer_params.manifest_filepath
+
+        if self._auto_split:
+            logging.info("Split long audio file to avoid CUDA memory issue")
+            logging.debug("Try smaller split_duration if you still have CUDA memory issue")
+            config = {
+                'input': manifest_vad_input,
+                'window_length_in_sec': self._vad_window_length_in_sec,
+                'split_duration': self._split_duration,
+                'num_workers': self._cfg.num_workers,
+            }
+            manifest_vad_input = prepare_manifest(config)
+        else:
+            logging.warning(
+                "If you encounter CUDA memory issue, try splitting manifest entry by split_duration to avoid it."
+            )
+
+        self._setup_vad_test_data(manifest_vad_input)
+        return manifest_vad_input
+
     def _perform_speech_activity_detection(self):
         """
         Checks for type of speech activity detection from config. Choices are NeMo VAD,
         external vad manifest and oracle VAD (generates speech activity labels from provided RTTM files)
         """
         if self.has_vad_model:
-            self._auto_split = True
-            self._split_duration = 50
-            manifest_vad_input = self._diarizer_params.manifest_filepath
-
-            if self._auto_split:
-                logging.info("Split long audio file to avoid CUDA memory issue")
-                logging.debug("Try smaller split_duration if you still have CUDA memory issue")
-                config = {
-                    'input': manifest_vad_input,
-                    'window_length_in_sec': self._vad_window_length_in_sec,
-                    'split_duration': self._split_duration,
-                    'num_workers': self._cfg.num_workers,
-                }
-                manifest_vad_input = prepare_manifest(config)
-            else:
-                logging.warning(
-                    "If you encounter CUDA memory issue, try splitting manifest entry by split_duration to avoid it."
-                )
-
-            self._setup_vad_test_data(manifest_vad_input)
+            manifest_vad_input = self._prepare_vad_input()
             self._run_vad(manifest_vad_input)
 
         elif self._diarizer_params.vad.external_vad_manifest is not None:
@@ -379,6 +403,171 @@ class ClusteringDiarizer(Model, DiarizationMixin):
             pkl.dump(self.embeddings, open(self._embeddings_file, 'wb'))
             logging.info("Saved embedding files to {}".format(embedding_dir))
 
+    def _run_vad_in_memory(self, manifest_file: str) -> Dict[str, List[List[float]]]:
+        """
+        Run voice activity detection like `_run_vad`, but keep the frame level predictions, the smoothed
+        predictions and the speech segment tables in memory instead of writing them to `self._vad_dir`.
+        Values are rounded like in the intermediate files so that the speech segments are the same.
+
+        Args:
+            manifest_file (str): Manifest file containing path to audio file and label as infer
+
+        Returns:
+            vad_start_end_dict (dict): Start and end time of the raw VAD segments, indexed by unique ID
+        """
+        frame_preds = {}
+        for uniq_name, to_save in self._get_vad_frame_predictions(manifest_file):
+            frame_preds.setdefault(uniq_name, []).append(torch.round(to_save.float().cpu() * 1e4) / 1e4)
+
+        if not self._vad_params.smoothing:
+            frame_length_in_sec = self._vad_shift_length_in_sec
+        else:
+            frame_length_in_sec = 0.01
+            overlap_args = {
+                "overlap": self._vad_params.overlap,
+                "window_length_in_sec": self._vad_window_length_in_sec,
+                "shift_length_in_sec": self._vad_shift_length_in_sec,
+            }
+
+        vad_start_end_dict = {}
+        for uniq_name, preds in tqdm(frame_preds.items(), desc='creating speech segments', leave=True):
+            sequence = torch.cat(preds)
+            if self._vad_params.smoothing:
+                sequence = generate_overlap_vad_seq_per_tensor(sequence, overlap_args, self._vad_params.smoothing)
+                sequence = torch.round(sequence * 1e4) / 1e4
+            per_args = {"frame_length_in_sec": frame_length_in_sec, **self._vad_params}
+            _, per_args_float = prepare_gen_segment_table(sequence, per_args)
+            table = generate_vad_segment_table_per_tensor(sequence, per_args_float)
+            table = torch.round(table * 1e4) / 1e4
+            vad_start_end_dict[uniq_name] = [[float(row[0]), float(row[0] + row[2])] for row in table]
+        return vad_start_end_dict
+
+    def _get_speech_ranges_in_memory(self) -> Dict[str, List[List[float]]]:
+        """
+        In-memory version of `_perform_speech_activity_detection`. Speech segments from NeMo VAD, an external VAD
+        manifest or oracle VAD are returned instead of written to a manifest file. Sessions without any speech
+        are removed from `self.AUDIO_RTTM_MAP`, see `validate_vad_manifest`.
+
+        Returns:
+            speech_ranges (dict): Start and end time of the speech segments, indexed by unique ID
+        """
+        speech_ranges = {}
+        if self.has_vad_model:
+            manifest_vad_input = self._prepare_vad_input()
+            vad_start_end_dict = self._run_vad_in_memory(manifest_vad_input)
+            for uniq_id in self.AUDIO_RTTM_MAP:
+                if uniq_id not in vad_start_end_dict:
+                    logging.warning(f"no vad file found for {uniq_id} due to zero or negative duration")
+                elif len(vad_start_end_dict[uniq_id]) > 0:
+                    speech_ranges[uniq_id] = get_speech_ranges(
+                        self.AUDIO_RTTM_MAP, uniq_id, vad_start_end_dict[uniq_id]
+                    )
+        elif self._diarizer_params.vad.external_vad_manifest is not None:
+            # External VAD segments are used as they are, like in `_perform_speech_activity_detection`
+            with open(self._diarizer_params.vad.external_vad_manifest, 'r', encoding='utf-8') as manifest:
+                for line in manifest:
+                    dic = json.loads(line.strip())
+                    uniq_id = dic.get('uniq_id', None) or get_uniqname_from_filepath(dic['audio_filepath'])
+                    speech_ranges.setdefault(uniq_id, []).append([dic['offset'], dic['offset'] + dic['duration']])
+        elif self._diarizer_params.oracle_vad:
+            for uniq_id in self.AUDIO_RTTM_MAP:
+                vad_start_end_list_raw = []
+                for line in read_rttm_lines(self.AUDIO_RTTM_MAP[uniq_id]['rttm_filepath']):
+                    start, dur = get_vad_out_from_rttm_line(line)
+                    vad_start_end_list_raw.append([start, start + dur])
+                speech_ranges[uniq_id] = get_speech_ranges(self.AUDIO_RTTM_MAP, uniq_id, vad_start_end_list_raw)
+        else:
+            raise ValueError(
+                "Only one of diarizer.oracle_vad, vad.model_path or vad.external_vad_manifest must be passed from config"
+            )
+
+        for uniq_id in list(self.AUDIO_RTTM_MAP.keys()):
+            if not any(end - start > 0 for start, end in speech_ranges.get(uniq_id, [])):
+                speech_ranges.pop(uniq_id, None)
+                del self.AUDIO_RTTM_MAP[uniq_id]
+                logging.warning(
+                    f"{uniq_id} is ignored since the file does not contain any speech signal to be processed."
+                )
+        if len(self.AUDIO_RTTM_MAP) == 0:
+            raise ValueError("All files present in manifest contains silence, aborting next steps")
+        return speech_ranges
+
+    def _extract_embeddings_in_memory(self, speech_ranges: Dict[str, List[List[float]]]):
+        """
+        Extract speaker embeddings of all scales without subsegment manifests and dataloaders.
+        Each session is loaded from disk once, its subsegments are sliced from the loaded signal, and the
+        subsegments of each scale are batched across sessions. Shorter subsegments in a batch are repeated up to
+        the longest one, like in the collate function of the speaker model dataset.
+        Fills `self.multiscale_embeddings_and_timestamps` like `diarize` does with `_extract_embeddings`.
+
+        Args:
+            speech_ranges (dict): Start and end time of the speech segments, indexed by unique ID
+        """
+        logging.info("Extracting embeddings for Diarization")
+        self._speaker_model = self._speaker_model.to(self._device)
+        self._speaker_model.eval()
+
+        sample_rate = self._cfg.sample_rate
+        batch_size = self._cfg.get('batch_size')
+        scale_dict = self.multiscale_args_dict['scale_dict']
+        embs_list = {scale_idx: {} for scale_idx in scale_dict}
+        time_stamps = {scale_idx: {} for scale_idx in scale_dict}
+        pending = {scale_idx: [] for scale_idx in scale_dict}
+
+        def _forward_pending(scale_idx):
+            signals = [signal for _, signal in pending[scale_idx]]
+            fixed_length = max(signal.shape[0] for signal in signals)
+            audio_signal = []
+            for signal in signals:
+                repeat, rem = fixed_length // signal.shape[0], fixed_length % signal.shape[0]
+                audio_signal.append(torch.cat(repeat * [signal] + [signal[signal.shape[0] - rem :]]))
+            audio_signal = torch.stack(audio_signal).to(self._device)
+            audio_signal_len = torch.full((len(signals),), fixed_length, dtype=torch.long, device=self._device)
+            with autocast(), torch.no_grad():
+                _, embs = self._speaker_model.forward(input_signal=audio_signal, input_signal_length=audio_signal_len)
+                embs = embs.view(-1, embs.shape[-1]).cpu().float()
+            for (uniq_id, _), emb in zip(pending[scale_idx], embs):
+                embs_list[scale_idx][uniq_id].append(emb)
+            pending[scale_idx] = []
+
+        for uniq_id in tqdm(self.AUDIO_RTTM_MAP, desc='extract embeddings', leave=True):
+            offset, duration = get_offset_and_duration(self.AUDIO_RTTM_MAP, uniq_id)
+            audio = AudioSegment.from_file(
+                self.AUDIO_RTTM_MAP[uniq_id]['audio_filepath'],
+                target_sr=sample_rate,
+                offset=offset,
+                duration=duration,
+            )
+            samples = torch.tensor(audio.samples, dtype=torch.float)
+            for scale_idx, (window, shift) in scale_dict.items():
+                subsegments = get_subsegments_from_ranges(speech_ranges[uniq_id], window=window, shift=shift)
+                embs_list[scale_idx][uniq_id] = []
+                time_stamps[scale_idx][uniq_id] = []
+                for start, dur in subsegments:
+                    start_idx = int((start - offset) * sample_rate)
+                    signal = samples[start_idx : start_idx + int(dur * sample_rate)]
+                    if signal.shape[0] == 0:
+                        continue
+                    pending[scale_idx].append((uniq_id, signal))
+                    time_stamps[scale_idx][uniq_id].append([start, start + dur])
+                    if len(pending[scale_idx]) == batch_size:
+                        _forward_pending(scale_idx)
+
+        for scale_idx in scale_dict:
+            if len(pending[scale_idx]) > 0:
+                _forward_pending(scale_idx)
+            # like in the subsegment manifests, sessions without subsegments are left out, they are not clustered
+            embeddings = {uniq_id: torch.stack(embs) for uniq_id, embs in embs_list[scale_idx].items() if embs}
+            scale_time_stamps = {uniq_id: time_stamps[scale_idx][uniq_id] for uniq_id in embeddings}
+            self.multiscale_embeddings_and_timestamps[scale_idx] = [embeddings, scale_time_stamps]
+
+            if self._speaker_params.save_embeddings:
+                embedding_dir = os.path.join(self._speaker_dir, 'embeddings')
+                os.makedirs(embedding_dir, exist_ok=True)
+                self._embeddings_file = os.path.join(embedding_dir, f'subsegments_scale{scale_idx}_embeddings.pkl')
+                pkl.dump(embeddings, open(self._embeddings_file, 'wb'))
+                logging.info("Saved embedding files to {}".format(embedding_dir))
+
     def path2audio_files_to_manifest(self, paths2audio_files, manifest_filepath):
         with open(manifest_filepath, 'w', encoding='utf-8') as fp:
             for audio_file in paths2audio_files:
@@ -416,20 +605,25 @@ class ClusteringDiarizer(Model, DiarizationMixin):
         out_rttm_dir = os.path.join(self._out_dir, 'pred_rttms')
         os.makedirs(out_rttm_dir, exist_ok=True)
 
-        # Speech Activity Detection
-        self._perform_speech_activity_detection()
+        if self._diarizer_params.get('in_memory_pipeline', False):
+            # Speech Activity Detection, Segmentation and Embedding Extraction without intermediate files
+            speech_ranges = self._get_speech_ranges_in_memory()
+            self._extract_embeddings_in_memory(speech_ranges)
+        else:
+            # Speech Activity Detection
+            self._perform_speech_activity_detection()
 
-        # Segmentation
-        scales = self.multiscale_args_dict['scale_dict'].items()
-        for scale_idx, (window, shift) in scales:
+            # Segmentation
+            scales = self.multiscale_args_dict['scale_dict'].items()
+            for scale_idx, (window, shift) in scales:
 
-            # Segmentation for the current scale (scale_idx)
-            self._run_segmentation(window, shift, scale_tag=f'_scale{scale_idx}')
+                # Segmentation for the current scale (scale_idx)
+                self._run_segmentation(window, shift, scale_tag=f'_scale{scale_idx}')
 
-            # Embedding Extraction for the current scale (scale_idx)
-            self._extract_embeddings(self.subsegments_manifest_path, scale_idx, len(scales))
+                # Embedding Extraction for the current scale (scale_idx)
+                self._extract_embeddings(self.subsegments_manifest_path, scale_idx, len(scales))
 
-            self.multiscale_embeddings_and_timestamps[scale_idx] = [self.embeddings, self.time_stamps]
+                self.multiscale_embeddings_and_timestamps[scale_idx] = [self.embeddings, self.time_stamps]
 
         embs_and_timestamps = get_embs_and_timestamps(
             self.multiscale_embeddings_and_timestamps, self.multiscale_args_dict
@@ -441,6 +635,7 @@ class ClusteringDiarizer(Model, DiarizationMixin):
             AUDIO_RTTM_MAP=self.AUDIO_RTTM_MAP,
             out_rttm_dir=out_rttm_dir,
             clustering_params=self._cluster_params,
+            num_workers=self._cfg.num_workers,
         )
 
         # Scoring
@@ -56,12 +56,24 @@ class ASRDatasetConfig(nemo.core.classes.dataset.DatasetConfig):
     pad_id: int = 0
     use_start_end_token: bool = False
     return_sample_id: Optional[bool] = False
+    resample_backend: str = 'librosa'
+
+    # transcript tokenization params
+    tokenization_num_workers: int = 0
+    tokenization_cache_dir: Optional[str] = None
 
     # bucketing params
     bucketing_strategy: str = "synced_randomized"
     bucketing_batch_size: Optional[Any] = None
     bucketing_weights: Optional[List[int]] = None
 
+    # duration bucketing params, bins are used by non-tarred datasets and a sorted buffer by tarred datasets
+    bucketing_batch_duration: Optional[float] = None
+    bucketing_duration_bins: Optional[List[float]] = None
+    bucketing_num_buckets: int = 10
+    bucketing_batch_tokens: Optional[int] = None
+    bucketing_buffer_size: int = 1000
+
 
 @dataclass
 class EncDecCTCConfig(model_cfg.ModelConfig):
@@ -180,6 +180,16 @@ class EncDecCTCModelBPE(EncDecCTCModel, ASRBPEMixin):
         else:
             collate_fn = dataset.datasets[0].collate_fn
 
+        dataloader = audio_to_text_dataset.get_duration_bucketing_dataloader(
+            config=config,
+            dataset=dataset,
+            collate_fn=collate_fn,
+            global_rank=self.global_rank,
+            world_size=self.world_size,
+        )
+        if dataloader is not None:
+            return dataloader
+
         return torch.utils.data.DataLoader(
             dataset=dataset,
             batch_size=config['batch_size'],
@@ -28,7 +28,7 @@ from nemo.collections.asr.data.audio_to_text_dali import DALIOutputs
 from nemo.collections.asr.losses.ctc import CTCLoss
 from nemo.collections.asr.metrics.wer import WER, CTCDecoding, CTCDecodingConfig
 from nemo.collections.asr.models.asr_model import ASRModel, ExportableEncDecModel
-from nemo.collections.asr.parts.mixins import ASRModuleMixin
+from nemo.collections.asr.parts.mixins import ASRModuleMixin, TranscriptionMixin
 from nemo.collections.asr.parts.preprocessing.perturb import process_augmentations
 from nemo.collections.asr.parts.utils.audio_utils import ChannelSelectorType
 from nemo.core.classes.common import PretrainedModelInfo, typecheck
@@ -39,7 +39,7 @@ from nemo.utils import logging
 __all__ = ['EncDecCTCModel']
 
 
-class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
+class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin, TranscriptionMixin):
     """Base class for encoder decoder CTC-based models."""
 
     def __init__(self, cfg: DictConfig, trainer: Trainer = None):
@@ -116,6 +116,7 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
         return_hypotheses: bool = False,
         num_workers: int = 0,
         channel_selector: Optional[ChannelSelectorType] = None,
+        max_batch_duration: Optional[float] = None,
     ) -> List[str]:
         """
         Uses greedy decoding to transcribe audio files. Use this method for debugging and prototyping.
@@ -131,6 +132,9 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
                 With hypotheses can do some postprocessing like getting timestamp or rescoring
             num_workers: (int) number of workers for DataLoader
             channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`.
+            max_batch_duration: (float) If set, files are sorted by duration (read from their headers) and batched
+                such that the padded duration of a batch is at most max_batch_duration seconds and the number
+                of files at most batch_size. Results are still returned in the order of paths2audio_files.
 
         Returns:
             A list of transcriptions (or raw log probabilities if logprobs is True) in the same order as paths2audio_files
@@ -147,6 +151,18 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
         if num_workers is None:
             num_workers = min(batch_size, os.cpu_count() - 1)
 
+        if max_batch_duration is not None:
+            hypotheses, _ = self._transcribe_sorted_by_duration(
+                paths2audio_files,
+                max_batch_duration=max_batch_duration,
+                batch_size=batch_size,
+                return_hypotheses=return_hypotheses,
+                logprobs=logprobs,
+                num_workers=num_workers,
+                channel_selector=channel_selector,
+            )
+            return hypotheses
+
         # We will store transcriptions here
         hypotheses = []
         all_hypotheses = []
@@ -184,36 +200,20 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
 
                 temporary_datalayer = self._setup_transcribe_dataloader(config)
                 for test_batch in tqdm(temporary_datalayer, desc="Transcribing"):
-                    logits, logits_len, greedy_predictions = self.forward(
-                        input_signal=test_batch[0].to(device), input_signal_length=test_batch[1].to(device)
+                    current_hypotheses, _ = self._transcribe_batch(
+                        test_batch[0].to(device),
+                        test_batch[1].to(device),
+                        return_hypotheses=return_hypotheses,
+                        logprobs=logprobs,
                     )
-                    if logprobs:
-                        # dump log probs per file
-                        for idx in range(logits.shape[0]):
-                            lg = logits[idx][: logits_len[idx]]
-                            hypotheses.append(lg.cpu().numpy())
-                    else:
-                        current_hypotheses, all_hyp = self.decoding.ctc_decoder_predictions_tensor(
-                            logits, decoder_lengths=logits_len, return_hypotheses=return_hypotheses,
-                        )
-
-                        if return_hypotheses:
-                            # dump log probs per file
-                            for idx in range(logits.shape[0]):
-                                current_hypotheses[idx].y_sequence = logits[idx][: logits_len[idx]]
-                                if current_hypotheses[idx].alignments is None:
-                                    current_hypotheses[idx].alignments = current_hypotheses[idx].y_sequence
-
-                        hypotheses += current_hypotheses
-
-                        # Keep following for beam search integration
-                        # if all_hyp is not None:
-                        #     all_hypotheses += all_hyp
-                        # else:
-                        #     all_hypotheses += current_hypotheses
-
-                    del greedy_predictions
-                    del logits
+                    hypotheses += current_hypotheses
+
+                    # Keep following for beam search integration
+                    # if all_hyp is not None:
+                    #     all_hypotheses += all_hyp
+                    # else:
+                    #     all_hypotheses += current_hypotheses
+
                     del test_batch
         finally:
             # set mode back to its original value
@@ -227,6 +227,35 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
 
         return hypotheses
 
+    def _transcribe_batch(
+        self,
+        input_signal: torch.Tensor,
+        input_signal_length: torch.Tensor,
+        return_hypotheses: bool = False,
+        logprobs: bool = False,
+    ):
+        logits, logits_len, greedy_predictions = self.forward(
+            input_signal=input_signal, input_signal_length=input_signal_length
+        )
+        del greedy_predictions
+
+        if logprobs:
+            # dump log probs per file
+            return [logits[idx][: logits_len[idx]].cpu().numpy() for idx in range(logits.shape[0])], None
+
+        current_hypotheses, all_hyp = self.decoding.ctc_decoder_predictions_tensor(
+            logits, decoder_lengths=logits_len, return_hypotheses=return_hypotheses,
+        )
+
+        if return_hypotheses:
+            # dump log probs per file
+            for idx in range(logits.shape[0]):
+                current_hypotheses[idx].y_sequence = logits[idx][: logits_len[idx]]
+                if current_hypotheses[idx].alignments is None:
+                    current_hypotheses[idx].alignments = current_hypotheses[idx].y_sequence
+
+        return current_hypotheses, all_hyp
+
     def change_vocabulary(self, new_vocabulary: List[str], decoding_cfg: Optional[DictConfig] = None):
         """
         Changes vocabulary used during CTC decoding process. Use this method when fine-tuning on from pre-trained model.
@@ -415,6 +444,16 @@ class EncDecCTCModel(ASRModel, ExportableEncDecModel, ASRModuleMixin):
         else:
             collate_fn = dataset.datasets[0].collate_fn
 
+        dataloader = audio_to_text_dataset.get_duration_bucketing_dataloader(
+            config=config,
+            dataset=dataset,
+            collate_fn=collate_fn,
+            global_rank=self.global_rank,
+            world_size=self.world_size,
+        )
+        if dataloader is not None:
+            return dataloader
+
         return torch.utils.data.DataLoader(
             dataset=dataset,
             batch_size=config['batch_size'],
@@ -97,6 +97,7 @@ class EncDecHybridRNNTCTCModel(EncDecRNNTModel, ASRBPEMixin):
         partial_hypothesis: Optional[List['Hypothesis']] = None,
         num_workers: int = 0,
         channel_selector: Optional[ChannelSelectorType] = None,
+        max_batch_duration: Optional[float] = None,
     ) -> (List[str], Optional[List['Hypothesis']]):
         """
         Uses greedy decoding to transcribe audio files. Use this method for debugging and prototyping.
@@ -112,15 +113,38 @@ class EncDecHybridRNNTCTCModel(EncDecRNNTModel, ASRBPEMixin):
         With hypotheses can do some postprocessing like getting timestamp or rescoring
             num_workers: (int) number of workers for DataLoader
             channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+            max_batch_duration: (float) If set, files are sorted by duration (read from their headers) and batched
+        such that the padded duration of a batch is at most max_batch_duration seconds and the number of files
+        at most batch_size. Results are still returned in the order of paths2audio_files.
 
         Returns:
             A list of transcriptions in the same order as paths2audio_files. Will also return
         """
         if self.use_rnnt_decoder:
-            return super().transcribe(**kwargs)
+            return super().transcribe(
+                paths2audio_files=paths2audio_files,
+                batch_size=batch_size,
+                return_hypotheses=return_hypotheses,
+                partial_hypothesis=partial_hypothesis,
+                num_workers=num_workers,
+                channel_selector=channel_selector,
+                max_batch_duration=max_batch_duration,
+            )
 
         if paths2audio_files is None or len(paths2audio_files) == 0:
             return {}
+
+        if max_batch_duration is not None:
+            if partial_hypothesis is not None:
+                raise ValueError("`partial_hypothesis` is not supported together with `max_batch_duration`.")
+            return self._transcribe_sorted_by_duration(
+                paths2audio_files,
+                max_batch_duration=max_batch_duration,
+                batch_size=batch_size,
+                return_hypotheses=return_hypotheses,
+                num_workers=0 if num_workers is None else num_workers,
+                channel_selector=channel_selector,
+            )
         # We will store transcriptions here
         hypotheses = []
         all_hypotheses = []
@@ -165,21 +189,9 @@ class EncDecHybridRNNTCTCModel(EncDecRNNTModel, ASRBPEMixin):
 
                 temporary_datalayer = self._setup_transcribe_dataloader(config)
                 for test_batch in tqdm(temporary_datalayer, desc="Transcribing"):
-                    encoded, encoded_len = self.forward(
-                        input_signal=test_batch[0].to(device), input_signal_length=test_batch[1].to(device)
-                    )
-
-                    logits = self.ctc_decoder(encoder_output=encoded)
-                    best_hyp, all_hyp = self.ctc_decoding.ctc_decoder_predictions_tensor(
-                        logits, encoded_len, return_hypotheses=return_hypotheses,
+                    best_hyp, all_hyp = self._transcribe_batch(
+                        test_batch[0].to(device), test_batch[1].to(device), return_hypotheses=return_hypotheses,
                     )
-                    if return_hypotheses:
-                        # dump log probs per file
-                        for idx in range(logits.shape[0]):
-                            best_hyp[idx].y_sequence = logits[idx][: logits_len[idx]]
-                            if best_hyp[idx].alignments is None:
-                                best_hyp[idx].alignments = best_hyp[idx].y_sequence
-                    del logits
 
                     hypotheses += best_hyp
                     if all_hyp is not None:
@@ -187,7 +199,6 @@ class EncDecHybridRNNTCTCModel(EncDecRNNTModel, ASRBPEMixin):
                     else:
                         all_hypotheses += best_hyp
 
-                    del encoded
                     del test_batch
         finally:
             # set mode back to its original value
@@ -204,6 +215,41 @@ class EncDecHybridRNNTCTCModel(EncDecRNNTModel, ASRBPEMixin):
                     self.ctc_decoder.unfreeze()
         return hypotheses, all_hypotheses
 
+    def _transcribe_batch(
+        self,
+        input_signal: torch.Tensor,
+        input_signal_length: torch.Tensor,
+        return_hypotheses: bool = False,
+        logprobs: bool = False,
+        partial_hypotheses: Optional[List['Hypothesis']] = None,
+    ):
+        if self.use_rnnt_decoder:
+            return super()._transcribe_batch(
+                input_signal,
+                input_signal_length,
+                return_hypotheses=return_hypotheses,
+                logprobs=logprobs,
+                partial_hypotheses=partial_hypotheses,
+            )
+
+        encoded, encoded_len = self.forward(input_signal=input_signal, input_signal_length=input_signal_length)
+        logits = self.ctc_decoder(encoder_output=encoded)
+
+        if logprobs:
+            # dump log probs per file
+            return [logits[idx][: encoded_len[idx]].cpu().numpy() for idx in range(logits.shape[0])], None
+
+        best_hyp, all_hyp = self.ctc_decoding.ctc_decoder_predictions_tensor(
+            logits, encoded_len, return_hypotheses=return_hypotheses,
+        )
+        if return_hypotheses:
+            # dump log probs per file
+            for idx in range(logits.shape[0]):
+                best_hyp[idx].y_sequence = logits[idx][: encoded_len[idx]]
+                if best_hyp[idx].alignments is None:
+                    best_hyp[idx].alignments = best_hyp[idx].y_sequence
+        return best_hyp, all_hyp
+
     def change_vocabulary(
         self,
         new_vocabulary: List[str],
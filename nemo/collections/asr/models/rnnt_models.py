@@ -30,7 +30,7 @@ from nemo.collections.asr.losses.rnnt import RNNTLoss, resolve_rnnt_default_loss
 from nemo.collections.asr.metrics.rnnt_wer import RNNTWER, RNNTDecoding, RNNTDecodingConfig
 from nemo.collections.asr.models.asr_model import ASRModel
 from nemo.collections.asr.modules.rnnt import RNNTDecoderJoint
-from nemo.collections.asr.parts.mixins import ASRModuleMixin
+from nemo.collections.asr.parts.mixins import ASRModuleMixin, TranscriptionMixin
 from nemo.collections.asr.parts.preprocessing.perturb import process_augmentations
 from nemo.collections.asr.parts.utils.audio_utils import ChannelSelectorType
 from nemo.core.classes import Exportable
@@ -40,7 +40,7 @@ from nemo.core.neural_types import AcousticEncodedRepresentation, AudioSignal, L
 from nemo.utils import logging
 
 
-class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
+class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable, TranscriptionMixin):
     """Base class for encoder decoder RNNT-based models."""
 
     def __init__(self, cfg: DictConfig, trainer: Trainer = None):
@@ -217,6 +217,7 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
         partial_hypothesis: Optional[List['Hypothesis']] = None,
         num_workers: int = 0,
         channel_selector: Optional[ChannelSelectorType] = None,
+        max_batch_duration: Optional[float] = None,
     ) -> Tuple[List[str], Optional[List['Hypothesis']]]:
         """
         Uses greedy decoding to transcribe audio files. Use this method for debugging and prototyping.
@@ -232,12 +233,28 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
         With hypotheses can do some postprocessing like getting timestamp or rescoring
             num_workers: (int) number of workers for DataLoader
             channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+            max_batch_duration: (float) If set, files are sorted by duration (read from their headers) and batched
+        such that the padded duration of a batch is at most max_batch_duration seconds and the number of files
+        at most batch_size. Results are still returned in the order of paths2audio_files.
 
         Returns:
             A list of transcriptions in the same order as paths2audio_files. Will also return
         """
         if paths2audio_files is None or len(paths2audio_files) == 0:
             return {}
+
+        if max_batch_duration is not None:
+            if partial_hypothesis is not None:
+                raise ValueError("`partial_hypothesis` is not supported together with `max_batch_duration`.")
+            return self._transcribe_sorted_by_duration(
+                paths2audio_files,
+                max_batch_duration=max_batch_duration,
+                batch_size=batch_size,
+                return_hypotheses=return_hypotheses,
+                num_workers=0 if num_workers is None else num_workers,
+                channel_selector=channel_selector,
+            )
+
         # We will store transcriptions here
         hypotheses = []
         all_hypotheses = []
@@ -279,12 +296,9 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
 
                 temporary_datalayer = self._setup_transcribe_dataloader(config)
                 for test_batch in tqdm(temporary_datalayer, desc="Transcribing"):
-                    encoded, encoded_len = self.forward(
-                        input_signal=test_batch[0].to(device), input_signal_length=test_batch[1].to(device)
-                    )
-                    best_hyp, all_hyp = self.decoding.rnnt_decoder_predictions_tensor(
-                        encoded,
-                        encoded_len,
+                    best_hyp, all_hyp = self._transcribe_batch(
+                        test_batch[0].to(device),
+                        test_batch[1].to(device),
                         return_hypotheses=return_hypotheses,
                         partial_hypotheses=partial_hypothesis,
                     )
@@ -295,7 +309,6 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
                     else:
                         all_hypotheses += best_hyp
 
-                    del encoded
                     del test_batch
         finally:
             # set mode back to its original value
@@ -310,6 +323,23 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
                 self.joint.unfreeze()
         return hypotheses, all_hypotheses
 
+    def _transcribe_batch(
+        self,
+        input_signal: torch.Tensor,
+        input_signal_length: torch.Tensor,
+        return_hypotheses: bool = False,
+        logprobs: bool = False,
+        partial_hypotheses: Optional[List['Hypothesis']] = None,
+    ):
+        if logprobs:
+            raise ValueError(f"{self.__class__.__name__} does not support returning log probabilities.")
+
+        encoded, encoded_len = self.forward(input_signal=input_signal, input_signal_length=input_signal_length)
+        best_hyp, all_hyp = self.decoding.rnnt_decoder_predictions_tensor(
+            encoded, encoded_len, return_hypotheses=return_hypotheses, partial_hypotheses=partial_hypotheses,
+        )
+        return best_hyp, all_hyp
+
     def change_vocabulary(self, new_vocabulary: List[str], decoding_cfg: Optional[DictConfig] = None):
         """
         Changes vocabulary used during RNNT decoding process. Use this method when fine-tuning a pre-trained model.
@@ -527,6 +557,16 @@ class EncDecRNNTModel(ASRModel, ASRModuleMixin, Exportable):
         else:
             collate_fn = dataset.datasets[0].collate_fn
 
+        dataloader = audio_to_text_dataset.get_duration_bucketing_dataloader(
+            config=config,
+            dataset=dataset,
+            collate_fn=collate_fn,
+            global_rank=self.global_rank,
+            world_size=self.world_size,
+        )
+        if dataloader is not None:
+            return dataloader
+
         return torch.utils.data.DataLoader(
             dataset=dataset,
             batch_size=config['batch_size'],
@@ -0,0 +1,305 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+import torch
+from tqdm.auto import tqdm
+
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.asr.parts.utils.audio_utils import ChannelSelectorType
+from nemo.utils import logging
+
+# a path to an audio file, encoded audio file contents, or samples at the sample rate of the model
+AudioInputType = Union[str, bytes, io.IOBase, np.ndarray, torch.Tensor]
+
+
+def load_audio_input(
+    audio: AudioInputType, sample_rate: int, channel_selector: Optional[ChannelSelectorType] = None
+) -> np.ndarray:
+    """Loads a single transcription input as float32 samples at sample_rate.
+
+    Args:
+        audio: A path to an audio file, a bytes object or a file-like object with the contents of an audio file,
+            or a numpy array / torch tensor with samples [num_samples] or [num_samples, num_channels] which are
+            expected to be at sample_rate already.
+        sample_rate: Sample rate of the model. Audio files are resampled to it.
+        channel_selector: Select a single channel or a subset of channels from multi-channel audio.
+
+    Returns:
+        A numpy array with samples of the selected channels.
+    """
+    if isinstance(audio, torch.Tensor):
+        audio = audio.detach().cpu().numpy()
+
+    if isinstance(audio, np.ndarray):
+        segment = AudioSegment(audio, sample_rate, channel_selector=channel_selector)
+    else:
+        if isinstance(audio, (bytes, bytearray)):
+            audio = io.BytesIO(audio)
+        segment = AudioSegment.from_file(audio, target_sr=sample_rate, channel_selector=channel_selector)
+
+    return segment.samples
+
+
+def pad_audio_batch(signals: List[np.ndarray]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Pads a list of signals along time and returns them with the lengths [B].
+
+    Signals are [num_samples] or [num_samples, num_channels] like the samples of AudioSegment, and are returned
+    as a tensor [B, T] or, for multi-channel signals, [B, C, T] with time on the last axis.
+    """
+    signals = [torch.as_tensor(np.ascontiguousarray(signal.T), dtype=torch.float32) for signal in signals]
+    lengths = torch.tensor([signal.size(-1) for signal in signals], dtype=torch.long)
+    if len(signals) == 0:
+        return torch.zeros(0, 0, dtype=torch.float32), lengths
+    max_len = int(lengths.max())
+    batch = torch.stack([torch.nn.functional.pad(signal, (0, max_len - signal.size(-1))) for signal in signals])
+    return batch, lengths
+
+
+def get_audio_duration(audio_file: str) -> float:
+    """Returns the duration of an audio file in seconds, reading only its header if it is supported by soundfile."""
+    try:
+        return sf.info(audio_file).duration
+    except RuntimeError:
+        return AudioSegment.from_file(audio_file).duration
+
+
+def make_duration_batches(
+    durations: List[float], max_batch_duration: float, max_batch_size: Optional[int] = None
+) -> List[List[int]]:
+    """Groups inputs sorted by duration into batches with a budget on the padded duration.
+
+    Inputs are sorted by decreasing duration, so the first batch is the most memory intensive one, and each
+    batch is filled while the number of inputs times the duration of its longest input does not exceed
+    `max_batch_duration`. An input longer than `max_batch_duration` forms its own batch.
+
+    Args:
+        durations: Duration of each input in seconds.
+        max_batch_duration: Maximum padded duration of a batch in seconds.
+        max_batch_size: Optional maximum number of inputs in a batch.
+
+    Returns:
+        A list of batches, each a list of indices into `durations`.
+    """
+    order = np.argsort(-np.asarray(durations, dtype=np.float64), kind='stable')
+    batches = []
+    batch = []
+    for idx in order.tolist():
+        # inputs are sorted, so the first input of a batch is the longest one
+        if batch and (
+            durations[batch[0]] * (len(batch) + 1) > max_batch_duration
+            or (max_batch_size is not None and len(batch) >= max_batch_size)
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(idx)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TranscriptionMixin(ABC):
+    """Transcription of in-memory audio for ASR models.
+
+    Unlike `transcribe`, inputs are neither written to a temporary manifest nor loaded by a new DataLoader.
+    Audio is loaded in the calling process, padded into batches and passed through the model (including its
+    preprocessor) directly, so the per-call overhead is small enough for services that transcribe many
+    small requests.
+
+    Models implement `_transcribe_batch`, which decodes a padded batch of audio signals.
+    """
+
+    @abstractmethod
+    def _transcribe_batch(
+        self,
+        input_signal: torch.Tensor,
+        input_signal_length: torch.Tensor,
+        return_hypotheses: bool = False,
+        logprobs: bool = False,
+    ) -> Tuple[List[Any], Optional[List[Any]]]:
+        """Transcribes a batch of audio signals on the device of the model.
+
+        Args:
+            input_signal: Tensor [B, T] with padded audio signals at the sample rate of the model.
+            input_signal_length: Tensor [B] with the lengths of the audio signals.
+            return_hypotheses: Return hypotheses instead of text.
+            logprobs: Return log probabilities instead of text, if supported by the model.
+
+        Returns:
+            A tuple (results, all_results) with a result for each signal and, if available, all hypotheses
+            for each signal (e.g., from beam search), otherwise None.
+        """
+        raise NotImplementedError()
+
+    @contextmanager
+    def transcription_mode(self):
+        """Context manager which prepares the model for inference and restores its state on exit.
+
+        Disables dither and padding of the preprocessor and switches the model to evaluation mode.
+        `transcribe_audio` enters it only while a batch is decoded. It can wrap several calls to
+        `transcribe_audio` to avoid the setup on every batch, and then stays active until it is exited.
+        """
+        if getattr(self, '_in_transcription_mode', False):
+            yield
+            return
+
+        mode = self.training
+        dither_value = self.preprocessor.featurizer.dither
+        pad_to_value = self.preprocessor.featurizer.pad_to
+        logging_level = logging.get_verbosity()
+        try:
+            self._in_transcription_mode = True
+            self.preprocessor.featurizer.dither = 0.0
+            self.preprocessor.featurizer.pad_to = 0
+            # Switch model to evaluation mode
+            self.eval()
+            logging.set_verbosity(logging.WARNING)
+            yield
+        finally:
+            # set mode back to its original value
+            self.train(mode=mode)
+            self.preprocessor.featurizer.dither = dither_value
+            self.preprocessor.featurizer.pad_to = pad_to_value
+            logging.set_verbosity(logging_level)
+            self._in_transcription_mode = False
+
+    def transcribe_audio(
+        self,
+        audio: Iterable[AudioInputType],
+        batch_size: int = 4,
+        max_batch_duration: Optional[float] = None,
+        return_hypotheses: bool = False,
+        channel_selector: Optional[ChannelSelectorType] = None,
+    ) -> Iterator[Any]:
+        """
+        Transcribes audio from memory, file-like objects or paths without writing a manifest.
+
+        Inputs are consumed lazily from `audio`, which can be a generator, and are grouped into batches of at
+        most `batch_size` items and, if `max_batch_duration` is set, at most `max_batch_duration` seconds of
+        padded audio. Results are yielded in input order as soon as the batch containing them is decoded.
+
+        Args:
+            audio: An iterable of inputs. Each input is a path to an audio file, a bytes object or file-like
+                object with the contents of an audio file, or a numpy array / torch tensor with samples at
+                the sample rate of the model.
+            batch_size: (int) maximum number of inputs in a batch.
+            max_batch_duration: (float) maximum duration in seconds of a padded batch (i.e., number of inputs
+                times the duration of the longest one). A single input longer than this forms its own batch.
+            return_hypotheses: (bool) Either return hypotheses or text.
+            channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+
+        Returns:
+            A generator of transcriptions (or hypotheses), one for each input.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+        sample_rate = self.preprocessor._sample_rate
+        max_batch_samples = None if max_batch_duration is None else max_batch_duration * sample_rate
+
+        def transcribe(signals):
+            # the model is set up for inference only while the batch is decoded, not while results are consumed
+            with self.transcription_mode():
+                return self._transcribe_signals(signals, return_hypotheses=return_hypotheses)[0]
+
+        signals = []
+        max_len = 0
+        for item in audio:
+            signal = load_audio_input(item, sample_rate=sample_rate, channel_selector=channel_selector)
+            if signals and max_batch_samples is not None:
+                if max(max_len, len(signal)) * (len(signals) + 1) > max_batch_samples:
+                    yield from transcribe(signals)
+                    signals, max_len = [], 0
+
+            signals.append(signal)
+            max_len = max(max_len, len(signal))
+            if len(signals) == batch_size:
+                yield from transcribe(signals)
+                signals, max_len = [], 0
+
+        if signals:
+            yield from transcribe(signals)
+
+    def _transcribe_signals(
+        self, signals: List[np.ndarray], return_hypotheses: bool = False, logprobs: bool = False
+    ) -> Tuple[List[Any], Optional[List[Any]]]:
+        """Pads a list of signals, moves them to the device of the model and transcribes them."""
+        device = next(self.parameters()).device
+        input_signal, input_signal_length = pad_audio_batch(signals)
+        with torch.no_grad():
+            return self._transcribe_batch(
+                input_signal.to(device),
+                input_signal_length.to(device),
+                return_hypotheses=return_hypotheses,
+                logprobs=logprobs,
+            )
+
+    def _transcribe_sorted_by_duration(
+        self,
+        paths2audio_files: List[str],
+        max_batch_duration: float,
+        batch_size: Optional[int] = None,
+        return_hypotheses: bool = False,
+        logprobs: bool = False,
+        num_workers: int = 0,
+        channel_selector: Optional[ChannelSelectorType] = None,
+    ) -> Tuple[List[Any], List[Any]]:
+        """Transcribes audio files in batches of similar duration and returns results in the original order.
+
+        Durations are read from the headers of the files, files are sorted by duration and batched with
+        `make_duration_batches`, so short files are not padded to the length of a long one.
+
+        Args:
+            paths2audio_files: (a list) of paths to audio files.
+            max_batch_duration: (float) maximum padded duration of a batch in seconds.
+            batch_size: (int) optional maximum number of files in a batch.
+            return_hypotheses: (bool) Either return hypotheses or text.
+            logprobs: (bool) Return log probabilities instead of text, if supported by the model.
+            num_workers: (int) number of threads used to load the audio files of a batch.
+            channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+
+        Returns:
+            A tuple (results, all_results) with one entry for each file in the order of paths2audio_files.
+            all_results contains all hypotheses of each file if the decoding strategy provides them,
+            otherwise it is the same as results.
+        """
+        sample_rate = self.preprocessor._sample_rate
+        durations = [get_audio_duration(audio_file) for audio_file in paths2audio_files]
+        batches = make_duration_batches(durations, max_batch_duration=max_batch_duration, max_batch_size=batch_size)
+
+        def load(idx):
+            return load_audio_input(paths2audio_files[idx], sample_rate=sample_rate, channel_selector=channel_selector)
+
+        results = [None] * len(paths2audio_files)
+        all_results = [None] * len(paths2audio_files)
+        with self.transcription_mode(), ThreadPoolExecutor(max_workers=max(num_workers, 1)) as pool:
+            for batch in tqdm(batches, desc="Transcribing"):
+                signals = list(pool.map(load, batch))
+                batch_results, batch_all_results = self._transcribe_signals(
+                    signals, return_hypotheses=return_hypotheses, logprobs=logprobs
+                )
+                if batch_all_results is None:
+                    batch_all_results = batch_results
+                for idx, result, all_result in zip(batch, batch_results, batch_all_results):
+                    results[idx] = result
+                    all_results[idx] = all_result
+
+        return results, all_results
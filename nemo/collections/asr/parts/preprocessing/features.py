@@ -142,10 +142,11 @@ def make_seq_mask_like(
 
 
 class WaveformFeaturizer(object):
-    def __init__(self, sample_rate=16000, int_values=False, augmentor=None):
+    def __init__(self, sample_rate=16000, int_values=False, augmentor=None, resample_backend='librosa'):
         self.augmentor = augmentor if augmentor is not None else AudioAugmentor()
         self.sample_rate = sample_rate
         self.int_values = int_values
+        self.resample_backend = resample_backend
 
     def max_augmentation_length(self, length):
         return self.augmentor.max_augmentation_length(length)
@@ -176,6 +177,7 @@ class WaveformFeaturizer(object):
             trim_hop_length=trim_hop_length,
             orig_sr=orig_sr,
             channel_selector=channel_selector,
+            resample_backend=self.resample_backend,
         )
         return self.process_segment(audio)
 
@@ -192,8 +194,9 @@ class WaveformFeaturizer(object):
 
         sample_rate = input_config.get("sample_rate", 16000)
         int_values = input_config.get("int_values", False)
+        resample_backend = input_config.get("resample_backend", "librosa")
 
-        return cls(sample_rate=sample_rate, int_values=int_values, augmentor=aa)
+        return cls(sample_rate=sample_rate, int_values=int_values, augmentor=aa, resample_backend=resample_backend)
 
 
 class FeaturizerFactory(object):
@@ -41,7 +41,7 @@ import librosa
 import numpy as np
 import soundfile as sf
 
-from nemo.collections.asr.parts.utils.audio_utils import select_channels
+from nemo.collections.asr.parts.utils.audio_utils import StreamingResampler, resample, select_channels
 from nemo.utils import logging
 
 # TODO @blisc: Perhaps refactor instead of import guarding
@@ -78,9 +78,11 @@ class AudioSegment(object):
         trim_hop_length=512,
         orig_sr=None,
         channel_selector=None,
+        resample_backend='librosa',
     ):
         """Create audio segment from samples.
         Samples are convert float32 internally, with int scaled to [-1, 1].
+        If target_sr differs from sample_rate, samples are resampled using resample_backend (see `audio_utils.resample`).
         """
         samples = self._convert_samples_to_float32(samples)
 
@@ -97,10 +99,7 @@ class AudioSegment(object):
             )
 
         if target_sr is not None and target_sr != sample_rate:
-            # resample along the temporal dimension (axis=0) will be in librosa 0.10.0 (#1561)
-            samples = samples.transpose()
-            samples = librosa.core.resample(samples, orig_sr=sample_rate, target_sr=target_sr)
-            samples = samples.transpose()
+            samples = resample(samples, orig_sr=sample_rate, target_sr=target_sr, backend=resample_backend)
             sample_rate = target_sr
         if trim:
             # librosa is using channels-first layout (num_channels, num_samples), which is transpose of AudioSegment's layout
@@ -181,6 +180,7 @@ class AudioSegment(object):
         trim_hop_length=512,
         orig_sr=None,
         channel_selector=None,
+        resample_backend='librosa',
     ):
         """
         Load a file supported by librosa and return as an AudioSegment.
@@ -199,6 +199,7 @@ class AudioSegment(object):
         :param channel selector: string denoting the downmix mode, an integer denoting the channel to be selected, or an iterable
                                  of integers denoting a subset of channels. Channel selector is using zero-based indexing.
                                  If set to `None`, the original signal will be used.
+        :param resample_backend: backend used to resample to target_sr, one of `audio_utils.RESAMPLE_BACKENDS`
         :return: numpy array of samples
         """
         samples = None
@@ -253,11 +254,92 @@ class AudioSegment(object):
             trim_hop_length=trim_hop_length,
             orig_sr=orig_sr,
             channel_selector=channel_selector,
+            resample_backend=resample_backend,
         )
 
+    @classmethod
+    def iter_chunks(
+        cls, audio_file, chunk_sec, overlap_sec=0.0, target_sr=None, offset=0, duration=0, channel_selector=None,
+    ):
+        """Read an audio file in consecutive chunks with bounded memory.
+
+        Blocks are read from the file via soundfile and resampled incrementally with a stateful polyphase
+        resampler (equivalent to `scipy.signal.resample_poly` over the whole signal), so only about one chunk
+        of samples is kept in memory. This is useful for feeding hour-long recordings to buffered or
+        streaming inference (e.g. `StreamingFeatureBufferer.update_feature_buffer`) or to VAD.
+
+        Consecutive chunks start `chunk_sec - overlap_sec` seconds apart. All chunks contain `chunk_sec`
+        seconds of audio except the last one, which may be shorter.
+
+        :param audio_file: path to a file or a file-like object supported by soundfile
+        :param chunk_sec: duration of each chunk in seconds
+        :param overlap_sec: overlap between consecutive chunks in seconds
+        :param target_sr: sample rate of the output chunks, if None the original sample rate is used
+        :param offset: offset in seconds when loading audio
+        :param duration: duration in seconds when loading audio, if 0 the file is read until the end
+        :param channel selector: select a subset of channels. If set to `None`, the original signal will be used.
+        :return: generator of AudioSegment chunks
+        """
+        if overlap_sec < 0 or overlap_sec >= chunk_sec:
+            raise ValueError(
+                f"Overlap ({overlap_sec} sec) must be non-negative and shorter than chunk ({chunk_sec} sec)"
+            )
+
+        with sf.SoundFile(audio_file, 'r') as f:
+            sample_rate = f.samplerate
+            target_sr = sample_rate if target_sr is None else target_sr
+            chunk_len = int(chunk_sec * target_sr)
+            hop_len = chunk_len - int(overlap_sec * target_sr)
+            if hop_len <= 0:
+                raise ValueError(f"Chunk ({chunk_sec} sec) is too short for overlap ({overlap_sec} sec)")
+            block_len = max(1, int(chunk_sec * sample_rate))
+
+            if offset > 0:
+                f.seek(int(offset * sample_rate))
+            num_remaining = int(duration * sample_rate) if duration > 0 else -1
+
+            resampler = StreamingResampler(orig_sr=sample_rate, target_sr=target_sr)
+            buffer = None
+            num_yielded = 0
+            is_last = False
+            while not is_last:
+                num_read = block_len if num_remaining < 0 else min(block_len, num_remaining)
+                block = f.read(num_read, dtype='float32')
+                if num_remaining >= 0:
+                    num_remaining -= block.shape[0]
+                is_last = block.shape[0] < block_len or num_remaining == 0
+                if block.ndim == 2:
+                    block = select_channels(block, channel_selector)
+                elif channel_selector not in [None, 0, 'average']:
+                    raise ValueError(
+                        'Input signal is one-dimensional, channel selector (%s) cannot not be used.',
+                        str(channel_selector),
+                    )
+
+                output = resampler.process(block, last=is_last)
+                buffer = output if buffer is None else np.concatenate([buffer, output], axis=0)
+
+                while buffer.shape[0] >= chunk_len:
+                    yield cls(buffer[:chunk_len], target_sr)
+                    buffer = buffer[hop_len:]
+                    num_yielded += 1
+
+            # the remaining samples are a shorter last chunk, unless they were already included in the previous chunk
+            num_overlap = chunk_len - hop_len if num_yielded > 0 else 0
+            if buffer.shape[0] > num_overlap:
+                yield cls(buffer, target_sr)
+
     @classmethod
     def segment_from_file(
-        cls, audio_file, target_sr=None, n_segments=0, trim=False, orig_sr=None, channel_selector=None, offset=None
+        cls,
+        audio_file,
+        target_sr=None,
+        n_segments=0,
+        trim=False,
+        orig_sr=None,
+        channel_selector=None,
+        offset=None,
+        resample_backend='librosa',
     ):
         """Grabs n_segments number of samples from audio_file.
         If offset is not provided, n_segments are selected randomly.
@@ -272,6 +354,7 @@ class AudioSegment(object):
         :param orig_sr: the original sample rate
         :param channel selector: select a subset of channels. If set to `None`, the original signal will be used.
         :param offset: fixed offset in seconds
+        :param resample_backend: backend used to resample to target_sr, one of `audio_utils.RESAMPLE_BACKENDS`
         :return: numpy array of samples
         """
         is_segmented = False
@@ -307,7 +390,13 @@ class AudioSegment(object):
             logging.error(f"Loading {audio_file} via SoundFile raised RuntimeError: `{e}`.")
 
         features = cls(
-            samples, sample_rate, target_sr=target_sr, trim=trim, orig_sr=orig_sr, channel_selector=channel_selector
+            samples,
+            sample_rate,
+            target_sr=target_sr,
+            trim=trim,
+            orig_sr=orig_sr,
+            channel_selector=channel_selector,
+            resample_backend=resample_backend,
         )
 
         if is_segmented:
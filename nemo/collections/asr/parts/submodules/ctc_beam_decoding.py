@@ -0,0 +1,837 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import math
+import multiprocessing
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from numba import jit, prange, typed, types
+
+from nemo.collections.asr.parts.submodules.ctc_greedy_decoding import pack_hypotheses
+from nemo.collections.asr.parts.utils import rnnt_utils
+from nemo.core.classes import Typing, typecheck
+from nemo.core.neural_types import HypothesisType, LengthsType, LogprobsType, NeuralType
+
+NEG_INF = float("-inf")
+LOG_10 = math.log(10.0)
+
+
+@jit(nopython=True, cache=False)
+def _logaddexp(a: float, b: float) -> float:
+    if a == NEG_INF:
+        return b
+    if b == NEG_INF:
+        return a
+    if a > b:
+        return a + math.log1p(math.exp(b - a))
+    return b + math.log1p(math.exp(a - b))
+
+
+class NGramLanguageModel:
+    """
+    Word level n-gram language model read from an ARPA file (optionally gzipped), scored with back-off in pure Python.
+    Scores are returned in natural log.
+
+    Args:
+        arpa_path: Path to the ARPA file. KenLM binary files are not supported.
+        unk_logprob: log10 probability of out-of-vocabulary words, used if the model has no `<unk>` entry.
+    """
+
+    def __init__(self, arpa_path: str, unk_logprob: float = -10.0):
+        self.probs: Dict[Tuple[str, ...], float] = {}
+        self.backoffs: Dict[Tuple[str, ...], float] = {}
+        self.order = 0
+
+        open_fn = gzip.open if arpa_path.endswith('.gz') else open
+        with open_fn(arpa_path, 'rt', encoding='utf-8') as f:
+            ngram_order = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('\\'):
+                    if line.endswith('-grams:'):
+                        ngram_order = int(line[1:].split('-')[0])
+                        self.order = max(self.order, ngram_order)
+                    elif line == '\\data\\':
+                        ngram_order = 0
+                    continue
+                if ngram_order == 0:
+                    continue
+                parts = line.split()
+                ngram = tuple(parts[1 : 1 + ngram_order])
+                self.probs[ngram] = float(parts[0]) * LOG_10
+                if len(parts) > 1 + ngram_order:
+                    self.backoffs[ngram] = float(parts[1 + ngram_order]) * LOG_10
+
+        if self.order == 0:
+            raise ValueError(f"No n-grams found in {arpa_path}. Only ARPA files are supported.")
+        self.unk_logprob = self.probs.get(('<unk>',), unk_logprob * LOG_10)
+
+    def score(self, context: Tuple[str, ...], word: str) -> float:
+        """
+        Log probability of `word` following the words in `context`.
+        """
+        context = context[len(context) - self.order + 1 :] if self.order > 1 else ()
+        backoff = 0.0
+        while True:
+            logprob = self.probs.get(context + (word,))
+            if logprob is not None:
+                return backoff + logprob
+            if not context:
+                return backoff + self.unk_logprob
+            backoff += self.backoffs.get(context, 0.0)
+            context = context[1:]
+
+
+class WordScorer:
+    """
+    Scores the words of CTC prefixes with an n-gram language model, a word insertion bonus and hotword boosting.
+    Word boundaries are found from the token strings: a word separator token, a sentencepiece token starting with
+    `▁`, or a wordpiece token not starting with `##` starts a new word.
+
+    A prefix state is a tuple of (score of the completed words, language model context, partial word).
+
+    Args:
+        tokens: String of each token id (without the blank token).
+        word_seperator: Str token representing the seperator between words.
+        ngram_lm: Optional NGramLanguageModel.
+        alpha: Weight of the language model scores.
+        beta: Bonus added for every word.
+        hotwords: Optional list of words to boost.
+        hotword_weight: Bonus added for a hotword. Prefixes of hotwords get a part of the bonus proportional to
+            their length, so that hotwords survive beam pruning.
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        word_seperator: str = ' ',
+        ngram_lm: Optional[NGramLanguageModel] = None,
+        alpha: float = 0.0,
+        beta: float = 0.0,
+        hotwords: Optional[List[str]] = None,
+        hotword_weight: float = 0.0,
+    ):
+        is_wordpiece = any(token.startswith('##') for token in tokens)
+        self.token_begins_word = []
+        self.token_text = []
+        for token in tokens:
+            if token == word_seperator:
+                self.token_begins_word.append(True)
+                self.token_text.append('')
+            elif token.startswith('▁'):
+                self.token_begins_word.append(True)
+                self.token_text.append(token[1:])
+            elif is_wordpiece:
+                self.token_begins_word.append(not token.startswith('##'))
+                self.token_text.append(token[2:] if token.startswith('##') else token)
+            else:
+                self.token_begins_word.append(False)
+                self.token_text.append(token)
+
+        self.ngram_lm = ngram_lm
+        self.alpha = alpha
+        self.beta = beta
+        self.hotword_weight = hotword_weight
+        self.hotword_prefix_bonus: Dict[str, float] = {}
+        for hotword in hotwords or []:
+            for i in range(1, len(hotword) + 1):
+                bonus = hotword_weight * i / len(hotword)
+                self.hotword_prefix_bonus[hotword[:i]] = max(self.hotword_prefix_bonus.get(hotword[:i], 0.0), bonus)
+        self.hotwords = set(hotwords or [])
+
+    def initial_state(self) -> Tuple[float, Tuple[str, ...], str]:
+        return 0.0, ('<s>',), ''
+
+    def _complete_word(self, state: Tuple[float, Tuple[str, ...], str]) -> Tuple[float, Tuple[str, ...], str]:
+        score, context, word = state
+        if not word:
+            return state
+        score += self.beta
+        if word in self.hotwords:
+            score += self.hotword_weight
+        if self.ngram_lm is not None:
+            score += self.alpha * self.ngram_lm.score(context, word)
+            context = (context + (word,))[1 - self.ngram_lm.order :] if self.ngram_lm.order > 1 else ()
+        return score, context, ''
+
+    def next_state(self, state: Tuple[float, Tuple[str, ...], str], token: int) -> Tuple[float, Tuple[str, ...], str]:
+        if self.token_begins_word[token]:
+            state = self._complete_word(state)
+        return state[0], state[1], state[2] + self.token_text[token]
+
+    def score(self, state: Tuple[float, Tuple[str, ...], str]) -> float:
+        return state[0] + self.hotword_prefix_bonus.get(state[2], 0.0)
+
+    def final_score(self, state: Tuple[float, Tuple[str, ...], str]) -> float:
+        score, context, _ = self._complete_word(state)
+        if self.ngram_lm is not None:
+            score += self.alpha * self.ngram_lm.score(context, '</s>')
+        return score
+
+
+@jit(nopython=True, cache=False)
+def _new_search(capacity, beam_size, topk):
+    """
+    Allocates the state of a search with at most `capacity` prefixes:
+    the trie of prefixes, where node 0 is the empty prefix, with the parent and the last token of each node and
+    the child of each (node, token) key, the slot of each node among the candidates of a frame,
+    the candidates of a frame, and the beams, which start with the empty prefix.
+    """
+    parents = np.empty(capacity, dtype=np.int64)
+    last_tokens = np.empty(capacity, dtype=np.int64)
+    parents[0], last_tokens[0] = -1, -1
+    children = typed.Dict.empty(key_type=types.int64, value_type=types.int64)
+    node_slot = np.full(capacity, -1, dtype=np.int64)
+
+    cand_nodes = np.empty(beam_size * (topk + 1), dtype=np.int64)
+    cand_p_b = np.empty(beam_size * (topk + 1), dtype=np.float64)
+    cand_p_nb = np.empty(beam_size * (topk + 1), dtype=np.float64)
+
+    beam_nodes = np.zeros(beam_size, dtype=np.int64)
+    beam_p_b = np.zeros(beam_size, dtype=np.float64)
+    beam_p_nb = np.full(beam_size, NEG_INF, dtype=np.float64)
+    return (
+        parents,
+        last_tokens,
+        children,
+        node_slot,
+        cand_nodes,
+        cand_p_b,
+        cand_p_nb,
+        beam_nodes,
+        beam_p_b,
+        beam_p_nb,
+    )
+
+
+@jit(nopython=True, cache=False)
+def _candidate_slot(node, cand_nodes, cand_p_b, cand_p_nb, node_slot, num_cands):
+    slot = node_slot[node]
+    if slot < 0:
+        slot = num_cands
+        node_slot[node] = slot
+        cand_nodes[slot] = node
+        cand_p_b[slot] = NEG_INF
+        cand_p_nb[slot] = NEG_INF
+        num_cands += 1
+    return slot, num_cands
+
+
+@jit(nopython=True, cache=False)
+def _extend_prefix(node, token, vocab_size, parents, last_tokens, children, num_nodes):
+    key = node * vocab_size + token
+    child = children.get(key, -1)
+    if child < 0:
+        child = num_nodes
+        children[key] = child
+        parents[child] = node
+        last_tokens[child] = token
+        num_nodes += 1
+    return child, num_nodes
+
+
+@jit(nopython=True, cache=False)
+def _expand_beams(
+    frame_logprobs,
+    frame_ids,
+    blank_id,
+    beam_prune_logp,
+    vocab_size,
+    beam_nodes,
+    beam_p_b,
+    beam_p_nb,
+    num_beams,
+    parents,
+    last_tokens,
+    children,
+    num_nodes,
+    cand_nodes,
+    cand_p_b,
+    cand_p_nb,
+    node_slot,
+):
+    """
+    Extends the beams with the tokens of a frame. Candidates are stored in the order in which they are found,
+    with the log probability of ending in blank and in non-blank. Returns the number of candidates and of nodes.
+    """
+    num_cands = 0
+    for b in range(num_beams):
+        node = beam_nodes[b]
+        p_b, p_nb = beam_p_b[b], beam_p_nb[b]
+        p_total = _logaddexp(p_b, p_nb)
+        last_token = last_tokens[node]
+        for k in range(frame_ids.shape[0]):
+            logp = frame_logprobs[k]
+            if k > 0 and logp < beam_prune_logp:
+                break
+            token = frame_ids[k]
+            if token == blank_id:
+                slot, num_cands = _candidate_slot(node, cand_nodes, cand_p_b, cand_p_nb, node_slot, num_cands)
+                cand_p_b[slot] = _logaddexp(cand_p_b[slot], p_total + logp)
+            elif token == last_token:
+                # repeated token is collapsed unless a blank separates the repetitions
+                slot, num_cands = _candidate_slot(node, cand_nodes, cand_p_b, cand_p_nb, node_slot, num_cands)
+                cand_p_nb[slot] = _logaddexp(cand_p_nb[slot], p_nb + logp)
+                child, num_nodes = _extend_prefix(node, token, vocab_size, parents, last_tokens, children, num_nodes)
+                slot, num_cands = _candidate_slot(child, cand_nodes, cand_p_b, cand_p_nb, node_slot, num_cands)
+                cand_p_nb[slot] = _logaddexp(cand_p_nb[slot], p_b + logp)
+            else:
+                child, num_nodes = _extend_prefix(node, token, vocab_size, parents, last_tokens, children, num_nodes)
+                slot, num_cands = _candidate_slot(child, cand_nodes, cand_p_b, cand_p_nb, node_slot, num_cands)
+                cand_p_nb[slot] = _logaddexp(cand_p_nb[slot], p_total + logp)
+    return num_cands, num_nodes
+
+
+@jit(nopython=True, cache=False)
+def _prune_beams(
+    beam_size, cand_nodes, cand_p_b, cand_p_nb, num_cands, node_scores, node_slot, beam_nodes, beam_p_b, beam_p_nb
+):
+    """
+    Keeps the `beam_size` best candidates as beams, sorted by descending score. The sort is stable, so ties are
+    resolved in the order in which candidates were found. Returns the number of beams.
+    """
+    scores = np.empty(num_cands, dtype=np.float64)
+    for i in range(num_cands):
+        node = cand_nodes[i]
+        scores[i] = _logaddexp(cand_p_b[i], cand_p_nb[i]) + node_scores[node]
+        node_slot[node] = -1
+    order = np.argsort(-scores, kind='mergesort')
+    num_beams = min(beam_size, num_cands)
+    for b in range(num_beams):
+        i = order[b]
+        beam_nodes[b], beam_p_b[b], beam_p_nb[b] = cand_nodes[i], cand_p_b[i], cand_p_nb[i]
+    return num_beams
+
+
+@jit(nopython=True, cache=False)
+def _backtrack_beams(
+    beam_nodes, beam_p_b, beam_p_nb, num_beams, parents, last_tokens, out_tokens, out_lengths, out_scores
+):
+    """
+    Writes the tokens and the score of each beam to `out_tokens[b, : out_lengths[b]]` and `out_scores[b]`.
+    """
+    for b in range(num_beams):
+        length = 0
+        node = beam_nodes[b]
+        while node > 0:
+            length += 1
+            node = parents[node]
+        out_lengths[b] = length
+        node = beam_nodes[b]
+        for i in range(length - 1, -1, -1):
+            out_tokens[b, i] = last_tokens[node]
+            node = parents[node]
+        out_scores[b] = _logaddexp(beam_p_b[b], beam_p_nb[b])
+
+
+@jit(nopython=True, cache=False)
+def _ctc_prefix_beam_search_kernel(
+    topk_logprobs,
+    topk_ids,
+    length,
+    blank_id,
+    beam_size,
+    beam_prune_logp,
+    vocab_size,
+    out_tokens,
+    out_lengths,
+    out_scores,
+):
+    """
+    CTC prefix beam search of a single sample without a scorer, see `ctc_prefix_beam_search`.
+    Returns the number of beams written to the outputs, see `_backtrack_beams`.
+    """
+    capacity = 1 + length * beam_size * topk_ids.shape[1]
+    (
+        parents,
+        last_tokens,
+        children,
+        node_slot,
+        cand_nodes,
+        cand_p_b,
+        cand_p_nb,
+        beam_nodes,
+        beam_p_b,
+        beam_p_nb,
+    ) = _new_search(capacity, beam_size, topk_ids.shape[1])
+    node_scores = np.zeros(capacity, dtype=np.float64)
+
+    num_beams, num_nodes = 1, 1
+    for t in range(length):
+        num_cands, num_nodes = _expand_beams(
+            topk_logprobs[t],
+            topk_ids[t],
+            blank_id,
+            beam_prune_logp,
+            vocab_size,
+            beam_nodes,
+            beam_p_b,
+            beam_p_nb,
+            num_beams,
+            parents,
+            last_tokens,
+            children,
+            num_nodes,
+            cand_nodes,
+            cand_p_b,
+            cand_p_nb,
+            node_slot,
+        )
+        num_beams = _prune_beams(
+            beam_size,
+            cand_nodes,
+            cand_p_b,
+            cand_p_nb,
+            num_cands,
+            node_scores,
+            node_slot,
+            beam_nodes,
+            beam_p_b,
+            beam_p_nb,
+        )
+
+    _backtrack_beams(
+        beam_nodes, beam_p_b, beam_p_nb, num_beams, parents, last_tokens, out_tokens, out_lengths, out_scores
+    )
+    return num_beams
+
+
+@jit(nopython=True, parallel=True, cache=False)
+def _ctc_prefix_beam_search_batch_kernel(
+    topk_logprobs,
+    topk_ids,
+    lengths,
+    blank_id,
+    beam_size,
+    beam_prune_logp,
+    vocab_size,
+    out_tokens,
+    out_lengths,
+    out_scores,
+    out_num_beams,
+):
+    """
+    CTC prefix beam search of the samples of a batch in parallel threads, see `_ctc_prefix_beam_search_kernel`.
+    """
+    for ind in prange(topk_logprobs.shape[0]):
+        out_num_beams[ind] = _ctc_prefix_beam_search_kernel(
+            topk_logprobs[ind],
+            topk_ids[ind],
+            lengths[ind],
+            blank_id,
+            beam_size,
+            beam_prune_logp,
+            vocab_size,
+            out_tokens[ind],
+            out_lengths[ind],
+            out_scores[ind],
+        )
+
+
+def ctc_prefix_beam_search(
+    topk_logprobs: np.ndarray,
+    topk_ids: np.ndarray,
+    blank_id: int,
+    beam_size: int,
+    beam_prune_logp: float,
+    scorer: Optional[WordScorer] = None,
+) -> List[Tuple[List[int], float]]:
+    """
+    CTC prefix beam search over the pruned tokens of each frame.
+
+    Prefixes are stored in a trie of integer nodes, so that extending a prefix and updating its word score
+    costs O(1) instead of copying the prefix. Without a scorer, the whole search runs in a numba kernel.
+    With a scorer, the beams of each frame are extended and pruned by numba kernels, and the scorer states
+    of the new prefixes are computed in Python in between.
+
+    Args:
+        topk_logprobs: Log probabilities of the top-k tokens of each frame, sorted in descending order. [T, K]
+        topk_ids: Token ids of the top-k tokens of each frame. [T, K]
+        blank_id: Id of the blank token.
+        beam_size: Number of prefixes kept after each frame.
+        beam_prune_logp: Tokens with a lower log probability are skipped, except for the best token of a frame.
+        scorer: Optional WordScorer for language model scores and hotword boosting.
+
+    Returns:
+        List of (token ids, score) of the final beams, sorted by descending score.
+    """
+    topk_logprobs = np.ascontiguousarray(topk_logprobs, dtype=np.float32)
+    topk_ids = np.ascontiguousarray(topk_ids, dtype=np.int64)
+    length, topk = topk_ids.shape
+    vocab_size = max(int(topk_ids.max(initial=0)), blank_id) + 1
+    out_tokens = np.zeros((beam_size, length), dtype=np.int64)
+    out_lengths = np.zeros(beam_size, dtype=np.int64)
+    out_scores = np.zeros(beam_size, dtype=np.float64)
+
+    if scorer is None:
+        num_beams = _ctc_prefix_beam_search_kernel(
+            topk_logprobs,
+            topk_ids,
+            length,
+            blank_id,
+            beam_size,
+            float(beam_prune_logp),
+            vocab_size,
+            out_tokens,
+            out_lengths,
+            out_scores,
+        )
+        return [(out_tokens[b, : out_lengths[b]].tolist(), float(out_scores[b])) for b in range(num_beams)]
+
+    capacity = 1 + length * beam_size * topk
+    (
+        parents,
+        last_tokens,
+        children,
+        node_slot,
+        cand_nodes,
+        cand_p_b,
+        cand_p_nb,
+        beam_nodes,
+        beam_p_b,
+        beam_p_nb,
+    ) = _new_search(capacity, beam_size, topk)
+    # scorer state and score of each node of the trie
+    states = [scorer.initial_state()]
+    node_scores = np.zeros(capacity, dtype=np.float64)
+    node_scores[0] = scorer.score(states[0])
+
+    num_beams, num_nodes = 1, 1
+    for t in range(length):
+        num_cands, next_num_nodes = _expand_beams(
+            topk_logprobs[t],
+            topk_ids[t],
+            blank_id,
+            float(beam_prune_logp),
+            vocab_size,
+            beam_nodes,
+            beam_p_b,
+            beam_p_nb,
+            num_beams,
+            parents,
+            last_tokens,
+            children,
+            num_nodes,
+            cand_nodes,
+            cand_p_b,
+            cand_p_nb,
+            node_slot,
+        )
+        for node in range(num_nodes, next_num_nodes):
+            states.append(scorer.next_state(states[parents[node]], int(last_tokens[node])))
+            node_scores[node] = scorer.score(states[node])
+        num_nodes = next_num_nodes
+        num_beams = _prune_beams(
+            beam_size,
+            cand_nodes,
+            cand_p_b,
+            cand_p_nb,
+            num_cands,
+            node_scores,
+            node_slot,
+            beam_nodes,
+            beam_p_b,
+            beam_p_nb,
+        )
+
+    _backtrack_beams(
+        beam_nodes, beam_p_b, beam_p_nb, num_beams, parents, last_tokens, out_tokens, out_lengths, out_scores
+    )
+    results = [
+        (out_tokens[b, : out_lengths[b]].tolist(), float(out_scores[b]) + scorer.final_score(states[beam_nodes[b]]))
+        for b in range(num_beams)
+    ]
+    return sorted(results, key=lambda result: result[1], reverse=True)
+
+
+def ctc_prefix_beam_search_batch(
+    topk_logprobs: np.ndarray,
+    topk_ids: np.ndarray,
+    lengths: np.ndarray,
+    blank_id: int,
+    beam_size: int,
+    beam_prune_logp: float,
+) -> List[List[Tuple[List[int], float]]]:
+    """
+    CTC prefix beam search without a scorer of all samples of a batch, which are decoded in parallel threads.
+
+    Args:
+        topk_logprobs: Log probabilities of the top-k tokens of each frame, sorted in descending order. [B, T, K]
+        topk_ids: Token ids of the top-k tokens of each frame. [B, T, K]
+        lengths: Number of frames of each sample. [B]
+        blank_id: Id of the blank token.
+        beam_size: Number of prefixes kept after each frame.
+        beam_prune_logp: Tokens with a lower log probability are skipped, except for the best token of a frame.
+
+    Returns:
+        List with the (token ids, score) of the final beams of each sample, sorted by descending score.
+    """
+    topk_logprobs = np.ascontiguousarray(topk_logprobs, dtype=np.float32)
+    topk_ids = np.ascontiguousarray(topk_ids, dtype=np.int64)
+    lengths = np.ascontiguousarray(lengths, dtype=np.int64)
+    batch_size, max_time = topk_ids.shape[0], topk_ids.shape[1]
+    vocab_size = max(int(topk_ids.max(initial=0)), blank_id) + 1
+    out_tokens = np.zeros((batch_size, beam_size, max_time), dtype=np.int64)
+    out_lengths = np.zeros((batch_size, beam_size), dtype=np.int64)
+    out_scores = np.zeros((batch_size, beam_size), dtype=np.float64)
+    out_num_beams = np.zeros(batch_size, dtype=np.int64)
+    _ctc_prefix_beam_search_batch_kernel(
+        topk_logprobs,
+        topk_ids,
+        lengths,
+        blank_id,
+        beam_size,
+        float(beam_prune_logp),
+        vocab_size,
+        out_tokens,
+        out_lengths,
+        out_scores,
+        out_num_beams,
+    )
+    return [
+        [(out_tokens[ind, b, : out_lengths[ind, b]].tolist(), float(out_scores[ind, b])) for b in range(num_beams)]
+        for ind, num_beams in enumerate(out_num_beams.tolist())
+    ]
+
+
+# scorer of the worker processes of BeamCTCInfer, set by the pool initializer
+_worker_scorer = None
+
+
+def _init_beam_search_worker(scorer: Optional[WordScorer]):
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _ctc_prefix_beam_search_star(args):
+    """
+    A workaround for multiprocessing, see `BeamCTCInfer`
+    """
+    return ctc_prefix_beam_search(*args, scorer=_worker_scorer)
+
+
+class BeamCTCInfer(Typing):
+    """A CTC prefix beam search decoder with optional n-gram language model and hotword boosting.
+
+    Top-k pruning of each frame is done for the whole batch at once on the device of the log probabilities.
+    Without a language model, word bonus or hotwords, the beam search of all samples runs in a numba kernel,
+    in parallel threads. Otherwise, the scorer is evaluated in Python, optionally in parallel across the CPU
+    processes of a pool which is kept for all batches.
+
+    Args:
+        blank_id: int index of the blank token. Can be 0 or len(vocabulary).
+        beam_size: int size of the beam.
+        return_best_hypothesis: If True, returns only the best hypothesis of each sample.
+            Otherwise, returns NBestHypotheses with all the beams of each sample.
+        beam_prune_topk: Number of best tokens of each frame considered during beam search.
+        beam_prune_logp: Tokens with a lower log probability are not considered during beam search,
+            except for the best token of each frame.
+        ngram_lm_model: Optional path to a word level ARPA n-gram language model.
+        ngram_lm_alpha: Weight of the n-gram language model scores.
+        beam_beta: Bonus added for every word of a hypothesis.
+        hotwords: Optional list of words to boost.
+        hotword_weight: Bonus added for every hotword of a hypothesis.
+        num_workers: Number of processes decoding the samples of a batch in parallel when a scorer is used.
+            0 or 1 decodes in-process.
+    """
+
+    @property
+    def input_types(self):
+        """Returns definitions of module input ports.
+        """
+        return {
+            "decoder_output": NeuralType(('B', 'T', 'D'), LogprobsType()),
+            "decoder_lengths": NeuralType(tuple('B'), LengthsType()),
+        }
+
+    @property
+    def output_types(self):
+        """Returns definitions of module output ports.
+        """
+        return {"predictions": [NeuralType(elements_type=HypothesisType())]}
+
+    def __init__(
+        self,
+        blank_id: int,
+        beam_size: int = 4,
+        return_best_hypothesis: bool = True,
+        beam_prune_topk: int = 8,
+        beam_prune_logp: float = -10.0,
+        ngram_lm_model: Optional[str] = None,
+        ngram_lm_alpha: float = 0.5,
+        beam_beta: float = 0.0,
+        hotwords: Optional[List[str]] = None,
+        hotword_weight: float = 5.0,
+        num_workers: int = 0,
+    ):
+        super().__init__()
+
+        if beam_size < 1:
+            raise ValueError(f"Beam search requires beam_size >= 1. Given {beam_size}")
+
+        self.blank_id = blank_id
+        self.beam_size = beam_size
+        self.return_best_hypothesis = return_best_hypothesis
+        self.beam_prune_topk = max(beam_prune_topk, 1)
+        self.beam_prune_logp = beam_prune_logp
+        self.ngram_lm_alpha = ngram_lm_alpha
+        self.beam_beta = beam_beta
+        self.hotwords = list(hotwords) if hotwords else None
+        self.hotword_weight = hotword_weight
+        self.num_workers = num_workers
+
+        self.ngram_lm = NGramLanguageModel(ngram_lm_model) if ngram_lm_model is not None else None
+        self.scorer = None
+        self._pool = None
+
+    @property
+    def requires_vocabulary(self) -> bool:
+        return self.ngram_lm is not None or self.hotwords is not None or self.beam_beta != 0.0
+
+    def set_vocabulary(self, tokens: List[str], word_seperator: str = ' '):
+        """
+        Set the string of each token id, which is needed to find the words for the language model, the word bonus
+        and hotword boosting.
+
+        Args:
+            tokens: String of each token id (without the blank token).
+            word_seperator: Str token representing the seperator between words.
+        """
+        # workers of the pool hold the previous scorer
+        self.close()
+        self.scorer = WordScorer(
+            tokens,
+            word_seperator=word_seperator,
+            ngram_lm=self.ngram_lm,
+            alpha=self.ngram_lm_alpha,
+            beta=self.beam_beta,
+            hotwords=self.hotwords,
+            hotword_weight=self.hotword_weight,
+        )
+
+    @typecheck()
+    def forward(
+        self, decoder_output: torch.Tensor, decoder_lengths: torch.Tensor,
+    ):
+        """Returns a list of hypotheses given an input batch of log probabilities.
+
+        Args:
+            decoder_output: A tensor of size (batch, timesteps, features) of log probabilities.
+            decoder_lengths: list of int representing the length of each sequence
+                output sequence.
+
+        Returns:
+            packed list containing batch number of sentences (Hypotheses), or NBestHypotheses if
+            return_best_hypothesis is False.
+        """
+        if self.requires_vocabulary and self.scorer is None:
+            raise RuntimeError("Language model, word bonus or hotwords require `set_vocabulary()` to be called.")
+
+        with torch.inference_mode():
+            if decoder_output.ndim != 3:
+                raise ValueError(
+                    f"`decoder_output` must be a tensor of shape [B, T, V] (log probs, float). "
+                    f"Provided shape = {decoder_output.shape}"
+                )
+
+            batch_size, max_time = decoder_output.shape[0], decoder_output.shape[1]
+            topk = min(self.beam_prune_topk, decoder_output.shape[2])
+            topk_logprobs, topk_ids = decoder_output.detach().float().topk(topk, dim=-1)
+            topk_logprobs, topk_ids = topk_logprobs.cpu().numpy(), topk_ids.cpu().numpy()
+            if decoder_lengths is not None:
+                lengths = decoder_lengths.cpu().tolist()
+            else:
+                lengths = [max_time] * batch_size
+
+            if self.scorer is None:
+                beams_list = ctc_prefix_beam_search_batch(
+                    topk_logprobs, topk_ids, np.asarray(lengths), self.blank_id, self.beam_size, self.beam_prune_logp
+                )
+            else:
+                inputs = [
+                    (
+                        topk_logprobs[ind, : lengths[ind]],
+                        topk_ids[ind, : lengths[ind]],
+                        self.blank_id,
+                        self.beam_size,
+                        self.beam_prune_logp,
+                    )
+                    for ind in range(batch_size)
+                ]
+                if self.num_workers is not None and self.num_workers > 1 and batch_size > 1:
+                    beams_list = self._get_pool().map(_ctc_prefix_beam_search_star, inputs)
+                else:
+                    beams_list = [ctc_prefix_beam_search(*args, scorer=self.scorer) for args in inputs]
+
+            hypotheses = []
+            for ind, beams in enumerate(beams_list):
+                nbest = [
+                    rnnt_utils.Hypothesis(score=score, y_sequence=tokens, dec_state=None, timestep=[], last_token=None)
+                    for tokens, score in beams
+                ]
+                nbest = pack_hypotheses(nbest, torch.tensor([lengths[ind]] * len(nbest)))
+                if self.return_best_hypothesis:
+                    hypotheses.append(nbest[0])
+                else:
+                    hypotheses.append(rnnt_utils.NBestHypotheses(nbest))
+
+        return (hypotheses,)
+
+    def __call__(self, *args, **kwargs):
+        return self.forward(*args, **kwargs)
+
+    def _get_pool(self):
+        # the pool is created once, so that the scorer is sent to the workers once instead of for every batch
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(
+                self.num_workers, initializer=_init_beam_search_worker, initargs=(self.scorer,)
+            )
+        return self._pool
+
+    def close(self):
+        """
+        Terminates the worker processes of the decoder, if any. They are started again by the next batch.
+        """
+        if getattr(self, '_pool', None) is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def __getstate__(self):
+        # the pool cannot be pickled, a copy of the decoder starts its own pool
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def __del__(self):
+        self.close()
+
+
+@dataclass
+class BeamCTCInferConfig:
+    beam_size: int = 4
+    return_best_hypothesis: bool = True
+    beam_prune_topk: int = 8
+    beam_prune_logp: float = -10.0
+    ngram_lm_model: Optional[str] = None
+    ngram_lm_alpha: float = 0.5
+    beam_beta: float = 0.0
+    hotwords: Optional[List[str]] = None
+    hotword_weight: float = 5.0
+    num_workers: int = 0
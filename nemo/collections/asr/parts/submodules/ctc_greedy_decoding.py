@@ -157,32 +157,87 @@ class GreedyCTCInfer(Typing, ConfidenceMeasureMixin):
             packed list containing batch number of sentences (Hypotheses).
         """
         with torch.inference_mode():
-            hypotheses = []
-            # Process each sequence independently
-            prediction_cpu_tensor = decoder_output.cpu()
-
-            if prediction_cpu_tensor.ndim < 2 or prediction_cpu_tensor.ndim > 3:
+            if decoder_output.ndim < 2 or decoder_output.ndim > 3:
                 raise ValueError(
                     f"`decoder_output` must be a tensor of shape [B, T] (labels, int) or "
-                    f"[B, T, V] (log probs, float). Provided shape = {prediction_cpu_tensor.shape}"
+                    f"[B, T, V] (log probs, float). Provided shape = {decoder_output.shape}"
                 )
 
             # determine type of input - logprobs or labels
-            if prediction_cpu_tensor.ndim == 2:  # labels
-                greedy_decode = self._greedy_decode_labels
+            if decoder_output.ndim == 2:  # labels
+                hypotheses = []
+                # Process each sequence independently
+                prediction_cpu_tensor = decoder_output.cpu()
+                for ind in range(prediction_cpu_tensor.shape[0]):
+                    out_len = decoder_lengths[ind] if decoder_lengths is not None else None
+                    hypothesis = self._greedy_decode_labels(prediction_cpu_tensor[ind], out_len)
+                    hypotheses.append(hypothesis)
             else:
-                greedy_decode = self._greedy_decode_logprobs
-
-            for ind in range(prediction_cpu_tensor.shape[0]):
-                out_len = decoder_lengths[ind] if decoder_lengths is not None else None
-                hypothesis = greedy_decode(prediction_cpu_tensor[ind], out_len)
-                hypotheses.append(hypothesis)
+                # Process the whole batch on the device of decoder_output
+                hypotheses = self._greedy_decode_logprobs_batch(decoder_output, decoder_lengths)
 
             # Pack results into Hypotheses
             packed_result = pack_hypotheses(hypotheses, decoder_lengths)
 
         return (packed_result,)
 
+    @torch.no_grad()
+    def _greedy_decode_logprobs_batch(self, x: torch.Tensor, out_len: Optional[torch.Tensor]):
+        # x: [B, T, D]
+        # out_len: [B]
+        # Equivalent to calling `_greedy_decode_logprobs` for every sample, but argmax, masking, scores and
+        # timesteps are computed for the whole batch on device, and results are moved to host once.
+        batch_size, max_time = x.shape[0], x.shape[1]
+        prediction = x.detach()
+        prediction_logprobs, prediction_labels = prediction.max(dim=-1)
+
+        if out_len is not None:
+            out_len = out_len.to(prediction.device)
+            valid_ids = torch.arange(max_time, device=prediction.device)[None, :] < out_len[:, None]
+        else:
+            valid_ids = torch.ones_like(prediction_labels, dtype=torch.bool)
+
+        non_blank_ids = (prediction_labels != self.blank_id) & valid_ids
+        scores = torch.where(non_blank_ids, prediction_logprobs, torch.zeros_like(prediction_logprobs)).sum(dim=-1)
+
+        lengths = valid_ids.sum(dim=-1).cpu().tolist()
+        labels = prediction_labels.cpu()
+        scores = scores.cpu()
+
+        if self.compute_timestamps:
+            # row-major order of nonzero keeps the timesteps of each sample sorted and contiguous
+            timesteps = torch.nonzero(non_blank_ids, as_tuple=False)[:, 1].cpu()
+            timesteps = torch.split(timesteps, non_blank_ids.sum(dim=-1).cpu().tolist())
+
+        if self.preserve_alignments:
+            prediction_cpu = prediction.cpu()
+
+        if self.preserve_frame_confidence:
+            frame_confidence = self._get_confidence(prediction)
+
+        hypotheses = []
+        for ind in range(batch_size):
+            length = lengths[ind]
+            # Initialize blank state and empty label set in Hypothesis
+            hypothesis = rnnt_utils.Hypothesis(
+                score=scores[ind], y_sequence=[], dec_state=None, timestep=[], last_token=None
+            )
+            hypothesis.y_sequence = labels[ind, :length].numpy().tolist()
+
+            if self.preserve_alignments:
+                # Preserve the logprobs, as well as labels after argmax
+                hypothesis.alignments = (prediction_cpu[ind, :length].clone(), labels[ind, :length].clone())
+
+            if self.compute_timestamps:
+                hypothesis.timestep = timesteps[ind].numpy().tolist()
+
+            if self.preserve_frame_confidence:
+                hypothesis.frame_confidence = frame_confidence[ind][:length]
+
+            hypotheses.append(hypothesis)
+
+        return hypotheses
+
     @torch.no_grad()
     def _greedy_decode_logprobs(self, x: torch.Tensor, out_len: torch.Tensor):
         # x: [T, D]
@@ -12,18 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Iterable, Optional, Union
+import functools
+import math
+from typing import Iterable, Optional, Tuple, Union
 
 import librosa
 import numpy as np
 import numpy.typing as npt
 import scipy
+import scipy.signal
 import soundfile as sf
+import torch
 from scipy.spatial.distance import pdist, squareform
 
 from nemo.utils import logging
 
+try:
+    import torchaudio
+
+    HAVE_TORCHAUDIO = True
+except ModuleNotFoundError:
+    HAVE_TORCHAUDIO = False
+
 SOUND_VELOCITY = 343.0  # m/s
+RESAMPLE_BACKENDS = ('librosa', 'polyphase', 'torchaudio')
 ChannelSelectorType = Union[int, Iterable[int], str]
 
 
@@ -400,3 +412,194 @@ def get_segment_start(signal: np.ndarray, segment: np.ndarray) -> int:
         )
     cc = scipy.signal.correlate(signal, segment, mode='valid')
     return np.argmax(cc)
+
+
+@functools.lru_cache(maxsize=32)
+def get_resampling_filter(orig_sr: int, target_sr: int) -> Tuple[int, int, Optional[npt.NDArray]]:
+    """Design an anti-aliasing FIR filter for polyphase resampling from `orig_sr` to `target_sr`.
+    The filter is the same as designed by `scipy.signal.resample_poly` (Kaiser window with beta=5),
+    and it is cached per pair of sample rates.
+
+    Args:
+        orig_sr: original sample rate
+        target_sr: target sample rate
+
+    Returns:
+        Tuple (up, down, h), where `up / down` is the reduced resampling ratio and `h` are the
+        filter coefficients (not scaled by `up`), or None if the sample rates are equal.
+    """
+    g = math.gcd(int(orig_sr), int(target_sr))
+    up, down = int(target_sr) // g, int(orig_sr) // g
+    if up == down == 1:
+        return up, down, None
+
+    max_rate = max(up, down)
+    h = scipy.signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    h.setflags(write=False)
+    return up, down, h
+
+
+@functools.lru_cache(maxsize=32)
+def get_polyphase_filter_bank(orig_sr: int, target_sr: int) -> Tuple[int, int, int, npt.NDArray]:
+    """Decompose the filter from `get_resampling_filter` into a polyphase filter bank, cached per pair of sample rates.
+
+    Args:
+        orig_sr: original sample rate
+        target_sr: target sample rate
+
+    Returns:
+        Tuple (up, down, delay, bank), where `up / down` is the reduced resampling ratio, `delay` is the
+        filter delay at the upsampled rate, and `bank` is an array with shape (up, num_taps) with the
+        time-reversed filter coefficients of each phase.
+    """
+    up, down, h = get_resampling_filter(orig_sr, target_sr)
+    if h is None:
+        # identity
+        bank = np.ones((1, 1), dtype=np.float32)
+        bank.setflags(write=False)
+        return up, down, 0, bank
+
+    half_len = (len(h) - 1) // 2
+    h = h * up
+
+    # polyphase decomposition: phase p uses coefficients h[p], h[p + up], h[p + 2 * up], ...
+    num_taps = math.ceil(len(h) / up)
+    h = np.pad(h, (0, num_taps * up - len(h)))
+    bank = h.reshape(num_taps, up).T[:, ::-1].astype(np.float32)
+    bank.setflags(write=False)
+    return up, down, half_len, bank
+
+
+class StreamingResampler:
+    """Stateful polyphase resampler for processing a signal in consecutive chunks.
+
+    Concatenated outputs of all chunks are equal (up to float precision) to resampling the whole
+    signal at once with `scipy.signal.resample_poly`, while only keeping the last few input
+    samples required by the filter in memory.
+
+    Args:
+        orig_sr: sample rate of the input signal
+        target_sr: sample rate of the output signal
+
+    Example:
+        resampler = StreamingResampler(orig_sr=44100, target_sr=16000)
+        for chunk in chunks:
+            output = resampler.process(chunk)
+        output = resampler.flush()
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self._up, self._down, self._delay, self._bank = get_polyphase_filter_bank(orig_sr, target_sr)
+        self.reset()
+
+    def reset(self):
+        """Reset the state to start processing a new signal."""
+        self._buffer = None
+        # absolute index of the first sample in buffer, buffer starts with zeros before the signal
+        self._buffer_start = -(self._bank.shape[1] - 1)
+        self._num_input = 0
+        self._num_output = 0
+
+    def process(self, samples: npt.NDArray, last: bool = False) -> npt.NDArray:
+        """Resample the next chunk of the signal.
+
+        Args:
+            samples: chunk with shape (num_samples,) or (num_samples, num_channels)
+            last: if True, this is the last chunk and the remaining output is produced
+
+        Returns:
+            Resampled output available after this chunk, with shape (num_output_samples,) or
+            (num_output_samples, num_channels).
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        num_taps = self._bank.shape[1]
+        if self._buffer is None:
+            self._buffer = np.zeros((num_taps - 1,) + samples.shape[1:], dtype=np.float32)
+        self._buffer = np.concatenate([self._buffer, samples], axis=0)
+        self._num_input += samples.shape[0]
+
+        # output n uses input samples up to (n * down + delay) // up
+        if last:
+            num_output = -(-self._num_input * self._up // self._down)
+        else:
+            num_output = max(0, (self._num_input * self._up - 1 - self._delay) // self._down + 1)
+
+        n = np.arange(self._num_output, num_output)
+        position = n * self._down + self._delay
+        phase, last_input = position % self._up, position // self._up
+
+        buffer = self._buffer
+        if last and len(n) > 0:
+            # zeros after the end of the signal
+            num_pad = max(0, int(last_input[-1]) - (self._buffer_start + buffer.shape[0]) + 1)
+            buffer = np.pad(buffer, [(0, num_pad)] + [(0, 0)] * (buffer.ndim - 1))
+
+        if len(n) > 0 and buffer.shape[0] >= num_taps:
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, num_taps, axis=0)
+            windows = windows[last_input - (num_taps - 1) - self._buffer_start]
+            if windows.ndim == 2:
+                output = np.einsum('nt,nt->n', self._bank[phase], windows)
+            else:
+                output = np.einsum('nt,nct->nc', self._bank[phase], windows)
+        else:
+            output = np.zeros((0,) + samples.shape[1:], dtype=np.float32)
+        self._num_output = num_output
+
+        # keep only the samples required by the next output
+        next_first_input = (num_output * self._down + self._delay) // self._up - (num_taps - 1)
+        num_drop = min(max(0, next_first_input - self._buffer_start), self._buffer.shape[0])
+        self._buffer = self._buffer[num_drop:]
+        self._buffer_start += num_drop
+
+        return output.astype(np.float32, copy=False)
+
+    def flush(self) -> npt.NDArray:
+        """Produce the remaining output at the end of the signal."""
+        if self._buffer is None:
+            return np.zeros(0, dtype=np.float32)
+        return self.process(np.zeros((0,) + self._buffer.shape[1:], dtype=np.float32), last=True)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_torchaudio_resampler(orig_sr: int, target_sr: int) -> 'torchaudio.transforms.Resample':
+    """Returns a torchaudio resampler with the kernel computed once per pair of sample rates."""
+    return torchaudio.transforms.Resample(orig_freq=orig_sr, new_freq=target_sr)
+
+
+def resample(samples: npt.NDArray, orig_sr: int, target_sr: int, backend: str = 'librosa') -> npt.NDArray:
+    """Resample a signal along the temporal dimension.
+
+    Available backends:
+        - `librosa`: `librosa.core.resample` with its default settings
+        - `polyphase`: `scipy.signal.resample_poly` with the filter from `get_resampling_filter`, cached per pair of sample rates
+        - `torchaudio`: `torchaudio.transforms.Resample` with the kernel cached per pair of sample rates
+
+    Args:
+        samples: signal with shape (num_samples,) or (num_samples, num_channels)
+        orig_sr: original sample rate
+        target_sr: target sample rate
+        backend: resampling backend, one of `RESAMPLE_BACKENDS`
+
+    Returns:
+        Resampled float32 signal with shape (num_resampled_samples,) or (num_resampled_samples, num_channels).
+    """
+    if backend not in RESAMPLE_BACKENDS:
+        raise ValueError(f'Unknown resample backend {backend}, expected one of {RESAMPLE_BACKENDS}')
+
+    if orig_sr == target_sr:
+        return samples
+
+    if backend == 'librosa':
+        # resample along the temporal dimension (axis=0) will be in librosa 0.10.0 (#1561)
+        return librosa.core.resample(samples.transpose(), orig_sr=orig_sr, target_sr=target_sr).transpose()
+    elif backend == 'polyphase':
+        up, down, h = get_resampling_filter(orig_sr, target_sr)
+        return scipy.signal.resample_poly(samples, up, down, axis=0, window=h).astype(np.float32)
+    else:
+        if not HAVE_TORCHAUDIO:
+            raise ModuleNotFoundError('torchaudio is not installed but is necessary for the `torchaudio` backend')
+        with torch.no_grad():
+            signal = torch.from_numpy(np.ascontiguousarray(samples.transpose()))
+            return _get_torchaudio_resampler(orig_sr, target_sr)(signal).numpy().transpose()
@@ -0,0 +1,184 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bulk edit distance between hypotheses and references with a breakdown into edit operations.
+
+Words (or characters) are mapped to integer ids with a vocabulary shared by all pairs, texts are packed
+into flat arrays with offsets, and the Levenshtein distance of all pairs is computed by a single
+numba-compiled kernel. Large sets of pairs can be split across processes.
+"""
+
+import multiprocessing
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numba import jit
+
+__all__ = ['edit_operations', 'edit_distance_totals', 'SUBSTITUTIONS', 'INSERTIONS', 'DELETIONS', 'REF_LENGTH']
+
+# columns of the array returned by `edit_operations`
+SUBSTITUTIONS, INSERTIONS, DELETIONS, REF_LENGTH = 0, 1, 2, 3
+
+
+def _split_text(text: str, use_cer: bool) -> List[str]:
+    return list(text) if use_cer else text.split()
+
+
+def encode_texts(texts: List[str], vocabulary: Dict[str, int], use_cer: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Maps words (or characters) of texts to integer ids, adding new tokens to the vocabulary.
+
+    Args:
+        texts: list of texts
+        vocabulary: mapping from token to id, shared by all texts which are compared with each other
+        use_cer: bool, set True to split texts into characters instead of words
+
+    Returns:
+        Tuple (ids, offsets), where ids is a flat int32 array with the ids of all texts, and the ids of
+        text i are ids[offsets[i] : offsets[i + 1]].
+    """
+    # split lists are not kept alive, so that garbage collection does not scan millions of them
+    tokens = []
+    lengths = [0]
+    for text in texts:
+        text_tokens = _split_text(text, use_cer)
+        tokens.extend(text_tokens)
+        lengths.append(len(text_tokens))
+
+    for token in set(tokens).difference(vocabulary):
+        vocabulary[token] = len(vocabulary)
+
+    ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+    offsets = np.cumsum(lengths, dtype=np.int64)
+    return ids, offsets
+
+
+@jit(nopython=True, cache=False)
+def _edit_operations_kernel(hyp_ids, hyp_offsets, ref_ids, ref_offsets, result):
+    """Computes the Levenshtein alignment of each pair and counts substitutions, insertions and deletions.
+
+    Dynamic programming runs over reference tokens (rows) and hypothesis tokens (columns), and besides the
+    cost keeps the operation counts of the best path. Ties are resolved in favor of match / substitution,
+    then deletion, then insertion.
+    """
+    num_pairs = len(ref_offsets) - 1
+    max_hyp_len = 0
+    for k in range(num_pairs):
+        max_hyp_len = max(max_hyp_len, hyp_offsets[k + 1] - hyp_offsets[k])
+
+    # previous and current rows of cost, substitutions, insertions and deletions
+    prev = np.zeros((4, max_hyp_len + 1), dtype=np.int64)
+    curr = np.zeros((4, max_hyp_len + 1), dtype=np.int64)
+
+    for k in range(num_pairs):
+        hyp = hyp_ids[hyp_offsets[k] : hyp_offsets[k + 1]]
+        ref = ref_ids[ref_offsets[k] : ref_offsets[k + 1]]
+        n = len(hyp)
+
+        # empty reference: all hypothesis tokens are insertions
+        for j in range(n + 1):
+            prev[0, j] = j
+            prev[1, j] = 0
+            prev[2, j] = j
+            prev[3, j] = 0
+
+        for i in range(1, len(ref) + 1):
+            # empty hypothesis: all reference tokens are deletions
+            curr[0, 0] = i
+            curr[1, 0] = 0
+            curr[2, 0] = 0
+            curr[3, 0] = i
+            for j in range(1, n + 1):
+                mismatch = 1 if ref[i - 1] != hyp[j - 1] else 0
+                best = 0
+                cost = prev[0, j - 1] + mismatch
+                if prev[0, j] + 1 < cost:
+                    best = 1
+                    cost = prev[0, j] + 1
+                if curr[0, j - 1] + 1 < cost:
+                    best = 2
+                    cost = curr[0, j - 1] + 1
+
+                curr[0, j] = cost
+                if best == 0:
+                    curr[1, j] = prev[1, j - 1] + mismatch
+                    curr[2, j] = prev[2, j - 1]
+                    curr[3, j] = prev[3, j - 1]
+                elif best == 1:
+                    curr[1, j] = prev[1, j]
+                    curr[2, j] = prev[2, j]
+                    curr[3, j] = prev[3, j] + 1
+                else:
+                    curr[1, j] = curr[1, j - 1]
+                    curr[2, j] = curr[2, j - 1] + 1
+                    curr[3, j] = curr[3, j - 1]
+            prev, curr = curr, prev
+
+        result[k, 0] = prev[1, n]
+        result[k, 1] = prev[2, n]
+        result[k, 2] = prev[3, n]
+        result[k, 3] = len(ref)
+
+
+def _edit_operations_worker(args: Tuple[List[str], List[str], bool]) -> np.ndarray:
+    hypotheses, references, use_cer = args
+    vocabulary = {}
+    hyp_ids, hyp_offsets = encode_texts(hypotheses, vocabulary, use_cer=use_cer)
+    ref_ids, ref_offsets = encode_texts(references, vocabulary, use_cer=use_cer)
+    result = np.zeros((len(references), 4), dtype=np.int64)
+    _edit_operations_kernel(hyp_ids, hyp_offsets, ref_ids, ref_offsets, result)
+    return result
+
+
+def edit_operations(
+    hypotheses: List[str], references: List[str], use_cer: bool = False, num_workers: int = 0, chunk_size: int = 10000
+) -> np.ndarray:
+    """
+    Computes the number of substitutions, insertions and deletions between each hypothesis and reference.
+
+    Args:
+      hypotheses: list of hypotheses
+      references: list of references, same length as hypotheses
+      use_cer: bool, set True to compare characters instead of words
+      num_workers: int, if greater than 1, pairs are processed in chunks by a pool of this many processes
+      chunk_size: int, number of pairs per chunk when num_workers > 1
+
+    Returns:
+      An int64 array [len(references), 4] with columns SUBSTITUTIONS, INSERTIONS, DELETIONS and REF_LENGTH
+      (number of words/characters of the reference). The sum of the first three columns is the edit distance.
+    """
+    if len(hypotheses) != len(references):
+        raise ValueError(
+            "In word error rate calculation, hypotheses and reference"
+            " lists must have the same number of elements. But I got:"
+            "{0} and {1} correspondingly".format(len(hypotheses), len(references))
+        )
+
+    if num_workers <= 1 or len(references) <= chunk_size:
+        return _edit_operations_worker((hypotheses, references, use_cer))
+
+    # compile the kernel before forking, so workers do not compile it again
+    _edit_operations_worker(([''], [''], use_cer))
+    chunks = [
+        (hypotheses[start : start + chunk_size], references[start : start + chunk_size], use_cer)
+        for start in range(0, len(references), chunk_size)
+    ]
+    with multiprocessing.Pool(processes=num_workers) as pool:
+        results = pool.map(_edit_operations_worker, chunks)
+    return np.concatenate(results, axis=0)
+
+
+def edit_distance_totals(hypotheses: List[str], references: List[str], use_cer: bool = False) -> Tuple[int, int]:
+    """Returns the total edit distance and the total number of reference words (or characters)."""
+    ops = edit_operations(hypotheses, references, use_cer=use_cer)
+    return int(ops[:, :REF_LENGTH].sum()), int(ops[:, REF_LENGTH].sum())
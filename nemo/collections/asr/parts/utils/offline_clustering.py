@@ -31,6 +31,7 @@
 # https://arxiv.org/pdf/2003.02405.pdf and the implementation from
 # https://github.com/tango4j/Auto-Tuning-Spectral-Clustering.
 
+import math
 from typing import Dict, List, Tuple
 
 import torch
@@ -404,6 +405,38 @@ def get_argmin_mat(timestamps_in_scales: List[torch.Tensor]) -> List[torch.Tenso
     return session_scale_mapping_list
 
 
+@torch.jit.script
+def get_nearest_segment_index(timestamps_in_scales: List[torch.Tensor]) -> List[torch.Tensor]:
+    """
+    Calculate the same mapping between the base scale and other scales as `get_argmin_mat`, without the
+    (Number of base segments) x (Number of scale segments) distance matrices. The center of every base scale
+    segment is searched among the sorted segment centers of each scale and mapped to the closer of its two
+    neighbors, or to the earlier segment in case of a tie, in O(N log N) time and O(N) memory.
+
+    Args:
+        timestamps_in_scales (list):
+            List containing timestamp tensors for each scale.
+            Each tensor has dimensions of (Number of segments in the scale) x 2.
+
+    Returns:
+        session_scale_mapping_list (list):
+            List containing the index of the closest segment of the scale for every base scale segment,
+            indexed by scale index.
+    """
+    base_scale_anchor = torch.mean(timestamps_in_scales[-1], dim=1)
+    session_scale_mapping_list: List[torch.Tensor] = []
+    for time_stamps_float in timestamps_in_scales:
+        curr_scale_anchor, sorted_index = torch.sort(torch.mean(time_stamps_float, dim=1), stable=True)
+        right = torch.searchsorted(curr_scale_anchor, base_scale_anchor)
+        right = torch.clamp(right, max=curr_scale_anchor.shape[0] - 1)
+        left = torch.clamp(right - 1, min=0)
+        left_dist = torch.abs(base_scale_anchor - curr_scale_anchor[left])
+        right_dist = torch.abs(curr_scale_anchor[right] - base_scale_anchor)
+        nearest = torch.where(left_dist <= right_dist, left, right)
+        session_scale_mapping_list.append(sorted_index[nearest])
+    return session_scale_mapping_list
+
+
 @torch.jit.script
 def getCosAffinityMatrix(emb: torch.Tensor) -> torch.Tensor:
     """
@@ -523,6 +556,134 @@ def getMultiScaleCosAffinityMatrix(
     return fused_sim_d
 
 
+@torch.jit.script
+def getNormalizedEmbeddings(emb: torch.Tensor, eps: float = 3.5e-4) -> torch.Tensor:
+    """
+    Normalize embedding vectors to unit length, the same way as `cos_similarity` does. Embeddings are rounded to
+    half precision first, like in `getMultiScaleCosAffinityMatrix`.
+    """
+    emb = emb.half().float()
+    return emb / (torch.norm(emb, dim=1).unsqueeze(1) + eps)
+
+
+@torch.jit.script
+def getScaleMinMax(norm_emb: torch.Tensor, block_size: int = 2048) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Calculate the minimum and the maximum of the cosine similarity matrix of the given normalized embeddings
+    block by block, without keeping the whole matrix in memory. The diagonal is set to 1, like in `cos_similarity`.
+
+    Args:
+        norm_emb (Tensor):
+            Normalized embedding vectors (N x embedding_dim)
+        block_size (int):
+            Number of rows of the similarity matrix computed at once
+
+    Returns:
+        v_min (Tensor):
+            Minimum cosine similarity value
+        v_max (Tensor):
+            Maximum cosine similarity value
+    """
+    v_min, v_max = torch.tensor(1.0), torch.tensor(1.0)
+    for start in range(0, norm_emb.shape[0], block_size):
+        block = torch.mm(norm_emb[start : start + block_size], norm_emb.t())
+        rows = torch.arange(block.shape[0], device=block.device)
+        block[rows, rows + start] = 1.0
+        v_min = torch.min(v_min, block.min().cpu())
+        v_max = torch.max(v_max, block.max().cpu())
+    return v_min, v_max
+
+
+@torch.jit.script
+def getMultiScaleCosAffinityBlock(
+    multiscale_weights: torch.Tensor,
+    norm_embs_in_scales: List[torch.Tensor],
+    base_to_scale_index: List[torch.Tensor],
+    scale_min_max: List[Tuple[torch.Tensor, torch.Tensor]],
+    row_index: torch.Tensor,
+    col_index: torch.Tensor,
+) -> torch.Tensor:
+    """
+    Calculate the rows `row_index` and the columns `col_index` of the fused multiscale affinity matrix of
+    `getMultiScaleCosAffinityMatrix` without calculating the whole matrix.
+
+    Args:
+        multiscale_weights (Tensor):
+            Tensor containing Multiscale weights
+            Dimensions: 1 x (Number of scales)
+        norm_embs_in_scales (list):
+            List containing normalized embeddings of each scale, see `getNormalizedEmbeddings`
+        base_to_scale_index (list):
+            List containing the index of the segment of each scale for every base scale segment
+        scale_min_max (list):
+            List containing the minimum and maximum cosine similarity of each scale, see `getScaleMinMax`
+        row_index (Tensor):
+            Indices of the base scale segments of the rows
+        col_index (Tensor):
+            Indices of the base scale segments of the columns
+
+    Returns:
+        fused_sim_d (Tensor):
+            Block of the fused affinity matrix. Dimensions: len(row_index) x len(col_index)
+    """
+    fused_sim_d = torch.zeros(row_index.shape[0], col_index.shape[0], device=norm_embs_in_scales[0].device)
+    for scale_idx in range(len(norm_embs_in_scales)):
+        rows = base_to_scale_index[scale_idx][row_index]
+        cols = base_to_scale_index[scale_idx][col_index]
+        norm_emb = norm_embs_in_scales[scale_idx]
+        sim_d = torch.mm(norm_emb[rows], norm_emb[cols].t())
+        sim_d[rows.unsqueeze(1) == cols.unsqueeze(0)] = 1.0
+        v_min, v_max = scale_min_max[scale_idx]
+        sim_d = (sim_d - v_min.to(sim_d.device)) / (v_max - v_min).to(sim_d.device)
+        fused_sim_d += sim_d * multiscale_weights[0, scale_idx]
+    return fused_sim_d
+
+
+@torch.jit.script
+def getSparseAffinityGraphMat(
+    multiscale_weights: torch.Tensor,
+    norm_embs_in_scales: List[torch.Tensor],
+    base_to_scale_index: List[torch.Tensor],
+    scale_min_max: List[Tuple[torch.Tensor, torch.Tensor]],
+    p_value: int,
+    block_size: int = 2048,
+) -> torch.Tensor:
+    """
+    Calculate the symmetrized binarized graph matrix of `getAffinityGraphMat` for the fused multiscale affinity
+    matrix as a sparse matrix. The affinity matrix is computed block by block and only the top-p connections of
+    each row are kept, so memory grows with N * p instead of N * N.
+
+    Args:
+        p_value (int):
+            Number of connections kept for each row (kNN graph)
+        block_size (int):
+            Number of rows of the affinity matrix computed at once
+        See `getMultiScaleCosAffinityBlock` for the other arguments.
+
+    Returns:
+        symm_affinity_mat (Tensor):
+            Sparse N x N graph matrix in COO format
+    """
+    num_segments = base_to_scale_index[0].shape[0]
+    device = norm_embs_in_scales[0].device
+    p_value = min(p_value, num_segments)
+    all_index = torch.arange(num_segments, device=device)
+    neighbor_list: List[torch.Tensor] = []
+    for start in range(0, num_segments, block_size):
+        row_index = all_index[start : start + block_size]
+        block = getMultiScaleCosAffinityBlock(
+            multiscale_weights, norm_embs_in_scales, base_to_scale_index, scale_min_max, row_index, all_index
+        )
+        neighbor_list.append(torch.topk(block, p_value, dim=1)[1])
+    neighbors = torch.cat(neighbor_list, dim=0).flatten()
+    centers = all_index.repeat_interleave(p_value)
+
+    # X[neighbor, center] = 1, then 0.5 * (X + X.T)
+    indices = torch.stack([torch.cat([neighbors, centers]), torch.cat([centers, neighbors])])
+    values = torch.full((indices.shape[1],), 0.5, device=device)
+    return torch.sparse_coo_tensor(indices, values, (num_segments, num_segments)).coalesce()
+
+
 @torch.jit.script
 def getLaplacian(X: torch.Tensor) -> torch.Tensor:
     """
@@ -737,6 +898,50 @@ def estimateNumofSpeakers(
     return num_of_spk, lambdas, lambda_gap
 
 
+@torch.jit.script
+def getSparseSpectralEmbeddings(affinity_mat: torch.Tensor, n_spks: int) -> torch.Tensor:
+    """
+    Calculate spectral embeddings from a sparse affinity matrix with LOBPCG, which only computes the eigenvectors
+    of the `n_spks` smallest eigenvalues of the Laplacian. LOBPCG finds the largest eigenvalues of c * I - L,
+    where c is an upper bound of the eigenvalues of L, which are the smallest eigenvalues of L.
+
+    Args:
+        affinity_mat (Tensor):
+            Sparse symmetric affinity matrix in COO format (N x N)
+        n_spks (int):
+            Number of eigenvectors (speakers)
+
+    Returns:
+        embedding (Tensor):
+            Spectral embeddings (N x n_spks)
+    """
+    num_segments = affinity_mat.shape[0]
+    indices, values = affinity_mat.indices(), affinity_mat.values().float()
+    off_diagonal = indices[0] != indices[1]
+    indices, values = indices[:, off_diagonal], values[off_diagonal]
+    degrees = torch.zeros(num_segments, device=values.device).index_add_(0, indices[0], values)
+    # Gershgorin bound of the eigenvalues of the Laplacian
+    upper_bound = 2 * degrees.max() + 1.0
+
+    diag_index = torch.arange(num_segments, device=values.device)
+    shifted_mat = torch.sparse_coo_tensor(
+        torch.cat([indices, torch.stack([diag_index, diag_index])], dim=1),
+        torch.cat([values, upper_bound - degrees]),
+        (num_segments, num_segments),
+    ).coalesce()
+
+    if num_segments <= 3 * n_spks:
+        lambdas, diffusion_map = eigh(shifted_mat.to_dense())
+        return diffusion_map[:, -n_spks:]
+
+    # deterministic initial subspace of slowly varying vectors
+    positions = (torch.arange(num_segments, device=values.device).float() + 0.5) / num_segments
+    frequencies = torch.arange(n_spks, device=values.device).float()
+    init_vectors = torch.cos(math.pi * positions.unsqueeze(1) * frequencies.unsqueeze(0))
+    lambdas, diffusion_map = torch.lobpcg(shifted_mat, k=n_spks, X=init_vectors, largest=True, tol=1e-6, niter=500)
+    return diffusion_map
+
+
 @torch.jit.script
 class SpectralClustering:
     """
@@ -842,6 +1047,8 @@ class SpectralClustering:
             labels (Tensor):
                 clustering label output
         """
+        if affinity_mat.is_sparse:
+            return getSparseSpectralEmbeddings(affinity_mat, n_spks)
         laplacian = getLaplacian(affinity_mat)
         lambdas_, diffusion_map_ = eigDecompose(laplacian, cuda=cuda)
         diffusion_map = diffusion_map_[:, :n_spks]
@@ -1123,11 +1330,17 @@ class SpeakerClustering(torch.nn.Module):
         maj_vote_spk_count: bool = False,
         parallelism: bool = True,
         cuda: bool = False,
+        scalable_min_segments: int = -1,
+        affinity_block_size: int = 2048,
     ):
         """
         Clustering method for speaker diarization based on cosine similarity.
         NME-SC part is converted to torch.tensor based operations in NeMo 1.9.
 
+        For long recordings, the scalable mode never builds a full N x N affinity matrix. NME analysis runs on
+        an affinity matrix computed only for the subsampled segments, the final graph is a sparse kNN graph
+        computed block by block, and only the required eigenvectors are computed with LOBPCG.
+
         Args:
             min_samples_for_nmesc (int):
                 The minimum number of samples required for NME clustering. This avoids
@@ -1143,6 +1356,11 @@ class SpeakerClustering(torch.nn.Module):
                 Use dynamic parallelism feature in torch.jit compiler to accelerate the p-value search.
             cuda (bool):
                 Boolean variable for toggling cuda availability.
+            scalable_min_segments (int):
+                Sessions with at least this many base scale segments are clustered in the scalable mode.
+                The scalable mode is disabled if the value is not positive.
+            affinity_block_size (int):
+                Number of rows of the affinity matrix computed at once in the scalable mode.
         """
         super().__init__()
         self.min_samples_for_nmesc: int = min_samples_for_nmesc
@@ -1151,6 +1369,8 @@ class SpeakerClustering(torch.nn.Module):
         self.parallelism: bool = parallelism
         self.cuda: bool = cuda
         self.maj_vote_spk_count: bool = maj_vote_spk_count
+        self.scalable_min_segments: int = scalable_min_segments
+        self.affinity_block_size: int = affinity_block_size
         self.embeddings_in_scales: List[torch.Tensor] = [torch.Tensor(0)]
         self.timestamps_in_scales: List[torch.Tensor] = [torch.Tensor(0)]
         self.device = torch.device("cuda") if self.cuda else torch.device("cpu")
@@ -1287,6 +1507,17 @@ class SpeakerClustering(torch.nn.Module):
         if oracle_num_speakers > 0:
             max_num_speakers = oracle_num_speakers
 
+        if 0 < self.scalable_min_segments <= emb.shape[0]:
+            return self.forward_infer_scalable(
+                multiscale_weights=multiscale_weights,
+                oracle_num_speakers=oracle_num_speakers,
+                est_num_of_spk_enhanced=est_num_of_spk_enhanced,
+                max_rp_threshold=max_rp_threshold,
+                max_num_speakers=max_num_speakers,
+                sparse_search_volume=sparse_search_volume,
+                fixed_thres=fixed_thres,
+            )
+
         mat = getMultiScaleCosAffinityMatrix(
             multiscale_weights, self.embeddings_in_scales, self.timestamps_in_scales, self.device
         )
@@ -1325,3 +1556,85 @@ class SpeakerClustering(torch.nn.Module):
         spectral_model = SpectralClustering(n_clusters=n_clusters, cuda=self.cuda, device=self.device)
         Y = spectral_model.forward(affinity_mat)
         return Y
+
+    def forward_infer_scalable(
+        self,
+        multiscale_weights: torch.Tensor,
+        oracle_num_speakers: int,
+        est_num_of_spk_enhanced: torch.Tensor,
+        max_rp_threshold: float,
+        max_num_speakers: int,
+        sparse_search_volume: int,
+        fixed_thres: float,
+    ) -> torch.LongTensor:
+        """
+        Scalable mode of `forward_infer` for long sessions, see `__init__`. It gives the same result as the
+        dense mode up to ties in the kNN graph and the precision of LOBPCG.
+        `self.embeddings_in_scales` and `self.timestamps_in_scales` should be set by `forward_infer`.
+
+        Returns:
+            Y (LongTensor):
+                Speaker labels for the segments in the given input embeddings.
+        """
+        multiscale_weights = multiscale_weights.to(self.device)
+        session_scale_mapping_list = get_nearest_segment_index(self.timestamps_in_scales)
+        norm_embs_in_scales: List[torch.Tensor] = []
+        base_to_scale_index: List[torch.Tensor] = []
+        scale_min_max: List[Tuple[torch.Tensor, torch.Tensor]] = []
+        for scale_idx in range(len(self.embeddings_in_scales)):
+            norm_emb = getNormalizedEmbeddings(self.embeddings_in_scales[scale_idx].to(self.device))
+            norm_embs_in_scales.append(norm_emb)
+            # same as repeating the scale affinity matrix rows and columns in getMultiScaleCosAffinityMatrix
+            base_to_scale_index.append(torch.sort(session_scale_mapping_list[scale_idx].to(self.device))[0])
+            scale_min_max.append(getScaleMinMax(norm_emb, self.affinity_block_size))
+
+        # NME analysis on the affinity matrix of the subsampled segments, see NMESC.subsampleAffinityMat
+        num_segments = base_to_scale_index[0].shape[0]
+        subsample_ratio = max(1, int(num_segments / self.nme_mat_size))
+        subsample_index = torch.arange(0, num_segments, subsample_ratio, device=self.device)
+        sub_mat = getMultiScaleCosAffinityBlock(
+            multiscale_weights,
+            norm_embs_in_scales,
+            base_to_scale_index,
+            scale_min_max,
+            subsample_index,
+            subsample_index,
+        )
+        nmesc = NMESC(
+            sub_mat,
+            max_num_speakers=max_num_speakers,
+            max_rp_threshold=max_rp_threshold,
+            sparse_search=self.sparse_search,
+            sparse_search_volume=sparse_search_volume,
+            fixed_thres=fixed_thres,
+            use_subsampling_for_nme=False,
+            maj_vote_spk_count=self.maj_vote_spk_count,
+            parallelism=self.parallelism,
+            cuda=self.cuda,
+            device=self.device,
+        )
+        # If there are less than `min_samples_for_nmesc` segments, est_num_of_spk is 1.
+        if num_segments <= self.min_samples_for_nmesc:
+            nmesc.fixed_thres = max_rp_threshold
+        est_num_of_spk, p_hat_value = nmesc.forward()
+        p_hat_value = subsample_ratio * p_hat_value
+
+        affinity_mat = getSparseAffinityGraphMat(
+            multiscale_weights,
+            norm_embs_in_scales,
+            base_to_scale_index,
+            scale_min_max,
+            int(p_hat_value.item()),
+            self.affinity_block_size,
+        )
+
+        if oracle_num_speakers > 0:
+            n_clusters = int(oracle_num_speakers)
+        elif est_num_of_spk_enhanced > 0:
+            n_clusters = int(est_num_of_spk_enhanced.item())
+        else:
+            n_clusters = int(est_num_of_spk.item())
+
+        spectral_model = SpectralClustering(n_clusters=n_clusters, cuda=self.cuda, device=self.device)
+        Y = spectral_model.forward(affinity_mat)
+        return Y
@@ -12,12 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import json
 import math
+import multiprocessing
 import os
 import shutil
 from copy import deepcopy
 from functools import reduce
+from itertools import repeat
 from typing import Dict, List, Tuple, Union
 
 import numpy as np
@@ -399,7 +402,73 @@ def write_cluster_labels(base_scale_idx, lines_cluster_labels, out_rttm_dir):
             f.write(clus_label_line)
 
 
-def perform_clustering(embs_and_timestamps, AUDIO_RTTM_MAP, out_rttm_dir, clustering_params):
+def get_cluster_labels_per_session(
+    uniq_embs_and_timestamps: Dict[str, torch.Tensor],
+    num_speakers: int,
+    clustering_params: dict,
+    cuda: bool,
+    speaker_clustering: SpeakerClustering = None,
+) -> Tuple[np.ndarray, torch.Tensor]:
+    """
+    Cluster the speaker embeddings of a single session.
+
+    Args:
+        uniq_embs_and_timestamps (dict): Embeddings and timestamps of the session, see `get_embs_and_timestamps`
+        num_speakers (int): Oracle number of speakers, -1 if unknown
+        clustering_params (dict): clustering parameters, see `perform_clustering`
+        cuda (bool): Use cuda for clustering
+        speaker_clustering (SpeakerClustering): Clustering module to use. A new module is created if None.
+
+    Returns:
+        cluster_labels (np.ndarray): Cluster label of each base scale segment
+        timestamps (Tensor): Timestamps of the base scale segments
+    """
+    if speaker_clustering is None:
+        speaker_clustering = SpeakerClustering(
+            maj_vote_spk_count=clustering_params['maj_vote_spk_count'],
+            cuda=cuda,
+            scalable_min_segments=clustering_params.get('scalable_min_segments', -1),
+            affinity_block_size=clustering_params.get('affinity_block_size', 2048),
+        )
+    cluster_labels = speaker_clustering.forward_infer(
+        embeddings_in_scales=uniq_embs_and_timestamps['embeddings'],
+        timestamps_in_scales=uniq_embs_and_timestamps['timestamps'],
+        multiscale_segment_counts=uniq_embs_and_timestamps['multiscale_segment_counts'],
+        multiscale_weights=uniq_embs_and_timestamps['multiscale_weights'],
+        oracle_num_speakers=int(num_speakers),
+        max_num_speakers=int(clustering_params['max_num_speakers']),
+        max_rp_threshold=float(clustering_params['max_rp_threshold']),
+        sparse_search_volume=int(clustering_params['sparse_search_volume']),
+    )
+    base_scale_idx = uniq_embs_and_timestamps['multiscale_segment_counts'].shape[0] - 1
+    timestamps = speaker_clustering.timestamps_in_scales[base_scale_idx]
+    return cluster_labels.cpu().numpy(), timestamps
+
+
+# Clustering module of a worker process of `perform_clustering`, set by `_init_clustering_worker`
+_worker_speaker_clustering = None
+
+
+def _init_clustering_worker(num_threads: int, speaker_clustering: Union[SpeakerClustering, bytes]):
+    """
+    Initializes a worker process of `perform_clustering` with the clustering module of the main process.
+    A scripted module cannot be pickled, so it is passed serialized by `torch.jit.save`.
+    """
+    global _worker_speaker_clustering
+    torch.set_num_threads(num_threads)
+    if isinstance(speaker_clustering, bytes):
+        speaker_clustering = torch.jit.load(io.BytesIO(speaker_clustering))
+    _worker_speaker_clustering = speaker_clustering
+
+
+def get_cluster_labels_per_session_star(args):
+    """
+    A workaround for tqdm with starmap of multiprocessing
+    """
+    return get_cluster_labels_per_session(*args, speaker_clustering=_worker_speaker_clustering)
+
+
+def perform_clustering(embs_and_timestamps, AUDIO_RTTM_MAP, out_rttm_dir, clustering_params, num_workers: int = 0):
     """
     Performs spectral clustering on embeddings with time stamps generated from VAD output
 
@@ -412,6 +481,7 @@ def perform_clustering(embs_and_timestamps, AUDIO_RTTM_MAP, out_rttm_dir, cluste
         clustering_params (dict): clustering parameters provided through config that contains max_num_speakers (int),
         oracle_num_speakers (bool), max_rp_threshold(float), sparse_search_volume(int) and enhance_count_threshold (int)
         use_torch_script (bool): Boolean that determines whether to use torch.jit.script for speaker clustering
+        num_workers (int): Number of processes clustering the sessions in parallel. Only used on CPU.
 
     Returns:
         all_reference (list[uniq_name,Annotation]): reference annotations for score calculation
@@ -428,47 +498,80 @@ def perform_clustering(embs_and_timestamps, AUDIO_RTTM_MAP, out_rttm_dir, cluste
         logging.warning("cuda=False, using CPU for eigen decomposition. This might slow down the clustering process.")
         cuda = False
 
-    speaker_clustering = SpeakerClustering(maj_vote_spk_count=clustering_params.maj_vote_spk_count, cuda=cuda)
+    speaker_clustering = SpeakerClustering(
+        maj_vote_spk_count=clustering_params.maj_vote_spk_count,
+        cuda=cuda,
+        scalable_min_segments=clustering_params.get('scalable_min_segments', -1),
+        affinity_block_size=clustering_params.get('affinity_block_size', 2048),
+    )
 
     # If True, export torch script module and save it to the base folder.
     if clustering_params.get('export_script_module', False):
         speaker_clustering = torch.jit.script(speaker_clustering)
         torch.jit.save(speaker_clustering, 'speaker_clustering_script.pt')
 
-    for uniq_id, audio_rttm_values in tqdm(AUDIO_RTTM_MAP.items(), desc='clustering', leave=True):
-        uniq_embs_and_timestamps = embs_and_timestamps[uniq_id]
+    # sessions without any subsegment long enough for an embedding are not clustered, they get empty outputs
+    clustered_ids = [uniq_id for uniq_id in AUDIO_RTTM_MAP if uniq_id in embs_and_timestamps]
+    for uniq_id in AUDIO_RTTM_MAP:
+        if uniq_id not in embs_and_timestamps:
+            logging.warning(f"{uniq_id} has no speaker embeddings, its predicted RTTM file is empty.")
 
+    num_speakers_list = []
+    for uniq_id in clustered_ids:
+        audio_rttm_values = AUDIO_RTTM_MAP[uniq_id]
         if clustering_params.oracle_num_speakers:
             num_speakers = audio_rttm_values.get('num_speakers', None)
             if num_speakers is None:
                 raise ValueError("Provided option as oracle num of speakers but num_speakers in manifest is null")
         else:
             num_speakers = -1
-
-        cluster_labels = speaker_clustering.forward_infer(
-            embeddings_in_scales=uniq_embs_and_timestamps['embeddings'],
-            timestamps_in_scales=uniq_embs_and_timestamps['timestamps'],
-            multiscale_segment_counts=uniq_embs_and_timestamps['multiscale_segment_counts'],
-            multiscale_weights=uniq_embs_and_timestamps['multiscale_weights'],
-            oracle_num_speakers=int(num_speakers),
-            max_num_speakers=int(clustering_params.max_num_speakers),
-            max_rp_threshold=float(clustering_params.max_rp_threshold),
-            sparse_search_volume=int(clustering_params.sparse_search_volume),
+        num_speakers_list.append(num_speakers)
+
+    if num_workers is not None and num_workers > 1 and not cuda:
+        # Each process clusters whole sessions, so the threads of a single eigen decomposition are shared.
+        # Workers get the clustering module used by the serial path, scripted or not.
+        if isinstance(speaker_clustering, torch.jit.ScriptModule):
+            buffer = io.BytesIO()
+            torch.jit.save(speaker_clustering, buffer)
+            worker_clustering = buffer.getvalue()
+        else:
+            worker_clustering = speaker_clustering
+        pool = multiprocessing.Pool(
+            num_workers,
+            initializer=_init_clustering_worker,
+            initargs=(max(1, torch.get_num_threads() // num_workers), worker_clustering),
+        )
+        inputs = zip(
+            [embs_and_timestamps[uniq_id] for uniq_id in clustered_ids],
+            num_speakers_list,
+            repeat(clustering_params),
+            repeat(cuda),
+        )
+        session_results = pool.imap(get_cluster_labels_per_session_star, inputs)
+    else:
+        pool = None
+        session_results = (
+            get_cluster_labels_per_session(
+                embs_and_timestamps[uniq_id], num_speakers, clustering_params, cuda, speaker_clustering
+            )
+            for uniq_id, num_speakers in zip(clustered_ids, num_speakers_list)
         )
 
-        base_scale_idx = uniq_embs_and_timestamps['multiscale_segment_counts'].shape[0] - 1
-        timestamps = speaker_clustering.timestamps_in_scales[base_scale_idx]
-        cluster_labels = cluster_labels.cpu().numpy()
-        if len(cluster_labels) != timestamps.shape[0]:
-            raise ValueError("Mismatch of length between cluster_labels and timestamps.")
+    base_scale_idx = None
+    for uniq_id, audio_rttm_values in tqdm(AUDIO_RTTM_MAP.items(), desc='clustering', leave=True):
+        lines, labels = [], []
+        if uniq_id in embs_and_timestamps:
+            cluster_labels, timestamps = next(session_results)
+            base_scale_idx = embs_and_timestamps[uniq_id]['multiscale_segment_counts'].shape[0] - 1
+            if len(cluster_labels) != timestamps.shape[0]:
+                raise ValueError("Mismatch of length between cluster_labels and timestamps.")
 
-        lines = []
-        for idx, label in enumerate(cluster_labels):
-            tag = 'speaker_' + str(label)
-            lines.append(f"{timestamps[idx][0]:.3f} {timestamps[idx][1]:.3f} {tag}")
+            for idx, label in enumerate(cluster_labels):
+                tag = 'speaker_' + str(label)
+                lines.append(f"{timestamps[idx][0]:.3f} {timestamps[idx][1]:.3f} {tag}")
 
-        a = get_contiguous_stamps(lines)
-        labels = merge_stamps(a)
+            a = get_contiguous_stamps(lines)
+            labels = merge_stamps(a)
 
         if out_rttm_dir:
             labels_to_rttmfile(labels, uniq_id, out_rttm_dir)
@@ -485,7 +588,11 @@ def perform_clustering(embs_and_timestamps, AUDIO_RTTM_MAP, out_rttm_dir, cluste
             no_references = True
             all_reference = []
 
-    if out_rttm_dir:
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    if out_rttm_dir and base_scale_idx is not None:
         write_cluster_labels(base_scale_idx, lines_cluster_labels, out_rttm_dir)
 
     return all_reference, all_hypothesis
@@ -786,6 +893,37 @@ def getSubRangeList(target_range, source_range_list) -> List:
         return out_range
 
 
+def get_speech_ranges(
+    AUDIO_RTTM_MAP: dict, uniq_id: str, vad_start_end_list_raw: List[List[float]], decimals: int = 5
+) -> List[List[float]]:
+    """
+    Merge overlapping VAD timestamps of a session and trim them with the offset and duration of the session.
+
+    Args:
+        AUDIO_RTTM_MAP (dict):
+            Dictionary containing the input manifest information
+        uniq_id (str):
+            Unique file id
+        vad_start_end_list_raw (list):
+            List containing the start and end time of each VAD segment
+        decimals (int):
+            Number of rounding decimals
+
+    Returns:
+        speech_ranges (list):
+            List containing the start and end time of the speech segments within the session.
+    """
+    offset, duration = get_offset_and_duration(AUDIO_RTTM_MAP, uniq_id, decimals)
+    vad_start_end_list = combine_float_overlaps(vad_start_end_list_raw, decimals)
+    if len(vad_start_end_list) == 0:
+        logging.warning(f"File ID: {uniq_id}: The VAD label is not containing any speech segments.")
+        return []
+    elif duration <= 0:
+        logging.warning(f"File ID: {uniq_id}: The audio file has negative or zero duration.")
+        return []
+    return getSubRangeList(source_range_list=vad_start_end_list, target_range=[offset, offset + duration])
+
+
 def write_rttm2manifest(
     AUDIO_RTTM_MAP: str, manifest_file: str, include_uniq_id: bool = False, decimals: int = 5
 ) -> str:
@@ -809,20 +947,12 @@ def write_rttm2manifest(
         for uniq_id in AUDIO_RTTM_MAP:
             rttm_file_path = AUDIO_RTTM_MAP[uniq_id]['rttm_filepath']
             rttm_lines = read_rttm_lines(rttm_file_path)
-            offset, duration = get_offset_and_duration(AUDIO_RTTM_MAP, uniq_id, decimals)
             vad_start_end_list_raw = []
             for line in rttm_lines:
                 start, dur = get_vad_out_from_rttm_line(line)
                 vad_start_end_list_raw.append([start, start + dur])
-            vad_start_end_list = combine_float_overlaps(vad_start_end_list_raw, decimals)
-            if len(vad_start_end_list) == 0:
-                logging.warning(f"File ID: {uniq_id}: The VAD label is not containing any speech segments.")
-            elif duration <= 0:
-                logging.warning(f"File ID: {uniq_id}: The audio file has negative or zero duration.")
-            else:
-                overlap_range_list = getSubRangeList(
-                    source_range_list=vad_start_end_list, target_range=[offset, offset + duration]
-                )
+            overlap_range_list = get_speech_ranges(AUDIO_RTTM_MAP, uniq_id, vad_start_end_list_raw, decimals)
+            if len(overlap_range_list) > 0:
                 write_overlap_segments(outfile, AUDIO_RTTM_MAP, uniq_id, overlap_range_list, include_uniq_id, decimals)
     return manifest_file
 
@@ -881,6 +1011,36 @@ def segments_manifest_to_subsegments_manifest(
     return subsegments_manifest_file
 
 
+def get_subsegments_from_ranges(
+    speech_ranges: List[List[float]],
+    window: float = 1.5,
+    shift: float = 0.75,
+    min_subsegment_duration: float = 0.05,
+    decimals: int = 5,
+) -> List[Tuple[float, float]]:
+    """
+    Generate subsegments of the speech ranges of a session in memory.
+    This gives the same subsegments as `write_rttm2manifest` followed by `segments_manifest_to_subsegments_manifest`.
+
+    Args:
+        speech_ranges (list): List containing the start and end time of the speech segments, see `get_speech_ranges`
+        window (float): window length for segments to subsegments length
+        shift (float): hop length for subsegments shift
+        min_subsegments_duration (float): exclude subsegments smaller than this duration value
+        decimals (int): Number of rounding decimals of the speech segments
+
+    Returns:
+        subsegments (List[tuple[float, float]]): start and duration of each subsegment
+    """
+    subsegments = []
+    for (stt, end) in speech_ranges:
+        offset, duration = round(stt, decimals), round(end - stt, decimals)
+        for start, dur in get_subsegments(offset=offset, window=window, shift=shift, duration=duration):
+            if dur > min_subsegment_duration:
+                subsegments.append((start, dur))
+    return subsegments
+
+
 def get_subsegments(offset: float, window: float, shift: float, duration: float):
     """
     Return subsegments from a segment of audio file
@@ -24,6 +24,7 @@ from nemo.collections.asr.models.ctc_bpe_models import EncDecCTCModelBPE
 from nemo.collections.asr.parts.mixins.streaming import StreamingEncoder
 from nemo.collections.asr.parts.preprocessing.features import normalize_batch
 from nemo.collections.asr.parts.utils.audio_utils import get_samples
+from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 from nemo.core.classes import IterableDataset
 from nemo.core.neural_types import LengthsType, NeuralType
 
@@ -1520,3 +1521,285 @@ class CacheAwareStreamingAudioBuffer:
                 normalize_type=self.model_normalize_type,
             )
         return processed_signal, self.streams_length
+
+
+class CacheAwareStreamingManager:
+    """
+    Manages cache-aware streaming of many concurrent streams with a single model, e.g. to serve live audio streams.
+    Streams can join and leave at any chunk boundary. The encoder caches of the streams are kept in a slot table and
+    at each step the chunks of all the streams which have enough audio are processed together in batches.
+
+    The caches of the encoder are not masked, so streams are batched together only when they are at the same kind of
+    step (first, intermediate or last) and have caches of the same length. Then the outputs of each stream are the same
+    as when the stream is processed alone by CacheAwareStreamingAudioBuffer. Streams which are in their steady state
+    have full caches, so all of them can be processed in one batch.
+
+    Example:
+        manager = CacheAwareStreamingManager(model=asr_model, max_streams=64)
+        stream_id = manager.add_stream()
+        # whenever new features of the stream arrive
+        manager.append_processed_signal(stream_id, processed_signal)
+        transcriptions = manager.step()
+        # when no more audio is expected for the stream
+        manager.end_stream(stream_id)
+        while not manager.is_stream_finished(stream_id):
+            transcriptions = manager.step()
+        transcription = manager.remove_stream(stream_id)
+    """
+
+    def __init__(self, model, max_streams=64, max_batch_size=None, online_normalization=False):
+        '''
+        Args:
+            model: An ASR model with a streaming encoder like Conformer.
+            max_streams (int): the maximum number of concurrent streams, which is the number of slots for the caches
+            max_batch_size (int): the maximum number of chunks to process in one forward pass, no limit if None
+            online_normalization (bool): whether to perform online normalization per chunk
+        '''
+        self.model = model
+        self.max_streams = max_streams
+        self.max_batch_size = max_batch_size
+        self.online_normalization = online_normalization
+
+        # the buffer is only used for the preprocessor and the streaming parameters of the model
+        self.streaming_buffer = CacheAwareStreamingAudioBuffer(model=model, online_normalization=online_normalization)
+        self.streaming_cfg = self.streaming_buffer.streaming_cfg
+        self.sampling_frames = self.streaming_buffer.sampling_frames
+        self.input_features = self.streaming_buffer.input_features
+
+        # cache_last_channel of each slot is kept right-aligned and only its last cache_lengths[slot] steps are valid
+        self.cache_last_channel, self.cache_last_time = model.encoder.get_initial_cache_state(batch_size=max_streams)
+        self.cache_lengths = [0] * max_streams
+        self.free_slots = list(range(max_streams - 1, -1, -1))
+
+        self.streams = {}
+        self.next_stream_id = 0
+
+    def __len__(self):
+        return len(self.streams)
+
+    def add_stream(self):
+        """
+        Adds a new stream and assigns a free cache slot to it. Returns the id of the new stream.
+        """
+        if not self.free_slots:
+            raise RuntimeError(f"All the {self.max_streams} slots are in use, no more streams can be added!")
+        slot = self.free_slots.pop()
+        self.cache_last_time[:, slot] = 0.0
+        self.cache_lengths[slot] = 0
+
+        stream_id = self.next_stream_id
+        self.next_stream_id += 1
+        self.streams[stream_id] = {
+            'slot': slot,
+            'buffer': torch.zeros((1, self.input_features, 0), device=self.streaming_buffer.get_model_device()),
+            'buffer_idx': 0,
+            'step': 0,
+            'ended': False,
+            'previous_hypotheses': None,
+            'previous_pred_out': None,
+            'transcription': None,
+        }
+        return stream_id
+
+    def _get_stream(self, stream_id):
+        if stream_id not in self.streams:
+            raise ValueError(f"Not valid stream_id: {stream_id}!")
+        return self.streams[stream_id]
+
+    def preprocess_audio(self, audio):
+        return self.streaming_buffer.preprocess_audio(audio)
+
+    def append_audio(self, stream_id, audio):
+        """
+        Appends audio samples to a stream. Each piece of audio is featurized separately, so the features at the
+        borders of the pieces may differ from the features of the whole audio.
+        """
+        processed_signal, processed_signal_length = self.preprocess_audio(audio)
+        self.append_processed_signal(stream_id, processed_signal)
+
+    def append_processed_signal(self, stream_id, processed_signal):
+        """
+        Appends features of the shape [1, features, time] to a stream.
+        """
+        stream = self._get_stream(stream_id)
+        if stream['ended']:
+            raise ValueError(f"Stream {stream_id} has already ended!")
+        if processed_signal.size(-2) != self.input_features:
+            raise ValueError("Buffer and the processed signal have different dimensions!")
+        processed_signal = processed_signal.reshape(1, self.input_features, -1).to(stream['buffer'].device)
+        stream['buffer'] = torch.cat((stream['buffer'], processed_signal), dim=-1)
+
+    def end_stream(self, stream_id):
+        """
+        Marks that no more audio is expected for a stream, so its remaining audio can get processed.
+        """
+        self._get_stream(stream_id)['ended'] = True
+
+    def is_stream_finished(self, stream_id):
+        stream = self._get_stream(stream_id)
+        return stream['ended'] and not self._is_chunk_ready(stream)
+
+    def get_transcription(self, stream_id):
+        return self._get_stream(stream_id)['transcription']
+
+    def remove_stream(self, stream_id):
+        """
+        Removes a stream and frees its cache slot. Returns the last transcription of the stream.
+        """
+        stream = self._get_stream(stream_id)
+        del self.streams[stream_id]
+        self.free_slots.append(stream['slot'])
+        return stream['transcription']
+
+    @staticmethod
+    def _get_step_value(value, first_step):
+        if isinstance(value, list):
+            return value[0] if first_step else value[1]
+        return value
+
+    def _is_chunk_ready(self, stream):
+        first_step = stream['step'] == 0
+        chunk_size = self._get_step_value(self.streaming_cfg.chunk_size, first_step)
+        shift_size = self._get_step_value(self.streaming_cfg.shift_size, first_step)
+        available_len = stream['buffer'].size(-1) - stream['buffer_idx']
+        if available_len <= 0:
+            return False
+        # for an ongoing stream we need to know whether the chunk is the last one, which needs more than a shift
+        if not stream['ended'] and (available_len < chunk_size or available_len <= shift_size):
+            return False
+        if self.sampling_frames is not None:
+            # checking to make sure the audio chunk has enough frames to produce at least one output after downsampling
+            if min(available_len, chunk_size) < self._get_step_value(self.sampling_frames, first_step):
+                return False
+        return True
+
+    def _get_chunk(self, stream):
+        """
+        Returns the next chunk of a stream along with the pre-encode cache the same way CacheAwareStreamingAudioBuffer
+        does, and whether it is the last chunk of the stream.
+        """
+        first_step = stream['step'] == 0
+        chunk_size = self._get_step_value(self.streaming_cfg.chunk_size, first_step)
+        shift_size = self._get_step_value(self.streaming_cfg.shift_size, first_step)
+        buffer, buffer_idx = stream['buffer'], stream['buffer_idx']
+        audio_chunk = buffer[:, :, buffer_idx : buffer_idx + chunk_size]
+
+        zeros_pads = None
+        if first_step and isinstance(self.streaming_cfg.pre_encode_cache_size, list):
+            cache_pre_encode = torch.zeros(
+                (1, self.input_features, self.streaming_cfg.pre_encode_cache_size[0]),
+                device=audio_chunk.device,
+                dtype=audio_chunk.dtype,
+            )
+        else:
+            pre_encode_cache_size = self._get_step_value(self.streaming_cfg.pre_encode_cache_size, first_step=False)
+            cache_pre_encode = buffer[:, :, max(buffer_idx - pre_encode_cache_size, 0) : buffer_idx]
+            if cache_pre_encode.size(-1) < pre_encode_cache_size:
+                zeros_pads = torch.zeros(
+                    (1, self.input_features, pre_encode_cache_size - cache_pre_encode.size(-1)),
+                    device=audio_chunk.device,
+                    dtype=audio_chunk.dtype,
+                )
+
+        audio_chunk = torch.cat((cache_pre_encode, audio_chunk), dim=-1)
+        if self.online_normalization:
+            audio_chunk, x_mean, x_std = normalize_batch(
+                x=audio_chunk,
+                seq_len=torch.tensor([audio_chunk.size(-1)]),
+                normalize_type=self.streaming_buffer.model_normalize_type,
+            )
+        if zeros_pads is not None:
+            audio_chunk = torch.cat((zeros_pads, audio_chunk), dim=-1)
+
+        is_last = stream['ended'] and buffer_idx + shift_size >= buffer.size(-1)
+        return audio_chunk, shift_size, is_last
+
+    def step(self):
+        """
+        Performs one streaming step for all the streams which have a ready chunk.
+        Returns a dict of the current transcriptions of the streams which got processed in this step.
+        """
+        groups = {}
+        for stream_id, stream in self.streams.items():
+            if not self._is_chunk_ready(stream):
+                continue
+            audio_chunk, shift_size, is_last = self._get_chunk(stream)
+            key = (stream['step'] == 0, self.cache_lengths[stream['slot']], audio_chunk.size(-1), is_last)
+            groups.setdefault(key, []).append((stream_id, audio_chunk, shift_size))
+
+        transcriptions = {}
+        for (first_step, cache_len, _, is_last), chunks in groups.items():
+            batch_size = self.max_batch_size if self.max_batch_size else len(chunks)
+            for batch_start in range(0, len(chunks), batch_size):
+                transcriptions.update(
+                    self._process_batch(chunks[batch_start : batch_start + batch_size], first_step, cache_len, is_last)
+                )
+        return transcriptions
+
+    def _process_batch(self, chunks, first_step, cache_len, is_last):
+        streams = [self.streams[stream_id] for stream_id, _, _ in chunks]
+        slots = torch.tensor([stream['slot'] for stream in streams], device=self.cache_last_time.device)
+        audio_chunks = torch.cat([audio_chunk for _, audio_chunk, _ in chunks], dim=0)
+        chunk_lengths = torch.full(
+            (audio_chunks.size(0),), audio_chunks.size(-1), dtype=torch.long, device=audio_chunks.device
+        )
+
+        capacity = self.cache_last_channel.size(2)
+        cache_last_channel = self.cache_last_channel.index_select(1, slots)[:, :, capacity - cache_len :, :]
+        cache_last_time = self.cache_last_time.index_select(1, slots)
+        if first_step or streams[0]['previous_hypotheses'] is None:
+            previous_hypotheses = None
+        else:
+            previous_hypotheses = [stream['previous_hypotheses'] for stream in streams]
+        previous_pred_out = None if first_step else [stream['previous_pred_out'] for stream in streams]
+
+        with torch.no_grad():
+            (
+                pred_out,
+                transcribed_texts,
+                cache_last_channel_next,
+                cache_last_time_next,
+                best_hyp,
+            ) = self.model.conformer_stream_step(
+                processed_signal=audio_chunks,
+                processed_signal_length=chunk_lengths,
+                cache_last_channel=cache_last_channel,
+                cache_last_time=cache_last_time,
+                keep_all_outputs=is_last,
+                previous_hypotheses=previous_hypotheses,
+                previous_pred_out=previous_pred_out,
+                # for the first step there is no need to drop any tokens after the downsampling as no caching is used
+                drop_extra_pre_encoded=0 if first_step else self.streaming_cfg.drop_extra_pre_encoded,
+                return_transcription=True,
+            )
+
+        # writing the updated caches back into the slots of the streams
+        next_cache_len = cache_last_channel_next.size(2)
+        if next_cache_len > capacity:
+            # caches are right-aligned, so the table gets extended on the left side
+            self.cache_last_channel = torch.nn.functional.pad(
+                self.cache_last_channel, pad=(0, 0, next_cache_len - capacity, 0)
+            )
+            capacity = next_cache_len
+        self.cache_last_channel.narrow(2, capacity - next_cache_len, next_cache_len).index_copy_(
+            1, slots, cache_last_channel_next.to(self.cache_last_channel.dtype)
+        )
+        self.cache_last_time.index_copy_(1, slots, cache_last_time_next.to(self.cache_last_time.dtype))
+
+        pre_encode_cache_size = self._get_step_value(self.streaming_cfg.pre_encode_cache_size, first_step=False)
+        transcriptions = {}
+        for idx, ((stream_id, _, shift_size), stream) in enumerate(zip(chunks, streams)):
+            self.cache_lengths[stream['slot']] = next_cache_len
+            stream['step'] += 1
+            stream['buffer_idx'] += shift_size
+            # dropping the features which are not needed anymore, except the ones used as the pre-encode cache
+            drop_len = stream['buffer_idx'] - pre_encode_cache_size
+            if drop_len > 0:
+                stream['buffer'] = stream['buffer'][:, :, drop_len:]
+                stream['buffer_idx'] -= drop_len
+            stream['previous_pred_out'] = pred_out[idx]
+            stream['previous_hypotheses'] = best_hyp[idx] if best_hyp is not None else None
+            transcription = transcribed_texts[idx]
+            stream['transcription'] = transcription.text if isinstance(transcription, Hypothesis) else transcription
+            transcriptions[stream_id] = stream['transcription']
+        return transcriptions
@@ -309,8 +309,6 @@ def generate_overlap_vad_seq_per_tensor(
     See description in generate_overlap_vad_seq.
     Use this for single instance pipeline. 
     """
-    # This function will be refactor for vectorization but this is okay for now
-
     overlap = per_args['overlap']
     window_length_in_sec = per_args['window_length_in_sec']
     shift_length_in_sec = per_args['shift_length_in_sec']
@@ -333,35 +331,52 @@ def generate_overlap_vad_seq_per_tensor(
 
     target_len = int(len(frame) * shift)
 
-    if smoothing_method == 'mean':
-        preds = torch.zeros(target_len)
-        pred_count = torch.zeros(target_len)
+    # window k starts at target unit k * step and covers [k * step, k * step + seg)
+    step = jump_on_frame * shift
+    window_preds = frame[::jump_on_frame]
+    num_windows = len(window_preds)
+    max_cover = (seg + step - 1) // step  # maximum number of windows covering a target unit
 
-        for i, og_pred in enumerate(frame):
-            if i % jump_on_frame != 0:
-                continue
-            start = i * shift
-            end = start + seg
-            preds[start:end] = preds[start:end] + og_pred
-            pred_count[start:end] = pred_count[start:end] + 1
+    # first and last window covering each target unit, the windows in between are consecutive
+    target_idx = torch.arange(target_len, device=frame.device)
+    first_window = torch.div(target_idx - seg + step, step, rounding_mode='floor').clamp(min=0)
+    last_window = torch.div(target_idx, step, rounding_mode='floor').clamp(max=num_windows - 1)
+
+    if smoothing_method == 'mean':
+        preds = torch.zeros(target_len, device=frame.device)
+        pred_count = torch.zeros(target_len, device=frame.device)
+        window_preds = window_preds.to(preds.dtype)
+
+        # accumulate the covering windows in ascending order, as adding the windows one by one would
+        for m in range(max_cover):
+            window = first_window + m
+            covered = window <= last_window
+            contribution = window_preds[window.clamp(max=num_windows - 1)]
+            preds = preds + torch.where(covered, contribution, torch.zeros_like(preds))
+            pred_count = pred_count + covered.to(pred_count.dtype)
 
         preds = preds / pred_count
         last_non_zero_pred = preds[pred_count != 0][-1]
         preds[pred_count == 0] = last_non_zero_pred
 
     elif smoothing_method == 'median':
-        preds = [torch.empty(0) for _ in range(target_len)]
-        for i, og_pred in enumerate(frame):
-            if i % jump_on_frame != 0:
-                continue
-
-            start = i * shift
-            end = start + seg
-            for j in range(start, end):
-                if j <= target_len - 1:
-                    preds[j] = torch.cat((preds[j], og_pred.unsqueeze(0)), 0)
-
-        preds = torch.stack([torch.nanquantile(l, q=0.5) for l in preds])
+        # predictions of the windows covering each target unit, padded with nan
+        covering_preds = torch.full((target_len, max_cover), float('nan'), dtype=frame.dtype, device=frame.device)
+        for m in range(max_cover):
+            window = first_window + m
+            covered = window <= last_window
+            covering_preds[:, m] = torch.where(
+                covered, window_preds[window.clamp(max=num_windows - 1)], covering_preds[:, m]
+            )
+
+        # torch.nanquantile is limited in input size, so long sequences are processed in chunks
+        chunk_len = max(1, 16777216 // max_cover)
+        preds = torch.cat(
+            [
+                torch.nanquantile(covering_preds[start : start + chunk_len], q=0.5, dim=1)
+                for start in range(0, target_len, chunk_len)
+            ]
+        )
         nan_idx = torch.isnan(preds)
         last_non_nan_pred = preds[~nan_idx][-1]
         preds[nan_idx] = last_non_nan_pred
@@ -489,37 +504,44 @@ def binarization(sequence: torch.Tensor, per_args: Dict[str, float]) -> torch.Te
     pad_onset = per_args.get('pad_onset', 0.0)
     pad_offset = per_args.get('pad_offset', 0.0)
 
-    speech = False
-    start = 0.0
-    i = 0
-
-    speech_segments = torch.empty(0)
-
-    for i in range(0, len(sequence)):
-        # Current frame is speech
-        if speech:
-            # Switch from speech to non-speech
-            if sequence[i] < offset:
-                if i * frame_length_in_sec + pad_offset > max(0, start - pad_onset):
-                    new_seg = torch.tensor(
-                        [max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]
-                    ).unsqueeze(0)
-                    speech_segments = torch.cat((speech_segments, new_seg), 0)
-
-                start = i * frame_length_in_sec
-                speech = False
-
-        # Current frame is non-speech
-        else:
-            # Switch from non-speech to speech
-            if sequence[i] > onset:
-                start = i * frame_length_in_sec
-                speech = True
+    if len(sequence) == 0:
+        return torch.empty(0)
+
+    # Hysteresis thresholding: a frame above onset switches to speech and a frame below offset switches to
+    # non-speech. A frame doing both (only if onset < offset) toggles the state, any other frame keeps it.
+    is_onset = sequence > onset
+    is_offset = sequence < offset
+    is_event = is_onset ^ is_offset
+    num_toggles = (is_onset & is_offset).long().cumsum(dim=0)
+
+    frame_idx = torch.arange(len(sequence), device=sequence.device)
+    last_event = torch.cummax(torch.where(is_event, frame_idx, torch.full_like(frame_idx, -1)), dim=0)[0]
+    has_event = last_event >= 0
+    last_event = last_event.clamp(min=0)
+    toggles_since_event = num_toggles - torch.where(has_event, num_toggles[last_event], torch.zeros_like(num_toggles))
+    speech = (has_event & is_onset[last_event]) ^ (toggles_since_event % 2 == 1)
+
+    # A speech run starts at the frame switching to speech and ends at the frame switching to non-speech
+    prev_speech = torch.cat((torch.zeros(1, dtype=torch.bool, device=sequence.device), speech[:-1]))
+    starts = torch.nonzero(speech & ~prev_speech).squeeze(1).double() * frame_length_in_sec
+    ends = torch.nonzero(~speech & prev_speech).squeeze(1).double() * frame_length_in_sec + pad_offset
+
+    begins = (starts - pad_onset).clamp(min=0.0)
+    closed_begins = begins[: len(ends)]
+    keep = ends > closed_begins
+    speech_segments = torch.stack((closed_begins[keep], ends[keep]), dim=1)
 
     # if it's speech at the end, add final segment
-    if speech:
-        new_seg = torch.tensor([max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]).unsqueeze(0)
-        speech_segments = torch.cat((speech_segments, new_seg), 0)
+    if bool(speech[-1]):
+        final_end = torch.tensor(
+            [(len(sequence) - 1) * frame_length_in_sec + pad_offset], dtype=torch.float64, device=sequence.device
+        )
+        final_seg = torch.stack((begins[-1:], final_end), dim=1)
+        speech_segments = torch.cat((speech_segments, final_seg), 0)
+
+    if len(speech_segments) == 0:
+        return torch.empty(0)
+    speech_segments = speech_segments.float()
 
     # Merge the overlapped speech segments due to padding
     speech_segments = merge_overlap_segment(speech_segments)  # not sorted
@@ -885,6 +907,206 @@ def vad_tune_threshold_on_dev(
     return best_threshold, optimal_scores
 
 
+def load_rttm_speech_intervals(groundtruth_RTTM_file: str) -> np.ndarray:
+    """
+    Load the merged speech intervals of a groundtruth rttm file.
+    Returns:
+        intervals (np.ndarray): sorted non-overlapping intervals in np.array([[start1, end1], [start2, end2]]) format.
+    """
+    label = pd.read_csv(groundtruth_RTTM_file, sep=" ", delimiter=None, header=None)
+    start = label[3].to_numpy(dtype=np.float64)
+    intervals = np.stack((start, start + label[4].to_numpy(dtype=np.float64)), axis=1)
+    return get_union_intervals(intervals)
+
+
+def get_vad_table_intervals(speech_segments: torch.Tensor) -> np.ndarray:
+    """
+    Convert the output of generate_vad_segment_table_per_tensor to intervals, with the same precision as the
+    written rttm-like table.
+    """
+    if speech_segments.shape == torch.Size([0]):
+        return np.zeros((0, 2))
+    speech_segments = speech_segments.double().cpu().numpy()
+    start = np.round(speech_segments[:, 0], 4)
+    return np.stack((start, start + np.round(speech_segments[:, 2], 4)), axis=1)
+
+
+def get_union_intervals(intervals: np.ndarray) -> np.ndarray:
+    """
+    Merge overlapping intervals in np.array([[start1, end1], [start2, end2]]) format into sorted non-overlapping ones.
+    """
+    intervals = intervals[intervals[:, 1] > intervals[:, 0]]
+    if len(intervals) == 0:
+        return np.zeros((0, 2))
+    intervals = intervals[np.argsort(intervals[:, 0], kind='stable')]
+    max_end = np.maximum.accumulate(intervals[:, 1])
+    # an interval starts a new merged interval if it starts after all the previous ones ended
+    is_head = np.concatenate(([True], intervals[1:, 0] > max_end[:-1]))
+    is_tail = np.concatenate((is_head[1:], [True]))
+    return np.stack((intervals[is_head, 0], max_end[is_tail]), axis=1)
+
+
+def get_intersection_duration(intervals_a: np.ndarray, intervals_b: np.ndarray) -> float:
+    """
+    Total duration of the intersection of two sets of non-overlapping intervals.
+    """
+    if len(intervals_a) == 0 or len(intervals_b) == 0:
+        return 0.0
+    times = np.concatenate((intervals_a.ravel(), intervals_b.ravel()))
+    changes = np.tile([1, -1], len(intervals_a) + len(intervals_b))
+    order = np.argsort(times, kind='stable')
+    times, coverage = times[order], np.cumsum(changes[order])
+    # both sets cover the time between two consecutive boundaries if the coverage is 2
+    return float(np.sum(np.diff(times)[coverage[:-1] == 2]))
+
+
+def get_detection_error_per_param(
+    param: dict, sequences: Dict[str, torch.Tensor], references: Dict[str, np.ndarray], frame_length_in_sec: float
+) -> Tuple[float, float, float]:
+    """
+    Accumulate the false alarm, miss and total speech durations of the given postprocessing parameters on all the
+    files, as pyannote.metrics.detection.DetectionErrorRate does with the rttm-like tables.
+    """
+    false_alarm = miss = total = 0.0
+    for name, sequence in sequences.items():
+        per_args = {"frame_length_in_sec": frame_length_in_sec, **param}
+        _, per_args_float = prepare_gen_segment_table(sequence, per_args)
+        speech_segments = generate_vad_segment_table_per_tensor(sequence, per_args_float)
+
+        hypothesis = get_union_intervals(get_vad_table_intervals(speech_segments))
+        reference = references[name]
+        intersection = get_intersection_duration(reference, hypothesis)
+        reference_duration = float(np.sum(reference[:, 1] - reference[:, 0]))
+        false_alarm += float(np.sum(hypothesis[:, 1] - hypothesis[:, 0])) - intersection
+        miss += reference_duration - intersection
+        total += reference_duration
+    return false_alarm, miss, total
+
+
+# frame predictions and groundtruth intervals of the worker processes of vad_tune_threshold_on_dev_in_memory
+_tune_threshold_worker = {}
+
+
+def _init_tune_threshold_worker(sequences: dict, references: dict, frame_length_in_sec: float):
+    torch.set_num_threads(1)
+    _tune_threshold_worker.update(sequences=sequences, references=references, frame_length_in_sec=frame_length_in_sec)
+
+
+def get_detection_error_per_param_star(param: dict):
+    """
+    A workaround for multiprocessing, see vad_tune_threshold_on_dev_in_memory
+    """
+    try:
+        return get_detection_error_per_param(
+            param,
+            _tune_threshold_worker['sequences'],
+            _tune_threshold_worker['references'],
+            _tune_threshold_worker['frame_length_in_sec'],
+        )
+    except RuntimeError as e:
+        return str(e)
+
+
+def vad_tune_threshold_on_dev_in_memory(
+    params: dict,
+    vad_pred: str,
+    groundtruth_RTTM: str,
+    result_file: str = "res",
+    vad_pred_method: str = "frame",
+    focus_metric: str = "DetER",
+    frame_length_in_sec: float = 0.01,
+    num_workers: int = 20,
+) -> Tuple[dict, dict]:
+    """
+    Same as vad_tune_threshold_on_dev, but the frame predictions and groundtruth rttm files are loaded only once,
+    and the parameters of the grid are evaluated in parallel without writing segment tables.
+    The detection error is calculated from the speech intervals directly, with the same precision as the tables.
+    Args:
+        params (dict): dictionary of parameters to be tuned on.
+        vad_pred_method (str): suffix of prediction file. Use to locate file. Should be either in "frame", "mean" or "median".
+        groundtruth_RTTM_dir (str): directory of ground-truth rttm files or a file contains the paths of them.
+        focus_metric (str): metrics we care most when tuning threshold. Should be either in "DetER", "FA", "MISS"
+        frame_length_in_sec (float): frame length.
+        num_workers (int): number of workers.
+    Returns:
+        best_threshold (float): threshold that gives lowest DetER.
+    """
+    min_score = 100
+    all_perf = {}
+    try:
+        check_if_param_valid(params)
+    except:
+        raise ValueError("Please check if the parameters are valid")
+
+    assert (
+        focus_metric == "DetER" or focus_metric == "FA" or focus_metric == "MISS"
+    ), "Metric we care most should be only in 'DetER', 'FA' or 'MISS'!"
+
+    paired_filenames, groundtruth_RTTM_dict, vad_pred_dict = pred_rttm_map(vad_pred, groundtruth_RTTM, vad_pred_method)
+    sequences = {}
+    references = {}
+    for filename in tqdm(sorted(paired_filenames), desc='loading predictions and groundtruth', leave=True):
+        sequences[filename], _ = load_tensor_from_file(vad_pred_dict[filename])
+        references[filename] = load_rttm_speech_intervals(groundtruth_RTTM_dict[filename])
+
+    params_grid = get_parameter_grid(params)
+    for param in params_grid:
+        for i in param:
+            if type(param[i]) == np.float64 or type(param[i]) == np.int64:
+                param[i] = float(param[i])
+
+    pool_args = (sequences, references, frame_length_in_sec)
+    if num_workers is not None and num_workers > 1:
+        with multiprocessing.Pool(
+            processes=num_workers, initializer=_init_tune_threshold_worker, initargs=pool_args
+        ) as p:
+            results = list(
+                tqdm(
+                    p.imap(get_detection_error_per_param_star, params_grid),
+                    total=len(params_grid),
+                    desc='tuning thresholds',
+                    leave=True,
+                )
+            )
+    else:
+        _tune_threshold_worker.update(
+            sequences=sequences, references=references, frame_length_in_sec=frame_length_in_sec
+        )
+        results = [
+            get_detection_error_per_param_star(param) for param in tqdm(params_grid, desc='tuning thresholds')
+        ]
+
+    for param, result in zip(params_grid, results):
+        if isinstance(result, str):
+            print(f"Pass {param}, with error {result}")
+            continue
+
+        false_alarm, miss, total = result
+        if total == 0.0:
+            print(f"Pass {param}, with error empty groundtruth")
+            continue
+        DetER = 100 * (false_alarm + miss) / total
+        FA = 100 * false_alarm / total
+        MISS = 100 * miss / total
+
+        all_perf[str(param)] = {'DetER (%)': DetER, 'FA (%)': FA, 'MISS (%)': MISS}
+        logging.info(f"parameter {param}, {all_perf[str(param)] }")
+
+        score = all_perf[str(param)][focus_metric + ' (%)']
+
+        # save results for analysis
+        with open(result_file + ".txt", "a", encoding='utf-8') as fp:
+            fp.write(f"{param}, {all_perf[str(param)] }\n")
+
+        if score < min_score:
+            best_threshold = param
+            optimal_scores = all_perf[str(param)]
+            min_score = score
+
+    print("Current best", best_threshold, optimal_scores)
+    return best_threshold, optimal_scores
+
+
 def check_if_param_valid(params: dict) -> bool:
     """
     Check if the parameters are valid.
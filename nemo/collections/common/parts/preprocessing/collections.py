@@ -13,14 +13,18 @@
 # limitations under the License.
 
 import collections
+import hashlib
 import json
+import multiprocessing as mp
 import os
 from itertools import combinations
 from typing import Any, Dict, Iterable, List, Optional, Union
 
+import numpy as np
 import pandas as pd
+import torch
 
-from nemo.collections.common.parts.preprocessing import manifest, parsers
+from nemo.collections.common.parts.preprocessing import compiled_manifest, manifest, parsers
 from nemo.utils import logging
 
 
@@ -88,6 +92,140 @@ class FromFileText(Text):
         return texts
 
 
+def _parse_text(parser: parsers.CharParser, text: Union[str, List[Dict]], lang: Optional[str]) -> Optional[List[int]]:
+    """Converts a transcript to tokens, returns None if parser fails."""
+    if text == '':
+        return []
+
+    if hasattr(parser, "is_aggregate") and parser.is_aggregate and isinstance(text, str):
+        if lang is not None:
+            return parser(text, lang)
+        raise ValueError("lang required in manifest when using aggregate tokenizers")
+
+    return parser(text)
+
+
+# parser used by forked tokenization workers, see `_tokenize_texts`
+_TOKENIZATION_PARSER = None
+
+
+def _parse_text_worker(text_lang):
+    text, lang = text_lang
+    return _parse_text(_TOKENIZATION_PARSER, text, lang)
+
+
+def _parser_fingerprint(parser: parsers.CharParser, texts: List, langs: List, num_probes: int = 100) -> str:
+    """Returns a fingerprint of the parser: its type, vocabulary (if available) and outputs on a few texts."""
+    fingerprint = hashlib.sha256(type(parser).__qualname__.encode('utf-8'))
+    # labels of a CharParser or vocabulary of a tokenizer wrapped by the ASR datasets
+    vocab = getattr(parser, '_labels', None)
+    if vocab is None and hasattr(parser, '_tokenizer'):
+        vocab = getattr(parser._tokenizer, 'vocab', None)
+    if vocab is not None:
+        fingerprint.update(json.dumps(list(vocab)).encode('utf-8'))
+    for text, lang in list(zip(texts, langs))[:num_probes]:
+        fingerprint.update(json.dumps(_parse_text(parser, text, lang)).encode('utf-8'))
+    return fingerprint.hexdigest()
+
+
+def _tokenize_texts_parallel(
+    texts: List, langs: List, parser: parsers.CharParser, num_workers: int
+) -> List[Optional[List[int]]]:
+    """Tokenizes texts with a pool of forked workers which inherit the parser."""
+    if num_workers <= 1:
+        return [_parse_text(parser, text, lang) for text, lang in zip(texts, langs)]
+
+    global _TOKENIZATION_PARSER
+    _TOKENIZATION_PARSER = parser
+    try:
+        with mp.get_context('fork').Pool(num_workers) as pool:
+            chunksize = max(1, len(texts) // (num_workers * 16))
+            return pool.map(_parse_text_worker, zip(texts, langs), chunksize=chunksize)
+    finally:
+        _TOKENIZATION_PARSER = None
+
+
+def _save_text_tokens(cache_path: str, text_tokens: List[Optional[List[int]]]):
+    """Saves token ids as a flat array with offsets, offsets are written last to mark a complete cache."""
+    valid = np.asarray([tokens is not None for tokens in text_tokens], dtype=bool)
+    lengths = np.asarray([len(tokens) if tokens is not None else 0 for tokens in text_tokens], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    flat_tokens = np.fromiter(
+        (token for tokens in text_tokens if tokens is not None for token in tokens),
+        dtype=np.int32,
+        count=int(offsets[-1]),
+    )
+
+    for suffix, array in (('tokens', flat_tokens), ('valid', valid), ('offsets', offsets)):
+        tmp_path = f'{cache_path}.{suffix}.npy.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, f'{cache_path}.{suffix}.npy')
+
+
+class _TextTokensCache:
+    """Token ids of texts memory-mapped from a cache written by `_save_text_tokens`.
+
+    Items are read-only slices of the memory-mapped array of all token ids, or None for texts that failed to parse.
+    """
+
+    def __init__(self, cache_path: str):
+        self.flat_tokens = np.load(f'{cache_path}.tokens.npy', mmap_mode='r')
+        self.valid = np.load(f'{cache_path}.valid.npy', mmap_mode='r')
+        self.offsets = np.load(f'{cache_path}.offsets.npy', mmap_mode='r')
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, index: int) -> Optional[np.ndarray]:
+        if not self.valid[index]:
+            return None
+        return self.flat_tokens[self.offsets[index] : self.offsets[index + 1]]
+
+
+def _tokenize_texts(
+    texts: List, langs: List, parser: parsers.CharParser, num_workers: int = 0, cache_dir: Optional[str] = None,
+) -> Union[List[Optional[List[int]]], _TextTokensCache]:
+    """Tokenizes all texts, optionally in a process pool and with a cache of token ids.
+
+    The cache is keyed by the hash of texts and languages and by the parser fingerprint, so it is shared by
+    subsequent runs and, in distributed runs, built by global rank zero and memory-mapped by the other ranks.
+    With a cache, the token ids are returned memory-mapped instead of as lists.
+
+    Args:
+        texts: List of raw text transcripts.
+        langs: List of language ids, one for each text, or None.
+        parser: Instance of `CharParser` to convert string to tokens.
+        num_workers: Number of tokenization processes, texts are tokenized serially if lower than 2.
+        cache_dir: Optional directory of the token ids cache.
+
+    Returns:
+        Token ids of each text, None for texts that failed to parse.
+    """
+    if cache_dir is None:
+        return _tokenize_texts_parallel(texts, langs, parser, num_workers)
+
+    key = hashlib.sha256()
+    for text, lang in zip(texts, langs):
+        key.update(json.dumps([text, lang]).encode('utf-8'))
+    key.update(_parser_fingerprint(parser, texts, langs).encode('utf-8'))
+    cache_path = os.path.join(cache_dir, f'text_tokens_{key.hexdigest()[:32]}')
+
+    is_distributed = torch.distributed.is_available() and torch.distributed.is_initialized()
+    if not os.path.exists(f'{cache_path}.offsets.npy') and (not is_distributed or torch.distributed.get_rank() == 0):
+        logging.info(f"Tokenizing {len(texts)} texts with {num_workers} workers, cache = {cache_path}")
+        text_tokens = _tokenize_texts_parallel(texts, langs, parser, num_workers)
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_text_tokens(cache_path, text_tokens)
+        del text_tokens
+
+    if is_distributed:
+        torch.distributed.barrier()
+
+    logging.info(f"Loading cached text tokens from {cache_path}")
+    return _TextTokensCache(cache_path)
+
+
 class AudioText(_Collection):
     """List of audio-transcript text correspondence with preprocessing."""
 
@@ -113,6 +251,8 @@ class AudioText(_Collection):
         max_number: Optional[int] = None,
         do_sort_by_duration: bool = False,
         index_by_file_id: bool = False,
+        tokenization_num_workers: int = 0,
+        tokenization_cache_dir: Optional[str] = None,
     ):
         """Instantiates audio-text manifest with filters and preprocessing.
 
@@ -131,6 +271,9 @@ class AudioText(_Collection):
             max_number: Maximum number of samples to collect.
             do_sort_by_duration: True if sort samples list by duration. Not compatible with index_by_file_id.
             index_by_file_id: If True, saves a mapping from filename base (ID) to index in data.
+            tokenization_num_workers: If greater than 1, texts are tokenized upfront in a pool of this many processes.
+            tokenization_cache_dir: If set, token ids are cached in this directory and reused by subsequent runs
+                and other ranks (keyed by texts and parser fingerprint).
         """
 
         output_type = self.OUTPUT_TYPE
@@ -138,8 +281,27 @@ class AudioText(_Collection):
         if index_by_file_id:
             self.mapping = {}
 
-        for id_, audio_file, duration, offset, text, speaker, orig_sr, token_labels, lang in zip(
-            ids, audio_files, durations, offsets, texts, speakers, orig_sampling_rates, token_labels, langs
+        parsed_texts, parsed_indices = None, None
+        if tokenization_num_workers > 1 or tokenization_cache_dir is not None:
+            # only texts of entries which pass the duration filters and have no token labels are tokenized
+            parsed_indices = {}
+            for k, (duration, labels) in enumerate(zip(durations, token_labels)):
+                if min_duration is not None and duration < min_duration:
+                    continue
+                if max_duration is not None and duration > max_duration:
+                    continue
+                if labels is None:
+                    parsed_indices[k] = len(parsed_indices)
+            parsed_texts = _tokenize_texts(
+                [texts[k] for k in parsed_indices],
+                [langs[k] for k in parsed_indices],
+                parser,
+                num_workers=tokenization_num_workers,
+                cache_dir=tokenization_cache_dir,
+            )
+
+        for k, (id_, audio_file, duration, offset, text, speaker, orig_sr, token_labels, lang) in enumerate(
+            zip(ids, audio_files, durations, offsets, texts, speakers, orig_sampling_rates, token_labels, langs)
         ):
             # Duration filters.
             if min_duration is not None and duration < min_duration:
@@ -155,16 +317,10 @@ class AudioText(_Collection):
             if token_labels is not None:
                 text_tokens = token_labels
             else:
-                if text != '':
-                    if hasattr(parser, "is_aggregate") and parser.is_aggregate and isinstance(text, str):
-                        if lang is not None:
-                            text_tokens = parser(text, lang)
-                        else:
-                            raise ValueError("lang required in manifest when using aggregate tokenizers")
-                    else:
-                        text_tokens = parser(text)
+                if parsed_texts is not None:
+                    text_tokens = parsed_texts[parsed_indices[k]]
                 else:
-                    text_tokens = []
+                    text_tokens = _parse_text(parser, text, lang)
 
                 if text_tokens is None:
                     duration_filtered += duration
@@ -195,6 +351,23 @@ class AudioText(_Collection):
 
         super().__init__(data)
 
+    @property
+    def durations(self) -> List[Optional[float]]:
+        """Durations of all entries (in seconds)."""
+        return [entry.duration for entry in self.data]
+
+    @property
+    def tokens_lengths(self) -> List[int]:
+        """Number of text tokens of all entries."""
+        return [len(entry.text_tokens) for entry in self.data]
+
+    def __getitem__(self, index):
+        item = super().__getitem__(index)
+        # token ids loaded from the tokenization cache are kept memory-mapped until the entry is read
+        if isinstance(item, tuple) and isinstance(item.text_tokens, np.ndarray):
+            item = item._replace(text_tokens=item.text_tokens.tolist())
+        return item
+
 
 class ASRAudioText(AudioText):
     """`AudioText` collector from asr structured json files."""
@@ -232,6 +405,153 @@ class ASRAudioText(AudioText):
         )
 
 
+class CompiledASRAudioText:
+    """`ASRAudioText` counterpart for compiled manifests (see `compiled_manifest.compile_manifest`).
+
+    Entries are not materialized at construction: duration filters and sorting are computed with numpy over the
+    memory-mapped duration column, and each entry (including its text tokens) is built when accessed. As with
+    `AudioText`, texts are parsed once at construction to filter out entries whose text cannot be parsed.
+    """
+
+    OUTPUT_TYPE = AudioText.OUTPUT_TYPE
+
+    def __init__(
+        self,
+        manifests_files: Union[str, List[str]],
+        parser: parsers.CharParser,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        max_number: Optional[int] = None,
+        do_sort_by_duration: bool = False,
+        index_by_file_id: bool = False,
+    ):
+        """Instantiates lazy audio-text collection with filters.
+
+        Args:
+            manifests_files: Either single string path or list of such - compiled manifests to read items from.
+            parser: Instance of `CharParser` to convert string to tokens.
+            min_duration: Minimum duration to keep entry with (default: None).
+            max_duration: Maximum duration to keep entry with (default: None).
+            max_number: Maximum number of samples to collect.
+            do_sort_by_duration: True if sort samples list by duration. Not compatible with index_by_file_id.
+            index_by_file_id: If True, saves a mapping from filename base (ID) to index in data.
+        """
+        if isinstance(manifests_files, str):
+            manifests_files = manifests_files.split(',')
+
+        self.manifests = [compiled_manifest.CompiledManifest(path) for path in manifests_files]
+        self.parser = parser
+
+        manifest_ids, rows, tokens_lengths, id_offsets = [], [], [], []
+        duration_filtered, num_filtered, id_offset = 0.0, 0, 0
+        for manifest_id, cmanifest in enumerate(self.manifests):
+            durations = np.asarray(cmanifest.get_column('duration'))
+            mask = np.ones(len(durations), dtype=bool)
+            # Duration filters.
+            if min_duration is not None:
+                mask &= durations >= min_duration
+            if max_duration is not None:
+                mask &= durations <= max_duration
+            # Unparseable texts filter, entries with token labels are not parsed.
+            num_tokens = np.zeros(len(durations), dtype=np.int64)
+            for row in np.flatnonzero(mask):
+                text_tokens = cmanifest.get_string('token_labels', row)
+                if text_tokens is None:
+                    text, lang = cmanifest.get_string('text', row), cmanifest.get_string('lang', row)
+                    text_tokens = _parse_text(parser, text, lang)
+                if text_tokens is None:
+                    mask[row] = False
+                else:
+                    num_tokens[row] = len(text_tokens)
+
+            duration_filtered += float(durations[~mask].sum())
+            num_filtered += int((~mask).sum())
+            selected = np.flatnonzero(mask)
+            rows.append(selected)
+            tokens_lengths.append(num_tokens[selected])
+            manifest_ids.append(np.full(len(selected), manifest_id, dtype=np.int32))
+            # ids are global positions across manifests, as with `manifest.item_iter`
+            id_offsets.append(id_offset)
+            id_offset += len(cmanifest)
+
+        self._rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        self._manifest_ids = np.concatenate(manifest_ids) if manifest_ids else np.empty(0, dtype=np.int32)
+        self._tokens_lengths = np.concatenate(tokens_lengths) if tokens_lengths else np.empty(0, dtype=np.int64)
+        self._id_offsets = id_offsets
+
+        # Max number of entities filter.
+        if max_number:
+            self._rows = self._rows[:max_number]
+            self._manifest_ids = self._manifest_ids[:max_number]
+            self._tokens_lengths = self._tokens_lengths[:max_number]
+
+        durations = self.durations
+        if do_sort_by_duration:
+            if index_by_file_id:
+                logging.warning("Tried to sort dataset by duration, but cannot since index_by_file_id is set.")
+            else:
+                order = np.argsort(durations, kind='stable')
+                self._rows = self._rows[order]
+                self._manifest_ids = self._manifest_ids[order]
+                self._tokens_lengths = self._tokens_lengths[order]
+                durations = durations[order]
+
+        if index_by_file_id:
+            self.mapping = {}
+            for index, (manifest_id, row) in enumerate(zip(self._manifest_ids, self._rows)):
+                audio_file = self.manifests[manifest_id].get_string('audio_file', row)
+                file_id, _ = os.path.splitext(os.path.basename(audio_file))
+                if file_id not in self.mapping:
+                    self.mapping[file_id] = []
+                self.mapping[file_id].append(index)
+
+        logging.info("Dataset loaded with %d files totalling %.2f hours", len(self), durations.sum() / 3600)
+        logging.info("%d files were filtered totalling %.2f hours", num_filtered, duration_filtered / 3600)
+
+    @property
+    def durations(self) -> np.ndarray:
+        """Durations of all entries (in seconds)."""
+        durations = np.empty(len(self), dtype=np.float64)
+        for manifest_id, cmanifest in enumerate(self.manifests):
+            mask = self._manifest_ids == manifest_id
+            durations[mask] = cmanifest.get_column('duration')[self._rows[mask]]
+        return durations
+
+    @property
+    def tokens_lengths(self) -> np.ndarray:
+        """Number of text tokens of all entries, recorded when texts are parsed at construction."""
+        return self._tokens_lengths
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if (index >= len(self)) or (index < 0):
+            raise IndexError(f"Index {index} is out of range with {len(self)} entries")
+
+        manifest_id = self._manifest_ids[index]
+        item = self.manifests[manifest_id][int(self._rows[index])]
+
+        if item['token_labels'] is not None:
+            text_tokens = item['token_labels']
+        else:
+            text_tokens = _parse_text(self.parser, item['text'], item['lang'])
+
+        return self.OUTPUT_TYPE(
+            item['id'] + self._id_offsets[manifest_id],
+            item['audio_file'],
+            item['duration'],
+            text_tokens,
+            item['offset'],
+            item['text'],
+            item['speaker'],
+            item['orig_sr'],
+            item['lang'],
+        )
+
+
 class SpeechLabel(_Collection):
     """List of audio-label correspondence with preprocessing."""
 
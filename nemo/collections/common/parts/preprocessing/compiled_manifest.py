@@ -0,0 +1,241 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compiled manifests: a columnar, memory-mapped binary representation of json manifests.
+
+A compiled manifest is a directory with a metadata file and one binary file per column:
+
+    meta.json               - version, number of items, source manifests and column dtypes
+    <field>.bin             - numeric columns (id, duration, offset, orig_sr)
+    <field>.str.bin         - utf-8 blob of string columns (audio_file, text, speaker, token_labels, lang)
+    <field>.off.bin         - int64 offsets of each item in the blob (num_items + 1 values)
+
+Items are produced by `manifest.item_iter`, so relative audio paths are resolved at compile time.
+All columns are memory-mapped when loading, hence dataloader workers share the same pages instead
+of holding copies of Python objects.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from nemo.collections.common.parts.preprocessing import manifest
+from nemo.utils import logging
+
+__all__ = ['CompiledManifest', 'compile_manifest', 'is_compiled_manifest']
+__compiled_manifest_version__ = '1.0'
+
+META_FILE = 'meta.json'
+
+# numeric columns and the value used to store missing (None) entries
+NUMERIC_FIELDS = {
+    'id': (np.int64, None),
+    'duration': (np.float64, None),
+    'offset': (np.float64, np.nan),
+    'orig_sr': (np.int64, -1),
+}
+# string columns, all except audio_file are json encoded (e.g., text can be a list for aggregate tokenizers)
+STRING_FIELDS = ('audio_file', 'text', 'speaker', 'token_labels', 'lang')
+RAW_STRING_FIELDS = ('audio_file',)
+
+
+def is_compiled_manifest(path: str) -> bool:
+    """Returns True if path points to a compiled manifest directory."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+class _ColumnWriter:
+    """Appends values of a numeric column to a binary file in fixed size chunks."""
+
+    def __init__(self, path: str, dtype, chunk_size: int = 65536):
+        self._f = open(path, 'wb')
+        self._dtype = dtype
+        self._chunk_size = chunk_size
+        self._buffer = []
+
+    def append(self, value):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            np.asarray(self._buffer, dtype=self._dtype).tofile(self._f)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+
+class _StringColumnWriter:
+    """Appends values of a string column to a utf-8 blob and records their offsets."""
+
+    def __init__(self, path: str, chunk_size: int = 65536):
+        self._blob = open(path + '.str.bin', 'wb')
+        self._offsets = _ColumnWriter(path + '.off.bin', np.int64, chunk_size=chunk_size)
+        self._pos = 0
+        self._offsets.append(self._pos)
+
+    def append(self, value: str):
+        data = value.encode('utf-8')
+        self._blob.write(data)
+        self._pos += len(data)
+        self._offsets.append(self._pos)
+
+    def close(self):
+        self._blob.close()
+        self._offsets.close()
+
+
+def compile_manifest(
+    manifests_files: Union[str, List[str]],
+    output_path: str,
+    parse_func: Optional[Callable[[str, Optional[str]], Dict[str, Any]]] = None,
+) -> int:
+    """Compiles json manifests into a single compiled manifest directory.
+
+    Manifest lines are streamed, so memory usage does not depend on the size of the manifests.
+
+    Args:
+        manifests_files: Either single string file or list of such - manifests to compile.
+        output_path: Directory to write the compiled manifest to.
+        parse_func: Optional parse function passed to `manifest.item_iter`.
+
+    Returns:
+        Number of compiled items.
+    """
+    if isinstance(manifests_files, str):
+        manifests_files = manifests_files.split(',')
+
+    os.makedirs(output_path, exist_ok=True)
+    numeric_writers = {
+        field: _ColumnWriter(os.path.join(output_path, f'{field}.bin'), dtype)
+        for field, (dtype, _) in NUMERIC_FIELDS.items()
+    }
+    string_writers = {field: _StringColumnWriter(os.path.join(output_path, field)) for field in STRING_FIELDS}
+
+    num_items = 0
+    for item in manifest.item_iter(manifests_files, parse_func=parse_func):
+        for field, (_, missing_value) in NUMERIC_FIELDS.items():
+            value = item.get(field)
+            numeric_writers[field].append(missing_value if value is None else value)
+        for field in STRING_FIELDS:
+            value = item.get(field)
+            string_writers[field].append(value if field in RAW_STRING_FIELDS else json.dumps(value))
+        num_items += 1
+
+    for writer in list(numeric_writers.values()) + list(string_writers.values()):
+        writer.close()
+
+    meta = dict(
+        version=__compiled_manifest_version__,
+        num_items=num_items,
+        manifests=list(manifests_files),
+        numeric_fields={field: np.dtype(dtype).name for field, (dtype, _) in NUMERIC_FIELDS.items()},
+        string_fields=list(STRING_FIELDS),
+    )
+    # metadata is written last, so an interrupted compilation is not detected as a compiled manifest
+    with open(os.path.join(output_path, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    logging.info(f"Compiled {num_items} items from {len(manifests_files)} manifests to {output_path}")
+    return num_items
+
+
+def _memmap(path: str, dtype) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        # empty files cannot be memory-mapped
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class CompiledManifest:
+    """Read-only, lazy access to the items of a compiled manifest.
+
+    Numeric columns are exposed as memory-mapped arrays and string columns are decoded on access.
+    Pickling only stores the path, so dataloader workers re-open the memory maps instead of copying data.
+
+    Args:
+        path: Path to a compiled manifest directory (see `compile_manifest`).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._load()
+
+    def _load(self):
+        with open(os.path.join(self.path, META_FILE), 'r') as f:
+            meta = json.load(f)
+
+        version = meta.get('version', '0.0')
+        if version != __compiled_manifest_version__:
+            raise RuntimeError(
+                f"Version mismatch: Please recompile {self.path}. Expected version = {__compiled_manifest_version__}, "
+                f"but compiled manifest version = {version}."
+            )
+
+        self.num_items = meta['num_items']
+        self.manifests = meta['manifests']
+        self._numeric = {
+            field: _memmap(os.path.join(self.path, f'{field}.bin'), np.dtype(dtype))
+            for field, dtype in meta['numeric_fields'].items()
+        }
+        self._strings = {
+            field: (
+                _memmap(os.path.join(self.path, f'{field}.str.bin'), np.uint8),
+                _memmap(os.path.join(self.path, f'{field}.off.bin'), np.int64),
+            )
+            for field in meta['string_fields']
+        }
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._load()
+
+    def __len__(self):
+        return self.num_items
+
+    def get_column(self, field: str) -> np.ndarray:
+        """Returns a memory-mapped numeric column (id, duration, offset or orig_sr)."""
+        return self._numeric[field]
+
+    def get_string(self, field: str, index: int) -> Any:
+        """Returns the decoded value of a string column for item index."""
+        blob, offsets = self._strings[field]
+        value = blob[offsets[index] : offsets[index + 1]].tobytes().decode('utf-8')
+        if field in RAW_STRING_FIELDS:
+            return value
+        return json.loads(value)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Returns item index in the same format as `manifest.item_iter`."""
+        if (index >= len(self)) or (index < 0):
+            raise IndexError(f"Index {index} if out of compiled manifest range with {len(self)} items")
+
+        item = {field: self.get_string(field, index) for field in self._strings}
+        offset = float(self._numeric['offset'][index])
+        orig_sr = int(self._numeric['orig_sr'][index])
+        item.update(
+            id=int(self._numeric['id'][index]),
+            duration=float(self._numeric['duration'][index]),
+            offset=None if np.isnan(offset) else offset,
+            orig_sr=None if orig_sr < 0 else orig_sr,
+        )
+        return item
@@ -16,6 +16,7 @@
 
 import os
 import time
+from functools import lru_cache
 
 import numpy as np
 import torch
@@ -306,6 +307,7 @@ class GPTDataset(Dataset):
         self.reset_position_ids = cfg.data.get('reset_position_ids', False)
         self.reset_attention_mask = cfg.data.get('reset_attention_mask', False)
         self.eod_mask_loss = cfg.data.get('eod_mask_loss', False)
+        self.compact_attention_mask = cfg.data.get('compact_attention_mask', False)
         self.eos_id = tokenizer.eos_id
         self.no_seqlen_plus_one_input_tokens = cfg.data.get('no_seqlen_plus_one_input_tokens', False)
         self.add_extra_token = 1
@@ -387,7 +389,12 @@ class GPTDataset(Dataset):
             labels = torch.roll(text, shifts=-1, dims=0)
             labels[-1] = -1
         attention_mask, loss_mask, position_ids = _create_ltor_masks_and_position_ids(
-            tokens, self.eos_id, self.reset_position_ids, self.reset_attention_mask, self.eod_mask_loss,
+            tokens,
+            self.eos_id,
+            self.reset_position_ids,
+            self.reset_attention_mask,
+            self.eod_mask_loss,
+            compact_attention_mask=self.compact_attention_mask,
         )
         loss_mask[labels == -1] = 0.0
         tokens[tokens == -1] = 0
@@ -399,18 +406,34 @@ class GPTDataset(Dataset):
             logging.info('WARNING: Got -1 as item index. Masking loss from this sample')
             loss_mask = torch.zeros_like(loss_mask)
 
+        # with compact attention masks the dataset returns segment ids, which are converted to a mask on device
+        mask_key = 'segment_ids' if self.compact_attention_mask else 'attention_mask'
         return {
             'tokens': tokens,
             'labels': labels,
-            'attention_mask': attention_mask,
+            mask_key: attention_mask,
             'loss_mask': loss_mask,
             'position_ids': position_ids,
         }
 
 
+@lru_cache(maxsize=4)
+def _get_causal_mask(seq_length: int) -> torch.Tensor:
+    """Returns a boolean mask [1, seq_length, seq_length] which is True for future positions.
+
+    The mask is shared by all samples with the same sequence length and must not be modified in place.
+    """
+    return ~torch.ones((seq_length, seq_length), dtype=torch.bool).tril().unsqueeze(0)
+
+
 @torch.no_grad()
 def _create_ltor_masks_and_position_ids(
-    tokens: torch.Tensor, eod_token: int, reset_position_ids: bool, reset_attention_mask: bool, eod_mask_loss: bool,
+    tokens: torch.Tensor,
+    eod_token: int,
+    reset_position_ids: bool,
+    reset_attention_mask: bool,
+    eod_mask_loss: bool,
+    compact_attention_mask: bool = False,
 ):
     """Create `attention_mask`, `loss_mask`, and `position_ids`.
 
@@ -424,36 +447,41 @@ def _create_ltor_masks_and_position_ids(
         reset_position_ids:
         reset_attention_mask:
         eod_mask_loss
+        compact_attention_mask: If True, return segment ids of shape [seq_length] instead of `attention_mask`.
+            Tokens attend only to previous tokens with the same segment id, see
+            :func:`get_attention_mask_from_segment_ids`. All segment ids are 0 unless `reset_attention_mask` is set.
 
     """
     assert tokens.ndim == 1
     seq_length = tokens.numel()
-    # `attention_mask` has the shape of [1, seq_length, seq_length]
-    attention_mask = torch.tril(torch.ones((seq_length, seq_length))).unsqueeze(0)
     loss_mask = torch.ones(seq_length, dtype=torch.float)
+    is_eod = tokens == eod_token
     if eod_mask_loss:
-        loss_mask[tokens == eod_token] = 0.0
+        loss_mask[is_eod] = 0.0
 
     position_ids = torch.arange(seq_length, dtype=torch.int64)
     if reset_position_ids:
-        position_ids = position_ids.clone()
-
-    if reset_position_ids or reset_attention_mask:
-        # Find indices where EOD token is.
-        eod_index = position_ids[tokens[b] == eod_token]
-        # Detach indices from positions if going to modify positions.
-        if reset_position_ids:
-            eod_index = eod_index.clone()
-        prev_index = 0
-        for j in range(eod_index.numel()):
-            i = eod_index[j]
-            if reset_attention_mask:
-                attention_mask[0, (i + 1) :, : (i + 1)] = 0
-            if reset_position_ids:
-                position_ids[(i + 1) :] -= i + 1 - prev_index
-                prev_index = i + 1
-    # Convert attention mask to binary.
-    attention_mask = attention_mask < 0.5
+        # positions restart after every EOD token: subtract the position of the first token of each document
+        doc_start = torch.zeros(seq_length, dtype=torch.int64)
+        eod_index = position_ids[:-1][is_eod[:-1]]
+        doc_start[eod_index + 1] = eod_index + 1
+        position_ids = position_ids - torch.cummax(doc_start, dim=0).values
+
+    # a document ends with its EOD token, so the EOD token belongs to the preceding document
+    segment_ids = None
+    if reset_attention_mask:
+        eod_count = torch.cumsum(is_eod, dim=0)
+        segment_ids = eod_count - is_eod.long()
+
+    if compact_attention_mask:
+        if segment_ids is None:
+            segment_ids = torch.zeros(seq_length, dtype=torch.int64)
+        return segment_ids, loss_mask, position_ids
+
+    # `attention_mask` has the shape of [1, seq_length, seq_length] and is True for masked positions
+    attention_mask = _get_causal_mask(seq_length)
+    if segment_ids is not None:
+        attention_mask = attention_mask | (segment_ids.unsqueeze(1) != segment_ids.unsqueeze(0)).unsqueeze(0)
     return attention_mask, loss_mask, position_ids
 
 
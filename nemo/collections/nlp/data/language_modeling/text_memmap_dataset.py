@@ -29,6 +29,7 @@ from nemo.utils import logging
 __all__ = ['TextMemMapDataset', 'CSVMemMapDataset', 'build_index_files']
 __idx_version__ = '0.2'  # index file version
 __idx_suffix__ = 'idx'  # index file suffix
+__idx_chunk_size__ = 64 * 1024 * 1024  # size of the window (in bytes) scanned at once when building index files
 
 
 def _build_index_from_memdata(fn, newline_int):
@@ -61,6 +62,87 @@ def _build_index_from_memdata(fn, newline_int):
     return midx
 
 
+def _index_dtype(max_value):
+    """Returns the smallest integer dtype used for index files that can hold offsets up to max_value"""
+    # keep a margin of one so that `offset + 1` (skipping the newline) never overflows
+    if max_value < np.iinfo(np.uint32).max:
+        return np.uint32
+
+    return np.int64
+
+
+def _build_index_from_memdata_chunked(fn, newline_int, chunk_size=__idx_chunk_size__):
+    """
+    Build index of delimiter positions between samples in memmap.
+    Streaming alternative to _build_index_from_memdata with bounded memory usage.
+
+    The file is scanned in windows of chunk_size bytes and the offsets are appended to disk
+    with the smallest fitting dtype. Empty lines at the end of file are trimmed by scanning
+    the written offsets backwards, so no Python list of offsets is ever materialized.
+    The result is written directly to the index file of fn (see _build_memmap_index_files).
+
+    Returns a 1D array of ints (read-only memmap of the index file).
+    """
+    idx_fn = f"{fn}.{__idx_suffix__}.npy"
+    raw_fn = f"{idx_fn}.raw.tmp"
+    tmp_fn = f"{idx_fn}.tmp"
+
+    # use memmap to read file
+    mdata = np.memmap(fn, dtype=np.uint8, mode='r')
+    data_len = len(mdata)
+    midx_dtype = _index_dtype(data_len + 1)
+
+    try:
+        # find newline positions window by window and stream them to disk
+        num_items = 0
+        last_offset = None
+        with open(raw_fn, 'wb') as f:
+            for start in range(0, data_len, chunk_size):
+                offsets = np.flatnonzero(mdata[start : start + chunk_size] == newline_int)
+                if len(offsets) == 0:
+                    continue
+                offsets = (offsets + start).astype(midx_dtype)
+                offsets.tofile(f)
+                num_items += len(offsets)
+                last_offset = int(offsets[-1])
+
+            # add last item in case there is no new-line at the end of the file
+            if (last_offset is None) or (last_offset + 1 != data_len):
+                np.asarray([data_len + 1], dtype=midx_dtype).tofile(f)
+                num_items += 1
+
+        raw_midx = np.memmap(raw_fn, dtype=midx_dtype, mode='r', shape=(num_items,))
+
+        # remove empty lines from end of file
+        chunk_items = max(2, chunk_size // raw_midx.itemsize)
+        end = num_items
+        while end > 1:
+            start = max(0, end - chunk_items)
+            gaps = np.flatnonzero(np.diff(raw_midx[start:end].astype(np.int64)) >= 2)
+            if len(gaps):
+                end = start + int(gaps[-1]) + 2
+                break
+            end = start + 1
+
+        # copy the trimmed offsets into a preallocated .npy file
+        midx = np.lib.format.open_memmap(tmp_fn, mode='w+', dtype=midx_dtype, shape=(end,))
+        for start in range(0, end, chunk_items):
+            midx[start : start + chunk_items] = raw_midx[start : min(end, start + chunk_items)]
+        midx.flush()
+        del midx, raw_midx
+
+        os.replace(tmp_fn, idx_fn)
+    finally:
+        # free memmap
+        mdata._mmap.close()
+        del mdata
+        for fn_ in (raw_fn, tmp_fn):
+            if os.path.exists(fn_):
+                os.remove(fn_)
+
+    return np.load(idx_fn, allow_pickle=True, mmap_mode='r')
+
+
 class TextMemMapDataset(Dataset):
     """
     Allow per-line lazy access to multiple text files using numpy memmap.
@@ -74,11 +156,12 @@ class TextMemMapDataset(Dataset):
         workers=None,
         tokenizer=None,
         sort_dataset_paths=True,
-        build_index_fn=_build_index_from_memdata,
+        build_index_fn=_build_index_from_memdata_chunked,
     ):
         """
         build_index_fn - a callable build_index_fn(fn, newline_int) -> midx [np.array] that returns the index of newlines in a file fn
                          must be pickleable (to be used in multiprocessing.Pool.map)
+                         default is a streaming builder with bounded memory (_build_index_from_memdata_chunked)
         """
         super().__init__()
         self.mdata_midx_list = []
@@ -163,6 +246,50 @@ class TextMemMapDataset(Dataset):
 
         return data
 
+    def __getitems__(self, indices):
+        """
+        Return a list of samples (used by torch DataLoader to fetch a whole batch at once)
+        """
+        return self.get_batch(indices)
+
+    def get_batch(self, indices):
+        """
+        Return a list of samples for a batch of indices (same order as indices).
+
+        File ids of the whole batch are resolved with a single searchsorted, and samples are
+        grouped per file so that their boundaries are gathered from the index at once and
+        read in increasing offset order.
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(indices) == 0:
+            return []
+
+        if (indices.min() < 0) or (indices.max() >= len(self)):
+            idx = indices[(indices < 0) | (indices >= len(self))][0]
+            raise IndexError(f"Index {idx} if out of dataset range with {len(self)} samples")
+
+        # Identify the files containing the records
+        file_ids = np.searchsorted(self.midx_bins, indices, side='right')
+        base_idx = np.where(file_ids > 0, self.midx_bins[file_ids - 1], 0)
+        file_idxs = indices - base_idx + self._header_lines
+
+        samples = [None] * len(indices)
+        for file_id in np.unique(file_ids):
+            batch_pos = np.flatnonzero(file_ids == file_id)
+            file_idx = file_idxs[batch_pos]
+            mdata, midx = self.mdata_midx_list[file_id]
+            # load samples boundaries (ignore newline)
+            ends = np.asarray(midx[file_idx], dtype=np.int64)
+            starts = np.asarray(midx[np.maximum(file_idx - 1, 0)], dtype=np.int64) + 1
+            starts[file_idx == 0] = 0
+
+            # fetch samples from memmap in file order, then parse raw text (e.g., tokenize)
+            for k in np.argsort(starts, kind='stable'):
+                sample = self._fetch_sample_from_memmap(mdata, int(starts[k]), int(ends[k]))
+                samples[batch_pos[k]] = self._build_data_from_text(sample)
+
+        return samples
+
     def _fetch_sample_from_memmap(self, mdata, i, j):
         """Fetchs the text sample. Can be overriden by child-classes to support loading of partial samples and alternative decode methods"""
         # load text sample by slicing memmap data[i:j]
@@ -292,6 +419,10 @@ def _build_memmap_index_files(newline_int, build_index_fn, fn):
         logging.info(f"Building indexing for fn = {fn}")
         # find all newline positions
         midx = build_index_fn(fn, newline_int)
+        # test if build_index_fn already wrote the index file (e.g., _build_index_from_memdata_chunked)
+        idx_file_written = isinstance(midx, np.memmap) and (
+            os.path.abspath(midx.filename) == os.path.abspath(idx_fn + ".npy")
+        )
         # validate midx
         midx = np.asarray(midx)
         if not np.issubdtype(midx.dtype, np.integer):
@@ -301,15 +432,19 @@ def _build_memmap_index_files(newline_int, build_index_fn, fn):
         data = dict(newline_int=newline_int, version=__idx_version__)
 
         # save index as numpy array to enable memmap reading
-        logging.info(f"Saving idx file = {idx_fn}.npy")
-        np.save(idx_fn + ".npy", midx, allow_pickle=True)
+        if not idx_file_written:
+            logging.info(f"Saving idx file = {idx_fn}.npy")
+            np.save(idx_fn + ".npy", midx, allow_pickle=True)
+        del midx
         logging.info(f"Saving metadata file = {idx_fn}.info")
         pickle.dump(data, open(idx_fn + ".info", "wb"))
 
         return True
 
 
-def build_index_files(dataset_paths, newline_int, workers=None, build_index_fn=_build_index_from_memdata):
+def build_index_files(
+    dataset_paths, newline_int, workers=None, build_index_fn=_build_index_from_memdata_chunked,
+):
     """Auxiliary method to build multiple index files"""
     if len(dataset_paths) < 1:
         raise ValueError("files_list must contain at leat one file name")
@@ -31,6 +31,7 @@ from nemo.collections.nlp.modules.common.megatron.module import Float16Module
 from nemo.collections.nlp.modules.common.megatron.utils import (
     average_losses_across_data_parallel_group,
     get_all_params_for_weight_decay_optimization,
+    get_attention_mask_from_segment_ids,
     get_params_for_weight_decay_optimization,
 )
 from nemo.collections.nlp.modules.common.text_generation_utils import (
@@ -456,6 +457,9 @@ class MegatronGPTModel(MegatronBaseModel, TextGeneration):
                 batch = [x.cuda(non_blocking=True) for x in batch]
                 tokens, labels, loss_mask, attention_mask, position_ids = batch
                 attention_mask = attention_mask[0:1]
+                if attention_mask.dim() == 2:
+                    # compact attention mask: segment ids [b, s]
+                    attention_mask = get_attention_mask_from_segment_ids(attention_mask)
             else:
                 # GPT3 uses only causal mask, which doesn't need attention mask
                 if parallel_state.is_pipeline_first_stage():
@@ -623,7 +627,7 @@ class MegatronGPTModel(MegatronBaseModel, TextGeneration):
             global_batch["tokens"],
             global_batch["labels"],
             global_batch["loss_mask"],
-            global_batch["attention_mask"],
+            global_batch["attention_mask"] if "attention_mask" in global_batch else global_batch["segment_ids"],
             global_batch["position_ids"],
         ]
 
@@ -220,6 +220,17 @@ def get_ltor_masks_and_position_ids(data, eod_token, reset_position_ids, reset_a
     return attention_mask, loss_mask, position_ids
 
 
+def get_attention_mask_from_segment_ids(segment_ids):
+    """Build the attention mask [b, 1, s, s] of a left to right model from segment ids [b, s].
+
+    Tokens attend to previous tokens of the same segment (document), masked positions are True.
+    """
+    seq_length = segment_ids.size(1)
+    causal_mask = torch.ones((seq_length, seq_length), dtype=torch.bool, device=segment_ids.device).tril()
+    attention_mask = causal_mask.unsqueeze(0) & (segment_ids.unsqueeze(2) == segment_ids.unsqueeze(1))
+    return ~attention_mask.unsqueeze(1)
+
+
 def attn_mask_postprocess(attn_mask):
     # [b, 1, s, s]
     # Attn_masks for enc-dec attn and dec attn is None when trying to get just the encoder hidden states.
@@ -0,0 +1,150 @@
+# Copyright (c) 2022, NVIDIA CORPORATION & AFFILIATES.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+__all__ = ['yin', 'PitchStatsAccumulator']
+
+
+def _frame(audio: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """Splits zero-padded audio into centered frames, the same frames as `librosa.pyin` uses."""
+    padded = np.pad(audio, frame_length // 2)
+    num_frames = 1 + len(audio) // hop_length
+    frames = np.lib.stride_tricks.sliding_window_view(padded, frame_length)[::hop_length]
+    return frames[:num_frames]
+
+
+def _cumulative_mean_normalized_difference(frames: np.ndarray, max_period: int) -> np.ndarray:
+    """Computes the cumulative mean normalized difference function of YIN for all frames and periods up to
+    `max_period`. The difference function is computed with FFT-based autocorrelation.
+    """
+    frame_length = frames.shape[1]
+    window_length = frame_length - max_period
+    fft_length = 1 << int(np.ceil(np.log2(frame_length + window_length)))
+
+    frames = frames.astype(np.float64)
+    acf = np.fft.irfft(
+        np.fft.rfft(frames, fft_length) * np.conj(np.fft.rfft(frames[:, :window_length], fft_length)), fft_length
+    )[:, : max_period + 1]
+
+    # energy of frames[:, tau : tau + window_length] for every tau
+    energy = np.cumsum(np.pad(frames ** 2, ((0, 0), (1, 0))), axis=1)
+    lagged_energy = energy[:, window_length : window_length + max_period + 1] - energy[:, : max_period + 1]
+    difference = np.maximum(lagged_energy[:, :1] + lagged_energy - 2 * acf, 0.0)
+
+    cmnd = np.ones_like(difference)
+    cumulative_mean = np.cumsum(difference[:, 1:], axis=1) / np.arange(1, max_period + 1)
+    np.divide(difference[:, 1:], cumulative_mean, out=cmnd[:, 1:], where=cumulative_mean > 0)
+    return cmnd
+
+
+def yin(
+    audio: np.ndarray,
+    sample_rate: int,
+    fmin: float,
+    fmax: float,
+    frame_length: int,
+    hop_length: Optional[int] = None,
+    threshold: float = 0.15,
+    interpolate: bool = True,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Estimates the fundamental frequency of audio with the YIN algorithm (de Cheveigné and Kawahara, 2002).
+
+    It is a much faster alternative to `librosa.pyin`, which runs a Viterbi decoding over the candidates of all
+    frames, and returns values in the same format, with the same number of frames.
+
+    Args:
+        audio: 1D audio signal.
+        sample_rate: Sample rate of the audio.
+        fmin: Minimum frequency in Hz.
+        fmax: Maximum frequency in Hz.
+        frame_length: Length of the analysis frames, must be larger than `sample_rate / fmin`.
+        hop_length: Number of samples between frames. Defaults to `frame_length // 4`, like `librosa.pyin`.
+        threshold: Frames whose normalized difference at the estimated period is below the threshold are voiced.
+            Lower values give fewer octave errors but more unvoiced frames.
+        interpolate: Whether to refine the period with parabolic interpolation, which is more accurate
+            than the integer period, especially for high frequencies.
+
+    Returns:
+        Tuple (f0, voiced_mask, voiced_prob): fundamental frequency in Hz (0 in unvoiced frames), boolean mask of
+        voiced frames, and the probability that a frame is voiced.
+    """
+    hop_length = hop_length or frame_length // 4
+    min_period = max(int(np.floor(sample_rate / fmax)), 1)
+    max_period = int(np.ceil(sample_rate / fmin))
+    if max_period >= frame_length:
+        raise ValueError(
+            f"frame_length={frame_length} is too short for fmin={fmin}, it must be larger than {max_period} samples."
+        )
+
+    frames = _frame(np.asarray(audio, dtype=np.float32), frame_length, hop_length)
+    cmnd = _cumulative_mean_normalized_difference(frames, max_period)
+
+    # first local minimum below the threshold, or the global minimum if there is none
+    candidates = cmnd[:, min_period : max_period + 1]
+    is_local_min = np.zeros_like(candidates, dtype=bool)
+    is_local_min[:, 1:-1] = (candidates[:, 1:-1] <= candidates[:, :-2]) & (candidates[:, 1:-1] < candidates[:, 2:])
+    below_threshold = is_local_min & (candidates < threshold)
+    period_idx = np.where(below_threshold.any(axis=1), below_threshold.argmax(axis=1), candidates.argmin(axis=1))
+
+    frame_idx = np.arange(len(frames))
+    min_value = candidates[frame_idx, period_idx]
+    period = (period_idx + min_period).astype(np.float64)
+
+    if interpolate:
+        inner = (period_idx > 0) & (period_idx < candidates.shape[1] - 1)
+        left = candidates[frame_idx, np.maximum(period_idx - 1, 0)]
+        right = candidates[frame_idx, np.minimum(period_idx + 1, candidates.shape[1] - 1)]
+        curvature = left - 2 * min_value + right
+        shift = np.zeros_like(period)
+        np.divide(left - right, 2 * curvature, out=shift, where=inner & (curvature > 0))
+        period += np.clip(shift, -1.0, 1.0)
+
+    voiced_mask = min_value < threshold
+    f0 = np.where(voiced_mask, sample_rate / period, 0.0)
+    voiced_prob = np.clip(1.0 - min_value, 0.0, 1.0)
+    return f0.astype(np.float32), voiced_mask, voiced_prob.astype(np.float32)
+
+
+class PitchStatsAccumulator:
+    """Accumulates pitch mean and standard deviation of voiced frames, overall and per speaker, in a single pass
+    and without keeping the pitch values. The statistics have the format of `pitch_stats_path` of TTSDataset.
+    """
+
+    def __init__(self):
+        # count, sum and sum of squares of the pitch values
+        self._moments = defaultdict(lambda: np.zeros(3, dtype=np.float64))
+
+    def update(self, pitch: np.ndarray, speaker: Optional[str] = None):
+        pitch = np.asarray(pitch, dtype=np.float64)
+        # filter out non-speech frames
+        pitch = pitch[pitch != 0]
+        moments = np.array([len(pitch), pitch.sum(), (pitch ** 2).sum()])
+        self._moments["default"] += moments
+        if speaker is not None:
+            self._moments[str(speaker)] += moments
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for key, (count, total, total_squares) in self._moments.items():
+            if count < 2:
+                continue
+            mean = total / count
+            # unbiased, like torch.std
+            variance = max(total_squares - count * mean ** 2, 0.0) / (count - 1)
+            stats[key] = {"pitch_mean": float(mean), "pitch_std": float(np.sqrt(variance))}
+        return stats
@@ -0,0 +1,159 @@
+# Copyright (c) 2022, NVIDIA CORPORATION & AFFILIATES.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Indexed, memory-mapped storage of supplementary TTS data (e.g. log mel, pitch, energy).
+
+A store holds one data type for all samples of one manifest in two files:
+    <path>.bin      -- values of all samples, concatenated
+    <path>.idx.npz  -- keys, offsets and shapes of the samples, and the dtype of the values
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import torch
+
+__all__ = ['SupDataStore', 'SupDataStoreWriter', 'get_store_name']
+
+
+def get_store_name(manifest_file: Union[str, Path]) -> str:
+    """Name of the stores of a manifest: its stem and a hash of its absolute path, so that manifests
+    with the same file name in different directories do not share stores."""
+    path_hash = hashlib.sha256(os.path.abspath(manifest_file).encode("utf-8")).hexdigest()[:16]
+    return f"{Path(manifest_file).stem}_{path_hash}"
+
+
+def _data_path(path: Union[str, Path]) -> str:
+    return f"{path}.bin"
+
+
+def _index_path(path: Union[str, Path]) -> str:
+    return f"{path}.idx.npz"
+
+
+class SupDataStoreWriter:
+    """Writes arrays of one data type to a store.
+
+    The store files are written under temporary names and renamed by `close`, so readers never see
+    a partially written store.
+
+    Args:
+        path: Path of the store without extension.
+        dtype: Data type of the stored values. Values are converted to it.
+    """
+
+    def __init__(self, path: Union[str, Path], dtype: Union[str, np.dtype] = np.float32):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._tmp_data_path = _data_path(path) + ".tmp"
+        self._data_file = open(self._tmp_data_path, "wb")
+        self._keys: List[str] = []
+        self._shapes: List[tuple] = []
+        self._offsets: List[int] = [0]
+
+    def append(self, key: str, value: Union[np.ndarray, torch.Tensor]):
+        if isinstance(value, torch.Tensor):
+            value = value.detach().cpu().numpy()
+        value = np.ascontiguousarray(value, dtype=self.dtype)
+        if self._shapes and value.ndim != len(self._shapes[0]):
+            raise ValueError(f"All values of a store must have {len(self._shapes[0])} dimensions, got {value.shape}")
+
+        self._data_file.write(value.tobytes())
+        self._keys.append(key)
+        self._shapes.append(value.shape)
+        self._offsets.append(self._offsets[-1] + value.size)
+
+    def close(self):
+        self._data_file.close()
+        tmp_index_path = _index_path(self.path) + ".tmp.npz"
+        np.savez(
+            tmp_index_path,
+            keys=np.array(self._keys, dtype=np.str_),
+            offsets=np.array(self._offsets, dtype=np.int64),
+            shapes=np.array(self._shapes, dtype=np.int64).reshape(len(self._shapes), -1),
+            dtype=np.array(self.dtype.str),
+        )
+        os.replace(self._tmp_data_path, _data_path(self.path))
+        os.replace(tmp_index_path, _index_path(self.path))
+
+    def abort(self):
+        """Discards the values written so far."""
+        self._data_file.close()
+        os.remove(self._tmp_data_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SupDataStore:
+    """Reads values from a store written by SupDataStoreWriter.
+
+    The values are memory-mapped copy-on-write, so returned tensors share memory with the page cache.
+    They should not be modified in place: this does not change the store, but later reads of the same
+    value in this process would return the modified value. The file is mapped on first access, so a store
+    can be created before DataLoader workers are started.
+
+    Args:
+        path: Path of the store without extension.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = path
+        with np.load(_index_path(path)) as index:
+            keys = index["keys"]
+            self.offsets = index["offsets"]
+            self.shapes = index["shapes"]
+            self.dtype = np.dtype(str(index["dtype"]))
+        self.key_to_index: Dict[str, int] = {key: idx for idx, key in enumerate(keys.tolist())}
+        self._data: Optional[np.memmap] = None
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        return os.path.exists(_data_path(path)) and os.path.exists(_index_path(path))
+
+    def _get_data(self) -> np.ndarray:
+        if self._data is None:
+            if self.offsets[-1] == 0:
+                # an empty file cannot be memory-mapped
+                self._data = np.zeros(0, dtype=self.dtype)
+            else:
+                self._data = np.memmap(_data_path(self.path), dtype=self.dtype, mode="c")
+        return self._data
+
+    def __getstate__(self):
+        # memory maps are not shared with workers, every worker maps the file itself
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_to_index
+
+    def __len__(self) -> int:
+        return len(self.key_to_index)
+
+    def __getitem__(self, key: str) -> torch.Tensor:
+        idx = self.key_to_index[key]
+        value = self._get_data()[self.offsets[idx] : self.offsets[idx + 1]]
+        return torch.from_numpy(value.reshape(self.shapes[idx]))
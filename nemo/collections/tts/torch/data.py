@@ -15,6 +15,7 @@
 
 import json
 import math
+import os
 import pickle
 import random
 from pathlib import Path
@@ -32,6 +33,8 @@ from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import (
     EnglishCharsTokenizer,
     EnglishPhonemesTokenizer,
 )
+from nemo.collections.tts.data.pitch_extraction import PitchStatsAccumulator, yin
+from nemo.collections.tts.data.sup_data_store import SupDataStore, SupDataStoreWriter, get_store_name
 from nemo.collections.tts.torch.helpers import (
     BetaBinomialInterpolator,
     beta_binomial_prior_distribution,
@@ -75,6 +78,16 @@ WINDOW_FN_SUPPORTED = {
 }
 
 
+# supplementary data types which can be precomputed into a SupDataStore, and the dtype they are stored with
+STORE_DATA_TYPES = {
+    LogMel: np.float32,
+    Pitch: np.float32,
+    Voiced_mask: np.bool_,
+    P_voiced: np.float32,
+    Energy: np.float32,
+}
+
+
 class TTSDataset(Dataset):
     def __init__(
         self,
@@ -162,11 +175,18 @@ class TTSDataset(Dataset):
             use_beta_binomial_interpolator (Optional[bool]): Whether to use beta-binomial interpolator for calculating alignment prior matrix. Defaults to False.
             pitch_fmin (Optional[float]): The fmin input to librosa.pyin. Defaults to librosa.note_to_hz('C2').
             pitch_fmax (Optional[float]): The fmax input to librosa.pyin. Defaults to librosa.note_to_hz('C7').
+            pitch_estimator (Optional[str]): Pitch estimator, "pyin" (librosa.pyin) or "yin" (a much faster estimator,
+                see nemo.collections.tts.data.pitch_extraction.yin). Defaults to "pyin".
+            yin_threshold (Optional[float]): Voicing threshold of the "yin" pitch estimator. Defaults to 0.15.
             pitch_mean (Optional[float]): The mean that we use to normalize the pitch.
             pitch_std (Optional[float]): The std that we use to normalize the pitch.
             pitch_norm (Optional[bool]): Whether to normalize pitch or not. If True, requires providing either
                 pitch_stats_path or (pitch_mean and pitch_std).
             pitch_stats_path (Optional[Path, str]): Path to file containing speaker level pitch statistics.
+
+        Supplementary data (log mel, pitch, voiced mask, p_voiced, energy) can be precomputed for all samples with
+        `precompute_sup_data`, which writes one memory-mapped store per data type and manifest into the folder of
+        the data type. Stores are used when they exist, samples missing in the stores fall back to `.pt` files.
         """
         super().__init__()
 
@@ -212,7 +232,7 @@ class TTSDataset(Dataset):
 
         data = []
         total_duration = 0
-        for manifest_file in self.manifest_filepath:
+        for manifest_idx, manifest_file in enumerate(self.manifest_filepath):
             with open(Path(manifest_file).expanduser(), 'r') as f:
                 logging.info(f"Loading dataset from {manifest_file}.")
                 for line in tqdm(f):
@@ -225,6 +245,7 @@ class TTSDataset(Dataset):
                         "duration": item["duration"] if "duration" in item else None,
                         "speaker_id": item["speaker"] if "speaker" in item else None,
                         "is_phoneme": item["is_phoneme"] if "is_phoneme" in item else None,
+                        "manifest_idx": manifest_idx,
                     }
 
                     if "normalized_text" in item:
@@ -325,6 +346,18 @@ class TTSDataset(Dataset):
         for data_type in self.sup_data_types:
             getattr(self, f"add_{data_type.name}")(**kwargs)
 
+        self.sup_data_stores = {}
+        for data_type in self.sup_data_types:
+            if data_type not in STORE_DATA_TYPES:
+                continue
+            stores = []
+            for manifest_file in self.manifest_filepath:
+                store_path = self._get_sup_data_store_path(data_type, manifest_file)
+                if SupDataStore.exists(store_path):
+                    logging.info(f"Loading {data_type.name} from {store_path}.")
+                    stores.append(SupDataStore(store_path))
+            self.sup_data_stores[data_type] = stores
+
     @staticmethod
     def filter_files(data, ignore_file, min_duration, max_duration, total_duration):
         if ignore_file:
@@ -415,6 +448,13 @@ class TTSDataset(Dataset):
 
         self.pitch_fmin = kwargs.pop("pitch_fmin", librosa.note_to_hz('C2'))
         self.pitch_fmax = kwargs.pop("pitch_fmax", librosa.note_to_hz('C7'))
+        self.pitch_estimator = kwargs.pop("pitch_estimator", "pyin")
+        self.yin_threshold = kwargs.pop("yin_threshold", 0.15)
+        if self.pitch_estimator not in ("pyin", "yin"):
+            raise NotImplementedError(
+                f"Current implementation doesn't support {self.pitch_estimator} pitch estimator. "
+                f"Please choose one from ['pyin', 'yin']."
+            )
         self.pitch_mean = kwargs.pop("pitch_mean", None)
         self.pitch_std = kwargs.pop("pitch_std", None)
         self.pitch_norm = kwargs.pop("pitch_norm", False)
@@ -466,6 +506,153 @@ class TTSDataset(Dataset):
     def add_speaker_id(self, **kwargs):
         pass
 
+    def _get_sup_data_store_path(self, data_type: TTSDataType, manifest_file: Union[str, Path]) -> Path:
+        folder = getattr(self, f"{data_type.name}_folder")
+        return Path(folder) / get_store_name(manifest_file)
+
+    def _get_text_id(self, sample: Dict) -> str:
+        # Let's keep audio name and all internal directories in rel_audio_path_as_text_id to avoid any collisions
+        rel_audio_path = Path(sample["audio_filepath"]).relative_to(self.base_data_dir).with_suffix("")
+        rel_audio_path_as_text_id = str(rel_audio_path).replace("/", "_")
+        if sample["is_phoneme"] == 1:
+            rel_audio_path_as_text_id += "_phoneme"
+        return rel_audio_path_as_text_id
+
+    def _load_sup_data(self, data_type: TTSDataType, text_id: str) -> Optional[torch.Tensor]:
+        """Loads supplementary data of a sample from a store or a `.pt` file, returns None if it does not exist."""
+        for store in self.sup_data_stores.get(data_type, []):
+            if text_id in store:
+                return store[text_id]
+
+        file_path = Path(getattr(self, f"{data_type.name}_folder")) / f"{text_id}.pt"
+        if file_path.exists():
+            return torch.load(file_path)
+        return None
+
+    @staticmethod
+    def _save_sup_data(value: torch.Tensor, file_path: Path):
+        # write to a temporary file first, so that workers never read a partially written file
+        tmp_file_path = file_path.with_suffix(f".{os.getpid()}.tmp")
+        torch.save(value, tmp_file_path)
+        os.replace(tmp_file_path, file_path)
+
+    def get_pitch(self, audio):
+        """Returns pitch, voiced mask and voiced probability of the audio, see `librosa.pyin`."""
+        if self.pitch_estimator == "yin":
+            return yin(
+                audio.numpy(),
+                sample_rate=self.sample_rate,
+                fmin=self.pitch_fmin,
+                fmax=self.pitch_fmax,
+                frame_length=self.win_length,
+                threshold=self.yin_threshold,
+            )
+        return librosa.pyin(
+            audio.numpy(),
+            fmin=self.pitch_fmin,
+            fmax=self.pitch_fmax,
+            frame_length=self.win_length,
+            sr=self.sample_rate,
+            fill_na=0.0,
+        )
+
+    def get_energy(self, audio, spec=None):
+        if spec is None:
+            spec = self.get_spec(audio)
+        return torch.linalg.norm(spec.squeeze(0), axis=0).float()
+
+    def load_audio(self, sample):
+        features = self.featurizer.process(
+            sample["audio_filepath"],
+            trim=self.trim,
+            trim_ref=self.trim_ref,
+            trim_top_db=self.trim_top_db,
+            trim_frame_length=self.trim_frame_length,
+            trim_hop_length=self.trim_hop_length,
+        )
+        return features
+
+    def compute_sup_data(self, index: int, data_types: List[TTSDataType]) -> Dict[TTSDataType, torch.Tensor]:
+        """Computes supplementary data of a sample without reading or writing any cached values.
+
+        Args:
+            index: Index of the sample.
+            data_types: Data types to compute, a subset of LogMel, Pitch, Voiced_mask, P_voiced and Energy.
+
+        Returns:
+            A dictionary with the computed value of each data type.
+        """
+        audio = self.load_audio(self.data[index])
+        result = {}
+        # log mel and energy are computed from the same spectrogram
+        spec = self.get_spec(audio) if LogMel in data_types and Energy in data_types else None
+        if LogMel in data_types:
+            result[LogMel] = self.get_log_mel(audio, spec=spec)
+        voiced_types = [data_type for data_type in (Pitch, Voiced_mask, P_voiced) if data_type in data_types]
+        if voiced_types:
+            voiced_tuple = self.get_pitch(audio)
+            for i, data_type in enumerate([Pitch, Voiced_mask, P_voiced]):
+                if data_type in voiced_types:
+                    result[data_type] = torch.from_numpy(voiced_tuple[i])
+        if Energy in data_types:
+            result[Energy] = self.get_energy(audio, spec=spec)
+        return result
+
+    def precompute_sup_data(self, num_workers: int = 0) -> Optional[Dict[str, Dict[str, float]]]:
+        """Computes supplementary data of all samples and writes it to a memory-mapped store for every data type
+        and manifest, which is used instead of `.pt` files by this and later datasets with the same folders.
+
+        Args:
+            num_workers: Number of DataLoader worker processes computing the data.
+
+        Returns:
+            If pitch is computed, pitch statistics of all samples ("default") and of every speaker, in the format
+            of `pitch_stats_path`. Otherwise None.
+        """
+        data_types = [data_type for data_type in self.sup_data_types if data_type in STORE_DATA_TYPES]
+        if not data_types:
+            logging.warning("None of the supplementary data types can be precomputed.")
+            return None
+
+        dataloader = torch.utils.data.DataLoader(
+            _SupDataComputeDataset(self, data_types), batch_size=None, num_workers=num_workers
+        )
+        writers = {}
+        pitch_stats = PitchStatsAccumulator() if Pitch in data_types else None
+        try:
+            for index, values in enumerate(tqdm(dataloader, total=len(self))):
+                sample = self.data[index]
+                text_id = self._get_text_id(sample)
+                if pitch_stats is not None:
+                    pitch_stats.update(values[Pitch].numpy(), speaker=sample["speaker_id"])
+                for data_type, value in values.items():
+                    key = (data_type, sample["manifest_idx"])
+                    if key not in writers:
+                        store_path = self._get_sup_data_store_path(
+                            data_type, self.manifest_filepath[sample["manifest_idx"]]
+                        )
+                        writers[key] = SupDataStoreWriter(store_path, dtype=STORE_DATA_TYPES[data_type])
+                    writers[key].append(text_id, value.squeeze(0) if data_type == LogMel else value)
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+
+        for (data_type, manifest_idx), writer in writers.items():
+            writer.close()
+            store_path = self._get_sup_data_store_path(data_type, self.manifest_filepath[manifest_idx])
+            store = SupDataStore(store_path)
+            # a store loaded in __init__ from the same path is replaced by the rebuilt one
+            stores = self.sup_data_stores.setdefault(data_type, [])
+            paths = [Path(loaded_store.path) for loaded_store in stores]
+            if Path(store_path) in paths:
+                stores[paths.index(Path(store_path))] = store
+            else:
+                stores.append(store)
+            logging.info(f"Saved {data_type.name} of {len(store)} samples to {store_path}.")
+
+        return pitch_stats.get_stats() if pitch_stats is not None else None
+
     def get_spec(self, audio):
         with torch.cuda.amp.autocast(enabled=False):
             spec = self.stft(audio)
@@ -474,31 +661,26 @@ class TTSDataset(Dataset):
             spec = torch.sqrt(spec.pow(2).sum(-1) + EPSILON)
         return spec
 
-    def get_log_mel(self, audio):
+    def get_log_mel(self, audio, spec=None):
         with torch.cuda.amp.autocast(enabled=False):
-            spec = self.get_spec(audio)
+            if spec is None:
+                spec = self.get_spec(audio)
             mel = torch.matmul(self.fb.to(spec.dtype), spec)
             log_mel = torch.log(torch.clamp(mel, min=torch.finfo(mel.dtype).tiny))
         return log_mel
 
+    def get_mel_length(self, audio_length: int) -> int:
+        """Returns the number of frames of the log mel of audio with `audio_length` samples without computing it.
+        `torch.stft` pads the audio by `n_fft // 2` on both sides, so there is a frame every `hop_len` samples.
+        """
+        return 1 + audio_length // self.hop_len
+
     def __getitem__(self, index):
         sample = self.data[index]
-
-        # Let's keep audio name and all internal directories in rel_audio_path_as_text_id to avoid any collisions
-        rel_audio_path = Path(sample["audio_filepath"]).relative_to(self.base_data_dir).with_suffix("")
-        rel_audio_path_as_text_id = str(rel_audio_path).replace("/", "_")
-        if sample["is_phoneme"] == 1:
-            rel_audio_path_as_text_id += "_phoneme"
+        rel_audio_path_as_text_id = self._get_text_id(sample)
 
         # Load audio
-        features = self.featurizer.process(
-            sample["audio_filepath"],
-            trim=self.trim,
-            trim_ref=self.trim_ref,
-            trim_top_db=self.trim_top_db,
-            trim_frame_length=self.trim_frame_length,
-            trim_hop_length=self.trim_hop_length,
-        )
+        features = self.load_audio(sample)
         audio, audio_length = features, torch.tensor(features.shape[0]).long()
 
         if "text_tokens" in sample:
@@ -517,13 +699,10 @@ class TTSDataset(Dataset):
             if mel_path is not None and Path(mel_path).exists():
                 log_mel = torch.load(mel_path)
             else:
-                mel_path = self.log_mel_folder / f"{rel_audio_path_as_text_id}.pt"
-
-                if mel_path.exists():
-                    log_mel = torch.load(mel_path)
-                else:
+                log_mel = self._load_sup_data(LogMel, rel_audio_path_as_text_id)
+                if log_mel is None:
                     log_mel = self.get_log_mel(audio)
-                    torch.save(log_mel, mel_path)
+                    self._save_sup_data(log_mel, self.log_mel_folder / f"{rel_audio_path_as_text_id}.pt")
 
             log_mel = log_mel.squeeze(0)
             log_mel_length = torch.tensor(log_mel.shape[1]).long()
@@ -536,7 +715,8 @@ class TTSDataset(Dataset):
         # Load alignment prior matrix if needed
         align_prior_matrix = None
         if AlignPriorMatrix in self.sup_data_types_set:
-            mel_len = self.get_log_mel(audio).shape[2]
+            # the prior only needs the mel length, reuse the log mel if it is loaded
+            mel_len = log_mel.shape[1] if log_mel is not None else self.get_mel_length(audio_length.item())
             if self.use_beta_binomial_interpolator:
                 align_prior_matrix = torch.from_numpy(self.beta_binomial_interpolator(mel_len, text_length.item()))
             else:
@@ -546,25 +726,19 @@ class TTSDataset(Dataset):
         my_var = locals()
         for i, voiced_item in enumerate([Pitch, Voiced_mask, P_voiced]):
             if voiced_item in self.sup_data_types_set:
-                voiced_folder = getattr(self, f"{voiced_item.name}_folder")
-                voiced_filepath = voiced_folder / f"{rel_audio_path_as_text_id}.pt"
-                if voiced_filepath.exists():
-                    my_var.__setitem__(voiced_item.name, torch.load(voiced_filepath).float())
+                voiced_value = self._load_sup_data(voiced_item, rel_audio_path_as_text_id)
+                if voiced_value is not None:
+                    my_var.__setitem__(voiced_item.name, voiced_value.float())
                 else:
+                    voiced_folder = getattr(self, f"{voiced_item.name}_folder")
+                    voiced_filepath = voiced_folder / f"{rel_audio_path_as_text_id}.pt"
                     non_exist_voiced_index.append((i, voiced_item.name, voiced_filepath))
 
         if len(non_exist_voiced_index) != 0:
-            voiced_tuple = librosa.pyin(
-                audio.numpy(),
-                fmin=self.pitch_fmin,
-                fmax=self.pitch_fmax,
-                frame_length=self.win_length,
-                sr=self.sample_rate,
-                fill_na=0.0,
-            )
+            voiced_tuple = self.get_pitch(audio)
             for (i, voiced_name, voiced_filepath) in non_exist_voiced_index:
                 my_var.__setitem__(voiced_name, torch.from_numpy(voiced_tuple[i]).float())
-                torch.save(my_var.get(voiced_name), voiced_filepath)
+                self._save_sup_data(my_var.get(voiced_name), voiced_filepath)
 
         pitch = my_var.get('pitch', None)
         pitch_length = my_var.get('pitch_length', None)
@@ -590,21 +764,20 @@ class TTSDataset(Dataset):
                 else:
                     raise ValueError(f"Missing statistics for pitch normalization.")
 
-                pitch -= sample_pitch_mean
+                # not in place, pitch can share memory with a store
+                pitch = pitch - sample_pitch_mean
                 pitch[pitch == -sample_pitch_mean] = 0.0  # Zero out values that were previously zero
                 pitch /= sample_pitch_std
 
         # Load energy if needed
         energy, energy_length = None, None
         if Energy in self.sup_data_types_set:
-            energy_path = self.energy_folder / f"{rel_audio_path_as_text_id}.pt"
-
-            if energy_path.exists():
-                energy = torch.load(energy_path).float()
+            energy = self._load_sup_data(Energy, rel_audio_path_as_text_id)
+            if energy is not None:
+                energy = energy.float()
             else:
-                spec = self.get_spec(audio)
-                energy = torch.linalg.norm(spec.squeeze(0), axis=0).float()
-                torch.save(energy, energy_path)
+                energy = self.get_energy(audio)
+                self._save_sup_data(energy, self.energy_folder / f"{rel_audio_path_as_text_id}.pt")
 
             energy_length = torch.tensor(len(energy)).long()
 
@@ -771,6 +944,20 @@ class TTSDataset(Dataset):
         return joined_data
 
 
+class _SupDataComputeDataset(torch.utils.data.Dataset):
+    """Computes supplementary data of the samples of a TTSDataset, used to run `precompute_sup_data` in workers."""
+
+    def __init__(self, dataset: TTSDataset, data_types: List[TTSDataType]):
+        self.dataset = dataset
+        self.data_types = data_types
+
+    def __getitem__(self, index):
+        return self.dataset.compute_sup_data(index, self.data_types)
+
+    def __len__(self):
+        return len(self.dataset)
+
+
 class MixerTTSXDataset(TTSDataset):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -868,8 +868,11 @@ def prepare_lr_scheduler(
         if train_dataloader.batch_size is not None:
             batch_size = train_dataloader.batch_size
         elif hasattr(train_dataloader, 'batch_sampler') and train_dataloader.batch_sampler is not None:
-            if train_dataloader.batch_sampler.micro_batch_size is not None:
+            if getattr(train_dataloader.batch_sampler, 'micro_batch_size', None) is not None:
                 batch_size = train_dataloader.batch_sampler.micro_batch_size
+            elif hasattr(train_dataloader.batch_sampler, '__len__'):
+                # batch samplers with variable batch sizes, their length is the number of batches of this rank
+                num_samples, batch_size, num_workers = len(train_dataloader.batch_sampler), 1, 1
             else:
                 raise ValueError(f'Could not find batch_size from batch_sampler: {train_dataloader.batch_sampler}')
         else:
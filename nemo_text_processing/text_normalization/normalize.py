@@ -13,13 +13,14 @@
 # limitations under the License.
 
 import itertools
+import json
 import os
 import re
 from argparse import ArgumentParser
 from collections import OrderedDict
 from math import factorial
 from time import perf_counter
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 import pynini
 import regex
@@ -44,6 +45,43 @@ except (ModuleNotFoundError, ImportError) as e:
 SPACE_DUP = re.compile(' {2,}')
 
 
+class LRUCache:
+    """
+    Bounded least recently used cache with hit and miss counters.
+
+    Args:
+        maxsize: maximum number of entries
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._data)}
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+
 class Normalizer:
     """
     Normalizer class that converts text from written to spoken form.
@@ -57,8 +95,15 @@ class Normalizer:
         whitelist: path to a file with whitelist replacements
         post_process: WFST-based post-processing, e.g. to remove extra spaces added during TN.
             Note: punct_post_process flag in normalize() supports all languages.
+        cache_size: if greater than 0, tagged texts and verbalized tokens are kept in LRU caches of this size,
+            so that repeated sentences skip tagging and repeated tokens (numbers, dates, money, ...) skip
+            verbalization. See cache_info().
     """
 
+    # caches are disabled unless cache_size is set
+    _tag_cache = None
+    _verbalizer_cache = None
+
     def __init__(
         self,
         input_case: str,
@@ -69,9 +114,14 @@ class Normalizer:
         whitelist: str = None,
         lm: bool = False,
         post_process: bool = True,
+        cache_size: int = 0,
     ):
         assert input_case in ["lower_cased", "cased"]
 
+        if cache_size > 0:
+            self._tag_cache = LRUCache(cache_size)
+            self._verbalizer_cache = LRUCache(cache_size)
+
         self.post_processor = None
 
         if lang == "en":
@@ -281,26 +331,24 @@ class Normalizer:
                 print(text)
             return text
         text = pynini.escape(text)
-        tagged_lattice = self.find_tags(text)
-        tagged_text = Normalizer.select_tag(tagged_lattice)
+        tagged_text = self._tag_cache.get(text) if self._tag_cache is not None else None
+        if tagged_text is None:
+            tagged_lattice = self.find_tags(text)
+            tagged_text = Normalizer.select_tag(tagged_lattice)
+            if self._tag_cache is not None:
+                self._tag_cache.put(text, tagged_text)
         if verbose:
             print(tagged_text)
         self.parser(tagged_text)
         tokens = self.parser.parse()
-        split_tokens = self._split_tokens_to_reduce_number_of_permutations(tokens)
+        if self._verbalizer_cache is not None:
+            # tokens are verbalized independently, like the splits below, so that repeated tokens hit the cache
+            split_tokens = [[token] for token in tokens]
+        else:
+            split_tokens = self._split_tokens_to_reduce_number_of_permutations(tokens)
         output = ""
         for s in split_tokens:
-            tags_reordered = self.generate_permutations(s)
-            verbalizer_lattice = None
-            for tagged_text in tags_reordered:
-                tagged_text = pynini.escape(tagged_text)
-
-                verbalizer_lattice = self.find_verbalizer(tagged_text)
-                if verbalizer_lattice.num_states() != 0:
-                    break
-            if verbalizer_lattice is None:
-                raise ValueError(f"No permutations were generated from tokens {s}")
-            output += ' ' + Normalizer.select_verbalizer(verbalizer_lattice)
+            output += ' ' + self._verbalize_tokens(s)
         output = SPACE_DUP.sub(' ', output[1:])
 
         if self.lang == "en" and hasattr(self, 'post_processor'):
@@ -316,6 +364,54 @@ class Normalizer:
 
         return output
 
+    def _verbalize_tokens(self, tokens: List[dict]) -> str:
+        """
+        Verbalizes a sequence of tokens with the first permutation of their fields accepted by the verbalizer.
+        The result is looked up in and saved to the verbalizer cache if it is enabled.
+
+        Args:
+            tokens: list of (nested) token dictionaries
+
+        Returns: verbalized tokens
+        """
+        key = None
+        if self._verbalizer_cache is not None:
+            key = json.dumps(tokens, ensure_ascii=False)
+            output = self._verbalizer_cache.get(key)
+            if output is not None:
+                return output
+
+        tags_reordered = self.generate_permutations(tokens)
+        verbalizer_lattice = None
+        for tagged_text in tags_reordered:
+            tagged_text = pynini.escape(tagged_text)
+
+            verbalizer_lattice = self.find_verbalizer(tagged_text)
+            if verbalizer_lattice.num_states() != 0:
+                break
+        if verbalizer_lattice is None:
+            raise ValueError(f"No permutations were generated from tokens {tokens}")
+        output = Normalizer.select_verbalizer(verbalizer_lattice)
+
+        if key is not None:
+            self._verbalizer_cache.put(key, output)
+        return output
+
+    def cache_info(self) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Returns hits, misses, maximum and current size of the tagger and verbalizer caches,
+        None for disabled caches.
+        """
+        return {
+            "tagger": self._tag_cache.info() if self._tag_cache is not None else None,
+            "verbalizer": self._verbalizer_cache.info() if self._verbalizer_cache is not None else None,
+        }
+
+    def clear_cache(self):
+        for cache in (self._tag_cache, self._verbalizer_cache):
+            if cache is not None:
+                cache.clear()
+
     def split_text_into_sentences(self, text: str) -> List[str]:
         """
         Split text into sentences.
@@ -489,6 +585,12 @@ def parse_args():
     )
     parser.add_argument("--overwrite_cache", help="set to True to re-create .far grammar files", action="store_true")
     parser.add_argument("--whitelist", help="path to a file with with whitelist", default=None, type=str)
+    parser.add_argument(
+        "--cache_size",
+        help="size of the LRU caches of tagged texts and verbalized tokens, 0 to disable caching",
+        default=0,
+        type=int,
+    )
     parser.add_argument(
         "--cache_dir",
         help="path to a dir with .far grammar file. Set to None to avoid using cache",
@@ -513,6 +615,7 @@ if __name__ == "__main__":
         overwrite_cache=args.overwrite_cache,
         whitelist=whitelist,
         lang=args.language,
+        cache_size=args.cache_size,
     )
     if args.input_string:
         print(
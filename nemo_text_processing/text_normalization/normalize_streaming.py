@@ -0,0 +1,252 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming text normalization of large text files and manifests.
+
+Unlike Normalizer.normalize_list, the input is read line by line and only a bounded number of chunks is in memory.
+Chunks are normalized by a pool of long-lived worker processes which create their Normalizer once: forked workers
+inherit the grammars of the main process, spawned workers load them from the .far files in cache_dir. The output is
+written in input order, and a checkpoint is saved after every chunk, so an interrupted run can be resumed.
+
+    python normalize_streaming.py --input_file=<INPUT> --output_file=<OUTPUT> --cache_dir=<CACHE_DIR> --n_jobs=16
+
+For .json manifests, --text_field is normalized and saved to --output_field of every entry.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+from argparse import ArgumentParser
+from collections import deque
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from nemo_text_processing.text_normalization.normalize import Normalizer
+
+__all__ = ['normalize_stream', 'normalize_file']
+
+# normalizer of a worker process, created once by _init_worker
+_WORKER_NORMALIZER = None
+_WORKER_NORMALIZE_KWARGS = None
+
+
+def _init_worker(normalizer: Optional[Normalizer], normalizer_kwargs: Dict, normalize_kwargs: Dict):
+    global _WORKER_NORMALIZER, _WORKER_NORMALIZE_KWARGS
+    _WORKER_NORMALIZER = normalizer if normalizer is not None else Normalizer(**normalizer_kwargs)
+    _WORKER_NORMALIZE_KWARGS = normalize_kwargs
+
+
+def _normalize_line(
+    normalizer: Normalizer, line: str, normalize_kwargs: Dict, text_field: Optional[str], output_field: str
+) -> str:
+    line = line.rstrip("\n")
+    if text_field is None:
+        return normalizer.normalize(line, **normalize_kwargs)
+    if not line.strip():
+        return line
+    entry = json.loads(line)
+    entry[output_field] = normalizer.normalize(entry[text_field], **normalize_kwargs)
+    return json.dumps(entry, ensure_ascii=False)
+
+
+def _normalize_chunk(lines: List[str], text_field: Optional[str], output_field: str) -> List[str]:
+    return [
+        _normalize_line(_WORKER_NORMALIZER, line, _WORKER_NORMALIZE_KWARGS, text_field, output_field) for line in lines
+    ]
+
+
+def normalize_stream(
+    lines: Iterable[str],
+    normalizer_kwargs: Dict,
+    normalize_kwargs: Optional[Dict] = None,
+    text_field: Optional[str] = None,
+    output_field: str = "normalized_text",
+    n_jobs: int = 1,
+    chunk_size: int = 1000,
+    max_pending_chunks: Optional[int] = None,
+) -> Iterator[List[str]]:
+    """
+    Normalizes a stream of lines with a pool of persistent workers.
+
+    Args:
+        lines: input lines, plain text or json manifest entries
+        normalizer_kwargs: arguments of Normalizer. Set cache_dir, so that spawned workers load the grammars
+            instead of compiling them.
+        normalize_kwargs: arguments of Normalizer.normalize, e.g. punct_post_process
+        text_field: if set, lines are json entries and this field is normalized
+        output_field: field of json entries which the normalized text is saved to
+        n_jobs: number of worker processes. If 1, lines are normalized in the current process.
+        chunk_size: number of lines sent to a worker at once
+        max_pending_chunks: maximum number of chunks read ahead of the output, defaults to 2 * n_jobs
+
+    Returns:
+        iterator over chunks of normalized lines (without newlines), in input order
+    """
+    normalize_kwargs = normalize_kwargs or {}
+    chunks = iter(lambda it=iter(lines): list(itertools.islice(it, chunk_size)), [])
+
+    if n_jobs == 1:
+        normalizer = Normalizer(**normalizer_kwargs)
+        for chunk in chunks:
+            yield [_normalize_line(normalizer, line, normalize_kwargs, text_field, output_field) for line in chunk]
+        return
+
+    n_jobs = n_jobs if n_jobs > 0 else os.cpu_count()
+    max_pending_chunks = max_pending_chunks or 2 * n_jobs
+    if multiprocessing.get_start_method() == "fork":
+        # grammars are created once and shared with the forked workers without pickling
+        initargs = (Normalizer(**normalizer_kwargs), normalizer_kwargs, normalize_kwargs)
+    else:
+        initargs = (None, normalizer_kwargs, normalize_kwargs)
+
+    with multiprocessing.Pool(processes=n_jobs, initializer=_init_worker, initargs=initargs) as pool:
+        # a bounded number of chunks is in flight, unlike Pool.imap which reads the whole input
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_normalize_chunk, (chunk, text_field, output_field)))
+            if len(pending) >= max_pending_chunks:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _checkpoint_path(output_file: str) -> str:
+    return f"{output_file}.checkpoint.json"
+
+
+def normalize_file(
+    input_file: str,
+    output_file: str,
+    normalizer_kwargs: Dict,
+    normalize_kwargs: Optional[Dict] = None,
+    text_field: Optional[str] = None,
+    output_field: str = "normalized_text",
+    n_jobs: int = 1,
+    chunk_size: int = 1000,
+    resume: bool = True,
+):
+    """
+    Normalizes a text file or manifest line by line and writes the result to output_file in input order.
+
+    After every chunk, the number of processed input lines and the size of the output are saved to
+    <output_file>.checkpoint.json. If resume is True and a checkpoint exists, the output is truncated to the size
+    in the checkpoint and normalization continues after the processed lines. The checkpoint is removed when
+    the whole input is processed.
+
+    Args:
+        input_file: path to a text file, or a .json manifest if text_field is set
+        output_file: path to the output file
+        see normalize_stream for the other arguments
+        resume: whether to resume from a checkpoint of a previous run
+    """
+    checkpoint_path = _checkpoint_path(output_file)
+    num_done_lines, output_size = 0, 0
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        num_done_lines, output_size = checkpoint["input_lines"], checkpoint["output_bytes"]
+        print(f"Resuming after {num_done_lines} lines of {input_file}")
+
+    with open(input_file, 'r', encoding='utf-8') as fin, open(output_file, 'ab') as fout:
+        fout.truncate(output_size)
+        fout.seek(output_size)
+        lines = itertools.islice(fin, num_done_lines, None)
+        for normalized_chunk in normalize_stream(
+            lines,
+            normalizer_kwargs=normalizer_kwargs,
+            normalize_kwargs=normalize_kwargs,
+            text_field=text_field,
+            output_field=output_field,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+        ):
+            fout.write("".join(line + "\n" for line in normalized_chunk).encode('utf-8'))
+            fout.flush()
+            num_done_lines += len(normalized_chunk)
+
+            tmp_checkpoint_path = checkpoint_path + ".tmp"
+            with open(tmp_checkpoint_path, 'w', encoding='utf-8') as f:
+                json.dump({"input_lines": num_done_lines, "output_bytes": fout.tell()}, f)
+            os.replace(tmp_checkpoint_path, checkpoint_path)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--input_file", help="input file path, text or .json manifest", required=True, type=str)
+    parser.add_argument("--output_file", help="output file path", required=True, type=str)
+    parser.add_argument(
+        "--text_field", help="field of manifest entries to normalize, set for .json manifests", default=None, type=str
+    )
+    parser.add_argument(
+        "--output_field", help="field of manifest entries for normalized text", default="normalized_text", type=str
+    )
+    parser.add_argument("--language", help="language", choices=["en", "de", "es", "zh"], default="en", type=str)
+    parser.add_argument(
+        "--input_case", help="input capitalization", choices=["lower_cased", "cased"], default="cased", type=str
+    )
+    parser.add_argument(
+        "--punct_post_process",
+        help="set to True to enable punctuation post processing to match input.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--punct_pre_process", help="set to True to enable punctuation pre processing", action="store_true"
+    )
+    parser.add_argument("--whitelist", help="path to a file with with whitelist", default=None, type=str)
+    parser.add_argument(
+        "--cache_size",
+        help="size of the LRU caches of tagged texts and verbalized tokens, 0 to disable caching",
+        default=0,
+        type=int,
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="path to a dir with .far grammar file. Set to None to avoid using cache",
+        default=None,
+        type=str,
+    )
+    parser.add_argument("--n_jobs", default=-2, type=int, help="The maximum number of concurrently running jobs")
+    parser.add_argument("--chunk_size", default=1000, type=int, help="Number of lines sent to a worker at once")
+    parser.add_argument("--no_resume", help="ignore checkpoints of previous runs", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    start_time = perf_counter()
+    args = parse_args()
+
+    n_jobs = args.n_jobs if args.n_jobs >= -1 else os.cpu_count() + 1 + args.n_jobs
+    normalize_file(
+        input_file=args.input_file,
+        output_file=args.output_file,
+        normalizer_kwargs={
+            "input_case": args.input_case,
+            "lang": args.language,
+            "cache_dir": args.cache_dir,
+            "whitelist": os.path.abspath(args.whitelist) if args.whitelist else None,
+            "cache_size": args.cache_size,
+        },
+        normalize_kwargs={"punct_pre_process": args.punct_pre_process, "punct_post_process": args.punct_post_process},
+        text_field=args.text_field,
+        output_field=args.output_field,
+        n_jobs=n_jobs,
+        chunk_size=args.chunk_size,
+        resume=not args.no_resume,
+    )
+    print(f"Execution time: {perf_counter() - start_time:.02f} sec")
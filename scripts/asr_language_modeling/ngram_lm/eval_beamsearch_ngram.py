@@ -29,6 +29,10 @@
 #                                         --decoding_mode beamsearch_ngram
 #                                         ...
 #
+# The grid search over the hyperparameters can run in parallel with '--num_workers'. The probabilities are then cached
+# in a memory-mapped file shared by the workers, and '--halving_eta' can drop the worst configs early by evaluating
+# them on growing subsets of the utterances (successive halving).
+#
 # You may find more info on how to use this script at:
 # https://docs.nvidia.com/deeplearning/nemo/user-guide/docs/en/main/asr/asr_language_modeling.html
 
@@ -39,8 +43,11 @@ TOKEN_OFFSET = 100
 import argparse
 import contextlib
 import json
+import math
+import multiprocessing
 import os
 import pickle
+import tempfile
 from pathlib import Path
 
 import editdistance
@@ -55,6 +62,39 @@ import nemo.collections.asr as nemo_asr
 from nemo.utils import logging
 
 
+def score_candidates(beams, target, ids_to_text_func=None):
+    """
+    Calculates the word and character edit distances of the candidates of an utterance to its target transcript.
+
+    Returns:
+        Tuple of the word and char distances of the first candidate, the minimum word and char distances among the
+        candidates, and the list of (text, score) of the candidates.
+    """
+    target_split_w = target.split()
+    target_split_c = list(target)
+    wer_dist_first = cer_dist_first = None
+    wer_dist_min = cer_dist_min = 10000
+    preds = []
+    for candidate in beams:
+        if ids_to_text_func is not None:
+            # For BPE encodings, need to shift by TOKEN_OFFSET to retrieve the original sub-word ids
+            pred_text = ids_to_text_func([ord(c) - TOKEN_OFFSET for c in candidate[1]])
+        else:
+            pred_text = candidate[1]
+        wer_dist = editdistance.eval(target_split_w, pred_text.split())
+        cer_dist = editdistance.eval(target_split_c, list(pred_text))
+
+        wer_dist_min = min(wer_dist_min, wer_dist)
+        cer_dist_min = min(cer_dist_min, cer_dist)
+
+        if wer_dist_first is None:
+            # first candidate
+            wer_dist_first, cer_dist_first = wer_dist, cer_dist
+
+        preds.append((pred_text, candidate[0]))
+    return wer_dist_first, cer_dist_first, wer_dist_min, cer_dist_min, preds
+
+
 def beam_search_eval(
     all_probs,
     target_transcripts,
@@ -103,35 +143,16 @@ def beam_search_eval(
 
         for beams_idx, beams in enumerate(beams_batch):
             target = target_transcripts[sample_idx + beams_idx]
-            target_split_w = target.split()
-            target_split_c = list(target)
-            words_count += len(target_split_w)
-            chars_count += len(target_split_c)
-            wer_dist_min = cer_dist_min = 10000
-            for candidate_idx, candidate in enumerate(beams):
-                if ids_to_text_func is not None:
-                    # For BPE encodings, need to shift by TOKEN_OFFSET to retrieve the original sub-word ids
-                    pred_text = ids_to_text_func([ord(c) - TOKEN_OFFSET for c in candidate[1]])
-                else:
-                    pred_text = candidate[1]
-                pred_split_w = pred_text.split()
-                wer_dist = editdistance.eval(target_split_w, pred_split_w)
-                pred_split_c = list(pred_text)
-                cer_dist = editdistance.eval(target_split_c, pred_split_c)
-
-                wer_dist_min = min(wer_dist_min, wer_dist)
-                cer_dist_min = min(cer_dist_min, cer_dist)
-
-                if candidate_idx == 0:
-                    # first candidate
-                    wer_dist_first += wer_dist
-                    cer_dist_first += cer_dist
-
-                score = candidate[0]
-                if preds_output_file:
-                    out_file.write('{}\t{}\n'.format(pred_text, score))
+            words_count += len(target.split())
+            chars_count += len(target)
+            wer_dist, cer_dist, wer_dist_min, cer_dist_min, preds = score_candidates(beams, target, ids_to_text_func)
+            wer_dist_first += wer_dist
+            cer_dist_first += cer_dist
             wer_dist_best += wer_dist_min
             cer_dist_best += cer_dist_min
+            if preds_output_file:
+                for pred_text, score in preds:
+                    out_file.write('{}\t{}\n'.format(pred_text, score))
         sample_idx += len(probs_batch)
 
     if preds_output_file:
@@ -158,6 +179,229 @@ def beam_search_eval(
     logging.info(f"=================================================================================")
 
 
+def write_probs_memmap(all_probs, memmap_dir):
+    """
+    Stores the probabilities of all the utterances into a single memory-mapped array in `memmap_dir`, so that they
+    can be shared by the worker processes and reused by later runs without unpickling.
+    """
+    os.makedirs(memmap_dir, exist_ok=True)
+    lengths = np.array([len(probs) for probs in all_probs], dtype=np.int64)
+    probs_memmap = np.lib.format.open_memmap(
+        os.path.join(memmap_dir, 'probs.npy'),
+        mode='w+',
+        dtype=np.float32,
+        shape=(int(lengths.sum()), all_probs[0].shape[1]),
+    )
+    offset = 0
+    for probs in all_probs:
+        probs_memmap[offset : offset + len(probs)] = probs
+        offset += len(probs)
+    probs_memmap.flush()
+    np.save(os.path.join(memmap_dir, 'lengths.npy'), lengths)
+
+
+def read_probs_memmap(memmap_dir):
+    """
+    Reads the probabilities stored by `write_probs_memmap` as a list of memory-mapped arrays, one per utterance.
+    """
+    probs_memmap = np.load(os.path.join(memmap_dir, 'probs.npy'), mmap_mode='r')
+    offsets = np.concatenate([[0], np.cumsum(np.load(os.path.join(memmap_dir, 'lengths.npy')))])
+    return [probs_memmap[offsets[idx] : offsets[idx + 1]] for idx in range(len(offsets) - 1)]
+
+
+# state of the worker processes of beam_search_tune, set by the pool initializer
+_tune_worker = {}
+
+
+def _init_tune_worker(memmap_dir, target_transcripts, vocab, ids_to_text_func, lm_path, return_preds):
+    _tune_worker.update(
+        all_probs=read_probs_memmap(memmap_dir),
+        target_transcripts=target_transcripts,
+        vocab=vocab,
+        ids_to_text_func=ids_to_text_func,
+        lm_path=lm_path,
+        return_preds=return_preds,
+        decoder=None,
+    )
+
+
+def _beam_search_tune_shard(args):
+    """
+    Decodes a shard of utterances with one config of the grid in a worker process.
+    """
+    hp_idx, hp, indices = args
+
+    # the decoder and its N-gram LM are loaded once per worker and reused by all the configs
+    decoder = _tune_worker['decoder']
+    if decoder is None:
+        decoder = nemo_asr.modules.BeamSearchDecoderWithLM(
+            vocab=_tune_worker['vocab'],
+            beam_width=hp['beam_width'],
+            alpha=hp['beam_alpha'],
+            beta=hp['beam_beta'],
+            lm_path=_tune_worker['lm_path'],
+            num_cpus=1,
+            input_tensor=False,
+        )
+        _tune_worker['decoder'] = decoder
+    decoder.beam_width = hp['beam_width']
+    if decoder.scorer is not None:
+        decoder.scorer.reset_params(hp['beam_alpha'], hp['beam_beta'])
+
+    with nemo.core.typecheck.disable_checks():
+        probs_batch = [_tune_worker['all_probs'][idx] for idx in indices]
+        beams_batch = decoder.forward(log_probs=probs_batch, log_probs_length=None)
+
+    results = []
+    for idx, beams in zip(indices, beams_batch):
+        wer_dist, cer_dist, wer_dist_min, cer_dist_min, preds = score_candidates(
+            beams, _tune_worker['target_transcripts'][idx], _tune_worker['ids_to_text_func']
+        )
+        if not _tune_worker['return_preds']:
+            preds = None
+        results.append((idx, wer_dist, cer_dist, wer_dist_min, cer_dist_min, preds))
+    return hp_idx, results
+
+
+def beam_search_tune(
+    hp_grid,
+    memmap_dir,
+    target_transcripts,
+    vocab,
+    ids_to_text_func=None,
+    preds_output_folder=None,
+    lm_path=None,
+    beam_batch_size=128,
+    num_workers=1,
+    halving_eta=0,
+    halving_min_size=100,
+    seed=0,
+):
+    """
+    Evaluates all the configs of the grid in parallel. Every (config, shard of utterances) pair is a task of a process
+    pool, and the probabilities are read from the memory-mapped cache in `memmap_dir`.
+
+    If `halving_eta` > 1, successive halving is used: all the configs are first evaluated on a random subset of the
+    utterances, only the best 1 / `halving_eta` of them are kept, and the subset grows by `halving_eta` at every
+    round until the survivors are evaluated on all the utterances. Utterances decoded in earlier rounds are reused.
+
+    Returns:
+        List of dicts with the config, the WER/CER, the best WER/CER among the candidates and the number of evaluated
+        utterances of each config, sorted by WER. Configs dropped by successive halving report their partial WER/CER.
+    """
+    num_utterances = len(target_transcripts)
+    order = np.random.RandomState(seed).permutation(num_utterances).tolist()
+    # number of halvings until a single config is left, counted like the survivors are dropped at every round
+    num_rounds = 0
+    if halving_eta > 1:
+        num_configs = len(hp_grid)
+        while num_configs > 1:
+            num_configs = int(math.ceil(num_configs / halving_eta))
+            num_rounds += 1
+
+    # per config, the distances of each evaluated utterance
+    dists = [{} for _ in hp_grid]
+    preds = [{} for _ in hp_grid]
+    survivors = list(range(len(hp_grid)))
+    num_evaluated = 0
+
+    pool_args = (memmap_dir, target_transcripts, vocab, ids_to_text_func, lm_path, preds_output_folder is not None)
+    if num_workers > 1:
+        pool = multiprocessing.Pool(num_workers, initializer=_init_tune_worker, initargs=pool_args)
+        imap = pool.imap_unordered
+    else:
+        pool = None
+        _init_tune_worker(*pool_args)
+        imap = map
+
+    try:
+        for round_idx in range(num_rounds + 1):
+            if round_idx == num_rounds:
+                round_size = num_utterances
+            else:
+                round_size = int(num_utterances / halving_eta ** (num_rounds - round_idx))
+                round_size = min(max(round_size, halving_min_size), num_utterances)
+            new_indices = order[num_evaluated:round_size]
+            tasks = [
+                (hp_idx, hp_grid[hp_idx], new_indices[start : start + beam_batch_size])
+                for hp_idx in survivors
+                for start in range(0, len(new_indices), beam_batch_size)
+            ]
+            for hp_idx, results in tqdm(
+                imap(_beam_search_tune_shard, tasks),
+                total=len(tasks),
+                desc=f"Grid search round {round_idx + 1}/{num_rounds + 1} with {len(survivors)} configs",
+                ncols=120,
+            ):
+                for idx, wer_dist, cer_dist, wer_dist_min, cer_dist_min, candidates in results:
+                    dists[hp_idx][idx] = (wer_dist, cer_dist, wer_dist_min, cer_dist_min)
+                    if candidates is not None:
+                        preds[hp_idx][idx] = candidates
+            num_evaluated = max(num_evaluated, round_size)
+
+            if round_idx < num_rounds:
+                evaluated = order[:num_evaluated]
+                words_count = max(sum(len(target_transcripts[idx].split()) for idx in evaluated), 1)
+                survivors = sorted(
+                    survivors, key=lambda hp_idx: sum(dists[hp_idx][idx][0] for idx in evaluated) / words_count
+                )
+                survivors = survivors[: int(math.ceil(len(survivors) / halving_eta))]
+                logging.info(f"Kept {len(survivors)} configs after evaluating {num_evaluated} utterances.")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    results = []
+    for hp_idx, hp in enumerate(hp_grid):
+        evaluated = list(dists[hp_idx].keys())
+        words_count = max(sum(len(target_transcripts[idx].split()) for idx in evaluated), 1)
+        chars_count = max(sum(len(target_transcripts[idx]) for idx in evaluated), 1)
+        wer_dist, cer_dist, wer_dist_best, cer_dist_best = np.sum(list(dists[hp_idx].values()), axis=0)
+        results.append(
+            {
+                **hp,
+                'wer': wer_dist / words_count,
+                'cer': cer_dist / chars_count,
+                'oracle_wer': wer_dist_best / words_count,
+                'oracle_cer': cer_dist_best / chars_count,
+                'num_utterances': len(evaluated),
+            }
+        )
+
+        # configs dropped by successive halving are not decoded on all the utterances
+        if preds_output_folder and len(preds[hp_idx]) == num_utterances:
+            preds_output_file = os.path.join(
+                preds_output_folder,
+                f"preds_out_width{hp['beam_width']}_alpha{hp['beam_alpha']}_beta{hp['beam_beta']}.tsv",
+            )
+            with open(preds_output_file, 'w') as out_file:
+                for idx in range(num_utterances):
+                    for pred_text, score in preds[hp_idx][idx]:
+                        out_file.write('{}\t{}\n'.format(pred_text, score))
+
+    results = sorted(results, key=lambda result: (-result['num_utterances'], result['wer']))
+    for result in results:
+        logging.info(
+            'width={}, alpha={}, beta={}: WER/CER = {:.2%}/{:.2%}, oracle WER/CER = {:.2%}/{:.2%} ({} samples)'.format(
+                result['beam_width'],
+                result['beam_alpha'],
+                result['beam_beta'],
+                result['wer'],
+                result['cer'],
+                result['oracle_wer'],
+                result['oracle_cer'],
+                result['num_utterances'],
+            )
+        )
+    logging.info(
+        f"Best config: width={results[0]['beam_width']}, alpha={results[0]['beam_alpha']}, "
+        f"beta={results[0]['beam_beta']} with WER = {results[0]['wer']:.2%}"
+    )
+    logging.info(f"=================================================================================")
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Evaluate an ASR model with beam search decoding and n-gram KenLM language model.'
@@ -218,6 +462,30 @@ def main():
     parser.add_argument(
         "--beam_batch_size", default=128, type=int, help="The batch size to be used for beam search decoding"
     )
+    parser.add_argument(
+        "--num_workers",
+        default=0,
+        type=int,
+        help="The number of processes to evaluate the grid of the beam search hyperparameters in parallel",
+    )
+    parser.add_argument(
+        "--probs_memmap_dir",
+        default=None,
+        type=str,
+        help="The folder of the memory-mapped cache of the probabilities shared by the workers of the grid search",
+    )
+    parser.add_argument(
+        "--halving_eta",
+        default=0,
+        type=int,
+        help="If larger than 1, keeps only the best 1/halving_eta configs at each round of successive halving",
+    )
+    parser.add_argument(
+        "--halving_min_size",
+        default=100,
+        type=int,
+        help="The minimum number of utterances to evaluate the configs on in the first round of successive halving",
+    )
     args = parser.parse_args()
 
     if args.nemo_model_file.endswith('.nemo'):
@@ -242,7 +510,17 @@ def main():
             target_transcripts.append(data['text'])
             audio_file_paths.append(str(audio_file.absolute()))
 
-    if args.probs_cache_file and os.path.exists(args.probs_cache_file):
+    use_tuning_engine = args.num_workers > 1 or args.halving_eta > 1
+    if args.probs_memmap_dir and os.path.exists(os.path.join(args.probs_memmap_dir, 'probs.npy')):
+        logging.info(f"Loading the memory-mapped probabilities from '{args.probs_memmap_dir}' ...")
+        all_probs = read_probs_memmap(args.probs_memmap_dir)
+
+        if len(all_probs) != len(audio_file_paths):
+            raise ValueError(
+                f"The number of samples in the probabilities folder '{args.probs_memmap_dir}' does not "
+                f"match the manifest file. You may need to delete the probabilities cached folder."
+            )
+    elif args.probs_cache_file and os.path.exists(args.probs_cache_file):
         logging.info(f"Found a pickle file of probabilities at '{args.probs_cache_file}'.")
         logging.info(f"Loading the cached pickle file of probabilities from '{args.probs_cache_file}' ...")
         with open(args.probs_cache_file, 'rb') as probs_file:
@@ -273,6 +551,15 @@ def main():
             with open(args.probs_cache_file, 'wb') as f_dump:
                 pickle.dump(all_probs, f_dump)
 
+    # the workers of the grid search read the probabilities from a memory-mapped file instead of pickling them
+    memmap_tmp_dir = None
+    if use_tuning_engine and args.probs_memmap_dir is None:
+        memmap_tmp_dir = tempfile.TemporaryDirectory()
+        args.probs_memmap_dir = memmap_tmp_dir.name
+    if args.probs_memmap_dir and not os.path.exists(os.path.join(args.probs_memmap_dir, 'probs.npy')):
+        logging.info(f"Writing the memory-mapped probabilities at '{args.probs_memmap_dir}' ...")
+        write_probs_memmap(all_probs, args.probs_memmap_dir)
+
     wer_dist_greedy = 0
     cer_dist_greedy = 0
     words_count = 0
@@ -334,28 +621,46 @@ def main():
 
         if args.preds_output_folder and not os.path.exists(args.preds_output_folder):
             os.mkdir(args.preds_output_folder)
-        for hp in hp_grid:
-            if args.preds_output_folder:
-                preds_output_file = os.path.join(
-                    args.preds_output_folder,
-                    f"preds_out_width{hp['beam_width']}_alpha{hp['beam_alpha']}_beta{hp['beam_beta']}.tsv",
-                )
-            else:
-                preds_output_file = None
-
-            beam_search_eval(
-                all_probs=all_probs,
+        if use_tuning_engine:
+            beam_search_tune(
+                hp_grid=hp_grid,
+                memmap_dir=args.probs_memmap_dir,
                 target_transcripts=target_transcripts,
                 vocab=vocab,
                 ids_to_text_func=ids_to_text_func,
-                preds_output_file=preds_output_file,
+                preds_output_folder=args.preds_output_folder,
                 lm_path=lm_path,
-                beam_width=hp["beam_width"],
-                beam_alpha=hp["beam_alpha"],
-                beam_beta=hp["beam_beta"],
                 beam_batch_size=args.beam_batch_size,
-                progress_bar=True,
+                num_workers=args.num_workers,
+                halving_eta=args.halving_eta,
+                halving_min_size=args.halving_min_size,
             )
+        else:
+            for hp in hp_grid:
+                if args.preds_output_folder:
+                    preds_output_file = os.path.join(
+                        args.preds_output_folder,
+                        f"preds_out_width{hp['beam_width']}_alpha{hp['beam_alpha']}_beta{hp['beam_beta']}.tsv",
+                    )
+                else:
+                    preds_output_file = None
+
+                beam_search_eval(
+                    all_probs=all_probs,
+                    target_transcripts=target_transcripts,
+                    vocab=vocab,
+                    ids_to_text_func=ids_to_text_func,
+                    preds_output_file=preds_output_file,
+                    lm_path=lm_path,
+                    beam_width=hp["beam_width"],
+                    beam_alpha=hp["beam_alpha"],
+                    beam_beta=hp["beam_beta"],
+                    beam_batch_size=args.beam_batch_size,
+                    progress_bar=True,
+                )
+
+    if memmap_tmp_dir is not None:
+        memmap_tmp_dir.cleanup()
 
 
 if __name__ == '__main__':
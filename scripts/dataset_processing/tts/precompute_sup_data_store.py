@@ -0,0 +1,64 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script precomputes supplementary data (log mel, pitch, voiced mask, p_voiced, energy) of a TTS dataset into
+memory-mapped stores, one per data type and manifest, which are read by TTSDataset instead of `.pt` files.
+It uses the same dataset configs as extract_sup_data.py.
+
+If pitch is computed, speaker level pitch statistics are computed in the same pass and saved to pitch_stats_path,
+so compute_speaker_stats.py does not need to be run. The much faster YIN pitch estimator can be selected with
++dataset.pitch_estimator=yin.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/precompute_sup_data_store.py \
+    --config-path=ljspeech/ds_conf \
+    --config-name=ds_for_fastpitch_align \
+    manifest_filepath=<data_root_path>/fastpitch_manifest.json \
+    sup_data_path=<data_root_path>/sup_data \
+    +num_workers=8 \
+    +pitch_stats_path=<data_root_path>/pitch_stats.json
+"""
+
+import json
+
+from hydra.utils import instantiate
+
+from nemo.core.config import hydra_runner
+
+
+@hydra_runner(config_path='ljspeech/ds_conf', config_name='ds_for_fastpitch_align')
+def main(cfg):
+    dataset = instantiate(cfg.dataset)
+    num_workers = cfg.get("num_workers", cfg.get("dataloader_params", {}).get("num_workers", 4))
+
+    print(f"Processing {cfg.manifest_filepath}:")
+    pitch_stats = dataset.precompute_sup_data(num_workers=num_workers)
+
+    if pitch_stats and 'default' in pitch_stats:
+        print(f"PITCH_MEAN={pitch_stats['default']['pitch_mean']}, PITCH_STD={pitch_stats['default']['pitch_std']}")
+    elif pitch_stats:
+        for speaker, stats in pitch_stats.items():
+            print(f"Speaker {speaker}: PITCH_MEAN={stats['pitch_mean']}, PITCH_STD={stats['pitch_std']}")
+    elif pitch_stats is not None:
+        print("No pitch statistics were computed, statistics need at least two voiced frames.")
+
+    if pitch_stats:
+        pitch_stats_path = cfg.get("pitch_stats_path", None)
+        if pitch_stats_path is not None:
+            with open(pitch_stats_path, 'w', encoding="utf-8") as stats_f:
+                json.dump(pitch_stats, stats_f, indent=4)
+
+
+if __name__ == '__main__':
+    main()  # noqa pylint: disable=no-value-for-parameter
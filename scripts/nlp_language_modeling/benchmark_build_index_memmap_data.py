@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares peak RSS and build time of the index builders of TextMemMapDataset.
+
+Each builder runs in a fresh process, so the reported peak RSS is not affected by the other builders.
+If no input file is given, a synthetic JSONL file of --synthetic_size_mb MB is generated.
+
+Usage:
+    python benchmark_build_index_memmap_data.py [data.jsonl] --synthetic_size_mb 1024
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from nemo.collections.nlp.data.language_modeling.text_memmap_dataset import (
+    __idx_suffix__,
+    _build_index_from_memdata,
+    _build_index_from_memdata_chunked,
+    _build_memmap_index_files,
+)
+
+BUILDERS = {
+    'legacy': _build_index_from_memdata,
+    'chunked': _build_index_from_memdata_chunked,
+}
+
+
+def _remove_index_files(fn):
+    for ext in ('.npy', '.info'):
+        idx_fn = f"{fn}.{__idx_suffix__}{ext}"
+        if os.path.exists(idx_fn):
+            os.remove(idx_fn)
+
+
+def _run_builder(name, fn, newline_int, queue):
+    """Builds the index of fn with a single builder and reports time and peak RSS (in MB)"""
+    start_time = time.time()
+    _build_memmap_index_files(newline_int, BUILDERS[name], fn)
+    build_time = time.time() - start_time
+    # ru_maxrss is reported in KB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    midx = np.load(f"{fn}.{__idx_suffix__}.npy", mmap_mode='r')
+    queue.put((build_time, peak_rss, len(midx), str(midx.dtype)))
+
+
+def _write_synthetic_data(fn, size_mb):
+    rng = np.random.default_rng(0)
+    size = size_mb * 1024 * 1024
+    written = 0
+    with open(fn, 'w') as f:
+        while written < size:
+            line = json.dumps({'text': 'x' * int(rng.integers(16, 2048))}) + '\n'
+            f.write(line)
+            written += len(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks index builders of TextMemMapDataset")
+    parser.add_argument('dataset_path', type=str, nargs='?', default=None, help='Input text file')
+    parser.add_argument(
+        '--synthetic_size_mb', type=int, default=1024, help='Size of synthetic data if no input file is given',
+    )
+    parser.add_argument('--newline_int', type=int, default=10, help='Int value to split text')
+    parser.add_argument(
+        '--builders', type=str, nargs='+', default=list(BUILDERS.keys()), choices=list(BUILDERS.keys()),
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fn = args.dataset_path
+        if fn is None:
+            fn = os.path.join(tmpdir, 'synthetic.jsonl')
+            print(f"Generating {args.synthetic_size_mb} MB of synthetic data in {fn}")
+            _write_synthetic_data(fn, args.synthetic_size_mb)
+
+        print(f"File size: {os.path.getsize(fn) / 1024 ** 2:.1f} MB")
+        ctx = mp.get_context('spawn')
+        for name in args.builders:
+            _remove_index_files(fn)
+            queue = ctx.Queue()
+            p = ctx.Process(target=_run_builder, args=(name, fn, args.newline_int, queue))
+            p.start()
+            build_time, peak_rss, num_lines, dtype = queue.get()
+            p.join()
+            print(
+                f"{name:>8}: time = {build_time:.2f} sec, peak RSS = {peak_rss:.1f} MB, "
+                f"lines = {num_lines}, dtype = {dtype}"
+            )
+        _remove_index_files(fn)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Micro-benchmark of the resampling backends available in `audio_utils.resample`.
+
+For each pair of sample rates and each backend, reports the throughput (seconds of audio resampled per second)
+and the SNR of the resampled signal relative to the `librosa` backend, which is the default used by the datasets.
+
+A backend can be selected for ASR datasets with `resample_backend` in the dataset config, e.g.:
+
+    model.train_ds.resample_backend=polyphase
+
+Usage:
+    python benchmark_resample.py --rates=8000:16000,22050:16000,44100:16000,48000:16000 --duration=10 --repeats=20
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from nemo.collections.asr.parts.utils.audio_utils import HAVE_TORCHAUDIO, RESAMPLE_BACKENDS, resample
+from nemo.utils import logging
+
+parser = argparse.ArgumentParser(description="Benchmark resampling backends")
+parser.add_argument(
+    "--rates",
+    default="8000:16000,22050:16000,44100:16000,48000:16000",
+    type=str,
+    help="Comma-separated pairs of orig_sr:target_sr",
+)
+parser.add_argument("--duration", default=10.0, type=float, help="Duration of the test signal in seconds")
+parser.add_argument("--repeats", default=20, type=int, help="Number of timed repetitions per backend")
+parser.add_argument("--seed", default=0, type=int, help="Random seed for the test signal")
+args = parser.parse_args()
+
+
+def snr_db(reference: np.ndarray, estimate: np.ndarray) -> float:
+    """SNR of estimate relative to reference, computed over the common length."""
+    length = min(len(reference), len(estimate))
+    reference, estimate = reference[:length], estimate[:length]
+    noise = np.sum((reference - estimate) ** 2)
+    return 10 * np.log10(np.sum(reference ** 2) / max(noise, 1e-20))
+
+
+def test_signal(sample_rate: int, duration: float, rng: np.random.Generator) -> np.ndarray:
+    """Sum of tones below the lowest Nyquist frequency of the benchmark plus low-level noise."""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    freqs = rng.uniform(50, 3500, size=8)
+    signal = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 2 * np.pi)) for f in freqs) / len(freqs)
+    signal += 0.01 * rng.standard_normal(len(t))
+    return signal.astype(np.float32)
+
+
+def main():
+    rng = np.random.default_rng(args.seed)
+    backends = [b for b in RESAMPLE_BACKENDS if b != 'torchaudio' or HAVE_TORCHAUDIO]
+
+    for pair in args.rates.split(','):
+        orig_sr, target_sr = [int(sr) for sr in pair.split(':')]
+        signal = test_signal(orig_sr, args.duration, rng)
+        reference = resample(signal, orig_sr, target_sr, backend='librosa')
+
+        for backend in backends:
+            # warm-up, also populates the filter caches
+            output = resample(signal, orig_sr, target_sr, backend=backend)
+
+            start_time = time.perf_counter()
+            for _ in range(args.repeats):
+                resample(signal, orig_sr, target_sr, backend=backend)
+            elapsed = (time.perf_counter() - start_time) / args.repeats
+
+            logging.info(
+                f"{orig_sr:>6d} -> {target_sr:<6d} {backend:<11s}: {elapsed * 1000:8.2f} ms per call, "
+                f"{args.duration / elapsed:9.1f}x realtime, SNR vs librosa {snr_db(reference, output):6.1f} dB"
+            )
+
+
+if __name__ == "__main__":
+    main()
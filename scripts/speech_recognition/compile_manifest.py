@@ -0,0 +1,57 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Converts json manifests into a compiled manifest: columnar, memory-mapped arrays that ASR datasets
+(e.g. AudioToCharDataset, AudioToBPEDataset) read lazily instead of parsing json lines into Python objects.
+
+The compiled manifest directory can be used anywhere a manifest path is expected, e.g.:
+
+    model.train_ds.manifest_filepath=/data/train_manifest.compiled
+
+Usage:
+    python compile_manifest.py \
+        --manifest=/data/train_manifest.json \
+        --output_path=/data/train_manifest.compiled
+
+Multiple manifests can be merged into a single compiled manifest by passing comma-separated paths to --manifest.
+"""
+
+import argparse
+import time
+
+from nemo.collections.common.parts.preprocessing.compiled_manifest import CompiledManifest, compile_manifest
+from nemo.utils import logging
+
+parser = argparse.ArgumentParser(description="Compile json manifests into a memory-mapped binary format")
+parser.add_argument(
+    "--manifest", required=True, type=str, help="Path to the json manifest (or comma-separated paths) to compile"
+)
+parser.add_argument("--output_path", required=True, type=str, help="Directory to write the compiled manifest to")
+args = parser.parse_args()
+
+
+def main():
+    start_time = time.time()
+    num_items = compile_manifest(args.manifest, args.output_path)
+    logging.info(f"Compiled {num_items} items in {time.time() - start_time:.2f} sec")
+
+    # sanity check
+    compiled = CompiledManifest(args.output_path)
+    if len(compiled) != num_items:
+        raise RuntimeError(f"Expected {num_items} items in {args.output_path}, but found {len(compiled)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the VAD post-processing in `vad_utils`: overlap smoothing (mean/median) and binarization.
+
+A synthetic frame level prediction sequence of the given duration is smoothed and binarized with the vectorized
+functions of `vad_utils`, and with the previous frame by frame implementations kept in this script as reference.
+Reports the time of each step and checks that both implementations produce identical predictions and segments.
+
+Usage:
+    python benchmark_vad_postprocessing.py --duration=3600 --overlap=0.875 --onset=0.7 --offset=0.4
+    python benchmark_vad_postprocessing.py --duration=3600 --skip_per_frame
+"""
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.asr.parts.utils.vad_utils import (
+    binarization,
+    generate_overlap_vad_seq_per_tensor,
+    merge_overlap_segment,
+)
+from nemo.utils import logging
+
+parser = argparse.ArgumentParser(description="Benchmark VAD post-processing")
+parser.add_argument("--duration", default=3600.0, type=float, help="Duration of the prediction sequence in seconds")
+parser.add_argument("--window_length_in_sec", default=0.63, type=float, help="Window length of the VAD model")
+parser.add_argument("--shift_length_in_sec", default=0.01, type=float, help="Shift of the windows of the VAD model")
+parser.add_argument("--overlap", default=0.875, type=float, help="Overlap of the smoothing windows")
+parser.add_argument("--onset", default=0.7, type=float, help="Onset threshold of binarization")
+parser.add_argument("--offset", default=0.4, type=float, help="Offset threshold of binarization")
+parser.add_argument("--pad_onset", default=0.1, type=float, help="Padding before each speech segment")
+parser.add_argument("--pad_offset", default=0.1, type=float, help="Padding after each speech segment")
+parser.add_argument(
+    "--skip_per_frame", action="store_true", help="Only time the vectorized implementations, the median is slow"
+)
+parser.add_argument("--seed", default=0, type=int, help="Random seed for the prediction sequence")
+args = parser.parse_args()
+
+
+def overlap_vad_seq_per_frame(frame: torch.Tensor, per_args: dict, smoothing_method: str) -> torch.Tensor:
+    """Previous frame by frame implementation of `generate_overlap_vad_seq_per_tensor`."""
+    frame_len = per_args.get('frame_len', 0.01)
+    shift = int(per_args['shift_length_in_sec'] / frame_len)
+    seg = int((per_args['window_length_in_sec'] / frame_len + 1))
+    jump_on_frame = int(int(seg * (1 - per_args['overlap'])) / shift)
+    target_len = int(len(frame) * shift)
+
+    if smoothing_method == 'mean':
+        preds = torch.zeros(target_len)
+        pred_count = torch.zeros(target_len)
+        for i, og_pred in enumerate(frame):
+            if i % jump_on_frame != 0:
+                continue
+            start = i * shift
+            end = start + seg
+            preds[start:end] = preds[start:end] + og_pred
+            pred_count[start:end] = pred_count[start:end] + 1
+
+        preds = preds / pred_count
+        last_non_zero_pred = preds[pred_count != 0][-1]
+        preds[pred_count == 0] = last_non_zero_pred
+    else:
+        preds = [torch.empty(0) for _ in range(target_len)]
+        for i, og_pred in enumerate(frame):
+            if i % jump_on_frame != 0:
+                continue
+            start = i * shift
+            end = start + seg
+            for j in range(start, min(end, target_len)):
+                preds[j] = torch.cat((preds[j], og_pred.unsqueeze(0)), 0)
+
+        preds = torch.stack([torch.nanquantile(l, q=0.5) for l in preds])
+        nan_idx = torch.isnan(preds)
+        last_non_nan_pred = preds[~nan_idx][-1]
+        preds[nan_idx] = last_non_nan_pred
+    return preds
+
+
+def binarization_per_frame(sequence: torch.Tensor, per_args: dict) -> torch.Tensor:
+    """Previous frame by frame implementation of `binarization`."""
+    frame_length_in_sec = per_args.get('frame_length_in_sec', 0.01)
+    onset = per_args.get('onset', 0.5)
+    offset = per_args.get('offset', 0.5)
+    pad_onset = per_args.get('pad_onset', 0.0)
+    pad_offset = per_args.get('pad_offset', 0.0)
+
+    speech = False
+    start = 0.0
+    i = 0
+    speech_segments = torch.empty(0)
+    for i in range(0, len(sequence)):
+        if speech:
+            if sequence[i] < offset:
+                if i * frame_length_in_sec + pad_offset > max(0, start - pad_onset):
+                    new_seg = torch.tensor(
+                        [max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]
+                    ).unsqueeze(0)
+                    speech_segments = torch.cat((speech_segments, new_seg), 0)
+                start = i * frame_length_in_sec
+                speech = False
+        else:
+            if sequence[i] > onset:
+                start = i * frame_length_in_sec
+                speech = True
+
+    if speech:
+        new_seg = torch.tensor([max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]).unsqueeze(0)
+        speech_segments = torch.cat((speech_segments, new_seg), 0)
+
+    return merge_overlap_segment(speech_segments)
+
+
+def timed(func, *func_args):
+    start_time = time.perf_counter()
+    output = func(*func_args)
+    return output, time.perf_counter() - start_time
+
+
+def main():
+    torch.manual_seed(args.seed)
+    num_frames = int(args.duration / args.shift_length_in_sec)
+    # speech probabilities with runs of speech and non-speech of various lengths
+    frame = torch.nn.functional.avg_pool1d(torch.rand(1, 1, num_frames), 31, stride=1, padding=15).squeeze()
+    frame = ((frame - frame.min()) / (frame.max() - frame.min())).contiguous()
+
+    overlap_args = {
+        'overlap': args.overlap,
+        'window_length_in_sec': args.window_length_in_sec,
+        'shift_length_in_sec': args.shift_length_in_sec,
+    }
+    binarization_args = {
+        'onset': args.onset,
+        'offset': args.offset,
+        'pad_onset': args.pad_onset,
+        'pad_offset': args.pad_offset,
+    }
+
+    # warm-up of the scripted functions
+    generate_overlap_vad_seq_per_tensor(frame[:1000], overlap_args, 'mean')
+    generate_overlap_vad_seq_per_tensor(frame[:1000], overlap_args, 'median')
+    binarization(frame[:1000], binarization_args)
+
+    logging.info(f"Post-processing {args.duration} seconds of predictions ({num_frames} frames)")
+    for smoothing_method in ['mean', 'median']:
+        preds, vectorized_time = timed(generate_overlap_vad_seq_per_tensor, frame, overlap_args, smoothing_method)
+        segments, binarization_time = timed(binarization, preds, binarization_args)
+        logging.info(
+            f"{smoothing_method} smoothing: {vectorized_time:.3f}s, binarization: {binarization_time:.3f}s, "
+            f"{len(segments)} segments"
+        )
+
+        if not args.skip_per_frame:
+            ref_preds, per_frame_time = timed(overlap_vad_seq_per_frame, frame, overlap_args, smoothing_method)
+            ref_segments, ref_binarization_time = timed(binarization_per_frame, preds, binarization_args)
+            logging.info(
+                f"{smoothing_method} smoothing per frame: {per_frame_time:.3f}s "
+                f"(speed-up x{per_frame_time / vectorized_time:.1f}), "
+                f"binarization per frame: {ref_binarization_time:.3f}s "
+                f"(speed-up x{ref_binarization_time / binarization_time:.1f})"
+            )
+            logging.info(
+                f"identical predictions: {torch.equal(preds, ref_preds)}, "
+                f"identical segments: {torch.equal(segments, ref_segments)}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@ import argparse
 
 import numpy as np
 
-from nemo.collections.asr.parts.utils.vad_utils import vad_tune_threshold_on_dev
+from nemo.collections.asr.parts.utils.vad_utils import vad_tune_threshold_on_dev, vad_tune_threshold_on_dev_in_memory
 from nemo.utils import logging
 
 """
@@ -30,6 +30,9 @@ python vad_tune_threshold.py \
 --groundtruth_RTTM=<DIRECTORY OF VAD PREDICTIONS OR A FILE CONTAINS THE PATHS OF THEM> \
 --vad_pred_method="median"
 
+Use --in_memory to load the predictions and groundtruth only once and evaluate the thresholds in parallel with
+--num_workers processes, without writing the segment tables of every combination to disk.
+
 """
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -84,6 +87,14 @@ if __name__ == "__main__":
     parser.add_argument(
         "--frame_length_in_sec", help="frame_length_in_sec ", type=float, default=0.01,
     )
+    parser.add_argument(
+        "--in_memory",
+        help="Whether to evaluate the thresholds in memory instead of writing segment tables to disk",
+        action='store_true',
+    )
+    parser.add_argument(
+        "--num_workers", help="number of processes for multiprocessing", type=int, default=20,
+    )
     args = parser.parse_args()
 
     params = {}
@@ -127,7 +138,8 @@ if __name__ == "__main__":
             "Theshold input is invalid! Please enter it as a 'START,STOP,STEP' for onset, offset, min_duration_on and min_duration_off, and enter True/False for filter_speech_first"
         )
 
-    best_threhsold, optimal_scores = vad_tune_threshold_on_dev(
+    tune_func = vad_tune_threshold_on_dev_in_memory if args.in_memory else vad_tune_threshold_on_dev
+    best_threhsold, optimal_scores = tune_func(
         params,
         args.vad_pred,
         args.groundtruth_RTTM,
@@ -135,6 +147,7 @@ if __name__ == "__main__":
         args.vad_pred_method,
         args.focus_metric,
         args.frame_length_in_sec,
+        args.num_workers,
     )
     logging.info(
         f"Best combination of thresholds for binarization selected from input ranges is {best_threhsold}, and the optimal score is {optimal_scores}"
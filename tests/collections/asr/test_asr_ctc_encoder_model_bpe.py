@@ -302,6 +302,11 @@ class TestEncDecCTCModel:
             'bucketing_batch_size',
             'bucketing_strategy',
             'bucketing_weights',
+            'bucketing_batch_duration',
+            'bucketing_duration_bins',
+            'bucketing_num_buckets',
+            'bucketing_batch_tokens',
+            'bucketing_buffer_size',
             'channel_selector',
         ]
 
@@ -338,7 +343,15 @@ class TestEncDecCTCModel:
             'bucketing_batch_size',
             'bucketing_strategy',
             'bucketing_weights',
+            'bucketing_batch_duration',
+            'bucketing_duration_bins',
+            'bucketing_num_buckets',
+            'bucketing_batch_tokens',
+            'bucketing_buffer_size',
             'max_utts',
+            'tokenization_num_workers',
+            'tokenization_cache_dir',
+            'resample_backend',
         ]
 
         REMAP_ARGS = {
@@ -13,7 +13,9 @@
 # limitations under the License.
 import copy
 
+import numpy as np
 import pytest
+import soundfile as sf
 import torch
 from omegaconf import DictConfig, OmegaConf, open_dict
 
@@ -21,6 +23,8 @@ import nemo.collections.asr as nemo_asr
 from nemo.collections.asr.data import audio_to_text
 from nemo.collections.asr.metrics.wer import CTCDecoding, CTCDecodingConfig
 from nemo.collections.asr.models import EncDecCTCModel, configs
+from nemo.collections.asr.parts.mixins.transcription import make_duration_batches, pad_audio_batch
+from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 from nemo.utils.config_utils import assert_dataclass_signature_match, update_model_config
 
 
@@ -131,6 +135,71 @@ class TestEncDecCTCModel:
         diff = torch.max(torch.abs(logprobs_instance - logprobs_batch))
         assert diff <= 1e-6
 
+    @pytest.mark.unit
+    def test_transcribe_audio(self, asr_model, tmp_path):
+        sample_rate = asr_model.preprocessor._sample_rate
+        signals = [np.random.uniform(-0.5, 0.5, size=int(sample_rate * duration)) for duration in [0.5, 1.3, 0.8]]
+        audio_files = []
+        for idx, signal in enumerate(signals):
+            audio_files.append(str(tmp_path / f'audio_{idx}.wav'))
+            sf.write(audio_files[-1], signal, sample_rate, 'float')
+
+        asr_model.train()
+        transcripts = asr_model.transcribe(audio_files, batch_size=4)
+        assert asr_model.training
+
+        # paths, in-memory samples and encoded audio from a generator
+        samples = [sf.read(audio_file, dtype='float32')[0] for audio_file in audio_files]
+        with open(audio_files[2], 'rb') as f:
+            inputs = (item for item in [audio_files[0], samples[1], f.read()])
+        assert list(asr_model.transcribe_audio(inputs, batch_size=4)) == transcripts
+        assert asr_model.training
+
+        # batches limited by duration produce one result per input in order
+        hypotheses = list(asr_model.transcribe_audio(samples, max_batch_duration=1.5, return_hypotheses=True))
+        assert len(hypotheses) == len(samples)
+        assert all(isinstance(hyp, Hypothesis) for hyp in hypotheses)
+
+        # the model is set up for inference only while a batch is decoded, not while results are consumed
+        dither_value = asr_model.preprocessor.featurizer.dither
+        for _ in asr_model.transcribe_audio(samples, batch_size=1):
+            assert asr_model.training
+            assert asr_model.preprocessor.featurizer.dither == dither_value
+
+    @pytest.mark.unit
+    def test_pad_audio_batch(self):
+        batch, lengths = pad_audio_batch([np.ones(3, dtype=np.float32), np.ones(5, dtype=np.float32)])
+        assert batch.shape == (2, 5)
+        assert lengths.tolist() == [3, 5]
+        assert torch.equal(batch[0, 3:], torch.zeros(2))
+
+        # multi-channel signals [num_samples, num_channels] are padded along time into [B, C, T]
+        batch, lengths = pad_audio_batch([np.ones((3, 2)), np.ones((5, 2))])
+        assert batch.shape == (2, 2, 5)
+        assert lengths.tolist() == [3, 5]
+        assert torch.equal(batch[0, :, :3], torch.ones(2, 3))
+        assert torch.equal(batch[0, :, 3:], torch.zeros(2, 2))
+
+    @pytest.mark.unit
+    def test_transcribe_sorted_by_duration(self, asr_model, tmp_path):
+        sample_rate = asr_model.preprocessor._sample_rate
+        durations = [0.5, 2.0, 0.3, 1.2, 0.7, 0.4]
+        audio_files = []
+        for idx, duration in enumerate(durations):
+            audio_files.append(str(tmp_path / f'audio_{idx}.wav'))
+            sf.write(audio_files[-1], np.random.uniform(-0.5, 0.5, size=int(sample_rate * duration)), sample_rate)
+
+        batches = make_duration_batches(durations, max_batch_duration=1.5, max_batch_size=3)
+        assert batches == [[1], [3], [4, 0], [5, 2]]
+
+        # one file per batch, results are restored to the input order
+        transcripts = asr_model.transcribe(audio_files, batch_size=1)
+        assert asr_model.transcribe(audio_files, batch_size=3, max_batch_duration=0.1) == transcripts
+
+        logprobs = asr_model.transcribe(audio_files, batch_size=1, logprobs=True)
+        sorted_logprobs = asr_model.transcribe(audio_files, batch_size=3, logprobs=True, max_batch_duration=1.5)
+        assert [lp.shape for lp in sorted_logprobs] == [lp.shape for lp in logprobs]
+
     @pytest.mark.unit
     def test_vocab_change(self, asr_model):
         old_vocab = copy.deepcopy(asr_model.decoder.vocabulary)
@@ -272,6 +341,11 @@ class TestEncDecCTCModel:
             'bucketing_batch_size',
             'bucketing_strategy',
             'bucketing_weights',
+            'bucketing_batch_duration',
+            'bucketing_duration_bins',
+            'bucketing_num_buckets',
+            'bucketing_batch_tokens',
+            'bucketing_buffer_size',
             'channel_selector',
         ]
 
@@ -302,7 +376,15 @@ class TestEncDecCTCModel:
             'bucketing_batch_size',
             'bucketing_strategy',
             'bucketing_weights',
+            'bucketing_batch_duration',
+            'bucketing_duration_bins',
+            'bucketing_num_buckets',
+            'bucketing_batch_tokens',
+            'bucketing_buffer_size',
             'max_utts',
+            'tokenization_num_workers',
+            'tokenization_cache_dir',
+            'resample_backend',
         ]
 
         REMAP_ARGS = {
@@ -16,6 +16,7 @@ import filecmp
 import json
 import os
 import shutil
+import tarfile
 import tempfile
 from unittest import mock
 
@@ -36,6 +37,7 @@ from nemo.collections.asr.data.audio_to_audio import (
 )
 from nemo.collections.asr.data.audio_to_text import (
     DataStoreObject,
+    DurationBucketingBatchSampler,
     TarredAudioToBPEDataset,
     TarredAudioToCharDataset,
     cache_datastore_manifests,
@@ -51,6 +53,7 @@ from nemo.collections.asr.models.ctc_models import EncDecCTCModel
 from nemo.collections.asr.parts.utils.audio_utils import get_segment_start
 from nemo.collections.asr.parts.utils.manifest_utils import write_manifest
 from nemo.collections.common import tokenizers
+from nemo.core.optim.lr_scheduler import prepare_lr_scheduler
 from nemo.utils import logging
 
 try:
@@ -152,6 +155,164 @@ class TestASRDatasets:
 
         logging._logger.propagate = False
 
+    @pytest.mark.unit
+    def test_duration_bucketing_batch_sampler(self):
+        rng = np.random.RandomState(0)
+        durations = rng.uniform(0.5, 20.0, size=1000).tolist()
+        max_batch_duration = 60.0
+
+        sampler = DurationBucketingBatchSampler(durations, max_batch_duration=max_batch_duration, num_buckets=8)
+        batches = list(sampler)
+        assert len(batches) == len(sampler)
+        # every sample is used once and the padded duration of a batch is within the budget
+        assert sorted(idx for batch in batches for idx in batch) == list(range(len(durations)))
+        for batch in batches:
+            assert len(batch) * max(durations[idx] for idx in batch) <= max_batch_duration
+
+        # a new epoch shuffles samples, the same epoch gives the same batches
+        assert list(sampler) == batches
+        sampler.set_epoch(1)
+        assert list(sampler) != batches
+
+        # a DataLoader has one step per batch of the sampler
+        sampler.set_epoch(0)
+        dataloader = DataLoader(durations, batch_sampler=sampler, collate_fn=list)
+        assert len(dataloader) == sampler.num_batches_per_rank
+        assert list(dataloader) == [[durations[idx] for idx in batch] for batch in batches]
+
+        # fixed boundaries and a maximum batch size
+        sampler = DurationBucketingBatchSampler(
+            durations, max_batch_duration=max_batch_duration, bucket_boundaries=[5.0, 10.0], max_batch_size=8
+        )
+        assert sampler.bucket_batch_sizes == [8, 6, 3]
+
+        # ranks get disjoint batches and the same number of batches
+        world_size = 3
+        rank_batches = [
+            list(
+                DurationBucketingBatchSampler(
+                    durations, max_batch_duration=max_batch_duration, global_rank=rank, world_size=world_size
+                )
+            )
+            for rank in range(world_size)
+        ]
+        assert len(set(len(batches) for batches in rank_batches)) == 1
+        samples = [idx for batches in rank_batches for batch in batches for idx in batch]
+        assert set(samples) == set(range(len(durations)))
+
+        # the LR scheduler takes the number of steps of an epoch from the number of batches of a rank
+        sampler = DurationBucketingBatchSampler(
+            durations, max_batch_duration=max_batch_duration, global_rank=1, world_size=world_size
+        )
+        dataloader = DataLoader(durations, batch_sampler=sampler, collate_fn=list)
+        optimizer = torch.optim.SGD(torch.nn.Linear(1, 1).parameters(), lr=0.1)
+        scheduler_config = {
+            'name': 'CosineAnnealing',
+            't_max_epochs': 2,
+            't_accumulate_grad_batches': 1,
+            't_limit_train_batches': 1.0,
+            't_num_workers': world_size,
+        }
+        scheduler = prepare_lr_scheduler(optimizer, scheduler_config, train_dataloader=dataloader)['scheduler']
+        assert scheduler.max_steps == 2 * len(rank_batches[1])
+
+    @pytest.mark.unit
+    def test_tarred_dataset_dynamic_batching(self):
+        sample_rate = 16000
+        durations = [0.2 + 0.1 * idx for idx in range(12)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest_filepath = os.path.join(tmpdir, 'manifest.json')
+            tar_filepath = os.path.join(tmpdir, 'audio_0.tar')
+            with open(manifest_filepath, 'w') as f, tarfile.open(tar_filepath, 'w') as tar:
+                for idx, duration in enumerate(durations):
+                    audio_filepath = os.path.join(tmpdir, f'{idx}.wav')
+                    sf.write(audio_filepath, np.random.uniform(-0.1, 0.1, int(duration * sample_rate)), sample_rate)
+                    tar.add(audio_filepath, arcname=f'{idx}.wav')
+                    f.write(json.dumps({'audio_filepath': f'{idx}.wav', 'duration': duration, 'text': 'ab'}) + '\n')
+
+            config = {
+                'manifest_filepath': manifest_filepath,
+                'tarred_audio_filepaths': tar_filepath,
+                'sample_rate': sample_rate,
+                'labels': self.labels,
+                'batch_size': 1,
+                'shuffle': True,
+                'bucketing_batch_duration': 2.0,
+                'bucketing_buffer_size': 5,
+            }
+            dataset = audio_to_text_dataset.get_tarred_dataset(config, shuffle_n=0, global_rank=0, world_size=1)
+            # padding is counted, so buffers of 5, 5 and 2 samples are split into batches
+            # of sizes [4, 1], [2, 2, 1] and [1, 1]
+            assert len(dataset) == 7
+
+            dataloader = DataLoader(dataset, batch_size=1, collate_fn=dataset.collate_fn)
+            num_samples = 0
+            num_batches = 0
+            for audio, audio_len, _, _ in dataloader:
+                # padded duration is within the budget, unless a single sample is longer
+                assert audio.shape[0] == 1 or audio.numel() <= 2.0 * sample_rate
+                num_samples += audio.shape[0]
+                num_batches += 1
+            assert num_samples == len(durations)
+            assert num_batches == len(dataset)
+
+            # the order of batches only depends on the seed and the epoch
+            batch_lens = []
+            for _ in range(2):
+                dataset.set_epoch(1)
+                batch_lens.append([audio_len.tolist() for _, audio_len, _, _ in dataloader])
+            assert batch_lens[0] == batch_lens[1]
+
+            with pytest.raises(ValueError):
+                audio_to_text_dataset.get_tarred_dataset(
+                    {**config, 'batch_size': 4}, shuffle_n=0, global_rank=0, world_size=1
+                )
+
+    @pytest.mark.unit
+    def test_tarred_dataset_dynamic_batching_epochs_with_workers(self):
+        sample_rate = 16000
+        num_shards = 2
+        durations = [0.1 + 0.05 * idx for idx in range(16)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest_filepath = os.path.join(tmpdir, 'manifest.json')
+            with open(manifest_filepath, 'w') as f:
+                for shard_idx in range(num_shards):
+                    with tarfile.open(os.path.join(tmpdir, f'audio_{shard_idx}.tar'), 'w') as tar:
+                        for idx in range(shard_idx, len(durations), num_shards):
+                            audio_filepath = os.path.join(tmpdir, f'{idx}.wav')
+                            audio = np.random.uniform(-0.1, 0.1, int(durations[idx] * sample_rate))
+                            sf.write(audio_filepath, audio, sample_rate)
+                            tar.add(audio_filepath, arcname=f'{idx}.wav')
+                            item = {'audio_filepath': f'{idx}.wav', 'duration': durations[idx], 'text': 'ab'}
+                            f.write(json.dumps(item) + '\n')
+
+            config = {
+                'manifest_filepath': manifest_filepath,
+                'tarred_audio_filepaths': os.path.join(tmpdir, 'audio_{0..1}.tar'),
+                'sample_rate': sample_rate,
+                'labels': self.labels,
+                'batch_size': 1,
+                'shuffle': True,
+                'bucketing_batch_duration': 0.8,
+                'bucketing_buffer_size': 8,
+            }
+            dataset = audio_to_text_dataset.get_tarred_dataset(config, shuffle_n=0, global_rank=0, world_size=1)
+            dataloader = DataLoader(dataset, batch_size=1, collate_fn=dataset.collate_fn, num_workers=2)
+
+            # the epoch is set in the main process, as ASR models do in on_train_epoch_start
+            epoch_batches = []
+            for epoch in [0, 1, 0]:
+                dataset.set_epoch(epoch)
+                epoch_batches.append([tuple(audio_len.tolist()) for _, audio_len, _, _ in dataloader])
+
+            # the same batches are yielded in every epoch, in an order which depends on the epoch
+            assert sorted(epoch_batches[0]) == sorted(epoch_batches[1])
+            assert sum(len(batch) for batch in epoch_batches[0]) == len(durations)
+            assert epoch_batches[0] != epoch_batches[1]
+            assert epoch_batches[0] == epoch_batches[2]
+
     @pytest.mark.with_downloads()
     @pytest.mark.unit
     def test_tarred_bpe_dataset(self, test_data_dir):
@@ -13,12 +13,14 @@
 # limitations under the License.
 import dataclasses
 import io
+import itertools
 import random
 import string
 from copy import deepcopy
 from typing import List
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pytest
 import torch
 
@@ -32,6 +34,13 @@ from nemo.collections.asr.metrics.wer import (
     word_error_rate_detail,
 )
 from nemo.collections.asr.metrics.wer_bpe import WERBPE, CTCBPEDecoding, CTCBPEDecodingConfig
+from nemo.collections.asr.parts.submodules.ctc_beam_decoding import (
+    BeamCTCInferConfig,
+    WordScorer,
+    ctc_prefix_beam_search,
+    ctc_prefix_beam_search_batch,
+)
+from nemo.collections.asr.parts.submodules.ctc_greedy_decoding import GreedyCTCInfer
 from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
 from nemo.collections.common.tokenizers import CharTokenizer
 from nemo.utils.config_utils import assert_dataclass_signature_match
@@ -414,6 +423,146 @@ class TestWordErrorRate:
         assert len(hyp.timestep) == 3
         assert hyp.alignments is not None
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize("with_lengths", [True, False])
+    def test_greedy_ctc_batch_matches_per_sample(self, with_lengths):
+        B, T, V = 4, 16, len(self.vocabulary) + 1
+        torch.manual_seed(0)
+        decoder_outputs = torch.randn(B, T, V, dtype=torch.float32).log_softmax(dim=-1)
+        decoder_lens = torch.tensor([T, 5, 0, 11], dtype=torch.long) if with_lengths else None
+
+        greedy = GreedyCTCInfer(
+            blank_id=V - 1, preserve_alignments=True, compute_timestamps=True, preserve_frame_confidence=True
+        )
+        hyps = greedy._greedy_decode_logprobs_batch(decoder_outputs, decoder_lens)
+
+        assert len(hyps) == B
+        for ind, hyp in enumerate(hyps):
+            ref = greedy._greedy_decode_logprobs(decoder_outputs[ind], decoder_lens[ind] if with_lengths else None)
+            assert hyp.y_sequence == ref.y_sequence
+            assert hyp.timestep == ref.timestep
+            assert torch.allclose(hyp.score, ref.score)
+            assert torch.equal(hyp.alignments[0], ref.alignments[0])
+            assert torch.equal(hyp.alignments[1], ref.alignments[1])
+            assert hyp.frame_confidence == pytest.approx(ref.frame_confidence)
+
+    @pytest.mark.unit
+    def test_beam_ctc_matches_exhaustive_search(self):
+        T, V = 4, 3
+        blank_id = V - 1
+        torch.manual_seed(0)
+        logprobs = torch.randn(T, V, dtype=torch.float32).log_softmax(dim=-1)
+
+        # sum the probabilities of all alignments of each collapsed label sequence
+        prefix_logprobs = {}
+        for alignment in itertools.product(range(V), repeat=T):
+            labels = tuple(
+                t for ind, t in enumerate(alignment) if t != blank_id and (ind == 0 or alignment[ind - 1] != t)
+            )
+            logp = sum(logprobs[ind, t].item() for ind, t in enumerate(alignment))
+            prefix_logprobs[labels] = np.logaddexp(prefix_logprobs.get(labels, -np.inf), logp)
+        best_labels = max(prefix_logprobs, key=prefix_logprobs.get)
+
+        topk_logprobs, topk_ids = logprobs.topk(V, dim=-1)
+        beams = ctc_prefix_beam_search(
+            topk_logprobs.numpy(), topk_ids.numpy(), blank_id, beam_size=V ** T, beam_prune_logp=-np.inf
+        )
+        assert tuple(beams[0][0]) == best_labels
+        assert beams[0][1] == pytest.approx(prefix_logprobs[best_labels], abs=1e-5)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_workers", [0, 2])
+    def test_beam_ctc_decoding_matches_greedy(self, num_workers):
+        B, T, V = 3, 16, len(self.vocabulary)
+        torch.manual_seed(0)
+        decoder_outputs = torch.randn(B, T, V + 1, dtype=torch.float32).log_softmax(dim=-1)
+        decoder_lens = torch.tensor([T, 9, 4], dtype=torch.long)
+
+        greedy = CTCDecoding(CTCDecodingConfig(), vocabulary=self.vocabulary)
+        greedy_text, _ = greedy.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)
+
+        # a beam of one over the best token of each frame is greedy decoding
+        decoding_cfg = CTCDecodingConfig(
+            strategy='beam', beam=BeamCTCInferConfig(beam_size=1, beam_prune_topk=1, num_workers=num_workers)
+        )
+        beam = CTCDecoding(decoding_cfg, vocabulary=self.vocabulary)
+        beam_text, _ = beam.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)
+
+        assert beam_text == greedy_text
+
+    @pytest.mark.unit
+    def test_beam_ctc_batch_and_scorer_match_kernel(self):
+        B, T, V = 3, 20, len(self.vocabulary) + 1
+        torch.manual_seed(0)
+        logprobs = torch.randn(B, T, V, dtype=torch.float32).log_softmax(dim=-1)
+        lengths = np.array([T, 13, 1])
+        topk_logprobs, topk_ids = logprobs.topk(4, dim=-1)
+        topk_logprobs, topk_ids = topk_logprobs.numpy(), topk_ids.numpy()
+
+        batch_beams = ctc_prefix_beam_search_batch(
+            topk_logprobs, topk_ids, lengths, V - 1, beam_size=8, beam_prune_logp=-10.0
+        )
+        # a scorer without a language model, word bonus and hotwords does not change the scores
+        scorer = WordScorer(self.vocabulary)
+        for ind, length in enumerate(lengths):
+            args = (topk_logprobs[ind, :length], topk_ids[ind, :length], V - 1, 8, -10.0)
+            beams = ctc_prefix_beam_search(*args)
+            scorer_beams = ctc_prefix_beam_search(*args, scorer=scorer)
+            assert [tokens for tokens, _ in batch_beams[ind]] == [tokens for tokens, _ in beams]
+            assert [tokens for tokens, _ in scorer_beams] == [tokens for tokens, _ in beams]
+            for (_, score), (_, batch_score), (_, scorer_score) in zip(beams, batch_beams[ind], scorer_beams):
+                assert batch_score == pytest.approx(score)
+                assert scorer_score == pytest.approx(score)
+
+    @pytest.mark.unit
+    def test_beam_ctc_decoding_hotwords_parallel(self):
+        B, T, V = 4, 16, len(self.vocabulary)
+        torch.manual_seed(0)
+        decoder_outputs = torch.randn(B, T, V + 1, dtype=torch.float32).log_softmax(dim=-1)
+        decoder_lens = torch.tensor([T, 9, 4, 12], dtype=torch.long)
+
+        texts = []
+        for num_workers in [0, 2]:
+            decoding_cfg = CTCDecodingConfig(
+                strategy='beam', beam=BeamCTCInferConfig(hotwords=['cot'], hotword_weight=2.0, num_workers=num_workers)
+            )
+            decoding = CTCDecoding(decoding_cfg, vocabulary=self.vocabulary)
+            # the pool of workers is reused by the next batch
+            texts.append([decoding.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)[0] for _ in range(2)])
+            decoding.decoding.close()
+        assert texts[0][0] == texts[0][1] == texts[1][0] == texts[1][1]
+
+    @pytest.mark.unit
+    def test_beam_ctc_decoding_lm_and_hotwords(self, tmp_path):
+        # emissions ambiguous between "cat" and "cot"
+        frames = [{'c': 0.0}, {'a': -0.6, 'o': -0.8}, {'t': 0.0}]
+        decoder_outputs = torch.full((1, len(frames), len(self.vocabulary) + 1), -20.0)
+        for ind, frame in enumerate(frames):
+            for char, logp in frame.items():
+                decoder_outputs[0, ind, self.vocabulary.index(char)] = logp
+        decoder_lens = torch.tensor([len(frames)], dtype=torch.long)
+
+        decoding_cfg = CTCDecodingConfig(strategy='beam', beam=BeamCTCInferConfig())
+        decoding = CTCDecoding(decoding_cfg, vocabulary=self.vocabulary)
+        assert decoding.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)[0] == ['cat']
+
+        decoding_cfg = CTCDecodingConfig(strategy='beam', beam=BeamCTCInferConfig(hotwords=['cot']))
+        decoding = CTCDecoding(decoding_cfg, vocabulary=self.vocabulary)
+        assert decoding.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)[0] == ['cot']
+
+        arpa_path = tmp_path / 'lm.arpa'
+        arpa_path.write_text(
+            "\\data\\\nngram 1=4\n\n\\1-grams:\n-1.0\t<s>\n-0.1\tcot\n-3.0\tcat\n-0.5\t</s>\n\n\\end\\\n"
+        )
+        decoding_cfg = CTCDecodingConfig(
+            strategy='beam_lm', beam=BeamCTCInferConfig(ngram_lm_model=str(arpa_path), ngram_lm_alpha=1.0)
+        )
+        decoding = CTCDecoding(decoding_cfg, vocabulary=self.vocabulary)
+        assert decoding.ctc_decoder_predictions_tensor(decoder_outputs, decoder_lens)[0] == ['cot']
+
+        with pytest.raises(ValueError):
+            CTCDecoding(CTCDecodingConfig(strategy='beam_lm', beam=BeamCTCInferConfig()), vocabulary=self.vocabulary)
+
     @pytest.mark.unit
     def test_char_decoding_labels(self):
         B, T, V = 1, 8, len(self.vocabulary)
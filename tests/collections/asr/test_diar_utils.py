@@ -12,16 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
 
 import numpy as np
 import pytest
+import soundfile as sf
 import torch
+from omegaconf import DictConfig, OmegaConf
 
+from nemo.collections.asr.models import ClusteringDiarizer, EncDecClassificationModel, EncDecSpeakerLabelModel
 from nemo.collections.asr.parts.utils.offline_clustering import (
     SpeakerClustering,
+    get_argmin_mat,
+    get_nearest_segment_index,
     get_scale_interpolated_embs,
     getCosAffinityMatrix,
+    getMultiScaleCosAffinityBlock,
+    getMultiScaleCosAffinityMatrix,
+    getNormalizedEmbeddings,
+    getScaleMinMax,
     split_input_data,
 )
 from nemo.collections.asr.parts.utils.online_clustering import (
@@ -33,7 +43,14 @@ from nemo.collections.asr.parts.utils.online_clustering import (
     run_reducer,
     stitch_cluster_labels,
 )
-from nemo.collections.asr.parts.utils.speaker_utils import get_subsegments
+from nemo.collections.asr.parts.utils.speaker_utils import (
+    get_speech_ranges,
+    get_subsegments,
+    get_subsegments_from_ranges,
+    perform_clustering,
+    segments_manifest_to_subsegments_manifest,
+    write_rttm2manifest,
+)
 
 MAX_SEED_COUNT = 2
 
@@ -250,6 +267,97 @@ class TestDiarizationUtilFunctions:
         # affinity_mat should not contain any nan element
         assert torch.any(torch.isnan(affinity_mat)) == False
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize("window, shift", [(1.5, 0.75), (0.5, 0.25)])
+    def test_subsegments_from_ranges_match_manifest(self, tmp_path, window, shift):
+        rttm_file = os.path.join(tmp_path, 'session.txt')
+        with open(rttm_file, 'w') as f:
+            f.write("0.3100 2.1300 speech\n2.2000 1.0000 speech\n5.0000 0.0300 speech\n9.5000 3.0000 speech\n")
+        AUDIO_RTTM_MAP = {
+            'session': {'audio_filepath': 'session.wav', 'rttm_filepath': rttm_file, 'offset': 0.0, 'duration': 11.0}
+        }
+        segments_manifest = write_rttm2manifest(AUDIO_RTTM_MAP, os.path.join(tmp_path, 'segments.json'))
+        subsegments_manifest = segments_manifest_to_subsegments_manifest(
+            segments_manifest, os.path.join(tmp_path, 'subsegments.json'), window=window, shift=shift
+        )
+        with open(subsegments_manifest, 'r') as f:
+            target = [(dic['offset'], dic['duration']) for dic in map(json.loads, f)]
+
+        vad_start_end_list_raw = [[0.31, 2.44], [2.2, 3.2], [5.0, 5.03], [9.5, 12.5]]
+        speech_ranges = get_speech_ranges(AUDIO_RTTM_MAP, 'session', vad_start_end_list_raw)
+        assert speech_ranges[-1][1] == 11.0
+        assert get_subsegments_from_ranges(speech_ranges, window=window, shift=shift) == target
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("export_script_module", [False, True])
+    def test_clustering_of_in_memory_ranges_in_parallel(self, tmp_path, monkeypatch, export_script_module):
+        # the scripted clustering module is saved to the working directory
+        monkeypatch.chdir(tmp_path)
+        torch.manual_seed(0)
+        ms_window, ms_shift = [1.5, 1.0, 0.5], [0.75, 0.5, 0.25]
+        spk_embs = generate_orthogonal_embs(2, 0.0, 192)
+        AUDIO_RTTM_MAP, embs_and_timestamps = {}, {}
+        for session_idx in range(3):
+            uniq_id = f'session{session_idx}'
+            # speaker 0 talks for 6 seconds and then speaker 1, the VAD segments are merged into one range
+            speech_start = 0.5 * session_idx
+            vad_start_end_list_raw = [[speech_start, speech_start + 6.0], [speech_start + 6.0, speech_start + 12.0]]
+            rttm_file = os.path.join(tmp_path, f'{uniq_id}.txt')
+            with open(rttm_file, 'w') as f:
+                f.write(''.join(f"{start:.4f} {end - start:.4f} speech\n" for start, end in vad_start_end_list_raw))
+            AUDIO_RTTM_MAP[uniq_id] = {'audio_filepath': f'{uniq_id}.wav', 'offset': 0.0, 'duration': 14.0}
+            session_map = {uniq_id: {**AUDIO_RTTM_MAP[uniq_id], 'rttm_filepath': rttm_file}}
+            segments_manifest = write_rttm2manifest(session_map, os.path.join(tmp_path, f'{uniq_id}_segments.json'))
+            speech_ranges = get_speech_ranges(session_map, uniq_id, vad_start_end_list_raw)
+
+            embs, timestamps, segment_counts = [], [], []
+            for window, shift in zip(ms_window, ms_shift):
+                subsegments_manifest = os.path.join(tmp_path, f'{uniq_id}_subsegments.json')
+                segments_manifest_to_subsegments_manifest(
+                    segments_manifest, subsegments_manifest, window=window, shift=shift
+                )
+                with open(subsegments_manifest, 'r') as f:
+                    target = [(dic['offset'], dic['duration']) for dic in map(json.loads, f)]
+                subsegments = get_subsegments_from_ranges(speech_ranges, window=window, shift=shift)
+                assert subsegments == target
+
+                for start, dur in subsegments:
+                    spk_idx = int(start + dur / 2 > speech_start + 6.0)
+                    embs.append(spk_embs[spk_idx] + 0.1 * torch.rand(192))
+                    timestamps.append([start, start + dur])
+                segment_counts.append(len(subsegments))
+
+            embs_and_timestamps[uniq_id] = {
+                'embeddings': torch.stack(embs),
+                'timestamps': torch.tensor(timestamps),
+                'multiscale_segment_counts': torch.tensor(segment_counts),
+                'multiscale_weights': torch.ones(1, len(ms_window)),
+            }
+
+        clustering_params = OmegaConf.create(
+            {
+                'oracle_num_speakers': False,
+                'max_num_speakers': 8,
+                'enhanced_count_thres': 80,
+                'max_rp_threshold': 0.25,
+                'sparse_search_volume': 30,
+                'maj_vote_spk_count': False,
+                'export_script_module': export_script_module,
+            }
+        )
+        _, serial_hypothesis = perform_clustering(
+            embs_and_timestamps, AUDIO_RTTM_MAP, None, clustering_params, num_workers=0
+        )
+        _, parallel_hypothesis = perform_clustering(
+            embs_and_timestamps, AUDIO_RTTM_MAP, None, clustering_params, num_workers=2
+        )
+        assert len(serial_hypothesis) == len(parallel_hypothesis) == len(AUDIO_RTTM_MAP)
+        for (uniq_id, serial), (parallel_uniq_id, parallel) in zip(serial_hypothesis, parallel_hypothesis):
+            assert uniq_id == parallel_uniq_id
+            assert len(serial.labels()) == 2
+            assert list(serial.itertracks(yield_label=True)) == list(parallel.itertracks(yield_label=True))
+
     @pytest.mark.unit
     @pytest.mark.parametrize("n_spks", [4, 5, 6])
     @pytest.mark.parametrize("target_speaker_index", [0, 1, 2])
@@ -410,6 +518,70 @@ class TestSpeakerClustering:
         assert Y_out.shape[0] == mc[-1]
         assert all(permuted_Y == gt)
 
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("n_spks", [2, 3])
+    @pytest.mark.parametrize("spk_dur", [20])
+    @pytest.mark.parametrize("block_size", [7, 2048])
+    def test_multiscale_affinity_block(self, n_spks, spk_dur, block_size):
+        em, ts, mc, mw, spk_ts, gt = generate_toy_data(n_spks=n_spks, spk_dur=spk_dur, perturb_sigma=0.1)
+        embeddings_in_scales, timestamps_in_scales = split_input_data(em, ts, mc)
+        dense_mat = getMultiScaleCosAffinityMatrix(mw, embeddings_in_scales, timestamps_in_scales)
+
+        session_scale_mapping_list = get_argmin_mat(timestamps_in_scales)
+        norm_embs_in_scales, base_to_scale_index, scale_min_max = [], [], []
+        for scale_idx in range(len(embeddings_in_scales)):
+            norm_emb = getNormalizedEmbeddings(embeddings_in_scales[scale_idx])
+            norm_embs_in_scales.append(norm_emb)
+            base_to_scale_index.append(torch.sort(session_scale_mapping_list[scale_idx])[0])
+            scale_min_max.append(getScaleMinMax(norm_emb, block_size))
+        index = torch.arange(dense_mat.shape[0])
+        block_mat = getMultiScaleCosAffinityBlock(
+            mw, norm_embs_in_scales, base_to_scale_index, scale_min_max, index[::3], index
+        )
+        assert torch.allclose(block_mat, dense_mat[::3], atol=1e-5)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("n_spks", [1, 2, 3])
+    @pytest.mark.parametrize("spk_dur", [20, 50])
+    def test_nearest_segment_index(self, n_spks, spk_dur):
+        em, ts, mc, mw, spk_ts, gt = generate_toy_data(n_spks=n_spks, spk_dur=spk_dur, perturb_sigma=0.1)
+        embeddings_in_scales, timestamps_in_scales = split_input_data(em, ts, mc)
+        argmin_mapping_list = get_argmin_mat(timestamps_in_scales)
+        nearest_mapping_list = get_nearest_segment_index(timestamps_in_scales)
+        for argmin_mapping, nearest_mapping in zip(argmin_mapping_list, nearest_mapping_list):
+            assert torch.equal(argmin_mapping, nearest_mapping)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("n_spks", [1, 2, 3])
+    @pytest.mark.parametrize("spk_dur", [20])
+    @pytest.mark.parametrize("block_size", [16, 2048])
+    def test_offline_speaker_clustering_scalable_cpu(self, n_spks, spk_dur, block_size):
+        em, ts, mc, mw, spk_ts, gt = generate_toy_data(n_spks=n_spks, spk_dur=spk_dur, perturb_sigma=0.1)
+        offline_speaker_clustering = SpeakerClustering(
+            maj_vote_spk_count=False, cuda=False, scalable_min_segments=1, affinity_block_size=block_size
+        )
+        Y_out = offline_speaker_clustering.forward_infer(
+            embeddings_in_scales=em,
+            timestamps_in_scales=ts,
+            multiscale_segment_counts=mc,
+            multiscale_weights=mw,
+            oracle_num_speakers=-1,
+            max_num_speakers=8,
+            enhanced_count_thres=40,
+            sparse_search_volume=10,
+            max_rp_threshold=0.15,
+            fixed_thres=-1.0,
+        )
+        permuted_Y = stitch_cluster_labels(Y_old=gt, Y_new=Y_out)
+
+        # mc[-1] is the number of base scale segments
+        assert len(set(permuted_Y.tolist())) == n_spks
+        assert Y_out.shape[0] == mc[-1]
+        assert all(permuted_Y == gt)
+
     @pytest.mark.run_only_on('GPU')
     @pytest.mark.unit
     @pytest.mark.parametrize("n_spks", [1, 2, 3, 4, 5, 6, 7])
@@ -592,3 +764,187 @@ class TestSpeakerClustering:
     @pytest.mark.parametrize("seed", [0])
     def test_online_speaker_clustering_cpu(self, n_spks, total_sec, buffer_size, sigma, seed):
         self.test_online_speaker_clustering(n_spks, total_sec, buffer_size, sigma, seed)
+
+
+@pytest.fixture(scope="module")
+def tiny_vad_model_path(tmp_path_factory):
+    torch.manual_seed(0)
+    preprocessor = {'cls': 'nemo.collections.asr.modules.AudioToMelSpectrogramPreprocessor', 'params': dict({})}
+    encoder = {
+        'cls': 'nemo.collections.asr.modules.ConvASREncoder',
+        'params': {
+            'feat_in': 64,
+            'activation': 'relu',
+            'conv_mask': True,
+            'jasper': [
+                {
+                    'filters': 16,
+                    'repeat': 1,
+                    'kernel': [1],
+                    'stride': [1],
+                    'dilation': [1],
+                    'dropout': 0.0,
+                    'residual': False,
+                    'separable': False,
+                }
+            ],
+        },
+    }
+    decoder = {
+        'cls': 'nemo.collections.asr.modules.ConvASRDecoderClassification',
+        'params': {'feat_in': 16, 'num_classes': 2},
+    }
+    model_config = DictConfig(
+        {
+            'preprocessor': DictConfig(preprocessor),
+            'encoder': DictConfig(encoder),
+            'decoder': DictConfig(decoder),
+            'labels': ['background', 'speech'],
+        }
+    )
+    model_path = str(tmp_path_factory.mktemp("vad") / "tiny_vad.nemo")
+    EncDecClassificationModel(cfg=model_config).save_to(model_path)
+    return model_path
+
+
+@pytest.fixture(scope="module")
+def tiny_speaker_model():
+    torch.manual_seed(0)
+    preprocessor = {'cls': 'nemo.collections.asr.modules.AudioToMelSpectrogramPreprocessor', 'params': dict({})}
+    encoder = {
+        'cls': 'nemo.collections.asr.modules.ConvASREncoder',
+        'params': {
+            'feat_in': 64,
+            'activation': 'relu',
+            'conv_mask': True,
+            'jasper': [
+                {
+                    'filters': 32,
+                    'repeat': 1,
+                    'kernel': [3],
+                    'stride': [1],
+                    'dilation': [1],
+                    'dropout': 0.0,
+                    'residual': False,
+                    'separable': False,
+                }
+            ],
+        },
+    }
+    decoder = {
+        'cls': 'nemo.collections.asr.modules.SpeakerDecoder',
+        'params': {'feat_in': 32, 'num_classes': 2, 'pool_mode': 'xvector', 'emb_sizes': [16]},
+    }
+    model_config = DictConfig(
+        {'preprocessor': DictConfig(preprocessor), 'encoder': DictConfig(encoder), 'decoder': DictConfig(decoder)}
+    )
+    return EncDecSpeakerLabelModel(cfg=model_config)
+
+
+def get_diarizer_config(manifest_filepath, out_dir, vad_model_path, in_memory_pipeline):
+    return OmegaConf.create(
+        {
+            'num_workers': 0,
+            'sample_rate': 16000,
+            'batch_size': 8,
+            'diarizer': {
+                'manifest_filepath': manifest_filepath,
+                'out_dir': out_dir,
+                'oracle_vad': vad_model_path is None,
+                'collar': 0.25,
+                'ignore_overlap': True,
+                'in_memory_pipeline': in_memory_pipeline,
+                'vad': {
+                    'model_path': vad_model_path,
+                    'external_vad_manifest': None,
+                    'parameters': {
+                        'window_length_in_sec': 0.15,
+                        'shift_length_in_sec': 0.01,
+                        'smoothing': 'median',
+                        'overlap': 0.5,
+                        'onset': 0.1,
+                        'offset': 0.1,
+                        'pad_onset': 0.1,
+                        'pad_offset': 0,
+                        'min_duration_on': 0,
+                        'min_duration_off': 0.2,
+                        'filter_speech_first': True,
+                    },
+                },
+                'speaker_embeddings': {
+                    'model_path': None,
+                    'parameters': {
+                        'window_length_in_sec': [1.5, 1.0, 0.5],
+                        'shift_length_in_sec': [0.75, 0.5, 0.25],
+                        'multiscale_weights': [1, 1, 1],
+                        'save_embeddings': False,
+                    },
+                },
+                'clustering': {
+                    'parameters': {
+                        'oracle_num_speakers': False,
+                        'max_num_speakers': 4,
+                        'enhanced_count_thres': 80,
+                        'max_rp_threshold': 0.25,
+                        'sparse_search_volume': 10,
+                        'maj_vote_spk_count': False,
+                    }
+                },
+            },
+        }
+    )
+
+
+class TestClusteringDiarizerInMemoryPipeline:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_vad_model", [False, True])
+    def test_in_memory_pipeline_matches_files(self, tmp_path, tiny_vad_model_path, tiny_speaker_model, use_vad_model):
+        sample_rate = 16000
+        np.random.seed(0)
+        # the speech of the last session is too short for any subsegment, so it has no embeddings with oracle VAD
+        session_rttm_segments = [[(0.2, 2.3), (2.6, 2.1)], [(0.5, 4.0)], [(1.0, 0.04)]]
+        manifest_filepath = os.path.join(tmp_path, 'manifest.json')
+        with open(manifest_filepath, 'w') as f:
+            for session_idx, segments in enumerate(session_rttm_segments):
+                uniq_id = f'session{session_idx}'
+                audio_filepath = os.path.join(tmp_path, f'{uniq_id}.wav')
+                # two alternating tones with noise, so that the subsegments get different embeddings
+                time = np.arange(5 * sample_rate) / sample_rate
+                tones = np.where(time % 2 < 1, np.sin(2 * np.pi * 220 * time), np.sin(2 * np.pi * 880 * time))
+                sf.write(audio_filepath, 0.5 * tones + 0.05 * np.random.randn(len(time)), sample_rate)
+                rttm_filepath = os.path.join(tmp_path, f'{uniq_id}.rttm')
+                with open(rttm_filepath, 'w') as rttm_f:
+                    for spk_idx, (start, dur) in enumerate(segments):
+                        rttm_f.write(f"SPEAKER {uniq_id} 1 {start:.3f} {dur:.3f} <NA> <NA> spk{spk_idx} <NA> <NA>\n")
+                entry = {
+                    'audio_filepath': audio_filepath,
+                    'offset': 0,
+                    'duration': None,
+                    'label': 'infer',
+                    'text': '-',
+                    'num_speakers': None,
+                    'rttm_filepath': rttm_filepath,
+                    'uem_filepath': None,
+                }
+                f.write(json.dumps(entry) + '\n')
+
+        vad_model_path = tiny_vad_model_path if use_vad_model else None
+        pred_rttms = {}
+        for in_memory_pipeline in [False, True]:
+            out_dir = os.path.join(tmp_path, f'out_in_memory_{in_memory_pipeline}')
+            cfg = get_diarizer_config(manifest_filepath, out_dir, vad_model_path, in_memory_pipeline)
+            diarizer = ClusteringDiarizer(cfg=cfg, speaker_model=tiny_speaker_model)
+            diarizer.diarize()
+
+            pred_rttms[in_memory_pipeline] = {}
+            for session_idx in range(len(session_rttm_segments)):
+                rttm_filepath = os.path.join(out_dir, 'pred_rttms', f'session{session_idx}.rttm')
+                with open(rttm_filepath, 'r') as f:
+                    pred_rttms[in_memory_pipeline][session_idx] = f.read()
+
+        assert pred_rttms[True] == pred_rttms[False]
+        assert pred_rttms[True][0] != ''
+        if not use_vad_model:
+            # sessions without embeddings get an empty RTTM file instead of failing the clustering
+            assert pred_rttms[True][2] == ''
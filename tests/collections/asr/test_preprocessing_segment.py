@@ -19,11 +19,12 @@ from typing import List, Type, Union
 
 import numpy as np
 import pytest
+import scipy.signal
 import soundfile as sf
 
 from nemo.collections.asr.parts.preprocessing.perturb import NoisePerturbation, SilencePerturbation
 from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
-from nemo.collections.asr.parts.utils.audio_utils import select_channels
+from nemo.collections.asr.parts.utils.audio_utils import RESAMPLE_BACKENDS, select_channels
 
 
 class TestAudioSegment:
@@ -201,3 +202,75 @@ class TestAudioSegment:
             _ = perturber.perturb(audio)
 
             assert len(audio._samples) == ori_audio_len + 2 * dur * self.sample_rate
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_channels", [1, 2])
+    @pytest.mark.parametrize("orig_sr", [8000, 44100])
+    @pytest.mark.parametrize("overlap_sec", [0.0, 0.25])
+    def test_iter_chunks(self, num_channels, orig_sr, overlap_sec):
+        """Test reading a signal in chunks matches resampling the whole signal
+        """
+        chunk_sec = 0.7
+        with tempfile.TemporaryDirectory() as test_dir:
+            # Prepare a wav file
+            audio_file = os.path.join(test_dir, 'audio.wav')
+            num_samples = orig_sr * self.signal_duration_sec
+            samples = np.random.rand(num_samples, num_channels) if num_channels > 1 else np.random.rand(num_samples)
+            sf.write(audio_file, samples, orig_sr, 'float')
+
+            golden = AudioSegment.from_file(audio_file)
+            golden_samples = scipy.signal.resample_poly(
+                golden.samples, self.sample_rate, orig_sr, axis=0, window=('kaiser', 5.0)
+            )
+
+            chunks = list(
+                AudioSegment.iter_chunks(
+                    audio_file, chunk_sec=chunk_sec, overlap_sec=overlap_sec, target_sr=self.sample_rate
+                )
+            )
+
+            chunk_len = int(chunk_sec * self.sample_rate)
+            hop_len = chunk_len - int(overlap_sec * self.sample_rate)
+            for n, chunk in enumerate(chunks):
+                assert chunk.sample_rate == self.sample_rate
+                assert chunk.num_channels == num_channels
+                if n < len(chunks) - 1:
+                    assert chunk.num_samples == chunk_len
+                golden_chunk = golden_samples[n * hop_len : n * hop_len + chunk_len]
+                assert chunk.num_samples == golden_chunk.shape[0]
+                assert np.max(np.abs(chunk.samples - golden_chunk)) < 1e-5
+            # all samples are covered
+            assert (len(chunks) - 1) * hop_len + chunks[-1].num_samples == golden_samples.shape[0]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_channels", [1, 2])
+    @pytest.mark.parametrize("resample_backend", RESAMPLE_BACKENDS)
+    def test_resample_backend(self, num_channels, resample_backend):
+        """Test resampling backends produce signals close to the librosa resampler
+        """
+        if resample_backend == 'torchaudio':
+            pytest.importorskip('torchaudio')
+
+        orig_sr = 22050
+        t = np.arange(orig_sr * self.signal_duration_sec) / orig_sr
+        samples = np.stack([np.sin(2 * np.pi * (440 + 100 * m) * t) for m in range(num_channels)], axis=-1)
+        samples = (samples[:, 0] if num_channels == 1 else samples).astype(np.float32)
+
+        golden = AudioSegment(samples, orig_sr, target_sr=self.sample_rate)
+        segment = AudioSegment(samples, orig_sr, target_sr=self.sample_rate, resample_backend=resample_backend)
+
+        assert segment.sample_rate == self.sample_rate
+        assert segment.samples.dtype == np.float32
+        assert segment.samples.shape == golden.samples.shape
+        # compare away from the edges, where the filters are different
+        margin = self.sample_rate // 10
+        assert np.allclose(segment.samples[margin:-margin], golden.samples[margin:-margin], atol=1e-2)
+
+        if resample_backend == 'polyphase':
+            golden_poly = scipy.signal.resample_poly(
+                samples, self.sample_rate, orig_sr, axis=0, window=('kaiser', 5.0)
+            )
+            assert np.max(np.abs(segment.samples - golden_poly)) < 1e-6
+
+        with pytest.raises(ValueError):
+            AudioSegment(samples, orig_sr, target_sr=self.sample_rate, resample_backend='unknown')
@@ -0,0 +1,66 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import editdistance
+import numpy as np
+import pytest
+
+from nemo.collections.asr.parts.utils.edit_distance_utils import (
+    DELETIONS,
+    INSERTIONS,
+    REF_LENGTH,
+    SUBSTITUTIONS,
+    edit_operations,
+)
+
+
+def _random_texts(num_texts, rng):
+    words = ['a', 'b', 'cat', 'dog', 'gpu', 'x']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(0, 8))) for _ in range(num_texts)]
+
+
+class TestEditOperations:
+    @pytest.mark.unit
+    def test_operations_breakdown(self):
+        ops = edit_operations(
+            ['cat', 'G P U', '', 'a b c', 'ducati motorcycle'], ['cot', 'GPU', 'a b', 'a c', 'motorcycle']
+        )
+        assert ops[:, SUBSTITUTIONS].tolist() == [1, 1, 0, 0, 0]
+        assert ops[:, INSERTIONS].tolist() == [0, 2, 0, 1, 1]
+        assert ops[:, DELETIONS].tolist() == [0, 0, 2, 0, 0]
+        assert ops[:, REF_LENGTH].tolist() == [1, 1, 2, 2, 1]
+
+        with pytest.raises(ValueError):
+            edit_operations(['a'], ['a', 'b'])
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_cer", [False, True])
+    def test_matches_editdistance(self, use_cer):
+        rng = random.Random(0)
+        hypotheses, references = _random_texts(500, rng), _random_texts(500, rng)
+
+        ops = edit_operations(hypotheses, references, use_cer=use_cer)
+        split = list if use_cer else str.split
+        expected = [editdistance.eval(split(h), split(r)) for h, r in zip(hypotheses, references)]
+        assert ops[:, :REF_LENGTH].sum(axis=1).tolist() == expected
+        assert ops[:, REF_LENGTH].tolist() == [len(split(r)) for r in references]
+        # the number of hypothesis tokens is consistent with the operations
+        hyp_lengths = ops[:, REF_LENGTH] - ops[:, DELETIONS] + ops[:, INSERTIONS]
+        assert hyp_lengths.tolist() == [len(split(h)) for h in hypotheses]
+
+        # chunks processed in parallel give the same result
+        parallel_ops = edit_operations(hypotheses, references, use_cer=use_cer, num_workers=2, chunk_size=64)
+        assert np.array_equal(parallel_ops, ops)
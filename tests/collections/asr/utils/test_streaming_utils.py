@@ -0,0 +1,216 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+from omegaconf import DictConfig
+
+from nemo.collections.asr.models import EncDecCTCModel
+from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
+from nemo.collections.asr.parts.utils.streaming_utils import (
+    CacheAwareStreamingAudioBuffer,
+    CacheAwareStreamingManager,
+)
+
+ATT_CONTEXT_SIZE = [6, 2]
+
+
+@pytest.fixture()
+def cache_aware_model():
+    torch.manual_seed(0)
+    preprocessor = {
+        '_target_': 'nemo.collections.asr.modules.AudioToMelSpectrogramPreprocessor',
+        'features': 80,
+        'normalize': 'per_feature',
+    }
+    encoder = {
+        '_target_': 'nemo.collections.asr.modules.ConformerEncoder',
+        'feat_in': 80,
+        'feat_out': -1,
+        'n_layers': 2,
+        'd_model': 64,
+        'subsampling': 'striding',
+        'subsampling_factor': 4,
+        'subsampling_conv_channels': 64,
+        'causal_downsampling': True,
+        'ff_expansion_factor': 2,
+        'self_attention_model': 'rel_pos',
+        'n_heads': 4,
+        'att_context_size': ATT_CONTEXT_SIZE,
+        'att_context_style': 'chunked_limited',
+        'conv_kernel_size': 7,
+        'conv_context_size': 'causal',
+        'dropout': 0.0,
+        'dropout_pre_encoder': 0.0,
+        'dropout_emb': 0.0,
+        'dropout_att': 0.0,
+    }
+    decoder = {
+        '_target_': 'nemo.collections.asr.modules.ConvASRDecoder',
+        'feat_in': 64,
+        'num_classes': 11,
+        'vocabulary': [' ', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j'],
+    }
+    model_config = DictConfig(
+        {'preprocessor': DictConfig(preprocessor), 'encoder': DictConfig(encoder), 'decoder': DictConfig(decoder)}
+    )
+    model = EncDecCTCModel(cfg=model_config)
+    model.eval()
+    return model
+
+
+def _get_text(transcription):
+    return transcription.text if isinstance(transcription, Hypothesis) else transcription
+
+
+def stream_alone(model, processed_signal):
+    """
+    Streams a single processed signal with CacheAwareStreamingAudioBuffer, returns its predictions and transcription.
+    """
+    streaming_buffer = CacheAwareStreamingAudioBuffer(model=model)
+    streaming_buffer.append_processed_signal(processed_signal)
+    cache_last_channel, cache_last_time = model.encoder.get_initial_cache_state(batch_size=1)
+
+    pred_out = None
+    for step_num, (chunk_audio, chunk_lengths) in enumerate(streaming_buffer):
+        with torch.no_grad():
+            (
+                pred_out,
+                transcribed_texts,
+                cache_last_channel,
+                cache_last_time,
+                best_hyp,
+            ) = model.conformer_stream_step(
+                processed_signal=chunk_audio,
+                processed_signal_length=chunk_lengths,
+                cache_last_channel=cache_last_channel,
+                cache_last_time=cache_last_time,
+                keep_all_outputs=streaming_buffer.is_buffer_empty(),
+                previous_pred_out=pred_out,
+                drop_extra_pre_encoded=0 if step_num == 0 else model.encoder.streaming_cfg.drop_extra_pre_encoded,
+                return_transcription=True,
+            )
+    return pred_out[0], _get_text(transcribed_texts[0])
+
+
+def stream_with_manager(manager, processed_signals, join_interval):
+    """
+    Streams the processed signals as live streams which join every join_interval steps and leave once finished.
+    Returns the predictions, transcriptions and slots of the streams along with the batches processed at each step.
+    """
+    streaming_cfg = manager.streaming_cfg
+    first_chunk_size = streaming_cfg.chunk_size[0]
+    shift_size = streaming_cfg.shift_size[1]
+
+    # records the state of the streams of each batch before the batch gets processed
+    batches = []
+    process_batch = manager._process_batch
+
+    def record_batch(chunks, first_step, cache_len, is_last):
+        streams = [manager.streams[stream_id] for stream_id, _, _ in chunks]
+        batches.append(
+            {
+                'step_num': step_num,
+                'key': (first_step, cache_len, chunks[0][1].size(-1), is_last),
+                'first_steps': [stream['step'] == 0 for stream in streams],
+                'cache_lens': [manager.cache_lengths[stream['slot']] for stream in streams],
+                'widths': [audio_chunk.size(-1) for _, audio_chunk, _ in chunks],
+                'capacity': manager.cache_last_channel.size(2),
+            }
+        )
+        return process_batch(chunks, first_step, cache_len, is_last)
+
+    manager._process_batch = record_batch
+
+    pred_outs = [None] * len(processed_signals)
+    transcriptions = [None] * len(processed_signals)
+    slots = [None] * len(processed_signals)
+    active_streams = {}
+    next_idx = 0
+    step_num = 0
+    while next_idx < len(processed_signals) or active_streams:
+        if next_idx < len(processed_signals) and manager.free_slots and step_num % join_interval == 0:
+            stream_id = manager.add_stream()
+            slots[next_idx] = manager.streams[stream_id]['slot']
+            active_streams[stream_id] = [next_idx, 0]
+            next_idx += 1
+
+        for stream_id, (idx, sent_len) in active_streams.items():
+            if sent_len >= processed_signals[idx].size(-1):
+                continue
+            new_sent_len = sent_len + (first_chunk_size if sent_len == 0 else shift_size)
+            manager.append_processed_signal(stream_id, processed_signals[idx][:, :, sent_len:new_sent_len])
+            active_streams[stream_id][1] = new_sent_len
+            if new_sent_len >= processed_signals[idx].size(-1):
+                manager.end_stream(stream_id)
+
+        manager.step()
+
+        for stream_id in list(active_streams.keys()):
+            if manager.is_stream_finished(stream_id):
+                idx = active_streams.pop(stream_id)[0]
+                pred_outs[idx] = manager.streams[stream_id]['previous_pred_out']
+                transcriptions[idx] = manager.remove_stream(stream_id)
+        step_num += 1
+
+    return pred_outs, transcriptions, slots, batches
+
+
+class TestCacheAwareStreamingManager:
+    @pytest.mark.unit
+    def test_staggered_streams_match_streaming_alone(self, cache_aware_model):
+        torch.manual_seed(1)
+        signal_lengths = [150, 97, 203, 64, 121]
+        processed_signals = [torch.randn(1, 80, signal_length) for signal_length in signal_lengths]
+
+        max_streams = 2
+        manager = CacheAwareStreamingManager(model=cache_aware_model, max_streams=max_streams)
+        assert manager.cache_last_channel.size(2) == 0
+
+        pred_outs, transcriptions, slots, batches = stream_with_manager(manager, processed_signals, join_interval=3)
+
+        # every stream has the same outputs as when it gets streamed alone
+        for processed_signal, pred_out, transcription in zip(processed_signals, pred_outs, transcriptions):
+            expected_pred_out, expected_transcription = stream_alone(cache_aware_model, processed_signal)
+            assert pred_out is not None
+            assert torch.equal(pred_out, expected_pred_out)
+            assert transcription == expected_transcription
+
+        # the slots of the streams which left are reused by the streams which joined later
+        assert sorted(set(slots)) == list(range(max_streams))
+        assert len(manager) == 0
+        assert sorted(manager.free_slots) == list(range(max_streams))
+
+        # the cache table grows on the left side until it holds the full cache of the attention layers
+        capacities = [batch['capacity'] for batch in batches]
+        assert capacities == sorted(capacities)
+        assert manager.cache_last_channel.size(2) == ATT_CONTEXT_SIZE[0]
+        # streams with shorter caches are processed while the table already holds longer caches
+        assert any(batch['key'][1] < batch['capacity'] for batch in batches)
+
+        # the streams of a batch share the kind of the step, the cache length and the width of the chunks
+        for batch in batches:
+            first_step, cache_len, width, _ = batch['key']
+            assert all(batch_first_step == first_step for batch_first_step in batch['first_steps'])
+            assert all(batch_cache_len == cache_len for batch_cache_len in batch['cache_lens'])
+            assert all(batch_width == width for batch_width in batch['widths'])
+            assert first_step == (cache_len == 0)
+        # streams in their steady state are batched together
+        assert any(len(batch['widths']) > 1 for batch in batches)
+        # streams at different stages get split into separate batches in the same step
+        keys_per_step = {}
+        for batch in batches:
+            keys_per_step.setdefault(batch['step_num'], []).append(batch['key'])
+        assert any(len(set(keys)) > 1 for keys in keys_per_step.values())
+        assert all(len(set(keys)) == len(keys) for keys in keys_per_step.values())
@@ -0,0 +1,199 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.asr.parts.utils.vad_utils import (
+    binarization,
+    generate_overlap_vad_seq_per_tensor,
+    get_intersection_duration,
+    get_union_intervals,
+    merge_overlap_segment,
+    vad_tune_threshold_on_dev,
+    vad_tune_threshold_on_dev_in_memory,
+)
+
+
+def overlap_vad_seq_per_frame(frame: torch.Tensor, per_args: dict, smoothing_method: str) -> torch.Tensor:
+    """
+    Reference frame by frame implementation of generate_overlap_vad_seq_per_tensor.
+    """
+    frame_len = per_args.get('frame_len', 0.01)
+    shift = int(per_args['shift_length_in_sec'] / frame_len)
+    seg = int((per_args['window_length_in_sec'] / frame_len + 1))
+    jump_on_frame = int(int(seg * (1 - per_args['overlap'])) / shift)
+    target_len = int(len(frame) * shift)
+
+    if smoothing_method == 'mean':
+        preds = torch.zeros(target_len)
+        pred_count = torch.zeros(target_len)
+        for i, og_pred in enumerate(frame):
+            if i % jump_on_frame != 0:
+                continue
+            start = i * shift
+            end = start + seg
+            preds[start:end] = preds[start:end] + og_pred
+            pred_count[start:end] = pred_count[start:end] + 1
+
+        preds = preds / pred_count
+        last_non_zero_pred = preds[pred_count != 0][-1]
+        preds[pred_count == 0] = last_non_zero_pred
+    else:
+        preds = [torch.empty(0) for _ in range(target_len)]
+        for i, og_pred in enumerate(frame):
+            if i % jump_on_frame != 0:
+                continue
+            start = i * shift
+            end = start + seg
+            for j in range(start, min(end, target_len)):
+                preds[j] = torch.cat((preds[j], og_pred.unsqueeze(0)), 0)
+
+        preds = torch.stack([torch.nanquantile(l, q=0.5) for l in preds])
+        nan_idx = torch.isnan(preds)
+        last_non_nan_pred = preds[~nan_idx][-1]
+        preds[nan_idx] = last_non_nan_pred
+    return preds
+
+
+def binarization_per_frame(sequence: torch.Tensor, per_args: dict) -> torch.Tensor:
+    """
+    Reference frame by frame implementation of binarization.
+    """
+    frame_length_in_sec = per_args.get('frame_length_in_sec', 0.01)
+    onset = per_args.get('onset', 0.5)
+    offset = per_args.get('offset', 0.5)
+    pad_onset = per_args.get('pad_onset', 0.0)
+    pad_offset = per_args.get('pad_offset', 0.0)
+
+    speech = False
+    start = 0.0
+    i = 0
+    speech_segments = torch.empty(0)
+    for i in range(0, len(sequence)):
+        if speech:
+            if sequence[i] < offset:
+                if i * frame_length_in_sec + pad_offset > max(0, start - pad_onset):
+                    new_seg = torch.tensor(
+                        [max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]
+                    ).unsqueeze(0)
+                    speech_segments = torch.cat((speech_segments, new_seg), 0)
+                start = i * frame_length_in_sec
+                speech = False
+        else:
+            if sequence[i] > onset:
+                start = i * frame_length_in_sec
+                speech = True
+
+    if speech:
+        new_seg = torch.tensor([max(0, start - pad_onset), i * frame_length_in_sec + pad_offset]).unsqueeze(0)
+        speech_segments = torch.cat((speech_segments, new_seg), 0)
+
+    return merge_overlap_segment(speech_segments)
+
+
+class TestVADPostProcessing:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("smoothing_method", ["mean", "median"])
+    @pytest.mark.parametrize(
+        "window_length_in_sec, shift_length_in_sec, overlap",
+        [(0.63, 0.01, 0.875), (0.63, 0.08, 0.5), (0.15, 0.01, 0.8), (0.5, 0.02, 0.0)],
+    )
+    def test_overlap_vad_seq_matches_per_frame(
+        self, smoothing_method, window_length_in_sec, shift_length_in_sec, overlap
+    ):
+        torch.manual_seed(0)
+        frame = torch.rand(997)
+        per_args = {
+            'overlap': overlap,
+            'window_length_in_sec': window_length_in_sec,
+            'shift_length_in_sec': shift_length_in_sec,
+        }
+
+        preds = generate_overlap_vad_seq_per_tensor(frame, per_args, smoothing_method)
+        ref_preds = overlap_vad_seq_per_frame(frame, per_args, smoothing_method)
+        assert preds.dtype == ref_preds.dtype
+        assert torch.equal(preds, ref_preds)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "onset, offset, pad_onset, pad_offset",
+        [(0.5, 0.5, 0.0, 0.0), (0.7, 0.3, 0.1, 0.05), (0.3, 0.7, 0.0, 0.0), (0.4, 0.6, 0.2, -0.05)],
+    )
+    def test_binarization_matches_per_frame(self, onset, offset, pad_onset, pad_offset):
+        torch.manual_seed(0)
+        # smooth random sequence, so that speech runs have various lengths
+        sequence = torch.nn.functional.avg_pool1d(torch.rand(1, 1, 3000), 9, stride=1, padding=4).squeeze()
+        per_args = {'onset': onset, 'offset': offset, 'pad_onset': pad_onset, 'pad_offset': pad_offset}
+
+        for seq in [sequence, sequence[:1], torch.ones(5), torch.zeros(5), torch.empty(0)]:
+            speech_segments = binarization(seq, per_args)
+            ref_speech_segments = binarization_per_frame(seq, per_args)
+            assert speech_segments.shape == ref_speech_segments.shape
+            assert torch.equal(speech_segments, ref_speech_segments)
+
+    @pytest.mark.unit
+    def test_union_and_intersection_of_intervals(self):
+        intervals = np.array([[3.0, 4.0], [0.0, 1.0], [0.5, 2.0], [2.0, 2.5], [5.0, 5.0]])
+        union = get_union_intervals(intervals)
+        assert np.array_equal(union, np.array([[0.0, 2.5], [3.0, 4.0]]))
+
+        other = get_union_intervals(np.array([[1.0, 3.5], [3.9, 6.0]]))
+        assert get_intersection_duration(union, other) == pytest.approx(1.5 + 0.5 + 0.1)
+        assert get_intersection_duration(union, np.zeros((0, 2))) == 0.0
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_workers", [0, 2])
+    def test_tune_threshold_in_memory_matches_tables(self, tmp_path, num_workers):
+        torch.manual_seed(0)
+        rng = np.random.RandomState(0)
+        vad_pred_dir = tmp_path / "vad_pred"
+        vad_pred_dir.mkdir()
+        rttm_dir = tmp_path / "rttm"
+        rttm_dir.mkdir()
+        for name in ["a", "b", "c"]:
+            sequence = torch.nn.functional.avg_pool1d(torch.rand(1, 1, 2000), 15, stride=1, padding=7).squeeze()
+            with open(vad_pred_dir / f"{name}.frame", "w") as f:
+                for pred in sequence:
+                    f.write(f"{pred:.4f}\n")
+            with open(rttm_dir / f"{name}.rttm", "w") as f:
+                for start in np.arange(0.5, 19.0, 3.0):
+                    f.write(f"SPEAKER {name} 1 {start:.3f} {rng.uniform(0.5, 2.5):.3f} <NA> <NA> speech <NA>\n")
+
+        params = {
+            'onset': [0.45, 0.5, 0.55],
+            'offset': [0.45, 0.5],
+            'min_duration_on': [0.0, 0.2],
+            'min_duration_off': [0.1],
+            'filter_speech_first': True,
+        }
+        best, scores = vad_tune_threshold_on_dev(
+            dict(params),
+            str(vad_pred_dir),
+            str(rttm_dir),
+            result_file=str(tmp_path / "res"),
+            num_workers=0,
+        )
+        best_in_memory, scores_in_memory = vad_tune_threshold_on_dev_in_memory(
+            dict(params),
+            str(vad_pred_dir),
+            str(rttm_dir),
+            result_file=str(tmp_path / "res_in_memory"),
+            num_workers=num_workers,
+        )
+
+        assert best_in_memory == best
+        for metric in scores:
+            assert scores_in_memory[metric] == pytest.approx(scores[metric], abs=1e-6)
@@ -0,0 +1,90 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from nemo.collections.common.parts.preprocessing import collections, parsers
+
+
+def _audio_text_args(texts):
+    num = len(texts)
+    return dict(
+        ids=list(range(num)),
+        audio_files=[f"/data/{i}.wav" for i in range(num)],
+        durations=[1.0] * num,
+        texts=texts,
+        offsets=[None] * num,
+        speakers=[None] * num,
+        orig_sampling_rates=[None] * num,
+        token_labels=[None] * (num - 1) + [[7, 7]],
+        langs=[None] * num,
+    )
+
+
+class TestAudioTextTokenization:
+    texts = ["hello world", "", "the cat", "abc", "ignored because of token labels"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("tokenization_num_workers", [0, 2])
+    def test_cached_tokenization(self, tmp_path, tokenization_num_workers):
+        parser = parsers.make_parser(labels=list(" abcdefghijklmnopqrstuvwxyz"), name="en")
+        ref = collections.AudioText(**_audio_text_args(self.texts), parser=parser)
+
+        cache_dir = str(tmp_path / "cache")
+        kwargs = dict(
+            parser=parser, tokenization_num_workers=tokenization_num_workers, tokenization_cache_dir=cache_dir
+        )
+        built = collections.AudioText(**_audio_text_args(self.texts), **kwargs)
+        assert len(os.listdir(cache_dir)) == 3
+        loaded = collections.AudioText(**_audio_text_args(self.texts), **kwargs)
+
+        assert list(built) == list(ref)
+        assert list(loaded) == list(ref)
+        assert loaded[-1].text_tokens == [7, 7]
+        # cached token ids stay memory-mapped until an entry is read
+        assert isinstance(built.data[0].text_tokens, np.memmap)
+        assert isinstance(loaded.data[0].text_tokens, np.memmap)
+        assert isinstance(loaded[0].text_tokens, list)
+
+        # a different parser does not reuse the cache
+        other_parser = parsers.make_parser(labels=list(" zyxwvutsrqponmlkjihgfedcba"), name="en")
+        other = collections.AudioText(
+            **_audio_text_args(self.texts), parser=other_parser, tokenization_cache_dir=cache_dir
+        )
+        assert len(os.listdir(cache_dir)) == 6
+        assert other[0].text_tokens != ref[0].text_tokens
+
+    @pytest.mark.unit
+    def test_duration_filtered_texts_are_not_tokenized(self, tmp_path):
+        parser = parsers.make_parser(labels=list(" abcdefghijklmnopqrstuvwxyz"), name="en")
+        parsed = []
+
+        def recording_parser(text):
+            parsed.append(text)
+            return parser(text)
+
+        args = _audio_text_args(self.texts)
+        args['durations'] = [1.0, 2.0, 0.5, 3.0, 1.0]
+        kwargs = dict(min_duration=0.8, max_duration=2.5)
+        ref = collections.AudioText(**args, parser=parser, **kwargs)
+        cached = collections.AudioText(
+            **args, parser=recording_parser, tokenization_cache_dir=str(tmp_path / "cache"), **kwargs
+        )
+
+        assert list(cached) == list(ref)
+        assert [entry.text_raw for entry in cached] == ["hello world", "", "ignored because of token labels"]
+        assert set(parsed) <= {"hello world", ""}
@@ -0,0 +1,113 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo.collections.common.parts.preprocessing import collections, parsers
+from nemo.collections.common.parts.preprocessing.compiled_manifest import (
+    CompiledManifest,
+    compile_manifest,
+    is_compiled_manifest,
+)
+
+
+@pytest.fixture()
+def manifest_file(tmp_path):
+    items = [
+        {"audio_filepath": "/data/a.wav", "duration": 1.5, "text": "hello world"},
+        {"audio_filepath": "/data/b.wav", "duration": 0.5, "text": "", "offset": 2.0, "speaker": 3},
+        {"audio_filepath": "/data/c.wav", "duration": 3.0, "text": "ça va", "orig_sample_rate": 8000, "lang": "fr"},
+        {"audio_filepath": "/data/d.wav", "duration": 2.0, "text": "abc", "token_labels": [1, 2]},
+    ]
+    path = str(tmp_path / "manifest.json")
+    with open(path, "w") as f:
+        for item in items:
+            f.write(json.dumps(item) + "\n")
+    return path
+
+
+class TestCompiledManifest:
+    @pytest.mark.unit
+    def test_compile_and_load(self, tmp_path, manifest_file):
+        output_path = str(tmp_path / "manifest.compiled")
+        assert compile_manifest(manifest_file, output_path) == 4
+        assert is_compiled_manifest(output_path)
+        assert not is_compiled_manifest(manifest_file)
+
+        compiled = CompiledManifest(output_path)
+        assert len(compiled) == 4
+        assert compiled[1]["offset"] == 2.0 and compiled[0]["offset"] is None
+        assert compiled[2]["orig_sr"] == 8000 and compiled[2]["text"] == "ça va"
+        assert compiled[1]["speaker"] == 3
+        assert np.array_equal(compiled.get_column("duration"), [1.5, 0.5, 3.0, 2.0])
+
+        # pickling re-opens memory maps instead of copying the data
+        restored = pickle.loads(pickle.dumps(compiled))
+        assert restored[3] == compiled[3]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("do_sort_by_duration", [False, True])
+    def test_compiled_collection_matches_json(self, tmp_path, manifest_file, do_sort_by_duration):
+        output_path = str(tmp_path / "manifest.compiled")
+        compile_manifest(manifest_file, output_path)
+
+        parser = parsers.make_parser(labels=list(" abcdefghijklmnopqrstuvwxyz"), name="en")
+        kwargs = dict(parser=parser, min_duration=1.0, max_duration=2.5, do_sort_by_duration=do_sort_by_duration)
+        ref = collections.ASRAudioText(manifest_file, **kwargs)
+        compiled = collections.CompiledASRAudioText(output_path, **kwargs)
+
+        assert len(compiled) == len(ref) == 2
+        assert [compiled[i] for i in range(len(compiled))] == list(ref)
+        assert np.array_equal(compiled.durations, [entry.duration for entry in ref])
+        assert np.array_equal(compiled.tokens_lengths, [len(entry.text_tokens) for entry in ref])
+        assert np.array_equal(compiled.tokens_lengths, ref.tokens_lengths)
+
+    @pytest.mark.unit
+    def test_compiled_collection_index_by_file_id(self, tmp_path, manifest_file):
+        output_path = str(tmp_path / "manifest.compiled")
+        compile_manifest(manifest_file, output_path)
+
+        compiled = collections.CompiledASRAudioText(
+            output_path, parser=parsers.make_parser([]), index_by_file_id=True, max_number=3
+        )
+        assert len(compiled) == 3
+        assert compiled.mapping == {"a": [0], "b": [1], "c": [2]}
+        assert os.path.basename(compiled[compiled.mapping["c"][0]].audio_file) == "c.wav"
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("max_number", [None, 2])
+    def test_compiled_collection_filters_unparseable_texts(self, tmp_path, manifest_file, max_number):
+        with open(manifest_file, "a") as f:
+            f.write(json.dumps({"audio_filepath": "/data/e.wav", "duration": 1.0, "text": "unparseable"}) + "\n")
+        output_path = str(tmp_path / "manifest.compiled")
+        compile_manifest(manifest_file, output_path)
+
+        char_parser = parsers.make_parser(labels=list(" abcdefghijklmnopqrstuvwxyz"), do_normalize=False)
+
+        def parser(text):
+            return None if text in ("unparseable", "hello world") else char_parser(text)
+
+        kwargs = dict(parser=parser, max_number=max_number)
+        ref = collections.ASRAudioText(manifest_file, **kwargs)
+        compiled = collections.CompiledASRAudioText(output_path, **kwargs)
+
+        assert len(compiled) == len(ref) == (max_number or 3)
+        assert [compiled[i] for i in range(len(compiled))] == list(ref)
+        assert "unparseable" not in [entry.text_raw for entry in compiled]
+        assert "hello world" not in [entry.text_raw for entry in compiled]
@@ -0,0 +1,53 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.nlp.data.language_modeling.megatron.gpt_dataset import _create_ltor_masks_and_position_ids
+from nemo.collections.nlp.modules.common.megatron.utils import (
+    get_attention_mask_from_segment_ids,
+    get_ltor_masks_and_position_ids,
+)
+
+
+class TestGPTDatasetMasks:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("reset_position_ids", [False, True])
+    @pytest.mark.parametrize("reset_attention_mask", [False, True])
+    @pytest.mark.parametrize("eod_mask_loss", [False, True])
+    def test_masks_match_batched_reference(self, reset_position_ids, reset_attention_mask, eod_mask_loss):
+        eod = 0
+        torch.manual_seed(0)
+        tokens = torch.randint(1, 10, (32,))
+        # documents of different lengths, including an EOD token at the first and the last position
+        tokens[[0, 5, 6, 17, 31]] = eod
+
+        ref_attention_mask, ref_loss_mask, ref_position_ids = get_ltor_masks_and_position_ids(
+            tokens.unsqueeze(0), eod, reset_position_ids, reset_attention_mask, eod_mask_loss
+        )
+        attention_mask, loss_mask, position_ids = _create_ltor_masks_and_position_ids(
+            tokens, eod, reset_position_ids, reset_attention_mask, eod_mask_loss
+        )
+        assert torch.equal(attention_mask, ref_attention_mask[0])
+        assert torch.equal(loss_mask, ref_loss_mask[0])
+        assert torch.equal(position_ids, ref_position_ids[0])
+
+        # the compact representation gives the same mask when it is expanded
+        segment_ids, loss_mask, position_ids = _create_ltor_masks_and_position_ids(
+            tokens, eod, reset_position_ids, reset_attention_mask, eod_mask_loss, compact_attention_mask=True
+        )
+        assert segment_ids.shape == tokens.shape
+        assert torch.equal(get_attention_mask_from_segment_ids(segment_ids.unsqueeze(0)), ref_attention_mask)
+        assert torch.equal(position_ids, ref_position_ids[0])
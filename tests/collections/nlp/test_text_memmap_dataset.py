@@ -0,0 +1,91 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.data.language_modeling.text_memmap_dataset import (
+    TextMemMapDataset,
+    _build_index_from_memdata,
+    _build_index_from_memdata_chunked,
+    build_index_files,
+)
+
+
+class TestTextMemMapIndex:
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"\n",
+            b"a",
+            b"abc\n",
+            b"abc\n\n",
+            b"abc\n\n\n\n\n\n\n\n\n",
+            b"abc\nx",
+            b"\n\n\n",
+            b"a\nb\n\nc\n\n",
+            b"a\n" * 100,
+        ],
+    )
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+    def test_chunked_index_matches_legacy(self, tmp_path, data, chunk_size):
+        fn = str(tmp_path / "data.txt")
+        with open(fn, "wb") as f:
+            f.write(data)
+
+        ref_midx = _build_index_from_memdata(fn, 10)
+        midx = _build_index_from_memdata_chunked(fn, 10, chunk_size=chunk_size)
+
+        assert midx.dtype == np.uint32
+        assert np.array_equal(np.asarray(midx), ref_midx)
+        # only the final index file is left behind
+        assert sorted(os.listdir(tmp_path)) == ["data.txt", "data.txt.idx.npy"]
+
+    @pytest.mark.unit
+    def test_build_index_files(self, tmp_path):
+        fn = str(tmp_path / "data.jsonl")
+        with open(fn, "w") as f:
+            f.write('{"text": "a"}\n{"text": "bb"}\n\n')
+
+        build_index_files([fn], newline_int=10, workers=1)
+
+        midx = np.load(fn + ".idx.npy")
+        assert np.array_equal(midx, _build_index_from_memdata(fn, 10))
+        assert os.path.exists(fn + ".idx.info")
+
+
+class TestTextMemMapDataset:
+    @pytest.mark.unit
+    def test_get_batch_matches_getitem(self, tmp_path):
+        dataset_paths = []
+        for k, data in enumerate(["h\na\nbb\nccc\n", "h\nxx\ny", "h\nq\n\n\n"]):
+            fn = str(tmp_path / f"{k}.txt")
+            with open(fn, "w") as f:
+                f.write(data)
+            dataset_paths.append(fn)
+
+        ds = TextMemMapDataset(dataset_paths, header_lines=1, workers=1)
+        samples = [ds[i] for i in range(len(ds))]
+        assert samples == ["a", "bb", "ccc", "xx", "y", "q"]
+
+        indices = [5, 0, 3, 3, 2, 4, 1]
+        assert ds.get_batch(indices) == [samples[i] for i in indices]
+        assert ds.__getitems__(np.array(indices)) == [samples[i] for i in indices]
+        assert ds.get_batch([]) == []
+
+        with pytest.raises(IndexError):
+            ds.get_batch([0, len(ds)])
@@ -0,0 +1,70 @@
+# Copyright (c) 2022, NVIDIA CORPORATION & AFFILIATES.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import librosa
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.tts.data.pitch_extraction import PitchStatsAccumulator, yin
+
+
+def _harmonic_signal(f0, sample_rate):
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    return (0.5 * np.sin(phase) + 0.3 * np.sin(2 * phase) + 0.2 * np.sin(3 * phase)).astype(np.float32)
+
+
+class TestPitchExtraction:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_yin(self):
+        sample_rate, hop_length = 22050, 256
+        times = np.arange(2 * sample_rate) / sample_rate
+        f0_ref = 150 + 50 * np.sin(2 * np.pi * 0.5 * times)
+        audio = _harmonic_signal(f0_ref, sample_rate)
+        silence = slice(sample_rate // 2, sample_rate)
+        audio[silence] = 0.0
+
+        f0, voiced_mask, voiced_prob = yin(audio, sample_rate, fmin=65.0, fmax=2000.0, frame_length=1024)
+        pyin_f0, _, _ = librosa.pyin(audio, fmin=65.0, fmax=2000.0, frame_length=1024, sr=sample_rate, fill_na=0.0)
+
+        assert f0.shape == voiced_mask.shape == voiced_prob.shape == pyin_f0.shape
+        frame_times = np.arange(len(f0)) * hop_length / sample_rate
+        frame_f0_ref = np.interp(frame_times, times, f0_ref)
+        in_silence = (frame_times > 0.55) & (frame_times < 0.95)
+        assert not voiced_mask[in_silence].any()
+        assert np.all(f0[~voiced_mask] == 0.0)
+        assert voiced_mask[~in_silence].mean() > 0.9
+        relative_error = np.abs(f0[voiced_mask] - frame_f0_ref[voiced_mask]) / frame_f0_ref[voiced_mask]
+        assert np.median(relative_error) < 0.01
+
+        with pytest.raises(ValueError):
+            yin(audio, sample_rate, fmin=20.0, fmax=2000.0, frame_length=1024)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_pitch_stats_accumulator(self):
+        pitches = {"a": [np.array([0.0, 100.0, 120.0]), np.array([110.0, 0.0])], "b": [np.array([200.0, 220.0])]}
+        accumulator = PitchStatsAccumulator()
+        for speaker, speaker_pitches in pitches.items():
+            for pitch in speaker_pitches:
+                accumulator.update(pitch, speaker=speaker)
+        stats = accumulator.get_stats()
+
+        all_voiced = torch.tensor([100.0, 120.0, 110.0, 200.0, 220.0], dtype=torch.float64)
+        assert stats["default"]["pitch_mean"] == pytest.approx(all_voiced.mean().item())
+        assert stats["default"]["pitch_std"] == pytest.approx(all_voiced.std().item())
+        assert stats["a"]["pitch_mean"] == pytest.approx(110.0)
+        assert stats["a"]["pitch_std"] == pytest.approx(10.0)
+        assert stats["b"]["pitch_mean"] == pytest.approx(210.0)
@@ -0,0 +1,88 @@
+# Copyright (c) 2022, NVIDIA CORPORATION & AFFILIATES.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.tts.data.sup_data_store import SupDataStore, SupDataStoreWriter, get_store_name
+
+
+class TestSupDataStore:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_write_read(self, tmp_path):
+        path = tmp_path / "pitch"
+        values = {f"sample_{i}": np.random.rand(i + 1).astype(np.float32) for i in range(5)}
+        values["empty"] = np.zeros(0, dtype=np.float32)
+
+        with SupDataStoreWriter(path, dtype=np.float32) as writer:
+            for key, value in values.items():
+                writer.append(key, torch.from_numpy(value))
+            # nothing is visible before the writer is closed
+            assert not SupDataStore.exists(path)
+
+        assert SupDataStore.exists(path)
+        store = SupDataStore(path)
+        assert len(store) == len(values)
+        assert "missing" not in store
+        for key, value in values.items():
+            assert key in store
+            assert torch.equal(store[key], torch.from_numpy(value))
+
+        # the store can be sent to DataLoader workers
+        store = pickle.loads(pickle.dumps(store))
+        assert torch.equal(store["sample_3"], torch.from_numpy(values["sample_3"]))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_multidimensional_bool(self, tmp_path):
+        path = tmp_path / "voiced_mask"
+        masks = [np.random.rand(2, length) > 0.5 for length in (3, 7)]
+        with SupDataStoreWriter(path, dtype=np.bool_) as writer:
+            for i, mask in enumerate(masks):
+                writer.append(str(i), mask)
+            with pytest.raises(ValueError):
+                writer.append("wrong_ndim", np.zeros(3, dtype=np.bool_))
+
+        store = SupDataStore(path)
+        for i, mask in enumerate(masks):
+            assert store[str(i)].dtype == torch.bool
+            assert torch.equal(store[str(i)], torch.from_numpy(mask))
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_abort(self, tmp_path):
+        path = tmp_path / "energy"
+        with pytest.raises(RuntimeError):
+            with SupDataStoreWriter(path) as writer:
+                writer.append("sample", np.ones(3))
+                raise RuntimeError("failed")
+
+        assert not SupDataStore.exists(path)
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_store_name(self, tmp_path):
+        train_manifest = tmp_path / "train" / "manifest.json"
+        dev_manifest = tmp_path / "dev" / "manifest.json"
+
+        assert get_store_name(train_manifest).startswith("manifest_")
+        assert get_store_name(train_manifest) != get_store_name(dev_manifest)
+        # relative and absolute paths of a manifest share its stores
+        assert get_store_name(os.path.relpath(train_manifest)) == get_store_name(train_manifest)
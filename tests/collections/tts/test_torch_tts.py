@@ -21,8 +21,10 @@ import torch
 from nemo_text_processing.g2p.modules import EnglishG2p
 
 from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import EnglishPhonemesTokenizer
+from nemo.collections.tts.data.sup_data_store import SupDataStore, SupDataStoreWriter
 from nemo.collections.tts.torch.data import TTSDataset
 from nemo.collections.tts.torch.helpers import get_base_dir
+from nemo.collections.tts.torch.tts_data_types import Energy, Pitch
 
 
 class TestTTSDataset:
@@ -181,3 +183,88 @@ class TestTTSDataset:
                 z = torch.load(f"{sup_path}/{sup_data_types[2]}/{rel_audio_path_as_text_id}.pt")
                 assert not torch.equal(x, y)
                 assert not torch.equal(x, z)
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.parametrize("audio_length", [513, 1000, 1024, 1025, 22050, 22051])
+    def test_mel_length(self, test_data_dir, tmp_path, audio_length):
+        manifest_path = os.path.join(test_data_dir, 'tts/mini_ljspeech/manifest.json')
+        dataset = TTSDataset(
+            manifest_filepath=manifest_path,
+            sample_rate=22050,
+            sup_data_types=["pitch"],
+            sup_data_path=tmp_path / "sup_data",
+            n_fft=1024,
+            hop_length=256,
+            text_tokenizer=EnglishPhonemesTokenizer(
+                punct=True,
+                stresses=True,
+                chars=True,
+                space=' ',
+                apostrophe=True,
+                pad_with_space=True,
+                g2p=EnglishG2p(),
+            ),
+        )
+
+        # lengths which are not multiples of the hop length are included, the audio is longer than the stft padding
+        audio = torch.rand(1, audio_length) * 2 - 1
+        assert dataset.get_mel_length(audio_length) == dataset.get_log_mel(audio).shape[2]
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('CPU')
+    def test_precomputed_sup_data_store(self, test_data_dir, tmp_path):
+        manifest_path = os.path.join(test_data_dir, 'tts/mini_ljspeech/manifest.json')
+
+        def make_dataset():
+            return TTSDataset(
+                manifest_filepath=manifest_path,
+                sample_rate=22050,
+                sup_data_types=["pitch", "energy"],
+                sup_data_path=tmp_path / "sup_data",
+                text_tokenizer=EnglishPhonemesTokenizer(
+                    punct=True,
+                    stresses=True,
+                    chars=True,
+                    space=' ',
+                    apostrophe=True,
+                    pad_with_space=True,
+                    g2p=EnglishG2p(),
+                ),
+            )
+
+        dataset = make_dataset()
+        text_ids = [dataset._get_text_id(sample) for sample in dataset.data]
+        pitch_store_path = dataset._get_sup_data_store_path(Pitch, manifest_path)
+
+        # a stale store loaded in __init__ is replaced by the precomputed one
+        with SupDataStoreWriter(pitch_store_path) as writer:
+            writer.append(text_ids[0], torch.zeros(3))
+        dataset = make_dataset()
+        assert len(dataset.sup_data_stores[Pitch]) == 1
+
+        dataset.precompute_sup_data()
+        assert len(dataset.sup_data_stores[Pitch]) == 1
+        assert len(dataset.sup_data_stores[Energy]) == 1
+        pitch_store = SupDataStore(pitch_store_path)
+        energy_store = SupDataStore(dataset._get_sup_data_store_path(Energy, manifest_path))
+        assert len(pitch_store) == len(energy_store) == len(dataset)
+
+        for index, text_id in enumerate(text_ids):
+            item = dataset[index]
+            assert torch.equal(item[8], pitch_store[text_id].float())
+            assert torch.equal(item[10], energy_store[text_id].float())
+        # values are read from the stores, no .pt files are written
+        assert not list(dataset.pitch_folder.glob("*.pt"))
+        assert not list(dataset.energy_folder.glob("*.pt"))
+
+        # ids missing from a store are read from .pt files
+        with SupDataStoreWriter(pitch_store_path) as writer:
+            for text_id in text_ids[1:]:
+                writer.append(text_id, pitch_store[text_id])
+        pt_pitch = torch.rand(len(pitch_store[text_ids[0]]))
+        torch.save(pt_pitch, dataset.pitch_folder / f"{text_ids[0]}.pt")
+
+        dataset = make_dataset()
+        assert torch.equal(dataset[0][8], pt_pitch)
+        assert torch.equal(dataset[1][8], SupDataStore(pitch_store_path)[text_ids[1]].float())
@@ -0,0 +1,99 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from ..utils import CACHE_DIR, parse_test_case_file
+
+try:
+    from nemo_text_processing.text_normalization.normalize import LRUCache, Normalizer
+
+    PYNINI_AVAILABLE = True
+except (ImportError, ModuleNotFoundError):
+    PYNINI_AVAILABLE = False
+
+
+class TestNormalizationCache:
+    normalizer_en = (
+        Normalizer(input_case='cased', lang='en', cache_dir=CACHE_DIR, overwrite_cache=False, post_process=True)
+        if PYNINI_AVAILABLE
+        else None
+    )
+    cached_normalizer_en = (
+        Normalizer(
+            input_case='cased',
+            lang='en',
+            cache_dir=CACHE_DIR,
+            overwrite_cache=False,
+            post_process=True,
+            cache_size=1000,
+        )
+        if PYNINI_AVAILABLE
+        else None
+    )
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not PYNINI_AVAILABLE,
+        reason="`pynini` not installed, please install via nemo_text_processing/pynini_install.sh",
+    )
+    def test_lru_cache(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        assert cache.get("a") == "1"
+        cache.put("c", "3")
+        # "b" is the least recently used entry
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+        assert cache.info() == {"hits": 2, "misses": 1, "maxsize": 2, "currsize": 2}
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not PYNINI_AVAILABLE,
+        reason="`pynini` not installed, please install via nemo_text_processing/pynini_install.sh",
+    )
+    @pytest.mark.parametrize(
+        "test_input, expected", parse_test_case_file('en/data_text_normalization/test_cases_money.txt')
+    )
+    def test_cached_normalization_matches(self, test_input, expected):
+        pred = self.normalizer_en.normalize(test_input, verbose=False)
+        for _ in range(2):
+            cached_pred = self.cached_normalizer_en.normalize(test_input, verbose=False)
+            assert cached_pred == pred
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not PYNINI_AVAILABLE,
+        reason="`pynini` not installed, please install via nemo_text_processing/pynini_install.sh",
+    )
+    def test_cache_info(self):
+        normalizer = self.cached_normalizer_en
+        normalizer.clear_cache()
+        normalizer.normalize("It costs $5.")
+        info = normalizer.cache_info()
+        assert info["tagger"]["misses"] == 1 and info["tagger"]["hits"] == 0
+
+        normalizer.normalize("It costs $5.")
+        assert normalizer.cache_info()["tagger"]["hits"] == 1
+
+        # the money token is verbalized from the cache
+        verbalizer_hits = normalizer.cache_info()["verbalizer"]["hits"]
+        assert normalizer.normalize("He paid $5.") == self.normalizer_en.normalize("He paid $5.")
+        assert normalizer.cache_info()["verbalizer"]["hits"] > verbalizer_hits
+
+        assert self.normalizer_en.cache_info() == {"tagger": None, "verbalizer": None}
@@ -0,0 +1,80 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import pytest
+
+from ..utils import CACHE_DIR
+
+try:
+    from nemo_text_processing.text_normalization.normalize_streaming import normalize_file
+
+    PYNINI_AVAILABLE = True
+except (ImportError, ModuleNotFoundError):
+    PYNINI_AVAILABLE = False
+
+
+class TestNormalizeStreaming:
+    normalizer_kwargs = {"input_case": "cased", "lang": "en", "cache_dir": CACHE_DIR}
+    texts = ["It costs $5.", "I was born in 1998.", "", "He ran 10 km."] * 3
+    normalized_texts = [
+        "It costs five dollars.",
+        "I was born in nineteen ninety eight.",
+        "",
+        "He ran ten kilometers.",
+    ] * 3
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not PYNINI_AVAILABLE,
+        reason="`pynini` not installed, please install via nemo_text_processing/pynini_install.sh",
+    )
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_normalize_text_file(self, tmp_path, n_jobs):
+        input_file, output_file = tmp_path / "input.txt", tmp_path / "output.txt"
+        input_file.write_text("\n".join(self.texts) + "\n", encoding="utf-8")
+
+        normalize_file(str(input_file), str(output_file), self.normalizer_kwargs, n_jobs=n_jobs, chunk_size=5)
+
+        assert output_file.read_text(encoding="utf-8").splitlines() == self.normalized_texts
+        assert not os.path.exists(f"{output_file}.checkpoint.json")
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.skipif(
+        not PYNINI_AVAILABLE,
+        reason="`pynini` not installed, please install via nemo_text_processing/pynini_install.sh",
+    )
+    def test_resume_manifest(self, tmp_path):
+        input_file, output_file = tmp_path / "manifest.json", tmp_path / "output.json"
+        entries = [{"text": text, "duration": 1.0} for text in self.texts if text]
+        input_file.write_text("\n".join(json.dumps(entry) for entry in entries) + "\n", encoding="utf-8")
+
+        # an interrupted run wrote 2 entries and started to write the third one after its checkpoint
+        done = "".join(
+            json.dumps({**entry, "normalized_text": text}) + "\n"
+            for entry, text in zip(entries[:2], [t for t in self.normalized_texts if t])
+        )
+        output_file.write_text(done + '{"text": "It co', encoding="utf-8")
+        with open(f"{output_file}.checkpoint.json", "w") as f:
+            json.dump({"input_lines": 2, "output_bytes": len(done.encode("utf-8"))}, f)
+
+        normalize_file(str(input_file), str(output_file), self.normalizer_kwargs, text_field="text", chunk_size=3)
+
+        output_entries = [json.loads(line) for line in output_file.read_text(encoding="utf-8").splitlines()]
+        assert [entry["normalized_text"] for entry in output_entries] == [t for t in self.normalized_texts if t]
+        assert all(entry["duration"] == 1.0 for entry in output_entries)